@@ -1,6 +1,6 @@
-import urllib.parse
+from typing import Any, Literal
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Body, Depends, HTTPException, Query
 from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -8,13 +8,32 @@ from app.core.auth import get_current_teacher, get_current_user
 from app.core.database import get_db
 from app.core.security import SessionUser
 from app.models.teacher import Teacher
-from app.schemas.import_export import DatasetExcelExportRequest, ExportRequest
+from app.schemas.import_export import (
+    DatasetExcelExportRequest,
+    DatasetHtmlExportJobRequest,
+    DatasetPackageExportJobRequest,
+    ExportJobRequest,
+    ExportJobResponse,
+    ExportRequest,
+    HanziExportJobRequest,
+)
+from app.services.export_job_service import ExportJobService
 from app.services.export_service import ExportService
+from app.utils.streaming_export import ExportStream, build_attachment_headers
 
 
 router = APIRouter()
 
 
+def _stream_response(stream: ExportStream) -> StreamingResponse:
+    """导出内容边生成边发送（分块传输），数据库在响应发送过程中分批读取。"""
+    return StreamingResponse(
+        stream.chunks,
+        media_type=stream.media_type,
+        headers=build_attachment_headers(stream.file_name),
+    )
+
+
 @router.post("/hanzi")
 async def export_hanzi(
     req: ExportRequest,
@@ -34,7 +53,7 @@ async def export_hanzi(
     """
     service = ExportService(db)
     try:
-        result = await service.export_hanzi_to_excel(
+        stream = await service.export_hanzi_to_excel(
             fields=req.fields,
             character=req.character,
             pinyin=req.pinyin,
@@ -47,12 +66,13 @@ async def export_hanzi(
             variant=req.variant,
             search=req.search,
             current_user_id=current_user.id,
+            export_format=req.format,
         )
-        return result
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"导出失败：{str(e)}")
+    return _stream_response(stream)
 
 
 @router.post("/hanzi-datasets/{dataset_id}")
@@ -80,7 +100,7 @@ async def export_hanzi_dataset_excel(
     """导出数据集为 HTML 页面（图片通过 img 标签加载），可选附带 CSV，打包为 ZIP。"""
     service = ExportService(db)
     try:
-        buffer, filename = await service.export_dataset_html(
+        stream = await service.export_dataset_html(
             dataset_id=dataset_id,
             current_user_id=current_user.id,
             hanzi_ids=req.hanzi_ids,
@@ -89,54 +109,41 @@ async def export_hanzi_dataset_excel(
             stroke_pattern=req.stroke_pattern,
             format=req.format,
         )
-        encoded_filename = urllib.parse.quote(filename)
-        return StreamingResponse(
-            buffer,
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={
-                "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}"
-            },
-        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"导出失败：{str(e)}")
+    return _stream_response(stream)
 
 
 @router.get("/assignments")
 async def export_assignments(
     course_id: str | None = Query(None),
     status: str | None = Query(None),
+    format: Literal["xlsx", "csv"] = Query("xlsx"),
     current_teacher: Teacher = Depends(get_current_teacher),
     db: AsyncSession = Depends(get_db),
 ):
-    """导出作业列表 Excel"""
-    result = await ExportService(db).export_assignments(
-        teacher_id=current_teacher.id, course_id=course_id, status=status,
+    """导出作业列表 Excel/CSV"""
+    stream = await ExportService(db).export_assignments(
+        teacher_id=current_teacher.id, course_id=course_id, status=status, export_format=format,
     )
-    return FileResponse(
-        result["file_path"],
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        filename="assignments.xlsx"
-        )
+    return _stream_response(stream)
 
 
 @router.get("/students")
 async def export_students(
     course_id: str | None = Query(None),
     class_id: str | None = Query(None),
+    format: Literal["xlsx", "csv"] = Query("xlsx"),
     current_teacher: Teacher = Depends(get_current_teacher),
     db: AsyncSession = Depends(get_db),
 ):
-    """导出学生列表 Excel"""
-    result = await ExportService(db).export_students(
-        teacher_id=current_teacher.id, course_id=course_id, class_id=class_id,
+    """导出学生列表 Excel/CSV"""
+    stream = await ExportService(db).export_students(
+        teacher_id=current_teacher.id, course_id=course_id, class_id=class_id, export_format=format,
     )
-    return FileResponse(
-        result["file_path"],
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        filename="students.xlsx"
-        )
+    return _stream_response(stream)
 
 
 @router.get("/submissions")
@@ -144,15 +151,71 @@ async def export_submissions(
     assignment_id: str = Query(...),
     student_id: str | None = Query(None),
     status: str | None = Query(None),
+    format: Literal["xlsx", "csv"] = Query("xlsx"),
     current_teacher: Teacher = Depends(get_current_teacher),
     db: AsyncSession = Depends(get_db),
 ):
-    """导出提交记录 Excel"""
-    result = await ExportService(db).export_submissions(
-        assignment_id=assignment_id, student_id=student_id, status=status,
+    """导出提交记录 Excel/CSV"""
+    stream = await ExportService(db).export_submissions(
+        assignment_id=assignment_id, student_id=student_id, status=status, export_format=format,
     )
+    return _stream_response(stream)
+
+
+async def _build_job_params(req, current_user: SessionUser, db: AsyncSession) -> dict[str, Any]:
+    """把异步导出请求转换为对应导出方法的参数；教师类导出按当前教师限定范围。"""
+    if isinstance(req, HanziExportJobRequest):
+        params = req.model_dump(exclude={"kind", "format"})
+        return {**params, "current_user_id": current_user.id, "export_format": req.format}
+    if isinstance(req, DatasetPackageExportJobRequest):
+        return {"dataset_id": req.dataset_id, "current_user_id": current_user.id}
+    if isinstance(req, DatasetHtmlExportJobRequest):
+        return {**req.model_dump(exclude={"kind"}), "current_user_id": current_user.id}
+    teacher = await get_current_teacher(current_user, db)
+    params = req.model_dump(exclude={"kind", "format"})
+    return {**params, "teacher_id": teacher.id, "export_format": req.format}
+
+
+@router.post("/jobs", response_model=ExportJobResponse)
+async def create_export_job(
+    req: ExportJobRequest = Body(...),
+    current_user: SessionUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """提交异步导出任务；相同条件且数据未变化时复用已有任务与产物。"""
+    params = await _build_job_params(req, current_user, db)
+    try:
+        return await ExportJobService(db).create_job(req.kind, params, owner_user_id=current_user.id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/jobs/{job_id}", response_model=ExportJobResponse)
+async def get_export_job(
+    job_id: str,
+    current_user: SessionUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """查询异步导出任务进度。"""
+    job = await ExportJobService(db).get_job(job_id, owner_user_id=current_user.id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="导出任务不存在或已过期")
+    return job
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_export_job(
+    job_id: str,
+    current_user: SessionUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """下载异步导出产物，支持 Range 断点续传。"""
+    try:
+        path, result = await ExportJobService(db).resolve_artifact(job_id, owner_user_id=current_user.id)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     return FileResponse(
-        result["file_path"],
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        filename="submissions.xlsx"
-        )
+        path,
+        media_type=result["media_type"],
+        headers=build_attachment_headers(result["file_name"]),
+    )
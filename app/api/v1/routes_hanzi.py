@@ -1,5 +1,6 @@
 from typing import Optional
 from fastapi import APIRouter, Body, Depends, File, HTTPException, Query, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.auth import get_current_admin, get_current_user, get_current_teacher
 from app.core.database import get_db
@@ -122,7 +123,7 @@ async def get_strokes(character: str, db: AsyncSession = Depends(get_db)):
         None: 无返回值。
     """
     service = HanziService(db)
-    return service.get_strokes(character)
+    return await service.get_strokes(character)
 
 
 @router.get("/stroke-search", response_model=HanziListResponse)
@@ -132,6 +133,8 @@ async def stroke_search(
     limit: Optional[int] = Query(None, ge=1, le=1000),
     page: Optional[int] = Query(None, ge=1),
     size: Optional[int] = Query(None, ge=1, le=1000),
+    stroke_count: Optional[int] = Query(None, ge=1),
+    radical: Optional[str] = Query(None, min_length=1),
     current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -145,6 +148,8 @@ async def stroke_search(
         limit (Optional[int]): 单次查询的最大返回数量。
         page (Optional[int]): 当前页码。
         size (Optional[int]): 每页条数。
+        stroke_count (Optional[int]): 笔画数。
+        radical (Optional[str]): 部首。
         current_user (User): 当前登录用户对象。
         db (AsyncSession): 数据库会话，用于执行持久化操作。
 
@@ -160,6 +165,8 @@ async def stroke_search(
         current_user.id,
         page=pagination["page"],
         size=pagination["size"],
+        stroke_count=stroke_count,
+        radical=radical,
     )
 
 
@@ -196,6 +203,7 @@ async def list_dictionary_entries(
     stroke_count: Optional[int] = Query(None, ge=1),
     stroke_pattern: Optional[str] = Query(None, min_length=1),
     keyword: Optional[str] = Query(None),
+    radical: Optional[str] = Query(None),
     _current_user: User = Depends(get_current_user),
     db: AsyncSession = Depends(get_db),
 ):
@@ -213,6 +221,7 @@ async def list_dictionary_entries(
         stroke_count (Optional[int]): 数量值。
         stroke_pattern (Optional[str]): 字符串结果。
         keyword (Optional[str]): 字符串结果。
+        radical (Optional[str]): 部首，精确匹配。
         _current_user (User): User 类型的数据。
         db (AsyncSession): 数据库会话，用于执行持久化操作。
 
@@ -230,6 +239,7 @@ async def list_dictionary_entries(
         stroke_count=stroke_count,
         stroke_pattern=stroke_pattern,
         keyword=keyword,
+        radical=radical,
     )
 
 
@@ -438,6 +448,30 @@ async def ocr_prefill_hanzi_batch(
         raise HTTPException(status_code=400, detail=str(exc))
 
 
+@router.post("/ocr-prefill/batch/stream")
+async def ocr_prefill_hanzi_batch_stream(
+    files: list[UploadFile] = File(...),
+    _current_teacher: Teacher = Depends(get_current_teacher),
+    db: AsyncSession = Depends(get_db),
+):
+    """批量 OCR 预填（SSE）：每个文件识别完成即推送一条 item/error 事件，最后推送 done。"""
+    service = HanziService(db)
+    try:
+        # 响应开始前落盘：配置错误仍返回 400，且不依赖流式期间上传文件对象仍可读
+        uploads = await service.prepare_batch_prefill(files)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return StreamingResponse(
+        service.stream_batch_prefill(uploads),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
 @router.get("/{id}", response_model=HanziResponse)
 async def get_hanzi(
     id: str,
@@ -25,16 +25,22 @@ celery_app.conf.update(
     enable_utc=True,
 )
 
+celery_app.conf.beat_schedule = {
+    # 过期导出产物清理
+    "cleanup-export-artifacts": {
+        "task": "cleanup_export_artifacts",
+        "schedule": timedelta(minutes=settings.EXPORT_ARTIFACT_CLEANUP_INTERVAL_MINUTES),
+    },
+}
+
 # ImageX URL 定时刷新 Beat 调度（仅在配置启用时注册）
 if settings.URL_REFRESH_ENABLED:
     interval = settings.URL_REFRESH_INTERVAL_MINUTES
-    celery_app.conf.beat_schedule = {
-        "refresh-imagex-urls": {
-            "task": "refresh_imagex_urls",
-            "schedule": timedelta(minutes=interval),
-            # 过期时间略小于间隔，防止任务堆积
-            "options": {"expires": max(60, interval * 60 - 30)},
-        },
+    celery_app.conf.beat_schedule["refresh-imagex-urls"] = {
+        "task": "refresh_imagex_urls",
+        "schedule": timedelta(minutes=interval),
+        # 过期时间略小于间隔，防止任务堆积
+        "options": {"expires": max(60, interval * 60 - 30)},
     }
 
 # 自动发现 app.tasks 包，并通过其聚合导入完成任务注册。
@@ -27,6 +27,19 @@ DEFAULT_SEARCH_SYNC_CONFIG = {
     "SEARCH_SYNC_RABBITMQ_QUEUE": "canal.search.sync",
     "SEARCH_SYNC_RABBITMQ_PREFETCH": 50,
     "SEARCH_SYNC_CANAL_TABLES": "assignment,comment,hanzi,course,teaching_class,student,hanzi_dictionary,hanzi_dataset",
+    "SEARCH_REINDEX_BATCH_SIZE": 1000,
+    "SEARCH_SYNC_BATCH_SIZE": 500,
+    "SEARCH_SYNC_BATCH_MAX_WAIT_MS": 200,
+    "SEARCH_SYNC_MAX_ATTEMPTS": 8,
+    "SEARCH_PIT_KEEP_ALIVE": "2m",
+    "SEARCH_SUGGEST_CACHE_TTL": 30,
+}
+# 导出默认配置
+DEFAULT_EXPORT_CONFIG = {
+    "EXPORT_BATCH_SIZE": 1000,
+    "EXPORT_ARTIFACT_ROOT": "temp/export_artifacts",
+    "EXPORT_ARTIFACT_TTL": 86400,
+    "EXPORT_ARTIFACT_CLEANUP_INTERVAL_MINUTES": 30,
 }
 # AI 智能服务默认配置
 DEFAULT_AI_CONFIG = {
@@ -41,6 +54,30 @@ DEFAULT_VOLCENGINE_CONFIG = {
     "IMAGEX_EXPIRE": 600,
     "IMAGEX_TEMPLATE_ID": "tplv-psbet1y7ve-image",
 }
+# 百度 OCR 与识别流水线默认配置（并发按阶段限制，识别阶段再按供应商 QPS 令牌桶限速）
+DEFAULT_OCR_CONFIG = {
+    "BAIDU_OCR_BASE_URL": "https://aip.baidubce.com",
+    "IMAGEX_SCHEME": "https",
+    "OCR_UPLOAD_CONCURRENCY": 8,
+    "OCR_SIGN_CONCURRENCY": 8,
+    "OCR_RECOGNIZE_CONCURRENCY": 2,
+    "OCR_QPS": 2.0,
+    "OCR_MAX_ATTEMPTS": 3,
+    "OCR_RETRY_BACKOFF_SECONDS": 0.5,
+    "OCR_RETRY_BACKOFF_MAX_SECONDS": 8.0,
+    "OCR_HTTP_TIMEOUT": 30.0,
+    "OCR_HTTP_MAX_CONNECTIONS": 20,
+    "OCR_HTTP_KEEPALIVE_SECONDS": 30.0,
+    "OCR_IMAGEX_THREADS": 8,
+    "OCR_RESULT_CACHE_ENABLED": True,
+    "OCR_RESULT_CACHE_TTL": 7 * 24 * 3600,
+    "OCR_GRID_MAX_SIDE": 4096,
+    "OCR_GRID_MAX_CELLS": 64,
+    "OCR_GRID_MAX_PAYLOAD_BYTES": 4 * 1024 * 1024,
+    "OCR_GRID_MIN_CELL": 96,
+    "OCR_GRID_MAX_CELL": 320,
+    "OCR_GRID_CONCURRENCY": 4,
+}
 # JWT / 会话安全默认配置
 DEFAULT_SECURITY_CONFIG = {
     "SECRET_KEY": "change_me",
@@ -53,6 +90,11 @@ DEFAULT_URL_REFRESH_CONFIG = {
     "URL_REFRESH_INTERVAL_MINUTES": 5,
     "URL_REFRESH_BATCH_SIZE": 5000,
     "URL_REFRESH_DOMAINS": "veimagex",
+    "URL_REFRESH_CONCURRENCY": 8,
+    "URL_REFRESH_TIME_BUDGET_SECONDS": 240,
+    "URL_SIGN_ON_READ_ENABLED": True,
+    "SIGNED_URL_CACHE_TTL": 1500,
+    "SIGNED_URL_L1_MAX_ENTRIES": 10000,
 }
 
 
@@ -69,6 +111,8 @@ class Settings(BaseSettings):
     STROKES_FILE_PATH: str = "Strokes.txt"
     # 临时目录
     TEMP_DIR: str = "temp"
+    # 单次请求内附件并发上传到 ImageX 的上限（多图提交按最慢一张计时，而不是逐张相加）
+    ATTACHMENT_UPLOAD_CONCURRENCY: int = 6
 
     MACHINE_ID: int = 1
 
@@ -171,6 +215,23 @@ class Settings(BaseSettings):
     SEARCH_SYNC_RABBITMQ_PREFETCH: int = DEFAULT_SEARCH_SYNC_CONFIG["SEARCH_SYNC_RABBITMQ_PREFETCH"]
     SEARCH_SYNC_CANAL_SCHEMA: str | None = None
     SEARCH_SYNC_CANAL_TABLES: str = DEFAULT_SEARCH_SYNC_CONFIG["SEARCH_SYNC_CANAL_TABLES"]
+    # 重建索引时按主键分页读取的批大小，决定峰值内存
+    SEARCH_REINDEX_BATCH_SIZE: int = DEFAULT_SEARCH_SYNC_CONFIG["SEARCH_REINDEX_BATCH_SIZE"]
+    # CDC 微批：累计行数或等待时长任一达到即刷写一次 ES _bulk
+    SEARCH_SYNC_BATCH_SIZE: int = DEFAULT_SEARCH_SYNC_CONFIG["SEARCH_SYNC_BATCH_SIZE"]
+    SEARCH_SYNC_BATCH_MAX_WAIT_MS: int = DEFAULT_SEARCH_SYNC_CONFIG["SEARCH_SYNC_BATCH_MAX_WAIT_MS"]
+    # 单条消息最多投递次数，超过后 requeue=False 拒绝（队列配置了死信交换机时进入死信队列）
+    SEARCH_SYNC_MAX_ATTEMPTS: int = DEFAULT_SEARCH_SYNC_CONFIG["SEARCH_SYNC_MAX_ATTEMPTS"]
+    # 跨模块检索游标分页的 point-in-time 保活时长，翻页间隔超过该值游标失效
+    SEARCH_PIT_KEEP_ALIVE: str = DEFAULT_SEARCH_SYNC_CONFIG["SEARCH_PIT_KEEP_ALIVE"]
+    SEARCH_SUGGEST_CACHE_TTL: int = DEFAULT_SEARCH_SYNC_CONFIG["SEARCH_SUGGEST_CACHE_TTL"]
+
+    # 导出按主键分页读取的批大小，决定导出时的峰值内存
+    EXPORT_BATCH_SIZE: int = DEFAULT_EXPORT_CONFIG["EXPORT_BATCH_SIZE"]
+    # 异步导出产物目录（不在 /media 下，只能经鉴权接口下载）与保留时长（秒），过期由定时任务清理
+    EXPORT_ARTIFACT_ROOT: str = DEFAULT_EXPORT_CONFIG["EXPORT_ARTIFACT_ROOT"]
+    EXPORT_ARTIFACT_TTL: int = DEFAULT_EXPORT_CONFIG["EXPORT_ARTIFACT_TTL"]
+    EXPORT_ARTIFACT_CLEANUP_INTERVAL_MINUTES: int = DEFAULT_EXPORT_CONFIG["EXPORT_ARTIFACT_CLEANUP_INTERVAL_MINUTES"]
 
     # 智能识别 / AI 大模型（支持通用 OpenAI 兼容接口和火山方舟 Ark）
     AI_PROVIDER: str = DEFAULT_AI_CONFIG["AI_PROVIDER"]
@@ -202,10 +263,44 @@ class Settings(BaseSettings):
     URL_REFRESH_INTERVAL_MINUTES: int = DEFAULT_URL_REFRESH_CONFIG["URL_REFRESH_INTERVAL_MINUTES"]
     URL_REFRESH_BATCH_SIZE: int = DEFAULT_URL_REFRESH_CONFIG["URL_REFRESH_BATCH_SIZE"]
     URL_REFRESH_DOMAINS: str = DEFAULT_URL_REFRESH_CONFIG["URL_REFRESH_DOMAINS"]
+    URL_REFRESH_CONCURRENCY: int = DEFAULT_URL_REFRESH_CONFIG["URL_REFRESH_CONCURRENCY"]    # 并发签名线程数
+    # 单轮时间预算，需小于调度间隔（任务过期时间为间隔 - 30 秒），超出后记录断点留待下一轮
+    URL_REFRESH_TIME_BUDGET_SECONDS: int = DEFAULT_URL_REFRESH_CONFIG["URL_REFRESH_TIME_BUDGET_SECONDS"]
+    # 读时签名：响应序列化时按 uri 签名并缓存，开启后定时刷新跳过 signed_on_read 的表
+    URL_SIGN_ON_READ_ENABLED: bool = DEFAULT_URL_REFRESH_CONFIG["URL_SIGN_ON_READ_ENABLED"]
+    # 签名 URL 缓存时间，略短于签名实际有效期（约 30 分钟）
+    SIGNED_URL_CACHE_TTL: int = DEFAULT_URL_REFRESH_CONFIG["SIGNED_URL_CACHE_TTL"]
+    SIGNED_URL_L1_MAX_ENTRIES: int = DEFAULT_URL_REFRESH_CONFIG["SIGNED_URL_L1_MAX_ENTRIES"]
 
     # 百度ak/sk
     BAIDU_API_KEY: str | None = os.getenv("BAIDU_API_KEY")
     BAIDU_SECRET_KEY: str | None = os.getenv("BAIDU_SECRET_KEY")
+    # 服务地址可改写，便于指向本地模拟服务做联调与测试
+    BAIDU_OCR_BASE_URL: str = DEFAULT_OCR_CONFIG["BAIDU_OCR_BASE_URL"]
+    IMAGEX_SCHEME: str = DEFAULT_OCR_CONFIG["IMAGEX_SCHEME"]
+    # 识别流水线：上传/签名/识别三段各自的并发上限，识别阶段额外受 OCR_QPS 限速
+    OCR_UPLOAD_CONCURRENCY: int = DEFAULT_OCR_CONFIG["OCR_UPLOAD_CONCURRENCY"]
+    OCR_SIGN_CONCURRENCY: int = DEFAULT_OCR_CONFIG["OCR_SIGN_CONCURRENCY"]
+    OCR_RECOGNIZE_CONCURRENCY: int = DEFAULT_OCR_CONFIG["OCR_RECOGNIZE_CONCURRENCY"]
+    OCR_QPS: float = DEFAULT_OCR_CONFIG["OCR_QPS"]
+    OCR_MAX_ATTEMPTS: int = DEFAULT_OCR_CONFIG["OCR_MAX_ATTEMPTS"]
+    OCR_RETRY_BACKOFF_SECONDS: float = DEFAULT_OCR_CONFIG["OCR_RETRY_BACKOFF_SECONDS"]
+    OCR_RETRY_BACKOFF_MAX_SECONDS: float = DEFAULT_OCR_CONFIG["OCR_RETRY_BACKOFF_MAX_SECONDS"]
+    # 百度 OCR 进程级连接池；ImageX SDK 为同步实现，在独立的小线程池中执行，不占用请求线程池
+    OCR_HTTP_TIMEOUT: float = DEFAULT_OCR_CONFIG["OCR_HTTP_TIMEOUT"]
+    OCR_HTTP_MAX_CONNECTIONS: int = DEFAULT_OCR_CONFIG["OCR_HTTP_MAX_CONNECTIONS"]
+    OCR_HTTP_KEEPALIVE_SECONDS: float = DEFAULT_OCR_CONFIG["OCR_HTTP_KEEPALIVE_SECONDS"]
+    OCR_IMAGEX_THREADS: int = DEFAULT_OCR_CONFIG["OCR_IMAGEX_THREADS"]
+    # 识别结果按规范化图片内容缓存：Redis 热层按 TTL 过期，数据库冷层长期保留
+    OCR_RESULT_CACHE_ENABLED: bool = DEFAULT_OCR_CONFIG["OCR_RESULT_CACHE_ENABLED"]
+    OCR_RESULT_CACHE_TTL: int = DEFAULT_OCR_CONFIG["OCR_RESULT_CACHE_TTL"]
+    # 网格合并识别：合并图最长边、单网格格子数与请求体（base64 后）上限，格子边长按图片尺寸在区间内自适应
+    OCR_GRID_MAX_SIDE: int = DEFAULT_OCR_CONFIG["OCR_GRID_MAX_SIDE"]
+    OCR_GRID_MAX_CELLS: int = DEFAULT_OCR_CONFIG["OCR_GRID_MAX_CELLS"]
+    OCR_GRID_MAX_PAYLOAD_BYTES: int = DEFAULT_OCR_CONFIG["OCR_GRID_MAX_PAYLOAD_BYTES"]
+    OCR_GRID_MIN_CELL: int = DEFAULT_OCR_CONFIG["OCR_GRID_MIN_CELL"]
+    OCR_GRID_MAX_CELL: int = DEFAULT_OCR_CONFIG["OCR_GRID_MAX_CELL"]
+    OCR_GRID_CONCURRENCY: int = DEFAULT_OCR_CONFIG["OCR_GRID_CONCURRENCY"]
 
     # 安全
     SECRET_KEY: str = DEFAULT_SECURITY_CONFIG["SECRET_KEY"]
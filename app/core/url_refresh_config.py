@@ -5,9 +5,11 @@ ImageX URL 刷新表级注册配置。
 - url_field: 存储签名 URL 的字段名
 - uri_field: 存储 veImageX URI 的字段名
 - enabled:  是否对该表启用刷新
+- signed_on_read: 该表的 URL 对外返回时按 uri 读时签名，开启 URL_SIGN_ON_READ_ENABLED 后定时刷新跳过该表
 """
 
 from app.models.attachment import Attachment
+from app.models.attachment_blob import AttachmentBlob
 from app.models.hanzi import Hanzi
 
 URL_REFRESH_TABLE_CONFIG: dict[type, dict[str, object]] = {
@@ -15,10 +17,19 @@ URL_REFRESH_TABLE_CONFIG: dict[type, dict[str, object]] = {
         "url_field": "file_url",
         "uri_field": "uri",
         "enabled": True,
+        "signed_on_read": True,
+    },
+    # 内容块的 URL 只作为新附件的存量地址，附件返回时会重新签名
+    AttachmentBlob: {
+        "url_field": "file_url",
+        "uri_field": "uri",
+        "enabled": True,
+        "signed_on_read": True,
     },
     Hanzi: {
         "url_field": "image_path",
         "uri_field": "uri",
         "enabled": True,
+        "signed_on_read": True,
     },
 }
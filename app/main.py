@@ -43,6 +43,7 @@ from app.core.logging import setup_logging
 from app.services.hanzi_dictionary_search_service import HanziDictionarySearchService
 from app.services.hanzi_dictionary_service import HanziDictionaryService
 from app.services.management_system_service import ManagementSystemService
+from app.services.ocr_client import close_ocr_clients
 from app.services.cross_search_service import CrossSearchService
 
 logger = logging.getLogger(__name__)
@@ -174,6 +175,7 @@ async def lifespan(_app: FastAPI):
     """
     await _bootstrap_application()
     yield
+    await close_ocr_clients()
 
 
 app = FastAPI(
@@ -26,6 +26,7 @@ from app.models.custom_field import (  # noqa
 )
 from app.models.message import Message  # noqa
 from app.models.event_outbox import EventOutbox  # noqa
+from app.models.ocr_result_cache import OCRResultCacheEntry  # noqa
 from app.models.management_system import ManagementSystem, ManagementSystemAccessRole, UserManagementSystem  # noqa
 from app.models.management_system_record import ManagementSystemRecord  # noqa
 from app.models.teaching_class import (  # noqa
@@ -36,6 +37,7 @@ from app.models.teaching_class import (  # noqa
     TeachingClassMemberStatus,
     TeachingClassStatus,
 )
+from app.models.attachment_blob import AttachmentBlob  # noqa
 from app.models.attachment import Attachment  # noqa
 from app.models.ai_feedback import (  # noqa
     AIFeedback,
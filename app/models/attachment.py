@@ -6,7 +6,7 @@
 """
 
 from typing import Optional
-from sqlalchemy import String, Integer, DateTime, func, Index
+from sqlalchemy import ForeignKey, String, Integer, DateTime, func, Index
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.core.database import Base
@@ -33,6 +33,10 @@ class Attachment(Base):
     filename: Mapped[str] = mapped_column(String(255), nullable=False)
     file_size: Mapped[int] = mapped_column(Integer, nullable=False)
     mime_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    # 引用的内容块；存量附件为空
+    blob_id: Mapped[str | None] = mapped_column(
+        String(50), ForeignKey("attachment_blob.id"), nullable=True, index=True,
+    )
 
     created_at: Mapped[DateTime] = mapped_column(DateTime, default=func.now())
     deleted_at: Mapped[Optional[DateTime]] = mapped_column(DateTime, nullable=True)
@@ -0,0 +1,45 @@
+"""
+附件内容块数据模型模块。
+
+同一份文件内容（按 SHA-256 区分）只上传一次，附件通过 blob_id 引用内容块；
+签名 URL、OCR 文本与 AI 评价等派生结果挂在内容块上，重复提交的相同图片直接复用。
+"""
+
+from typing import Any, Optional
+
+from sqlalchemy import JSON, DateTime, Integer, String, Text, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+from app.utils.id_generator import generate_id
+
+
+class AttachmentBlob(Base):
+    """
+    附件内容块实体模型。
+
+    对应数据库 attachment_blob 表，ref_count 为引用该内容块的未删除附件数；
+    引用数降为 0 的内容块保留，相同内容再次上传时直接复用。
+    """
+    __tablename__ = "attachment_blob"
+
+    id: Mapped[str] = mapped_column(String(50), primary_key=True, default=generate_id)
+    sha256: Mapped[str] = mapped_column(String(64), nullable=False, unique=True)
+    # ImageX 对象键按 MD5 命名
+    md5: Mapped[str] = mapped_column(String(32), nullable=False)
+    uri: Mapped[str | None] = mapped_column(String(500), nullable=True)
+    file_url: Mapped[str] = mapped_column(String(500), nullable=False)
+    # 上次刷新 URL 的时间，由 URL 刷新任务维护
+    url_refreshed_at: Mapped[DateTime | None] = mapped_column(DateTime, nullable=True)
+    file_size: Mapped[int] = mapped_column(Integer, nullable=False)
+    mime_type: Mapped[str] = mapped_column(String(100), nullable=False)
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    ocr_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    # 附件级 AI 评分的模型原始输出，评价记录仍按附件写入 ai_feedback
+    ai_feedback: Mapped[Optional[dict[str, Any]]] = mapped_column(JSON, nullable=True)
+
+    created_at: Mapped[DateTime] = mapped_column(DateTime, default=func.now())
+    updated_at: Mapped[DateTime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<AttachmentBlob(id='{self.id}', sha256='{self.sha256}', ref_count={self.ref_count})>"
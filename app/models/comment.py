@@ -29,6 +29,7 @@ class Comment(Base):
     like_count: Mapped[int] = mapped_column(Integer, default=0)
 
     created_at: Mapped[DateTime] = mapped_column(DateTime, default=func.now())
+    updated_at: Mapped[DateTime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
 
     user: Mapped["User"] = relationship("User", back_populates="comments")  # noqa
 
@@ -12,10 +12,13 @@ class HanziDictionary(Base):
 
     id: Mapped[str] = mapped_column(String(50), primary_key=True, default=generate_id)
     character: Mapped[str] = mapped_column(String(1), nullable=False, unique=True, index=True)
+    radical: Mapped[Optional[str]] = mapped_column(String(8), nullable=True, index=True)
     stroke_count: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     stroke_pattern: Mapped[Optional[str]] = mapped_column(String(255), nullable=True, index=True)
     pinyin: Mapped[Optional[str]] = mapped_column(String(100), nullable=True, index=True)
     source: Mapped[str] = mapped_column(String(50), nullable=False, default="strokes_txt")
+    # 源数据内容摘要，增量初始化据此判断条目是否需要更新
+    content_hash: Mapped[Optional[str]] = mapped_column(String(32), nullable=True)
     created_at: Mapped[DateTime] = mapped_column(DateTime, default=func.now())
     updated_at: Mapped[DateTime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
 
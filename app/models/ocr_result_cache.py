@@ -0,0 +1,18 @@
+from sqlalchemy import JSON, DateTime, String, func
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.core.database import Base
+
+
+class OCRResultCacheEntry(Base):
+    """OCR 结果冷存储：Redis 过期后仍可按图片内容摘要命中，避免重复调用付费识别接口。"""
+
+    __tablename__ = "ocr_result_cache"
+
+    # {识别模式}:{规范化图片 SHA-256}
+    cache_key: Mapped[str] = mapped_column(String(100), primary_key=True)
+    mode: Mapped[str] = mapped_column(String(30), nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False, index=True)
+    characters: Mapped[str | list[str]] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[DateTime] = mapped_column(DateTime, default=func.now())
+    updated_at: Mapped[DateTime] = mapped_column(DateTime, default=func.now(), onupdate=func.now())
@@ -0,0 +1,128 @@
+from typing import Any, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.attachment_blob import AttachmentBlob
+
+
+class AttachmentBlobRepository:
+    def __init__(self, db: AsyncSession):
+        """
+        功能描述：
+            初始化AttachmentBlobRepository并准备运行所需的依赖对象。
+
+        参数：
+            db (AsyncSession): 数据库会话，用于执行持久化操作。
+
+        返回值：
+            None: 无返回值。
+        """
+        self.db = db
+
+    async def get(self, id: str) -> Optional[AttachmentBlob]:
+        """
+        功能描述：
+            按ID获取内容块。
+
+        参数：
+            id (str): 内容块ID。
+
+        返回值：
+            Optional[AttachmentBlob]: 返回查询到的内容块；未命中时返回 None。
+        """
+        return await self.db.get(AttachmentBlob, id)
+
+    async def get_by_sha256s(self, sha256s: list[str]) -> dict[str, AttachmentBlob]:
+        """
+        功能描述：
+            按内容摘要批量获取内容块。
+
+        参数：
+            sha256s (list[str]): 内容 SHA-256 列表。
+
+        返回值：
+            dict[str, AttachmentBlob]: SHA-256 → 内容块；不存在的摘要不在结果中。
+        """
+        if not sha256s:
+            return {}
+        result = await self.db.execute(select(AttachmentBlob).where(AttachmentBlob.sha256.in_(sha256s)))
+        return {blob.sha256: blob for blob in result.scalars().all()}
+
+    async def get_or_create(
+        self,
+        *,
+        sha256: str,
+        md5: str,
+        uri: Optional[str],
+        file_url: str,
+        file_size: int,
+        mime_type: str,
+    ) -> AttachmentBlob:
+        """
+        功能描述：
+            创建内容块；并发请求已先写入同一内容时返回已有记录。
+
+        参数：
+            sha256 (str): 内容 SHA-256。
+            md5 (str): 内容 MD5。
+            uri (Optional[str]): 对象存储 URI。
+            file_url (str): 签名访问地址。
+            file_size (int): 文件字节数。
+            mime_type (str): MIME 类型。
+
+        返回值：
+            AttachmentBlob: 内容块，引用数由调用方通过 add_references 维护。
+        """
+        blob = AttachmentBlob(
+            sha256=sha256, md5=md5, uri=uri, file_url=file_url, file_size=file_size, mime_type=mime_type, ref_count=0,
+        )
+        try:
+            # 保存点内插入，唯一键冲突只回滚这一条，不影响调用方事务中的其他写入
+            async with self.db.begin_nested():
+                self.db.add(blob)
+        except IntegrityError:
+            # 普通 SELECT 在 REPEATABLE READ 下沿用事务快照，看不到并发事务刚提交的行；
+            # 加锁读取总是读最新提交版本，并锁住该行直到本事务结束
+            result = await self.db.execute(
+                select(AttachmentBlob)
+                .where(AttachmentBlob.sha256 == sha256)
+                .with_for_update()
+                .execution_options(populate_existing=True)
+            )
+            return result.scalar_one()
+        return blob
+
+    async def add_references(self, blob_id: str, count: int = 1) -> None:
+        """原子增加内容块引用数。"""
+        await self.db.execute(
+            update(AttachmentBlob)
+            .where(AttachmentBlob.id == blob_id)
+            .values(ref_count=AttachmentBlob.ref_count + count)
+        )
+
+    async def release(self, blob_id: str) -> None:
+        """原子减少内容块引用数，不会减到负数。"""
+        await self.db.execute(
+            update(AttachmentBlob)
+            .where(AttachmentBlob.id == blob_id, AttachmentBlob.ref_count > 0)
+            .values(ref_count=AttachmentBlob.ref_count - 1)
+        )
+
+    async def save_derived(self, blob: AttachmentBlob, ocr_text: str, ai_feedback: dict[str, Any]) -> None:
+        """
+        功能描述：
+            记录内容块的 OCR 文本与 AI 评分，随调用方事务一起提交。
+
+        参数：
+            blob (AttachmentBlob): 内容块。
+            ocr_text (str): OCR 识别文本。
+            ai_feedback (dict[str, Any]): 附件级 AI 评分。
+
+        返回值：
+            None: 无返回值。
+        """
+        blob.ocr_text = ocr_text
+        blob.ai_feedback = ai_feedback
+        await self.db.flush()
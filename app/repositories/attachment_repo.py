@@ -38,6 +38,7 @@ class AttachmentRepository:
             filename=attachment_in.filename,
             file_size=attachment_in.file_size,
             mime_type=attachment_in.mime_type,
+            blob_id=attachment_in.blob_id,
         )
         self.db.add(attachment)
         await self.db.flush()
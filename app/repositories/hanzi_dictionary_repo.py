@@ -1,12 +1,11 @@
 from typing import Optional
 
-import pandas as pd
-from sqlalchemy import case, delete, func, insert, or_, select
+from sqlalchemy import Select, bindparam, case, delete, func, insert, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.hanzi import Hanzi
 from app.models.hanzi_dictionary import HanziDataset, DatasetHanziRelation, HanziDictionary
-from app.utils.hanzi_dictionary_parser import normalize_pinyin_keyword, split_stroke_pattern
+from app.utils.hanzi_dictionary_parser import build_stroke_unit_counts, normalize_pinyin_keyword, split_stroke_pattern
 
 
 class HanziDictionaryRepository:
@@ -25,7 +24,8 @@ class HanziDictionaryRepository:
 
     @staticmethod
     def _apply_filters(query, character: Optional[str] = None,
-                       pinyin: Optional[str] = None, stroke_count: Optional[int] = None):
+                       pinyin: Optional[str] = None, stroke_count: Optional[int] = None,
+                       radical: Optional[str] = None):
         """
         功能描述：
             处理filters。
@@ -35,6 +35,7 @@ class HanziDictionaryRepository:
             character (Optional[str]): 字符串结果。
             pinyin (Optional[str]): 字符串结果。
             stroke_count (Optional[int]): 数量值。
+            radical (Optional[str]): 部首，精确匹配。
 
         返回值：
             None: 无返回值。
@@ -56,6 +57,33 @@ class HanziDictionaryRepository:
                             "")).startswith(normalized))
         if stroke_count is not None:
             query = query.where(HanziDictionary.stroke_count == stroke_count)
+        if radical and radical.strip():
+            query = query.where(HanziDictionary.radical == radical.strip())
+        return query
+
+    @staticmethod
+    def _apply_stroke_unit_filters(query, stroke_pattern: Optional[str] = None):
+        """
+        功能描述：
+            在 SQL 中按"至少包含 N 个某笔画"过滤，分页与计数可直接由数据库完成。
+
+        参数：
+            query (Any): 检索或查询条件。
+            stroke_pattern (Optional[str]): 查询笔画序列。
+
+        返回值：
+            Any: 返回追加过滤条件后的查询。
+        """
+        query_counts = build_stroke_unit_counts(stroke_pattern)
+        if not query_counts:
+            return query
+        # 分隔符加倍后首尾补齐，",横,横," 变为 ",,横,,横,,"，相邻同名笔画也能被 REPLACE 逐个计数
+        wrapped = func.concat(",", func.replace(HanziDictionary.stroke_pattern, ",", ",,"), ",")
+        wrapped_length = func.char_length(wrapped)
+        for unit, count in query_counts.items():
+            needle = f",{unit},"
+            removed_length = wrapped_length - func.char_length(func.replace(wrapped, needle, ""))
+            query = query.where(removed_length >= count * len(needle))
         return query
 
     async def count_all(self) -> int:
@@ -72,30 +100,26 @@ class HanziDictionaryRepository:
         result = await self.db.execute(select(func.count()).select_from(HanziDictionary))
         return int(result.scalar() or 0)
 
-    async def get_all(self) -> list[dict]:
+    async def list_content_hashes(self) -> dict[str, tuple[str, Optional[str], str]]:
         """
         功能描述：
-            按条件获取all。
+            只投影 (字符, 主键, 内容摘要, 来源) 三列，供增量初始化比对，不加载完整实体。
 
         参数：
             无。
 
         返回值：
-            list[dict]: 返回列表形式的结果数据。
-        """
-        result = await self.db.execute(select(HanziDictionary))
-        items = result.scalars().all()
-        return [
-            {
-                "id": item.id,
-                "character": item.character,
-                "stroke_count": item.stroke_count,
-                "stroke_pattern": item.stroke_pattern,
-                "pinyin": item.pinyin,
-                "source": item.source,
-            }
-            for item in items
-        ]
+            dict[str, tuple[str, Optional[str], str]]: 返回 {字符: (主键, 内容摘要, 来源)}。
+        """
+        result = await self.db.execute(
+            select(
+                HanziDictionary.character,
+                HanziDictionary.id,
+                HanziDictionary.content_hash,
+                HanziDictionary.source,
+            )
+        )
+        return {row[0]: (row[1], row[2], row[3]) for row in result.all()}
 
     async def get_by_character(self, character: str) -> Optional[HanziDictionary]:
         """
@@ -167,6 +191,8 @@ class HanziDictionaryRepository:
         pinyin: Optional[str] = None,
         stroke_count: Optional[int] = None,
         keyword: Optional[str] = None,
+        radical: Optional[str] = None,
+        stroke_pattern: Optional[str] = None,
     ) -> list[HanziDictionary]:
         """
         功能描述：
@@ -179,12 +205,17 @@ class HanziDictionaryRepository:
             pinyin (Optional[str]): 字符串结果。
             stroke_count (Optional[int]): 数量值。
             keyword (Optional[str]): 字符串结果。
+            radical (Optional[str]): 部首，精确匹配。
+            stroke_pattern (Optional[str]): 查询笔画序列，按笔画出现次数包含匹配。
 
         返回值：
             list[HanziDictionary]: 返回列表形式的结果数据。
         """
         query = select(HanziDictionary)
-        query = self._apply_filters(query, character=character, pinyin=pinyin, stroke_count=stroke_count)
+        query = self._apply_filters(
+            query, character=character, pinyin=pinyin, stroke_count=stroke_count, radical=radical
+        )
+        query = self._apply_stroke_unit_filters(query, stroke_pattern)
         if keyword:
             normalized = normalize_pinyin_keyword(keyword)
             trimmed = keyword.strip()
@@ -208,6 +239,8 @@ class HanziDictionaryRepository:
         pinyin: Optional[str] = None,
         stroke_count: Optional[int] = None,
         keyword: Optional[str] = None,
+        radical: Optional[str] = None,
+        stroke_pattern: Optional[str] = None,
     ) -> int:
         """
         功能描述：
@@ -218,12 +251,17 @@ class HanziDictionaryRepository:
             pinyin (Optional[str]): 字符串结果。
             stroke_count (Optional[int]): 数量值。
             keyword (Optional[str]): 字符串结果。
+            radical (Optional[str]): 部首，精确匹配。
+            stroke_pattern (Optional[str]): 查询笔画序列，按笔画出现次数包含匹配。
 
         返回值：
             int: 返回统计结果。
         """
         query = select(func.count()).select_from(HanziDictionary)
-        query = self._apply_filters(query, character=character, pinyin=pinyin, stroke_count=stroke_count)
+        query = self._apply_filters(
+            query, character=character, pinyin=pinyin, stroke_count=stroke_count, radical=radical
+        )
+        query = self._apply_stroke_unit_filters(query, stroke_pattern)
         if keyword:
             normalized = normalize_pinyin_keyword(keyword)
             trimmed = keyword.strip()
@@ -239,72 +277,51 @@ class HanziDictionaryRepository:
         result = await self.db.execute(query)
         return int(result.scalar() or 0)
 
-    async def list_search_candidates(
+    async def apply_delta(
         self,
-        character: Optional[str] = None,
-        pinyin: Optional[str] = None,
-        stroke_count: Optional[int] = None,
-        keyword: Optional[str] = None,
-    ) -> list[HanziDictionary]:
+        inserts: list[dict],
+        updates: list[dict],
+        delete_ids: list[str],
+        batch_size: int = 1000,
+    ) -> list[str]:
         """
         功能描述：
-            按条件查询检索candidates列表。
+            在同一事务内批量写入增量：新增走多行 INSERT，变更按主键 executemany UPDATE，
+            删除只处理未被私有字库引用的条目。
 
         参数：
-            character (Optional[str]): 字符串结果。
-            pinyin (Optional[str]): 字符串结果。
-            stroke_count (Optional[int]): 数量值。
-            keyword (Optional[str]): 字符串结果。
+            inserts (list[dict]): 新增行，需包含 id。
+            updates (list[dict]): 变更行，需包含 id 及待更新字段。
+            delete_ids (list[str]): 源文件中已不存在的条目主键。
+            batch_size (int): 每批写入行数。
 
         返回值：
-            list[HanziDictionary]: 返回列表形式的结果数据。
-        """
-        query = select(HanziDictionary)
-        query = self._apply_filters(query, character=character, pinyin=pinyin, stroke_count=stroke_count)
-        if keyword:
-            normalized = normalize_pinyin_keyword(keyword)
-            trimmed = keyword.strip()
-            conditions = []
-            if trimmed:
-                conditions.append(HanziDictionary.character.contains(trimmed))
-            if normalized:
-                conditions.append(
-                    func.lower(func.replace(func.coalesce(HanziDictionary.pinyin, ""), " ", "")).contains(normalized)
-                )
-            if conditions:
-                query = query.where(or_(*conditions))
-        query = query.where(HanziDictionary.stroke_pattern.is_not(None)).order_by(
-            HanziDictionary.stroke_count.asc(),
-            HanziDictionary.character.asc(),
-        )
-        result = await self.db.execute(query)
-        return result.scalars().all()
-
-    async def upsert_many(self, rows: pd.DataFrame, force: bool = False, batch_size: int = 1000) -> tuple[int, int]:
-        """
-        功能描述：
-            新增或更新many。
-
-        参数：
-            rows (pd.DataFrame): pd.DataFrame 类型的数据。
-            force (bool): 布尔值结果。
-            batch_size (int): 整数结果。
-
-        返回值：
-            tuple[int, int]: 返回tuple[int, int]类型的处理结果。
-        """
-        if rows.empty:
-            return 0, 0
-
-        created = 0
-        for index in range(0, len(rows), batch_size):
-            chunk = rows.iloc[index:index + batch_size]
-            payload = chunk.to_dict(orient="records")
-            statement = insert(HanziDictionary.__table__).values(payload)
-            await self.db.execute(statement)
-            created += len(payload)
+            list[str]: 返回实际删除的条目主键。
+        """
+        table = HanziDictionary.__table__
+        for index in range(0, len(inserts), batch_size):
+            await self.db.execute(insert(table).values(inserts[index:index + batch_size]))
+        if updates:
+            columns = [column for column in updates[0] if column != "id"]
+            statement = (
+                update(table)
+                .where(table.c.id == bindparam("b_id"))
+                .values({column: bindparam(column) for column in columns})
+            )
+            for index in range(0, len(updates), batch_size):
+                chunk = updates[index:index + batch_size]
+                await self.db.execute(statement, [{**row, "b_id": row["id"]} for row in chunk])
+        deleted_ids: list[str] = []
+        for index in range(0, len(delete_ids), batch_size):
+            chunk = delete_ids[index:index + batch_size]
+            referenced = select(Hanzi.dictionary_id).where(Hanzi.dictionary_id.in_(chunk))
+            referenced_ids = set((await self.db.execute(referenced)).scalars().all())
+            removable = [dictionary_id for dictionary_id in chunk if dictionary_id not in referenced_ids]
+            if removable:
+                await self.db.execute(delete(table).where(table.c.id.in_(removable)))
+                deleted_ids.extend(removable)
         await self.db.commit()
-        return created, 0
+        return deleted_ids
 
 
 class HanziDatasetRepository:
@@ -389,16 +406,15 @@ class HanziDatasetRepository:
         )
         return int(result.scalar() or 0)
 
-    async def list_items(
+    def select_items(
         self,
         dataset_id: str,
         created_by_user_id: str,
-        skip: int,
-        limit: int,
         character: Optional[str] = None,
         pinyin: Optional[str] = None,
         stroke_pattern: Optional[str] = None,
-    ) -> list[Hanzi]:
+    ) -> Select:
+        """返回数据集条目的筛选查询（未排序未分页），供列表与流式导出复用。"""
         query = (
             select(Hanzi)
             .join(DatasetHanziRelation, DatasetHanziRelation.hanzi_id == Hanzi.id)
@@ -419,6 +435,19 @@ class HanziDatasetRepository:
         if stroke_pattern:
             for unit in split_stroke_pattern(stroke_pattern):
                 query = query.where(Hanzi.stroke_pattern.contains(unit))
+        return query
+
+    async def list_items(
+        self,
+        dataset_id: str,
+        created_by_user_id: str,
+        skip: int,
+        limit: int,
+        character: Optional[str] = None,
+        pinyin: Optional[str] = None,
+        stroke_pattern: Optional[str] = None,
+    ) -> list[Hanzi]:
+        query = self.select_items(dataset_id, created_by_user_id, character, pinyin, stroke_pattern)
         result = await self.db.execute(
             query.order_by(Hanzi.updated_at.desc()).offset(skip).limit(limit)
         )
@@ -1,6 +1,6 @@
-from typing import List, Optional
+from typing import List, Optional, Sequence
 
-from sqlalchemy import func, or_, select
+from sqlalchemy import Select, func, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.hanzi import Hanzi
@@ -97,6 +97,36 @@ class HanziRepository:
         result = await self.db.execute(query)
         return result.scalars().first()
 
+    def select_filtered(
+        self,
+        structure: Optional[str] = None,
+        level: Optional[str] = None,
+        variant: Optional[str] = None,
+        search: Optional[str] = None,
+        created_by_user_id: Optional[str] = None,
+        character: Optional[str] = None,
+        pinyin: Optional[str] = None,
+        stroke_count: Optional[int] = None,
+        stroke_pattern: Optional[str] = None,
+        dataset_id: Optional[str] = None,
+        source: Optional[str] = None,
+    ) -> Select:
+        """返回带筛选条件、未排序未分页的查询，供列表与流式导出复用。"""
+        return self._apply_filters(
+            select(Hanzi),
+            created_by_user_id=created_by_user_id,
+            structure=structure,
+            level=level,
+            variant=variant,
+            search=search,
+            character=character,
+            pinyin=pinyin,
+            stroke_count=stroke_count,
+            stroke_pattern=stroke_pattern,
+            dataset_id=dataset_id,
+            source=source,
+        )
+
     async def get_all(
         self,
         skip: int = 0,
@@ -113,9 +143,7 @@ class HanziRepository:
         dataset_id: Optional[str] = None,
         source: Optional[str] = None,
     ) -> List[Hanzi]:
-        query = select(Hanzi)
-        query = self._apply_filters(
-            query,
+        query = self.select_filtered(
             created_by_user_id=created_by_user_id,
             structure=structure,
             level=level,
@@ -139,14 +167,21 @@ class HanziRepository:
         limit: int = 100,
         created_by_user_id: Optional[str] = None,
         dataset_id: Optional[str] = None,
+        stroke_count: Optional[int] = None,
+        characters: Optional[Sequence[str]] = None,
     ) -> List[Hanzi]:
-        return await self.get_all(
-            skip=skip,
-            limit=limit,
+        """按笔顺检索；characters 为笔画引擎算出的候选字，非空时先按 character IN (...) 收窄再比对笔顺。"""
+        query = self.select_filtered(
             created_by_user_id=created_by_user_id,
+            stroke_count=stroke_count,
             stroke_pattern=stroke_pattern,
             dataset_id=dataset_id,
         )
+        if characters is not None:
+            query = query.where(Hanzi.character.in_(characters))
+        query = query.order_by(Hanzi.updated_at.desc()).offset(skip).limit(limit)
+        result = await self.db.execute(query)
+        return result.scalars().all()
 
     async def count(
         self,
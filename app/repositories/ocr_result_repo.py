@@ -0,0 +1,65 @@
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.ocr_result_cache import OCRResultCacheEntry
+
+
+class OCRResultRepository:
+    def __init__(self, db: AsyncSession):
+        """
+        功能描述：
+            初始化OCRResultRepository并准备运行所需的依赖对象。
+
+        参数：
+            db (AsyncSession): 数据库会话，用于执行持久化操作。
+
+        返回值：
+            None: 无返回值。
+        """
+        self.db = db
+
+    async def get_many(self, cache_keys: list[str]) -> dict[str, str | list[str]]:
+        """
+        功能描述：
+            按缓存键批量读取识别结果。
+
+        参数：
+            cache_keys (list[str]): 缓存键列表。
+
+        返回值：
+            dict[str, str | list[str]]: 缓存键 → 识别结果；未命中的键不在结果中。
+        """
+        if not cache_keys:
+            return {}
+        result = await self.db.execute(
+            select(OCRResultCacheEntry.cache_key, OCRResultCacheEntry.characters)
+            .where(OCRResultCacheEntry.cache_key.in_(cache_keys))
+        )
+        return {row[0]: row[1] for row in result.all()}
+
+    async def upsert(self, cache_key: str, mode: str, content_hash: str, characters: str | list[str]) -> None:
+        """
+        功能描述：
+            写入或覆盖一条识别结果；并发写入同一键时以先写入者为准。
+
+        参数：
+            cache_key (str): 缓存键。
+            mode (str): 识别模式。
+            content_hash (str): 规范化图片摘要。
+            characters (str | list[str]): 识别结果。
+
+        返回值：
+            None: 无返回值。
+        """
+        entry = await self.db.get(OCRResultCacheEntry, cache_key)
+        if entry is None:
+            self.db.add(OCRResultCacheEntry(
+                cache_key=cache_key, mode=mode, content_hash=content_hash, characters=characters,
+            ))
+        else:
+            entry.characters = characters
+        try:
+            await self.db.commit()
+        except IntegrityError:
+            await self.db.rollback()
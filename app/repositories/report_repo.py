@@ -0,0 +1,99 @@
+from typing import Any, NamedTuple, Optional
+
+from sqlalchemy import Select, case, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.assignment import Assignment
+from app.models.submission import Submission, SubmissionStatus
+
+
+class SubmissionStats(NamedTuple):
+    submission_count: int = 0
+    graded_count: int = 0
+    average_score: Optional[float] = None
+
+
+class ReportRepository:
+    """
+    报表聚合查询：一批主体的提交统计用一条 GROUP BY 完成，
+    导出按批调用，往返次数与批数成正比而不是与行数成正比。
+    """
+
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def submission_stats_by_assignment(self, assignment_ids: list[str]) -> dict[str, SubmissionStats]:
+        """
+        功能描述：
+            统计一批作业的提交人数、已批改人数与平均分。
+
+        参数：
+            assignment_ids (list[str]): 作业ID列表。
+
+        返回值：
+            dict[str, SubmissionStats]: 作业ID → 统计结果；无提交的作业不在结果中。
+        """
+        return await self._grouped_stats(Submission.assignment_id, assignment_ids)
+
+    async def submission_stats_by_student(
+        self,
+        student_ids: list[str],
+        course_id: Optional[str] = None,
+    ) -> dict[str, SubmissionStats]:
+        """
+        功能描述：
+            统计一批学生的提交次数、已批改次数与平均分，可限定在某门课程的作业内。
+
+        参数：
+            student_ids (list[str]): 学生ID列表。
+            course_id (Optional[str]): 课程ID。
+
+        返回值：
+            dict[str, SubmissionStats]: 学生ID → 统计结果；无提交的学生不在结果中。
+        """
+        extra_conditions = []
+        if course_id:
+            extra_conditions.append(
+                Submission.assignment_id.in_(select(Assignment.id).where(Assignment.course_id == course_id))
+            )
+        return await self._grouped_stats(Submission.student_id, student_ids, *extra_conditions)
+
+    async def data_watermark(self, statement: Select, *timestamp_columns: str) -> tuple[Any, ...]:
+        """
+        功能描述：
+            对查询结果集做一次聚合，得到行数与各时间列的最大值，用于判断导出数据是否变化。
+
+        参数：
+            statement (Select): 导出使用的基础查询。
+            timestamp_columns (str): 参与水位计算的时间列名。
+
+        返回值：
+            tuple[Any, ...]: (行数, 各时间列最大值...)。
+        """
+        subquery = statement.subquery()
+        result = await self.db.execute(
+            select(func.count(), *(func.max(subquery.c[name]) for name in timestamp_columns))
+        )
+        return tuple(result.one())
+
+    async def _grouped_stats(self, group_column, keys: list[str], *conditions) -> dict[str, SubmissionStats]:
+        if not keys:
+            return {}
+        result = await self.db.execute(
+            select(
+                group_column,
+                func.count(Submission.id),
+                func.count(case((Submission.status == SubmissionStatus.GRADED, 1))),
+                func.avg(Submission.score),
+            )
+            .where(group_column.in_(keys), *conditions)
+            .group_by(group_column)
+        )
+        return {
+            row[0]: SubmissionStats(
+                submission_count=int(row[1] or 0),
+                graded_count=int(row[2] or 0),
+                average_score=float(row[3]) if row[3] is not None else None,
+            )
+            for row in result.all()
+        }
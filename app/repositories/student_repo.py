@@ -1,8 +1,9 @@
 from typing import Optional
-from sqlalchemy import select, func
+from sqlalchemy import or_, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.student import Student
+from app.models.teaching_class import TeachingClassMember
 from app.schemas.student import StudentCreate, StudentUpdate
 
 
@@ -18,6 +19,30 @@ class StudentRepository:
         result = await self.db.execute(select(Student).where(Student.user_id == user_id))
         return result.scalars().first()
 
+    async def list_user_ids_by_membership(
+        self,
+        student_ids: list[str],
+        teaching_class_ids: list[str],
+    ) -> list[str]:
+        """按学生ID或所在教学班解析对应的用户ID，用于权限缓存失效。"""
+        conditions = []
+        if student_ids:
+            conditions.append(Student.id.in_(student_ids))
+        if teaching_class_ids:
+            conditions.append(
+                Student.id.in_(
+                    select(TeachingClassMember.student_id).where(
+                        TeachingClassMember.teaching_class_id.in_(teaching_class_ids)
+                    )
+                )
+            )
+        if not conditions:
+            return []
+        result = await self.db.execute(
+            select(Student.user_id).where(or_(*conditions)).distinct()
+        )
+        return [row[0] for row in result.all()]
+
     async def get_all(self, skip: int = 0, limit: int = 100) -> list[Student]:
         result = await self.db.execute(select(Student).offset(skip).limit(limit))
         return result.scalars().all()
@@ -238,30 +238,19 @@ class TeachingClassRepository:
         """
         await self.db.commit()
 
-    async def remove_member(self, teaching_class_id: str, student_id: str) -> bool:
+    async def delete_member(self, member: TeachingClassMember) -> None:
         """
         功能描述：
-            移除教学班中的学生成员。
+            删除教学班成员记录并提交。
 
         参数：
-            teaching_class_id (str): 教学班级ID。
-            student_id (str): 学生ID。
+            member (TeachingClassMember): 待删除的成员对象。
 
         返回值：
-            bool: 是否成功移除。
+            None: 无返回值。
         """
-        result = await self.db.execute(
-            select(TeachingClassMember).where(
-                TeachingClassMember.teaching_class_id == teaching_class_id,
-                TeachingClassMember.student_id == student_id,
-            )
-        )
-        member = result.scalars().first()
-        if not member:
-            return False
         await self.db.delete(member)
         await self.db.commit()
-        return True
 
     async def list_student_ids_for_teacher(self, teacher_id: str) -> list[str]:
         """
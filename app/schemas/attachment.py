@@ -14,6 +14,7 @@ class AttachmentBase(BaseModel):
 class AttachmentCreate(AttachmentBase):
     owner_type: str
     owner_id: str
+    blob_id: str | None = None
 
 
 class AttachmentResponse(AttachmentBase):
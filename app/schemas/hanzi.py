@@ -138,12 +138,20 @@ class HanziOCRPrefillResponse(BaseModel):
 
 
 class HanziOCRBatchPrefillItem(BaseModel):
+    # 文件在本次上传中的序号，流式返回时按完成顺序到达，前端据此归位
+    index: int = 0
     file_name: str
     recognized_text: str
     draft: HanziCreate
     candidates: list[OCRDictionaryCandidate] = Field(default_factory=list)
 
 
+class HanziOCRBatchPrefillFailure(BaseModel):
+    index: int
+    file_name: str
+    error: str
+
+
 class HanziOCRBatchPrefillResponse(BaseModel):
     total: int
     items: list[HanziOCRBatchPrefillItem]
@@ -13,11 +13,13 @@ class HanziDictionaryInitResponse(BaseModel):
     total: int
     created: int
     updated: int
+    deleted: int = 0
 
 
 class HanziDictionaryResponse(BaseModel):
     id: str
     character: str
+    radical: Optional[str] = None
     stroke_count: Optional[int] = None
     stroke_pattern: Optional[str] = None
     stroke_units: list[str] = Field(default_factory=list)
@@ -1,5 +1,5 @@
-from typing import Optional
-from pydantic import BaseModel
+from typing import Annotated, Any, Literal, Optional, Union
+from pydantic import BaseModel, Field
 
 
 class ExportRequest(BaseModel):
@@ -14,6 +14,7 @@ class ExportRequest(BaseModel):
     level: Optional[str] = None
     variant: Optional[str] = None
     search: Optional[str] = None
+    format: Literal["xlsx", "csv"] = "xlsx"
 
 
 class DatasetExcelExportRequest(BaseModel):
@@ -23,3 +24,66 @@ class DatasetExcelExportRequest(BaseModel):
     stroke_pattern: Optional[str] = None
     # "html+csv" = 默认，导出 index.html + data.csv；"csv" = 仅 CSV
     format: str = "html+csv"
+
+
+class HanziExportJobRequest(ExportRequest):
+    kind: Literal["hanzi"]
+
+
+class DatasetPackageExportJobRequest(BaseModel):
+    kind: Literal["dataset_package"]
+    dataset_id: str
+
+
+class DatasetHtmlExportJobRequest(DatasetExcelExportRequest):
+    kind: Literal["dataset_html"]
+    dataset_id: str
+
+
+class AssignmentsExportJobRequest(BaseModel):
+    kind: Literal["assignments"]
+    course_id: Optional[str] = None
+    status: Optional[str] = None
+    format: Literal["xlsx", "csv"] = "xlsx"
+
+
+class StudentsExportJobRequest(BaseModel):
+    kind: Literal["students"]
+    course_id: Optional[str] = None
+    class_id: Optional[str] = None
+    format: Literal["xlsx", "csv"] = "xlsx"
+
+
+class SubmissionsExportJobRequest(BaseModel):
+    kind: Literal["submissions"]
+    assignment_id: str
+    student_id: Optional[str] = None
+    status: Optional[str] = None
+    format: Literal["xlsx", "csv"] = "xlsx"
+
+
+# 按 kind 区分的异步导出请求，字段与对应的同步导出接口一致
+ExportJobRequest = Annotated[
+    Union[
+        HanziExportJobRequest,
+        DatasetPackageExportJobRequest,
+        DatasetHtmlExportJobRequest,
+        AssignmentsExportJobRequest,
+        StudentsExportJobRequest,
+        SubmissionsExportJobRequest,
+    ],
+    Field(discriminator="kind"),
+]
+
+
+class ExportJobResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: str
+    stage: str
+    progress: int
+    message: str
+    completed: int = 0
+    total: int = 0
+    result: Optional[dict[str, Any]] = None
+    reused: bool = False
@@ -1,7 +1,9 @@
+import hashlib
+import json
 from dataclasses import dataclass, field
 from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class SearchHit(BaseModel):
@@ -12,12 +14,18 @@ class SearchHit(BaseModel):
     content: str
     target_type: str
     url: str | None = None
+    # 字段名 → 高亮片段，命中词以 <em> 包裹
+    highlights: dict[str, list[str]] = Field(default_factory=dict)
 
 
 class CrossSearchResponse(BaseModel):
     keyword: str
     total: int
     items: list[SearchHit]
+    # 模块 → 命中数，不受 modules 筛选影响，便于前端展示分面
+    facets: dict[str, int] = Field(default_factory=dict)
+    # 下一页游标，为空表示已到最后一页
+    next_cursor: str | None = None
 
 
 class ReindexResponse(BaseModel):
@@ -34,3 +42,11 @@ class PermissionContext:
     course_ids: list[str] = field(default_factory=list)
     class_ids: list[str] = field(default_factory=list)
     student_user_id: str | None = None
+
+    def fingerprint(self) -> str:
+        """权限指纹：可见范围相同的用户得到相同指纹，用于缓存 key 与游标绑定。"""
+        raw = json.dumps(
+            [self.role, self.user_id, sorted(self.course_ids), sorted(self.class_ids), self.student_user_id],
+            separators=(",", ":"),
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
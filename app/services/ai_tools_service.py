@@ -146,9 +146,10 @@ class AIToolsService:
 
         svc = HanziDictionarySearchService(self.db)
         result = await svc.search(
-            keyword=character or pinyin or "",
+            character=character,
             pinyin=pinyin,
             stroke_count=stroke_count_min,
+            stroke_pattern=stroke_pattern,
             limit=limit,
         )
         items = [
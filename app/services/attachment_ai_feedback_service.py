@@ -10,9 +10,11 @@ from app.models.ai_feedback import (
     AIFeedbackVisibility,
 )
 from app.repositories.ai_feedback_repo import AIFeedbackRepository
+from app.repositories.attachment_blob_repo import AttachmentBlobRepository
 from app.repositories.attachment_repo import AttachmentRepository
 from app.repositories.submission_repo import SubmissionRepository
 from app.services.ai_feedback_runtime import AIFeedbackRuntime
+from app.services.url_signer import get_url_signer
 
 
 logger = logging.getLogger(__name__)
@@ -21,9 +23,11 @@ logger = logging.getLogger(__name__)
 class AttachmentAIFeedbackService:
     def __init__(self, db: AsyncSession):
         self.attachment_repo = AttachmentRepository(db)
+        self.blob_repo = AttachmentBlobRepository(db)
         self.submission_repo = SubmissionRepository(db)
         self.feedback_repo = AIFeedbackRepository(db)
         self.runtime = AIFeedbackRuntime()
+        self.url_signer = get_url_signer()
 
     async def generate(self, attachment_id: str) -> dict:
         attachment = await self.attachment_repo.get(attachment_id)
@@ -40,8 +44,17 @@ class AttachmentAIFeedbackService:
             return {"status": "missing_submission", "attachment_id": attachment_id}
 
         try:
-            ocr_text = await self.runtime.recognize_char(attachment.file_url)
-            scores = await self.runtime.call_attachment_model(attachment.file_url, ocr_text)
+            # 相同内容的图片已评过分时直接复用内容块上的结果，不再调用 OCR 与视觉模型
+            blob = await self.blob_repo.get(attachment.blob_id) if attachment.blob_id else None
+            if blob is not None and blob.ai_feedback:
+                ocr_text, scores = blob.ocr_text or "", blob.ai_feedback
+            else:
+                # 库中 file_url 可能已过期，按 uri 取当前有效的签名地址
+                image_url = (await self.url_signer.resolve([attachment], "uri", "file_url"))[0]
+                ocr_text = await self.runtime.recognize_char(image_url)
+                scores = await self.runtime.call_attachment_model(image_url, ocr_text)
+                if blob is not None:
+                    await self.blob_repo.save_derived(blob, ocr_text=ocr_text, ai_feedback=scores)
             payload = {
                 "attachment_id": attachment.id,
                 "char": ocr_text,
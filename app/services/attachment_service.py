@@ -2,17 +2,25 @@
 附件业务逻辑层。
 
 处理附件上传、查询、删除等业务操作，集成文件存储和数据持久化。
+上传文件分块落盘（随机临时文件名），落盘时一并算出对象键所需的 MD5；
+多文件在单次请求内按 ATTACHMENT_UPLOAD_CONCURRENCY 并发上传到云存储；
+附件按内容 SHA-256 引用内容块（attachment_blob），相同内容只上传、签名一次，删除附件时归还引用数；
+库中 file_url 只作兜底，返回时按 uri 读时签名。
 """
 
+import asyncio
 import os
 from typing import List
 from fastapi import UploadFile
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.config import ATTACHMENT_OWNER_TYPES
+from app.core.config import ATTACHMENT_OWNER_TYPES, settings
+from app.repositories.attachment_blob_repo import AttachmentBlobRepository
 from app.repositories.attachment_repo import AttachmentRepository
 from app.schemas.attachment import AttachmentCreate, AttachmentResponse
 from app.services.ocr_service import OCRService
+from app.services.url_signer import get_url_signer
+from app.utils.file_utils import SpooledUpload, spool_upload_file
 
 
 class AttachmentService:
@@ -29,7 +37,9 @@ class AttachmentService:
         """
         self.db = db
         self.repo = AttachmentRepository(db)
+        self.blob_repo = AttachmentBlobRepository(db)
         self.ocr_service = OCRService()
+        self.url_signer = get_url_signer()
 
     def validate_owner_type(self, owner_type: str) -> bool:
         """
@@ -61,45 +71,85 @@ class AttachmentService:
         返回值：
             AttachmentResponse: 返回创建后的附件响应对象。
         """
+        return (await self.upload_attachments([file], owner_type, owner_id))[0]
+
+    async def upload_attachments(
+        self,
+        files: List[UploadFile],
+        owner_type: str,
+        owner_id: str,
+    ) -> List[AttachmentResponse]:
+        """
+        功能描述：
+            批量上传文件并创建附件记录：先分块落盘，内容已存在的文件直接引用已有内容块，
+            其余文件并发上传到云存储，最后按输入顺序写入附件记录。
+
+        参数：
+            files (List[UploadFile]): 上传的文件对象列表。
+            owner_type (str): 所有者类型。
+            owner_id (str): 所有者ID。
+        返回值：
+            List[AttachmentResponse]: 与输入顺序一致的附件响应列表。
+
+        异常：
+            ValueError: 所有者类型不支持。其余上传异常在全部上传结束后抛出第一个。
+        """
         if not self.validate_owner_type(owner_type):
             raise ValueError(f"不支持的所有者类型: {owner_type}")
 
-        # 保存临时文件
-        from app.core.config import settings
-        temp_dir = settings.TEMP_DIR
-        os.makedirs(temp_dir, exist_ok=True)
-
-        temp_file_path = os.path.join(temp_dir, file.filename)
+        spooled: List[SpooledUpload] = []
         try:
-            content = await file.read()
-            with open(temp_file_path, "wb") as f:
-                f.write(content)
-
-            # 调用 OCRService 上传到云存储
-            upload_result = await self.ocr_service.upload_image(temp_file_path)
-            file_url = upload_result.get("image_url", "")
-            uri = upload_result.get("uri", "")
-
-            # 获取文件大小
-            file_size = len(content)
-
-            # 创建附件记录
-            attachment_in = AttachmentCreate(
-                owner_type=owner_type,
-                owner_id=owner_id,
-                file_url=file_url,
-                uri=uri or None,
-                filename=file.filename,
-                file_size=file_size,
-                mime_type=file.content_type or "application/octet-stream",
-            )
-            attachment = await self.repo.create(attachment_in)
-
-            return AttachmentResponse.model_validate(attachment)
+            for file in files:
+                spooled.append(await spool_upload_file(file, settings.TEMP_DIR))
+
+            blobs = await self.blob_repo.get_by_sha256s(sorted({item.sha256 for item in spooled}))
+            # 已有内容块的文件跳过上传与签名；同一批内重复的文件只上传一份
+            pending = {item.sha256: (file, item) for file, item in zip(files, spooled) if item.sha256 not in blobs}
+            slots = asyncio.Semaphore(settings.ATTACHMENT_UPLOAD_CONCURRENCY)
+
+            async def upload(item: SpooledUpload) -> dict:
+                async with slots:
+                    return await self.ocr_service.upload_image(
+                        item.path, store_key=self.ocr_service.build_store_key(item.md5, item.path),
+                    )
+
+            uploaded = await asyncio.gather(*(upload(item) for _, item in pending.values()), return_exceptions=True)
+            for result in uploaded:
+                if isinstance(result, BaseException):
+                    raise result
+
+            # 数据库会话不支持并发，内容块与附件记录在全部上传完成后顺序写入
+            for (file, item), upload_result in zip(pending.values(), uploaded):
+                blobs[item.sha256] = await self.blob_repo.get_or_create(
+                    sha256=item.sha256,
+                    md5=item.md5,
+                    uri=upload_result.get("uri", "") or None,
+                    file_url=upload_result.get("image_url", ""),
+                    file_size=item.size,
+                    mime_type=file.content_type or "application/octet-stream",
+                )
+            responses: List[AttachmentResponse] = []
+            for file, item in zip(files, spooled):
+                blob = blobs[item.sha256]
+                attachment = await self.repo.create(AttachmentCreate(
+                    owner_type=owner_type,
+                    owner_id=owner_id,
+                    file_url=blob.file_url,
+                    uri=blob.uri,
+                    filename=item.file_name,
+                    file_size=item.size,
+                    mime_type=file.content_type or "application/octet-stream",
+                    blob_id=blob.id,
+                ))
+                await self.blob_repo.add_references(blob.id)
+                responses.append(AttachmentResponse.model_validate(attachment))
+            # 复用的内容块 URL 可能已过期，返回前统一读时签名
+            await self.url_signer.apply(responses)
+            return responses
         finally:
-            # 删除临时文件
-            if os.path.exists(temp_file_path):
-                os.remove(temp_file_path)
+            for item in spooled:
+                if os.path.exists(item.path):
+                    os.remove(item.path)
 
     async def get_attachments_by_owner(
         self,
@@ -120,7 +170,9 @@ class AttachmentService:
             owner_type=owner_type,
             owner_id=owner_id,
         )
-        return [AttachmentResponse.model_validate(a) for a in attachments]
+        responses = [AttachmentResponse.model_validate(a) for a in attachments]
+        await self.url_signer.apply(responses)
+        return responses
 
     async def delete_attachment(
         self,
@@ -139,4 +191,6 @@ class AttachmentService:
         if not attachment:
             raise ValueError(f"附件不存在: {attachment_id}")
 
+        if attachment.blob_id:
+            await self.blob_repo.release(attachment.blob_id)
         await self.repo.soft_delete(attachment)
@@ -1,8 +1,18 @@
 """
 ES 搜索服务基类，封装索引管理、文档操作、ensure_index 缓存等公共逻辑。
+
+为什么这样做：业务侧只读写 index_name（读别名），物理索引按代际版本化；
+重建时先写满新一代索引并校验文档数，再原子切换别名，读请求永远不会落到半成品索引上。
+特殊逻辑：每代索引的 mapping _meta 里持久化清单（mapping 哈希 + 各数据源行数、updated_at 水位与最大主键），
+启动时只与数据库做一次聚合比对，未漂移的数据源直接跳过，启动耗时与数据量无关；
+重建填充期间 CDC 仍写旧代，切换别名后按填充前的清单统计追平一次，避免这段时间的变更随旧代一起丢失。
 """
 
+import hashlib
+import json
 import logging
+from datetime import datetime, timezone
+from typing import Any, AsyncIterable, Iterable
 
 from elasticsearch import NotFoundError
 from elasticsearch.helpers import async_bulk
@@ -16,9 +26,22 @@ logger = logging.getLogger(__name__)
 
 _ensured_indexes: set[str] = set()
 
+# 物理索引命名：{别名}{分隔符}{UTC 时间戳}，时间戳定长保证字典序即代际先后
+INDEX_GENERATION_SEPARATOR = "_v"
+INDEX_GENERATION_TIME_FORMAT = "%Y%m%d%H%M%S%f"
+# 每个文档写入时打上的同步时间戳，数据源原地刷新后据此清扫残留文档
+SYNCED_AT_FIELD = "synced_at"
+MANIFEST_META_KEY = "charwork_manifest"
+
+
+class IndexGenerationError(RuntimeError):
+    """新一代索引构建或校验失败，别名保持指向旧代。"""
+
 
 class BaseSearchService:
     REINDEX_BULK_CHUNK_SIZE: int = 500
+    # 构建完成后恢复的副本数，None 表示回落到集群默认值
+    INDEX_NUMBER_OF_REPLICAS: int | None = None
 
     def __init__(self, db: AsyncSession):
         self.db = db
@@ -35,12 +58,63 @@ class BaseSearchService:
         await self._create_index()
         _ensured_indexes.add(self.index_name)
 
-    async def _create_index(self) -> None:
+    def _build_index_body(self) -> dict[str, Any]:
+        """返回物理索引的 settings + mappings，由子类实现。"""
         raise NotImplementedError
 
-    async def ensure_index_with_bootstrap(self) -> ReindexResponse | int:
+    async def _create_index(self) -> None:
+        """首次启动时创建第一代物理索引并挂上读别名。"""
+        generation = self._new_generation_name()
+        await self._create_generation(generation, bulk_mode=False)
+        await self._swap_alias(generation)
+
+    async def ensure_index_with_bootstrap(self) -> ReindexResponse:
+        """
+        启动引导：mapping 变化或无清单时全量重建；否则逐数据源比对清单统计，
+        只把漂移的数据源同步到当前别名（见 _catch_up_sources）。
+        """
         await self.ensure_index()
-        return await self.reindex()
+        manifest = await self._read_manifest()
+        if not manifest or manifest.get("mapping_hash") != self._mapping_hash():
+            return await self.reindex()
+        current_sources = await self._collect_source_stats()
+        indexed, failed, drifted = await self._catch_up_sources(manifest.get("sources") or {}, current_sources)
+        if drifted:
+            await self._refresh_index_safe()
+            await self._write_manifest(self.index_name, current_sources)
+        return self._build_reindex_response(indexed, failed)
+
+    async def _catch_up_sources(
+        self,
+        previous_sources: dict[str, dict[str, Any]],
+        current_sources: dict[str, dict[str, Any]],
+    ) -> tuple[int, int, bool]:
+        """
+        把相对 previous_sources 漂移的数据源同步到当前别名，返回 (成功数, 失败数, 是否有漂移)。
+        行数与最大主键都不变时只追平水位之后的变更；否则（含删一插一这种行数不变的情况）
+        原地刷新该数据源并清扫残留文档。主键为递增的雪花 ID，有新插入必然推高最大主键。
+        """
+        indexed = 0
+        failed = 0
+        drifted = False
+        for source, stats in current_sources.items():
+            previous = previous_sources.get(source)
+            if previous == stats:
+                continue
+            drifted = True
+            since = None
+            if (
+                previous
+                and previous.get("watermark")
+                and previous.get("count") == stats["count"]
+                and previous.get("max_id") == stats.get("max_id")
+            ):
+                since = previous["watermark"]
+            logger.info("ES 数据源漂移: index=%s, source=%s, catch_up_since=%s", self.index_name, source, since)
+            success, errors = await self._sync_source(source, since)
+            indexed += success
+            failed += errors
+        return indexed, failed, drifted
 
     async def _delete_document(self, doc_id: str) -> None:
         try:
@@ -51,20 +125,221 @@ class BaseSearchService:
     async def _index_document(self, doc_id: str, document: dict, refresh: bool = False) -> None:
         await self.es.index(index=self.index_name, id=doc_id, document=document, refresh=refresh)
 
-    async def _bulk_index(self, actions: list[dict]) -> tuple[int, int]:
-        if not actions:
-            return 0, 0
+    async def _bulk_index(self, actions: Iterable[dict] | AsyncIterable[dict]) -> tuple[int, int]:
+        """批量写入；actions 可以是列表，也可以是按批产出的（异步）迭代器，async_bulk 会按 chunk 流式消费。"""
+        success, failures = await self._bulk_submit(actions)
+        return success, len(failures)
+
+    async def _bulk_submit(self, actions: Iterable[dict] | AsyncIterable[dict]) -> tuple[int, list[dict]]:
+        """执行 async_bulk，返回 (成功数, 条目级失败明细)。"""
+        if isinstance(actions, list) and not actions:
+            return 0, []
         success, errors = await async_bulk(
             self.es, actions,
             chunk_size=self.REINDEX_BULK_CHUNK_SIZE,
             refresh=False,
             raise_on_error=False,
         )
-        return success, len(errors)
+        # 删除不存在的文档（404）属于幂等结果，不计入失败
+        failures = [error for error in errors if not self._is_missing_delete(error)]
+        for error in failures[:5]:
+            logger.warning("ES bulk 条目写入失败: index=%s, error=%s", self.index_name, error)
+        return success, failures
+
+    async def apply_bulk_actions(self, actions: list[dict]) -> tuple[int, int]:
+        """
+        一次 _bulk 提交混合的 index/delete 动作。
+        传输层异常直接抛出；条目级失败只计数。
+        """
+        return await self._bulk_index(actions)
+
+    async def apply_bulk_actions_with_failures(self, actions: list[dict]) -> tuple[int, set[str]]:
+        """
+        一次 _bulk 提交混合的 index/delete 动作（CDC 微批使用），返回 (成功数, 失败文档 ID)。
+        传输层异常直接抛出；条目级失败（含 429 es_rejected_execution）按文档 ID 返回，调用方只重试对应消息。
+        """
+        success, failures = await self._bulk_submit(actions)
+        return success, {self._failed_document_id(error) for error in failures}
+
+    @staticmethod
+    def _failed_document_id(error: dict) -> str:
+        # 失败明细形如 {"index": {"_id": ..., "status": 429, ...}}
+        for result in error.values() if isinstance(error, dict) else ():
+            if isinstance(result, dict) and result.get("_id") is not None:
+                return str(result["_id"])
+        return ""
+
+    @staticmethod
+    def _is_missing_delete(error: dict) -> bool:
+        delete_result = error.get("delete") if isinstance(error, dict) else None
+        return bool(delete_result) and delete_result.get("status") == 404
+
+    async def reindex(self) -> ReindexResponse:
+        """
+        零停机重建：写入新一代索引 → 恢复刷新与副本 → 校验文档数 → 原子切换别名 → 追平构建期间的变更 → 回收旧代。
+        切换前任一步失败都会删除新一代索引，别名继续指向旧代。
+        """
+        generation = self._new_generation_name()
+        await self._create_generation(generation, bulk_mode=True)
+        try:
+            # 先取统计再写数据，构建期间 CDC 写入的是旧代，切换别名后以这份统计为起点追平
+            source_stats = await self._collect_source_stats()
+            indexed, failed = await self._populate_index(generation)
+            await self._finalize_generation(generation)
+            await self._verify_generation(generation, indexed, failed)
+            await self._write_manifest(generation, source_stats)
+        except Exception:
+            await self._delete_index_safe(generation)
+            raise
+        await self._swap_alias(generation)
+        caught_up, catch_up_failed = await self._catch_up_after_swap(generation, source_stats)
+        await self._cleanup_generations(keep=generation)
+        return self._build_reindex_response(indexed + caught_up, failed + catch_up_failed)
+
+    async def _catch_up_after_swap(self, generation: str, source_stats: dict[str, dict[str, Any]]) -> tuple[int, int]:
+        """
+        别名已指向新一代后，把填充期间只写进旧代的 CDC 变更补写到新一代；
+        失败时清单仍是填充前的统计，下次启动引导会再次识别为漂移。
+        """
+        try:
+            current_sources = await self._collect_source_stats()
+            indexed, failed, drifted = await self._catch_up_sources(source_stats, current_sources)
+            if drifted:
+                await self._refresh_index_safe()
+                await self._write_manifest(generation, current_sources)
+        except Exception:
+            logger.exception("ES 重建后追平变更失败: index=%s, generation=%s", self.index_name, generation)
+            return 0, 0
+        return indexed, failed
+
+    async def _populate_index(self, index: str) -> tuple[int, int]:
+        """把全量文档写入指定物理索引，返回 (成功数, 失败数)，由子类实现。"""
+        raise NotImplementedError
+
+    async def _collect_source_stats(self) -> dict[str, dict[str, Any]]:
+        """返回 {数据源: {"count": 行数, "watermark": 最大 updated_at, "max_id": 最大主键}}，由子类实现。"""
+        return {}
 
-    async def reindex(self) -> ReindexResponse | int:
+    async def _sync_source(self, source: str, since: str | None) -> tuple[int, int]:
+        """
+        把单个数据源同步到当前别名：since 为水位时只写入其后的变更，
+        为 None 时原地全量刷新并清扫残留文档。由子类实现。
+        """
         raise NotImplementedError
 
+    def _mapping_hash(self) -> str:
+        raw = json.dumps(self._build_index_body(), sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    async def _read_manifest(self) -> dict[str, Any] | None:
+        try:
+            response = await self.es.indices.get_mapping(index=self.index_name)
+        except NotFoundError:
+            return None
+        for mapping in response.values():
+            meta = (mapping.get("mappings") or {}).get("_meta") or {}
+            manifest = meta.get(MANIFEST_META_KEY)
+            if manifest:
+                return manifest
+        return None
+
+    async def _write_manifest(self, index: str, source_stats: dict[str, dict[str, Any]]) -> None:
+        manifest = {
+            "mapping_hash": self._mapping_hash(),
+            "sources": source_stats,
+            "written_at": self._sync_timestamp(),
+        }
+        await self.es.indices.put_mapping(index=index, meta={MANIFEST_META_KEY: manifest})
+
+    async def _sweep_stale_documents(self, filters: list[dict[str, Any]], before: str) -> None:
+        """删除匹配 filters 且同步时间早于 before 的文档，即本轮刷新未再写入的已删除行。"""
+        await self._refresh_index_safe()
+        await self.es.delete_by_query(
+            index=self.index_name,
+            query={"bool": {"filter": [*filters, {"range": {SYNCED_AT_FIELD: {"lt": before}}}]}},
+            conflicts="proceed",
+            refresh=True,
+        )
+
+    @staticmethod
+    def _sync_timestamp() -> str:
+        return datetime.now(timezone.utc).isoformat()
+
+    def _new_generation_name(self) -> str:
+        timestamp = datetime.now(timezone.utc).strftime(INDEX_GENERATION_TIME_FORMAT)
+        return f"{self.index_name}{INDEX_GENERATION_SEPARATOR}{timestamp}"
+
+    async def _create_generation(self, index: str, bulk_mode: bool) -> None:
+        """创建物理索引；bulk_mode 下关闭刷新、副本置 0，减少批量写入的段合并与复制开销。"""
+        body = self._build_index_body()
+        index_settings = dict(body.get("settings") or {})
+        if bulk_mode:
+            index_settings["index"] = {
+                **(index_settings.get("index") or {}),
+                "refresh_interval": "-1",
+                "number_of_replicas": 0,
+            }
+        elif self.INDEX_NUMBER_OF_REPLICAS is not None:
+            index_settings["index"] = {
+                **(index_settings.get("index") or {}),
+                "number_of_replicas": self.INDEX_NUMBER_OF_REPLICAS,
+            }
+        await self.es.indices.create(index=index, body={**body, "settings": index_settings})
+
+    async def _finalize_generation(self, index: str) -> None:
+        """恢复刷新间隔与副本数（None 即回落默认值），并强制刷新使文档可计数。"""
+        await self.es.indices.put_settings(
+            index=index,
+            settings={
+                "index": {
+                    "refresh_interval": None,
+                    "number_of_replicas": self.INDEX_NUMBER_OF_REPLICAS,
+                }
+            },
+        )
+        await self.es.indices.refresh(index=index)
+
+    async def _verify_generation(self, index: str, indexed: int, failed: int) -> None:
+        # 部分写入失败也不能切换：缺失的文档不在清单统计里体现，启动引导会把残缺索引当作最新
+        if failed > 0:
+            raise IndexGenerationError(f"新索引 {index} 有文档写入失败：indexed={indexed}, failed={failed}")
+        count_response = await self.es.count(index=index)
+        total = int(count_response.get("count", 0))
+        if total != indexed:
+            raise IndexGenerationError(f"新索引 {index} 文档数校验失败：expected={indexed}, actual={total}")
+
+    async def _swap_alias(self, index: str) -> None:
+        """单次 update_aliases 请求内完成摘旧挂新；兼容别名同名的历史实体索引。"""
+        actions: list[dict[str, Any]] = []
+        if await self.es.indices.exists_alias(name=self.index_name):
+            current = await self.es.indices.get_alias(name=self.index_name)
+            actions.extend({"remove": {"index": name, "alias": self.index_name}} for name in current)
+        elif await self.es.indices.exists(index=self.index_name):
+            # 升级前的实体索引与别名同名，需在同一原子操作中删除
+            actions.append({"remove_index": {"index": self.index_name}})
+        actions.append({"add": {"index": index, "alias": self.index_name}})
+        await self.es.indices.update_aliases(actions=actions)
+        _ensured_indexes.add(self.index_name)
+
+    async def _cleanup_generations(self, keep: str) -> None:
+        """删除早于 keep 的历史代际；更晚的代际可能正由其他进程构建，保持不动。"""
+        pattern = f"{self.index_name}{INDEX_GENERATION_SEPARATOR}*"
+        try:
+            generations = await self.es.indices.get_alias(index=pattern)
+        except NotFoundError:
+            return
+        for name in sorted(generations):
+            if name < keep:
+                await self._delete_index_safe(name)
+
+    async def _delete_index_safe(self, index: str) -> None:
+        try:
+            await self.es.indices.delete(index=index)
+        except NotFoundError:
+            return
+        except Exception:
+            logger.exception("ES 删除索引失败: %s", index)
+
     async def _refresh_index_safe(self) -> None:
         """安全刷新索引，失败时仅记录日志。"""
         try:
@@ -9,6 +9,8 @@ from app.models.course import Course
 from app.repositories.course_repo import CourseRepository
 from app.repositories.teaching_class_repo import TeachingClassRepository
 from app.schemas.course import CourseCreate, CourseListResponse, CourseResponse, CourseUpdate
+from app.services.permission_context_service import COURSE_CLASSES_CHANGED_EVENT, add_permission_change_event
+from app.tasks.notification_tasks import publish_outbox_events
 from app.utils.pagination import build_paged_response
 
 
@@ -24,6 +26,7 @@ class CourseService:
         返回值：
             None: 无返回值。
         """
+        self.db = db
         self.repo = CourseRepository(db)
         self.teaching_class_repo = TeachingClassRepository(db)
 
@@ -127,6 +130,12 @@ class CourseService:
                 if tc.teacher_id != teacher_id:
                     raise ValueError("仅可关联本人教学班级")
         item = await self.repo.create(course_in, teacher_id, teaching_class_ids)
+        if teaching_class_ids:
+            await add_permission_change_event(
+                self.db, COURSE_CLASSES_CHANGED_EVENT, "course", item.id, teaching_class_ids=teaching_class_ids,
+            )
+            await self.repo.save()
+            publish_outbox_events.delay()
         # 重新查询以加载关系
         return await self.get_course(item.id)
 
@@ -139,6 +148,7 @@ class CourseService:
         item = await self.repo.get(id)
         if not item:
             return None
+        previous_class_ids = [link.teaching_class_id for link in (item.class_links or [])]
         updated = await self.repo.update(item, course_in)
         if course_in.teaching_class_ids is not None:
             if course_in.teaching_class_ids:
@@ -150,7 +160,16 @@ class CourseService:
                         raise ValueError("仅可关联本人教学班级")
             await self.repo.set_teaching_classes(id, course_in.teaching_class_ids)
             updated.teaching_class_id = course_in.teaching_class_ids[0] if course_in.teaching_class_ids else None
+            # 新旧班级的成员可见课程都可能变化
+            await add_permission_change_event(
+                self.db,
+                COURSE_CLASSES_CHANGED_EVENT,
+                "course",
+                id,
+                teaching_class_ids=[*previous_class_ids, *course_in.teaching_class_ids],
+            )
             await self.repo.save()
+            publish_outbox_events.delay()
         return await self.get_course(updated.id)
 
     @staticmethod
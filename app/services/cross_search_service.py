@@ -1,52 +1,86 @@
 """
 为什么这样做：跨模块检索统一落 ES 全局索引，屏蔽各业务表差异，提供一致检索入口。
-特殊逻辑：索引只做召回，最终可见性按当前用户角色与业务归属二次过滤。
+特殊逻辑：可见性规则按模块拼进 ES 查询，命中即可见，分页与总数不会被二次过滤打乱；
+翻页使用 point-in-time + search_after 游标，深翻页耗时与页码无关；
+首页直接查别名，只有确实存在下一页时才打开 PIT，大多数只看首页的检索不会在集群上留下待过期的上下文。
 """
 
+import asyncio
+import base64
+import hashlib
+import json
 import logging
-from typing import Optional
+import unicodedata
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
 
+from elasticsearch import NotFoundError
+from pypinyin import Style, lazy_pinyin
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.redis_client import get_redis
 from app.core.security import SessionUser
-from app.models.user import UserRole
-from app.repositories.course_repo import CourseRepository
-from app.repositories.student_repo import StudentRepository
-from app.repositories.teaching_class_repo import TeachingClassRepository
-from app.schemas.search import CrossSearchResponse, PermissionContext, SearchHit, ReindexResponse
-from app.services.base_search_service import BaseSearchService
-from app.services.search_registry import SearchDocument, get_enabled_search_module_configs
+from app.schemas.search import CrossSearchResponse, PermissionContext, SearchHit
+from app.services.base_search_service import SYNCED_AT_FIELD, BaseSearchService
+from app.services.search_registry import (
+    SearchDocument,
+    SearchModuleConfig,
+    build_module_documents,
+    get_enabled_search_module_configs,
+    iter_module_batches,
+    load_module_items,
+    load_module_stats,
+)
+from app.utils.redis_cache import build_cache_key, cache_get, cache_set
 
 
 logger = logging.getLogger(__name__)
 
-# 权限检查字典：模块 → 判断函数(source, user_id/course_ids)
-_TEACHER_PERMISSION_CHECK: dict[str, callable] = {
-    "assignment": lambda s, u: s.get("teacher_user_id") == u,
-    "course": lambda s, u: s.get("teacher_user_id") == u,
-    "teaching_class": lambda s, u: s.get("teacher_user_id") == u,
-    "discussion": lambda s, u: s.get("teacher_user_id") == u,
-    "student": lambda s, u: u in (s.get("teacher_user_ids") or []),
-    "hanzi": lambda s, u: s.get("created_by_user_id") in {None, "", u},
-}
-
-# 学生权限判断：额外传入 course_ids, class_ids, current_user_id
-
-
-def _student_permission_check(source: dict, user_id: str, course_ids: set, class_ids: set) -> bool:
-    module = str(source.get("module") or "")
-    if module == "student":
-        return str(source.get("student_user_id") or "") == user_id
-    if module == "hanzi":
-        return not source.get("created_by_user_id")
-    if module in {"assignment", "discussion"}:
-        return str(source.get("course_id") or "") in course_ids
-    if module == "course":
-        return str(source.get("source_id") or "") in course_ids
-    if module == "teaching_class":
-        return str(source.get("source_id") or "") in class_ids
-    return False
+HIGHLIGHT_FRAGMENT_SIZE = 120
+# 排序键在有无 PIT 时都可用（_shard_doc 只能配合 PIT），首页的 sort 值可直接作为 PIT 翻页的 search_after；
+# source_id 为全局唯一的雪花 ID，保证排序稳定
+SEARCH_SORT = ({"_score": "desc"}, {"module": "asc"}, {"source_id": "asc"})
+# 参与权限过滤的字段必须是 keyword，动态映射出的 text 字段无法精确匹配
+PERMISSION_KEYWORD_FIELDS = (
+    "course_id",
+    "teacher_user_id",
+    "teacher_user_ids",
+    "student_user_id",
+    "created_by_user_id",
+    "teaching_class_id",
+    "target_type",
+)
+
+
+SUGGEST_FIELD = "suggest"
+SUGGEST_CONTEXT = "scope"
+SUGGEST_MAX_PREFIX_LENGTH = 50
+# 同一前缀 + 权限指纹的并发建议请求共享一次 ES 调用
+_inflight_suggestions: dict[str, asyncio.Future] = {}
+
+
+class SearchCursorError(ValueError):
+    """游标无法解析、与当前查询不匹配或 point-in-time 已过期。"""
+
+
+def _module_clause(modules: list[str], condition: dict) -> dict:
+    return {"bool": {"filter": [{"terms": {"module": modules}}, condition]}}
+
+
+def _suggest_scope(module: str, principal: str) -> str:
+    return f"{module}|{principal}"
+
+
+async def _coalesce(key: str, factory: Callable[[], Awaitable[Any]]) -> Any:
+    """相同 key 的并发调用只执行一次 factory，其余调用等待同一结果。"""
+    future = _inflight_suggestions.get(key)
+    if future is None:
+        future = asyncio.ensure_future(factory())
+        _inflight_suggestions[key] = future
+        future.add_done_callback(lambda _: _inflight_suggestions.pop(key, None))
+    # shield 避免某个调用方断开时取消其他调用方共享的请求
+    return await asyncio.shield(future)
 
 
 class CrossSearchService(BaseSearchService):
@@ -55,38 +89,47 @@ class CrossSearchService(BaseSearchService):
         self.index_name = f"{settings.ELASTICSEARCH_INDEX_PREFIX}_global_search"
         self.module_configs = get_enabled_search_module_configs()
 
-    async def _create_index(self) -> None:
-        await self.es.indices.create(
-            index=self.index_name,
-            body={
-                "settings": {
-                    "analysis": {
-                        "analyzer": {
-                            "charwork_ngram_analyzer": {
-                                "tokenizer": "charwork_ngram_tokenizer",
-                                "filter": ["lowercase"],
-                            }
+    def _build_index_body(self) -> dict:
+        return {
+            "settings": {
+                "analysis": {
+                    "analyzer": {
+                        "charwork_ngram_analyzer": {
+                            "tokenizer": "charwork_ngram_tokenizer",
+                            "filter": ["lowercase"],
                         },
-                        "tokenizer": {
-                            "charwork_ngram_tokenizer": {
-                                "type": "ngram",
-                                "min_gram": 1,
-                                "max_gram": 2,
-                                "token_chars": ["letter", "digit"],
-                            }
+                        "keyword_lowercase_analyzer": {
+                            "tokenizer": "keyword",
+                            "filter": ["lowercase"],
                         },
-                    }
-                },
-                "mappings": {
-                    "properties": {
-                        "module": {"type": "keyword"},
-                        "source_id": {"type": "keyword"},
-                        "title": {"type": "text", "analyzer": "charwork_ngram_analyzer"},
-                        "content": {"type": "text", "analyzer": "charwork_ngram_analyzer"},
-                    }
-                },
+                    },
+                    "tokenizer": {
+                        "charwork_ngram_tokenizer": {
+                            "type": "ngram",
+                            "min_gram": 1,
+                            "max_gram": 2,
+                            "token_chars": ["letter", "digit"],
+                        }
+                    },
+                }
             },
-        )
+            "mappings": {
+                "properties": {
+                    "module": {"type": "keyword"},
+                    "source_id": {"type": "keyword"},
+                    "title": {"type": "text", "analyzer": "charwork_ngram_analyzer"},
+                    "content": {"type": "text", "analyzer": "charwork_ngram_analyzer"},
+                    SYNCED_AT_FIELD: {"type": "date"},
+                    **{field_name: {"type": "keyword"} for field_name in PERMISSION_KEYWORD_FIELDS},
+                    SUGGEST_FIELD: {
+                        "type": "completion",
+                        "analyzer": "keyword_lowercase_analyzer",
+                        "preserve_separators": False,
+                        "contexts": [{"name": SUGGEST_CONTEXT, "type": "category"}],
+                    },
+                }
+            },
+        }
 
     def _build_payload(self, document: SearchDocument) -> dict:
         payload = {
@@ -94,64 +137,159 @@ class CrossSearchService(BaseSearchService):
             "source_id": document.source_id,
             "title": document.title,
             "content": document.content,
+            SYNCED_AT_FIELD: self._sync_timestamp(),
         }
         payload.update(document.extra_fields)
+        suggest_inputs = self._build_suggest_inputs(document.title)
+        if suggest_inputs:
+            payload[SUGGEST_FIELD] = {
+                "input": suggest_inputs,
+                "contexts": {SUGGEST_CONTEXT: self._build_document_suggest_scopes(payload)},
+            }
         return payload
 
-    async def reindex(self) -> ReindexResponse:
-        await self.ensure_index()
+    @staticmethod
+    def _build_suggest_inputs(title: str) -> list[str]:
+        """标题原文 + 全拼 + 拼音首字母，满足汉字前缀与拼音输入两种联想方式。"""
+        title = (title or "").strip()[:SUGGEST_MAX_PREFIX_LENGTH]
+        if not title:
+            return []
+        inputs = [title]
+        for style in (Style.NORMAL, Style.FIRST_LETTER):
+            converted = "".join(lazy_pinyin(title, style=style, errors="ignore"))
+            if converted and converted not in inputs:
+                inputs.append(converted)
+        return inputs
+
+    @staticmethod
+    def _build_document_suggest_scopes(payload: dict) -> list[str]:
+        """
+        文档侧建议上下文：模块名本身（管理员使用）加上 "模块|主体" 组合，
+        与 _build_suggest_scopes 的查询侧规则一一对应。
+        """
+        module = str(payload.get("module") or "")
+        principals: list[str] = []
+        if payload.get("teacher_user_id"):
+            principals.append(f"teacher:{payload['teacher_user_id']}")
+        principals.extend(f"teacher:{user_id}" for user_id in payload.get("teacher_user_ids") or [])
+        if payload.get("course_id"):
+            principals.append(f"course:{payload['course_id']}")
+        if module == "course":
+            principals.append(f"course:{payload['source_id']}")
+        elif module == "teaching_class":
+            principals.append(f"class:{payload['source_id']}")
+        if payload.get("student_user_id"):
+            principals.append(f"student:{payload['student_user_id']}")
+        if "created_by_user_id" in payload:
+            creator = payload.get("created_by_user_id")
+            principals.append(f"owner:{creator}" if creator else "public")
+        return [module, *dict.fromkeys(_suggest_scope(module, principal) for principal in principals)]
+
+    async def _populate_index(self, index: str) -> tuple[int, int]:
         indexed = 0
         failed = 0
         for table, config in self.module_configs.items():
-            context = await config.preload(self.db) if config.preload else {}
-            items = await config.load_all(self.db)
-            actions = []
-            for item in items:
-                document = await config.build_document(self.db, item, context)
-                if not document:
-                    continue
-                actions.append({
+            success, errors = await self._index_module(index, table, config)
+            indexed += success
+            failed += errors
+        return indexed, failed
+
+    async def _collect_source_stats(self) -> dict[str, dict[str, Any]]:
+        return {table: await load_module_stats(self.db, config) for table, config in self.module_configs.items()}
+
+    async def _sync_source(self, source: str, since: str | None) -> tuple[int, int]:
+        config = self.module_configs[source]
+        if since:
+            return await self._index_module(self.index_name, source, config, since=datetime.fromisoformat(since))
+        started_at = self._sync_timestamp()
+        success, errors = await self._index_module(self.index_name, source, config)
+        # 有写入失败时不清扫，避免把未能刷新的存量文档当作残留删掉
+        if errors == 0:
+            await self._sweep_stale_documents([{"term": {"module": config.module}}], started_at)
+        return success, errors
+
+    async def _index_module(
+        self,
+        index: str,
+        table: str,
+        config: SearchModuleConfig,
+        since: datetime | None = None,
+    ) -> tuple[int, int]:
+        """按批读取 → 按批预加载 → 构建文档，以流的形式交给 async_bulk，峰值内存只与批大小相关。"""
+        progress = {"batches": 0, "rows": 0, "documents": 0}
+        try:
+            return await self._bulk_index(self._iter_module_actions(index, table, config, since, progress))
+        except Exception:
+            logger.exception("ES bulk 写入失败: module=%s", config.module)
+            return 0, progress["documents"]
+        finally:
+            logger.info(
+                "ES 模块索引完成: module=%s, batches=%d, rows=%d, documents=%d",
+                config.module, progress["batches"], progress["rows"], progress["documents"],
+            )
+
+    async def _iter_module_actions(
+        self,
+        index: str,
+        table: str,
+        config: SearchModuleConfig,
+        since: datetime | None,
+        progress: dict[str, int],
+    ) -> AsyncIterator[dict]:
+        async for items in iter_module_batches(self.db, config, since=since):
+            documents = await build_module_documents(self.db, config, items)
+            progress["batches"] += 1
+            progress["rows"] += len(items)
+            progress["documents"] += len(documents)
+            logger.info(
+                "ES 模块索引进度: module=%s, batch=%d, rows=%d, documents=%d",
+                config.module, progress["batches"], progress["rows"], progress["documents"],
+            )
+            for document in documents:
+                yield {
                     "_op_type": "index",
-                    "_index": self.index_name,
+                    "_index": index,
                     "_id": self._build_document_id(table, document.source_id),
                     "_source": self._build_payload(document),
-                })
-            if not actions:
-                continue
-            try:
-                success, errors = await self._bulk_index(actions)
-                indexed += success
-                failed += errors
-            except Exception:
-                logger.exception("ES bulk 写入失败: module=%s", config.module)
-                failed += len(actions)
-        if indexed > 0:
-            await self._refresh_index_safe()
-        return self._build_reindex_response(indexed, failed)
+                }
 
     async def apply_cdc_change(self, table: str, operation: str, data: dict) -> None:
-        await self.ensure_index()
-        operation = (operation or "").lower()
         source_id = data.get("id")
         if not source_id:
             return
+        actions = await self.build_cdc_actions(table, {str(source_id): (operation or "").lower()})
+        await self.apply_bulk_actions(actions)
+
+    async def build_cdc_actions(self, table: str, changes: dict[str, str]) -> list[dict]:
+        """
+        把同一张表已合并的变更 {source_id: operation} 转成 bulk 动作：
+        一次主键批量查询 + 一次按批预加载，库中已不存在或不再可索引的行转为删除。
+        """
+        await self.ensure_index()
         config = self.module_configs.get(table)
         if not config:
             logger.warning("跨模块检索收到未注册或未启用的表变更：%s", table)
-            return
-        doc_id = self._build_document_id(table, str(source_id))
-        if operation == "delete":
-            await self._delete_document(doc_id)
-            return
-        item = await config.load_one(self.db, str(source_id))
-        if not item:
-            await self._delete_document(doc_id)
-            return
-        document = await config.build_document(self.db, item, {})
-        if not document:
-            await self._delete_document(doc_id)
-            return
-        await self._index_document(doc_id, self._build_payload(document))
+            return []
+        upsert_ids = [source_id for source_id, operation in changes.items() if operation != "delete"]
+        items = await load_module_items(self.db, config, upsert_ids)
+        documents = {
+            str(document.source_id): document
+            for document in await build_module_documents(self.db, config, items)
+        }
+        actions: list[dict] = []
+        for source_id in changes:
+            doc_id = self._build_document_id(table, source_id)
+            document = documents.get(source_id)
+            if document:
+                actions.append({
+                    "_op_type": "index",
+                    "_index": self.index_name,
+                    "_id": doc_id,
+                    "_source": self._build_payload(document),
+                })
+            else:
+                actions.append({"_op_type": "delete", "_index": self.index_name, "_id": doc_id})
+        return actions
 
     async def search(
         self,
@@ -160,135 +298,273 @@ class CrossSearchService(BaseSearchService):
         modules: Optional[list[str]] = None,
         limit: int = 20,
         permission_ctx: PermissionContext | None = None,
+        cursor: str | None = None,
     ) -> CrossSearchResponse:
+        """
+        功能描述：
+            跨模块检索：首页直接检索，有下一页时才打开 point-in-time，之后按游标 search_after 翻页；
+            返回精确总数、按模块分面计数与标题/正文高亮。
+
+        参数：
+            keyword (str): 检索关键词。
+            current_user (SessionUser): 当前登录用户。
+            modules (Optional[list[str]]): 限定模块，只影响命中列表，不影响分面。
+            limit (int): 每页条数。
+            permission_ctx (PermissionContext | None): 权限上下文。
+            cursor (str | None): 上一页返回的 next_cursor。
+
+        返回值：
+            CrossSearchResponse: 返回当前页结果与下一页游标。
+        """
         await self.ensure_index()
         allowed_modules = self._normalize_requested_modules(modules)
-        must = [
-            {
-                "multi_match": {
-                    "query": keyword,
-                    "fields": ["title^2", "content"],
-                }
-            }
-        ]
+        query_key = self._build_query_key(keyword, allowed_modules, permission_ctx)
+        pit_id, search_after = self._decode_cursor(cursor, query_key) if cursor else (None, None)
         filter_query: list[dict] = []
-        if allowed_modules:
-            filter_query.append({"terms": {"module": allowed_modules}})
-        # 接入权限过滤，ES 直接返回用户可见结果
         if permission_ctx:
             filter_query.extend(self._build_permission_filter(permission_ctx))
-        response = await self.es.search(
-            index=self.index_name,
-            body={
-                "query": {
-                    "bool": {
-                        "must": must,
-                        "filter": filter_query,
-                    }
+        body: dict[str, Any] = {
+            "query": {
+                "bool": {
+                    "must": [{"multi_match": {"query": keyword, "fields": ["title^2", "content"]}}],
+                    "filter": filter_query,
+                }
+            },
+            "size": limit,
+            "sort": list(SEARCH_SORT),
+            "track_total_hits": True,
+            "aggs": {"modules": {"terms": {"field": "module", "size": max(len(self.module_configs), 1)}}},
+            "highlight": {
+                "pre_tags": ["<em>"],
+                "post_tags": ["</em>"],
+                "fields": {
+                    "title": {"number_of_fragments": 0},
+                    "content": {"fragment_size": HIGHLIGHT_FRAGMENT_SIZE, "number_of_fragments": 2},
                 },
-                "size": limit,
             },
+        }
+        if allowed_modules:
+            # 模块筛选放在 post_filter，分面仍统计全部可见模块
+            body["post_filter"] = {"terms": {"module": allowed_modules}}
+        if search_after is not None:
+            body["search_after"] = search_after
+        if pit_id is None:
+            response = await self.es.search(index=self.index_name, body=body)
+        else:
+            body["pit"] = {"id": pit_id, "keep_alive": settings.SEARCH_PIT_KEEP_ALIVE}
+            try:
+                response = await self.es.search(body=body)
+            except NotFoundError as exc:
+                raise SearchCursorError("检索游标已过期，请重新检索") from exc
+        hits_data = response.get("hits", {})
+        hits = hits_data.get("hits", [])
+        total = int((hits_data.get("total") or {}).get("value", 0))
+        next_cursor = None
+        if pit_id is None:
+            if hits and total > len(hits):
+                pit_id = await self._open_point_in_time()
+                next_cursor = self._encode_cursor(pit_id, hits[-1].get("sort") or [], query_key)
+        else:
+            pit_id = response.get("pit_id") or pit_id
+            if len(hits) >= limit and hits:
+                next_cursor = self._encode_cursor(pit_id, hits[-1].get("sort") or [], query_key)
+            else:
+                await self._close_point_in_time(pit_id)
+        buckets = (response.get("aggregations") or {}).get("modules", {}).get("buckets", [])
+        return CrossSearchResponse(
+            keyword=keyword,
+            total=total,
+            items=[self._to_search_hit(hit) for hit in hits],
+            facets={str(bucket["key"]): int(bucket["doc_count"]) for bucket in buckets},
+            next_cursor=next_cursor,
         )
-        hits = response.get("hits", {}).get("hits", [])
-        items = [self._to_search_hit(hit) for hit in hits[:limit]]
-        return CrossSearchResponse(keyword=keyword, total=len(items), items=items)
+
+    async def _open_point_in_time(self) -> str:
+        response = await self.es.open_point_in_time(index=self.index_name, keep_alive=settings.SEARCH_PIT_KEEP_ALIVE)
+        return response["id"]
+
+    async def _close_point_in_time(self, pit_id: str) -> None:
+        try:
+            await self.es.close_point_in_time(id=pit_id)
+        except Exception:
+            # 关闭失败不影响结果，PIT 会在 keep_alive 到期后自动释放
+            logger.debug("关闭检索 point-in-time 失败", exc_info=True)
+
+    @staticmethod
+    def _build_query_key(
+        keyword: str,
+        modules: list[str] | None,
+        permission_ctx: PermissionContext | None,
+    ) -> str:
+        """游标与查询条件绑定，防止换了关键词或身份后沿用旧游标得到错位结果。"""
+        raw = json.dumps(
+            [keyword, sorted(modules or []), permission_ctx.fingerprint() if permission_ctx else None],
+            ensure_ascii=False,
+        )
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:16]
+
+    @staticmethod
+    def _encode_cursor(pit_id: str, search_after: list, query_key: str) -> str:
+        raw = json.dumps({"pit": pit_id, "after": search_after, "q": query_key}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+    @staticmethod
+    def _decode_cursor(cursor: str, query_key: str) -> tuple[str, list]:
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            pit_id, search_after, cursor_key = payload["pit"], payload["after"], payload["q"]
+        except (ValueError, KeyError, TypeError) as exc:
+            raise SearchCursorError("检索游标无效") from exc
+        if cursor_key != query_key or not isinstance(search_after, list):
+            raise SearchCursorError("检索游标与当前查询条件不匹配")
+        return pit_id, search_after
 
     async def suggest(
-        self, q: str, current_user: SessionUser,
-        modules: list[str] | None = None, limit: int = 10,
+        self,
+        q: str,
+        current_user: SessionUser,
+        modules: list[str] | None = None,
+        limit: int = 10,
+        permission_ctx: PermissionContext | None = None,
     ) -> list[dict]:
-        """实时搜索建议，支持拼音首字母和部分汉字匹配。"""
-        await self.ensure_index()
+        """
+        功能描述：
+            实时搜索建议：completion suggester 按权限上下文召回，支持拼音、拼音首字母和汉字前缀；
+            结果按“前缀 + 权限指纹”短期缓存，并发的相同请求合并为一次 ES 调用。
+
+        参数：
+            q (str): 用户已输入的前缀。
+            current_user (SessionUser): 当前登录用户。
+            modules (list[str] | None): 限定模块。
+            limit (int): 最多返回条数。
+            permission_ctx (PermissionContext | None): 权限上下文，为空时不做权限裁剪。
+
+        返回值：
+            list[dict]: 建议列表，每项包含 module、id、title。
+        """
+        prefix = self._normalize_suggest_prefix(q)
+        if not prefix:
+            return []
         allowed_modules = self._normalize_requested_modules(modules)
-        filter_query: list[dict] = []
-        if allowed_modules:
-            filter_query.append({"terms": {"module": allowed_modules}})
+        scopes = self._build_suggest_scopes(permission_ctx, allowed_modules)
+        if scopes == []:
+            return []
+        cache_key = build_cache_key(
+            "search:suggest",
+            permission_ctx.fingerprint() if permission_ctx else "-",
+            ",".join(sorted(allowed_modules or [])) or "*",
+            str(limit),
+            prefix,
+        )
+
+        async def load() -> list[dict]:
+            redis = get_redis()
+            cached = await cache_get(redis, cache_key)
+            if cached is not None:
+                return cached
+            suggestions = await self._query_suggestions(prefix, scopes, limit)
+            await cache_set(redis, cache_key, suggestions, ttl=settings.SEARCH_SUGGEST_CACHE_TTL)
+            return suggestions
+
+        return await _coalesce(cache_key, load)
+
+    async def _query_suggestions(self, prefix: str, scopes: list[str] | None, limit: int) -> list[dict]:
+        await self.ensure_index()
+        completion: dict[str, Any] = {"field": SUGGEST_FIELD, "size": limit}
+        if scopes is not None:
+            completion["contexts"] = {SUGGEST_CONTEXT: scopes}
         response = await self.es.search(
             index=self.index_name,
             body={
-                "query": {
-                    "bool": {
-                        "must": [{"match_phrase_prefix": {"title": q}}],
-                        "filter": filter_query,
-                    }
-                },
-                "size": limit,
+                "suggest": {"title_suggest": {"prefix": prefix, "completion": completion}},
                 "_source": ["module", "source_id", "title"],
             },
         )
-        hits = response.get("hits", {}).get("hits", [])
-        return [{"module": h["_source"]["module"], "id": h["_source"]
-                 ["source_id"], "title": h["_source"]["title"]} for h in hits]
-
-    async def _filter_hits_by_permissions(
-        self,
-        hits: list[dict],
-        current_user: SessionUser,
-        modules: list[str] | None,
-    ) -> list[dict]:
-        if current_user.role == UserRole.ADMIN:
-            return self._filter_by_modules(hits, modules)
-        if current_user.role == UserRole.TEACHER:
-            return self._filter_teacher_hits(hits, current_user.id, modules)
-        student = await StudentRepository(self.db).get_by_user_id(current_user.id)
-        if not student:
-            return []
-        course_ids = set(await CourseRepository(self.db).list_ids_for_student(student.id))
-        class_ids = set(await TeachingClassRepository(self.db).list_ids_for_student(student.id))
-        filtered_hits: list[dict] = []
-        for hit in hits:
-            source = hit.get("_source", {})
-            module = str(source.get("module") or "")
-            if modules and module not in modules:
-                continue
-            if _student_permission_check(source, current_user.id, course_ids, class_ids):
-                filtered_hits.append(hit)
-        return filtered_hits
+        suggestions: list[dict] = []
+        seen_ids: set[str] = set()
+        for entry in (response.get("suggest") or {}).get("title_suggest", []):
+            for option in entry.get("options", []):
+                if option["_id"] in seen_ids:
+                    continue
+                seen_ids.add(option["_id"])
+                source = option["_source"]
+                suggestions.append({"module": source["module"], "id": source["source_id"], "title": source["title"]})
+        return suggestions[:limit]
 
     @staticmethod
-    def _filter_by_modules(hits: list[dict], modules: list[str] | None) -> list[dict]:
-        if not modules:
-            return hits
-        return [hit for hit in hits if hit.get("_source", {}).get("module") in modules]
+    def _normalize_suggest_prefix(q: str) -> str:
+        normalized = " ".join(unicodedata.normalize("NFKC", q or "").split()).lower()
+        return normalized[:SUGGEST_MAX_PREFIX_LENGTH]
 
-    def _filter_teacher_hits(
+    def _build_suggest_scopes(
         self,
-        hits: list[dict],
-        teacher_user_id: str,
+        ctx: PermissionContext | None,
         modules: list[str] | None,
-    ) -> list[dict]:
-        filtered_hits: list[dict] = []
-        for hit in self._filter_by_modules(hits, modules):
-            source = hit.get("_source", {})
-            module = str(source.get("module") or "")
-            check = _TEACHER_PERMISSION_CHECK.get(module)
-            if check and check(source, teacher_user_id):
-                filtered_hits.append(hit)
-        return filtered_hits
+    ) -> list[str] | None:
+        """
+        查询侧建议上下文，规则与 _build_permission_filter 保持一致。
+        返回 None 表示不限上下文；返回空列表表示当前用户没有任何可见建议。
+        """
+        if ctx is None or ctx.role == "admin":
+            return modules
+        principals: dict[str, list[str]] = {}
+        if ctx.role == "teacher" and ctx.user_id:
+            teacher = f"teacher:{ctx.user_id}"
+            for module in ("assignment", "course", "teaching_class", "discussion", "student"):
+                principals[module] = [teacher]
+            principals["hanzi"] = ["public", f"owner:{ctx.user_id}"]
+            principals["dataset"] = [f"owner:{ctx.user_id}"]
+        elif ctx.role == "student":
+            courses = [f"course:{course_id}" for course_id in ctx.course_ids]
+            for module in ("assignment", "discussion", "course"):
+                principals[module] = courses
+            principals["teaching_class"] = [f"class:{class_id}" for class_id in ctx.class_ids]
+            principals["student"] = [f"student:{ctx.student_user_id}"] if ctx.student_user_id else []
+            principals["hanzi"] = ["public"]
+        target_modules = modules or [config.module for config in self.module_configs.values()]
+        return [
+            _suggest_scope(module, principal)
+            for module in target_modules
+            for principal in principals.get(module, [])
+        ]
 
     @staticmethod
     def _build_permission_filter(ctx: "PermissionContext") -> list[dict]:
-        """根据用户角色构建 ES 权限 filter 子句。"""
+        """
+        根据用户角色构建 ES 权限 filter 子句。
+        每条可见性规则都限定在对应模块内，避免某模块缺少字段时被其他模块的规则误放行。
+        """
         if ctx.role == "admin":
             return []
 
         should: list[dict] = []
+        public_hanzi = {
+            "bool": {
+                "should": [
+                    {"bool": {"must_not": {"exists": {"field": "created_by_user_id"}}}},
+                    {"term": {"created_by_user_id": ""}},
+                ],
+                "minimum_should_match": 1,
+            }
+        }
 
-        if ctx.role == "teacher":
-            # teacher_user_id 直接匹配：assignment / course / teaching_class / discussion
-            should.append({"term": {"teacher_user_id": ctx.user_id}})
-            # student 模块：teacher_user_ids 包含当前教师
-            should.append({"term": {"teacher_user_ids": ctx.user_id}})
-            # hanzi 模块：created_by_user_id 为空或为本人
-            should.append({"bool": {"must_not": {"exists": {"field": "created_by_user_id"}}}})
-            should.append({"term": {"created_by_user_id": ctx.user_id}})
+        if ctx.role == "teacher" and ctx.user_id:
+            should.append(_module_clause(
+                ["assignment", "course", "teaching_class", "discussion"],
+                {"term": {"teacher_user_id": ctx.user_id}},
+            ))
+            should.append(_module_clause(["student"], {"term": {"teacher_user_ids": ctx.user_id}}))
+            should.append(_module_clause(["hanzi"], public_hanzi))
+            should.append(_module_clause(["hanzi", "dataset"], {"term": {"created_by_user_id": ctx.user_id}}))
         elif ctx.role == "student":
             if ctx.course_ids:
-                should.append({"terms": {"course_id": ctx.course_ids}})
+                should.append(_module_clause(["assignment", "discussion"], {"terms": {"course_id": ctx.course_ids}}))
+                should.append(_module_clause(["course"], {"terms": {"source_id": ctx.course_ids}}))
+            if ctx.class_ids:
+                should.append(_module_clause(["teaching_class"], {"terms": {"source_id": ctx.class_ids}}))
             if ctx.student_user_id:
-                should.append({"term": {"student_user_id": ctx.student_user_id}})
-            # hanzi 模块：created_by_user_id 为空（公共汉字）
-            should.append({"bool": {"must_not": {"exists": {"field": "created_by_user_id"}}}})
+                should.append(_module_clause(["student"], {"term": {"student_user_id": ctx.student_user_id}}))
+            should.append(_module_clause(["hanzi"], public_hanzi))
 
         if not should:
             return [{"match_none": {}}]
@@ -307,6 +583,7 @@ class CrossSearchService(BaseSearchService):
 
     def _to_search_hit(self, hit: dict) -> SearchHit:
         source = hit["_source"]
+        highlights = hit.get("highlight") or {}
         target_type = str(source.get("target_type") or source["module"])
         return SearchHit(
             module=source["module"],
@@ -316,6 +593,7 @@ class CrossSearchService(BaseSearchService):
             content=source["content"],
             target_type=target_type,
             url=self._build_hit_url(source["module"], source["source_id"]),
+            highlights={field_name: list(fragments) for field_name, fragments in highlights.items()},
         )
 
     @staticmethod
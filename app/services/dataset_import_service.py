@@ -1,5 +1,5 @@
 """
-数据集导入服务：并行上传 → 5x5 合并 OCR → pandas 批量处理 → ORM bulk insert。
+数据集导入服务：并行上传 → 自适应网格合并 OCR → pandas 批量处理 → ORM bulk insert。
 """
 
 import json
@@ -16,9 +16,9 @@ from sqlalchemy import insert, select
 from app.core.redis_client import get_sync_redis
 from app.models.hanzi import Hanzi
 from app.models.hanzi_dictionary import HanziDataset, DatasetHanziRelation, HanziDictionary
+from app.services.ocr_client import run_with_ocr_clients
 from app.services.ocr_service import OCRService
-from app.utils.hanzi_dictionary_parser import resolve_pinyin
-from app.utils.image_utils import merge_images
+from app.utils.hanzi_dictionary_parser import resolve_pinyin_series
 
 logger = logging.getLogger(__name__)
 
@@ -26,12 +26,9 @@ SUPPORTED_EXTS = {".png", ".jpg", ".jpeg", ".bmp", ".webp"}
 REDIS_PROGRESS_PREFIX = "dataset_import:progress:"
 REDIS_TTL = 3600
 BATCH_SIZE = 1000
-GRID_SIZE = (5, 5)
-GRID_BATCH = GRID_SIZE[0] * GRID_SIZE[1]
 
-# 上传不限并发，OCR 限流
+# 上传不限并发；OCR 的网格并发与限速见 OCR_GRID_CONCURRENCY / OCR_QPS
 UPLOAD_THREADS = 20
-OCR_THREADS = 1  # 合并后单张识别，不需要多线程
 
 
 def _safe_int(val) -> int:
@@ -70,34 +67,6 @@ def _upload_one(path: str, ocr: OCRService) -> dict:
         return {"path": path, "url": "", "uri": "", "status": "failed"}
 
 
-def _ocr_merged(image_paths: list[str], ocr: OCRService) -> list[str]:
-    """合并 5x5 → OCR → 返回字符列表（按网格顺序）"""
-    merged_paths = merge_images(image_paths, grid_size=GRID_SIZE)
-    all_chars: list[str] = []
-    for merged_path in merged_paths:
-        try:
-            result = ocr._upload_image(merged_path)
-            merged_url = ocr._transform_uri2url(result.get("URI", ""))
-            if not merged_url:
-                all_chars.extend([""] * GRID_BATCH)
-                continue
-            resp = ocr._ai_process_ocr(merged_url)
-            text = ocr._extract_text(resp)
-            if isinstance(text, str):
-                text = list(text) if text else []
-            elif not isinstance(text, list):
-                text = []
-            all_chars.extend(text)
-        except Exception:
-            all_chars.extend([""] * GRID_BATCH)
-        finally:
-            try:
-                os.unlink(merged_path)
-            except OSError:
-                pass
-    return all_chars
-
-
 def scan_images(root_dir: str) -> list[str]:
     paths: list[str] = []
     for dirpath, _dirnames, filenames in os.walk(root_dir):
@@ -141,25 +110,24 @@ def run_dataset_import_sync(
 
     pub("uploading", total, "上传完成，开始识别…")
 
-    # Stage 2: Merge 5x5 + OCR
+    # Stage 2: 自适应网格合并 + 并发 OCR（网格在内存中合成，不再上传合并图）
     pub("recognizing", 0, "合并识别中…")
     ok_uploads = [r for r in upload_results if r["status"] == "ok"]
-    batches = [ok_uploads[i:i + GRID_BATCH] for i in range(0, len(ok_uploads), GRID_BATCH)]
+
+    def on_recognized(completed: int):
+        pub("recognizing", completed, f"识别中 {completed}/{len(ok_uploads)}")
 
     all_results: list[dict] = []
-    recognized = 0
-    for batch in batches:
-        batch_paths = [r["path"] for r in batch]
-        chars = _ocr_merged(batch_paths, ocr)
-        # 映射回原始 url（按网格顺序，左→右 上→下）
-        for i, r in enumerate(batch):
-            char = chars[i] if i < len(chars) else ""
+    if ok_uploads:
+        recognized = run_with_ocr_clients(
+            ocr.batch_recognize([r["path"] for r in ok_uploads], on_progress=on_recognized)
+        )
+        for r, text in zip(ok_uploads, recognized["results"]):
             all_results.append({
                 "path": r["path"], "url": r["url"], "uri": r.get("uri", ""),
-                "char": char, "status": "ok",
+                # 数据集一张图对应一个字，多识别出的笔画噪点等只取首字
+                "char": text[:1], "status": "ok",
             })
-        recognized += len(batch)
-        pub("recognizing", recognized, f"识别中 {recognized}/{len(ok_uploads)}")
 
     # 添加失败的
     for r in upload_results:
@@ -181,7 +149,7 @@ def run_dataset_import_sync(
 
     ok = df[ok_mask].copy()
     ok["id"] = [uuid_mod.uuid4().hex[:16] for _ in range(len(ok))]
-    ok["pinyin"] = ok["char"].astype(str).apply(resolve_pinyin)
+    ok["pinyin"] = resolve_pinyin_series(ok["char"].astype(str))
     ok["source"] = "dataset_import"
     ok["level"] = metadata.get("level") or "D"
     ok["image_path"] = ok["url"]
@@ -0,0 +1,293 @@
+"""
+为什么这样做：导出原先在请求内同步生成，10 万行级别的导出会长时间占住请求 worker 与客户端连接；
+这里把导出交给 Celery 生成到本地产物目录，接口只负责登记任务、查询进度与下载。
+特殊逻辑：任务指纹由导出类型、导出参数（含发起人）与数据水位（行数 + 最近更新时间）组成，
+指纹相同的请求复用同一任务与产物；数据一旦变化水位随之改变，自然生成新产物。
+进度与导入任务一样写在 Redis 中（progress/stage/message/status/result），完成或失败后给发起人发站内消息。
+"""
+
+import hashlib
+import json
+import logging
+import os
+import uuid
+from typing import Any, Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.redis_client import get_redis, get_sync_redis
+from app.repositories.message_repo import MessageRepository
+from app.schemas.message import MessageCreate
+from app.services.export_service import ZIP_MEDIA_TYPE, ExportService
+from app.tasks.export_tasks import run_export_job
+from app.utils.export_artifacts import ExportArtifactStore
+from app.utils.streaming_export import ExportStream
+
+logger = logging.getLogger(__name__)
+
+REDIS_JOB_PREFIX = "export_job:"
+REDIS_DEDUP_PREFIX = "export_job:dedup:"
+# 导出类型 → ExportService 方法
+EXPORT_JOB_KINDS = {
+    "hanzi": "export_hanzi_to_excel",
+    "dataset_package": "export_dataset_package",
+    "dataset_html": "export_dataset_html",
+    "assignments": "export_assignments",
+    "students": "export_students",
+    "submissions": "export_submissions",
+}
+ACTIVE_STATUSES = frozenset({"pending", "running"})
+# 读完全部数据前进度最多到该值，剩余部分留给打包与落盘
+EXPORTING_PROGRESS_CAP = 95
+
+
+def _job_key(job_id: str) -> str:
+    return f"{REDIS_JOB_PREFIX}{job_id}"
+
+
+def _dedup_key(fingerprint: str) -> str:
+    return f"{REDIS_DEDUP_PREFIX}{fingerprint}"
+
+
+def build_job_fingerprint(kind: str, params: dict[str, Any], watermark: str) -> str:
+    """导出类型、参数与数据水位的稳定摘要，参数顺序不影响结果。"""
+    raw = json.dumps({"kind": kind, "params": params, "watermark": watermark}, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _loads(raw: Optional[str]) -> Optional[dict]:
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except (ValueError, TypeError):
+        return None
+
+
+class ExportJobService:
+    def __init__(self, db: AsyncSession, artifact_store: Optional[ExportArtifactStore] = None):
+        """
+        功能描述：
+            初始化ExportJobService并准备运行所需的依赖对象。
+
+        参数：
+            db (AsyncSession): 数据库会话，仅用于计算数据水位。
+            artifact_store (Optional[ExportArtifactStore]): 产物目录，默认读取配置。
+
+        返回值：
+            None: 无返回值。
+        """
+        self.db = db
+        self.artifact_store = artifact_store or ExportArtifactStore()
+
+    async def create_job(self, kind: str, params: dict[str, Any], owner_user_id: str) -> dict:
+        """
+        功能描述：
+            登记导出任务；相同参数且数据未变化时直接返回已有任务，否则入队新任务。
+
+        参数：
+            kind (str): 导出类型，取 EXPORT_JOB_KINDS 之一。
+            params (dict[str, Any]): 对应导出方法的参数，需可 JSON 序列化。
+            owner_user_id (str): 发起人用户ID，进度查询、下载与完成通知均按其校验。
+
+        返回值：
+            dict: 任务记录，reused 表示是否复用了已有任务。
+        """
+        if kind not in EXPORT_JOB_KINDS:
+            raise ValueError(f"不支持的导出类型：{kind}")
+        watermark = await ExportService(self.db).data_watermark(kind, params)
+        fingerprint = build_job_fingerprint(kind, params, watermark.token)
+        redis = get_redis()
+        existing = await self._find_reusable(redis, fingerprint)
+        if existing is not None:
+            return {**existing, "reused": True}
+
+        job_id = uuid.uuid4().hex
+        record = {
+            "job_id": job_id,
+            "kind": kind,
+            "params": params,
+            "owner_user_id": owner_user_id,
+            "fingerprint": fingerprint,
+            "progress": 0,
+            "stage": "queued",
+            "message": "导出任务已排队",
+            "completed": 0,
+            "total": watermark.total,
+            "status": "pending",
+            "result": None,
+        }
+        ttl = settings.EXPORT_ARTIFACT_TTL
+        await redis.set(_job_key(job_id), json.dumps(record, ensure_ascii=False), ex=ttl)
+        # NX 抢占指纹：并发的重复点击只有一个能真正入队
+        if not await redis.set(_dedup_key(fingerprint), job_id, ex=ttl, nx=True):
+            existing = await self._find_reusable(redis, fingerprint)
+            if existing is not None:
+                await redis.delete(_job_key(job_id))
+                return {**existing, "reused": True}
+            await redis.set(_dedup_key(fingerprint), job_id, ex=ttl)
+        try:
+            run_export_job.apply_async(args=[job_id], task_id=job_id)
+        except Exception:
+            await redis.delete(_dedup_key(fingerprint), _job_key(job_id))
+            raise
+        return {**record, "reused": False}
+
+    async def get_job(self, job_id: str, owner_user_id: str) -> Optional[dict]:
+        """
+        功能描述：
+            查询导出任务进度。
+
+        参数：
+            job_id (str): 导出任务ID。
+            owner_user_id (str): 当前用户ID，非发起人视为不存在。
+
+        返回值：
+            Optional[dict]: 任务记录；不存在、已过期或无权访问时返回 None。
+        """
+        record = _loads(await get_redis().get(_job_key(job_id)))
+        if record is None or record.get("owner_user_id") != owner_user_id:
+            return None
+        return record
+
+    async def resolve_artifact(self, job_id: str, owner_user_id: str) -> tuple[str, dict]:
+        """
+        功能描述：
+            获取已完成任务的产物路径。
+
+        参数：
+            job_id (str): 导出任务ID。
+            owner_user_id (str): 当前用户ID。
+
+        返回值：
+            tuple[str, dict]: 产物文件路径与任务结果（file_name、media_type 等）。
+
+        异常：
+            LookupError: 任务不存在、未完成或产物已过期。
+        """
+        record = await self.get_job(job_id, owner_user_id)
+        if record is None:
+            raise LookupError("导出任务不存在或已过期")
+        if record.get("status") != "done":
+            raise LookupError("导出任务尚未完成")
+        path = self.artifact_store.resolve(job_id, record["result"]["file_name"])
+        if path is None:
+            raise LookupError("导出文件已过期，请重新导出")
+        return path, record["result"]
+
+    async def _find_reusable(self, redis, fingerprint: str) -> Optional[dict]:
+        job_id = await redis.get(_dedup_key(fingerprint))
+        if not job_id:
+            return None
+        record = _loads(await redis.get(_job_key(job_id)))
+        if record is None:
+            return None
+        if record.get("status") in ACTIVE_STATUSES:
+            return record
+        if record.get("status") == "done" and self.artifact_store.resolve(job_id, record["result"]["file_name"]):
+            return record
+        return None
+
+
+def _save_record(redis_client, record: dict) -> None:
+    redis_client.set(
+        _job_key(record["job_id"]),
+        json.dumps(record, ensure_ascii=False),
+        ex=settings.EXPORT_ARTIFACT_TTL,
+    )
+
+
+def _build_progress_callback(redis_client, record: dict) -> Callable[[int], None]:
+    def on_progress(completed: int) -> None:
+        total = record.get("total") or 0
+        record.update({
+            "completed": completed,
+            "progress": min(EXPORTING_PROGRESS_CAP, int(EXPORTING_PROGRESS_CAP * completed / total)) if total else 0,
+            "stage": "exporting",
+            "message": f"已导出 {completed}/{total} 条",
+        })
+        _save_record(redis_client, record)
+
+    return on_progress
+
+
+async def _notify_owner(db: AsyncSession, record: dict, title: str, content: str) -> None:
+    # 站内消息没有系统账号，通知以发起人自己的名义投递到其收件箱
+    try:
+        await MessageRepository(db).create(
+            MessageCreate(receiver_id=record["owner_user_id"], title=title, content=content),
+            sender_id=record["owner_user_id"],
+        )
+    except Exception:
+        await db.rollback()
+        logger.exception("导出通知发送失败 job_id=%s", record["job_id"])
+
+
+async def execute_export_job(
+    job_id: str,
+    session_factory,
+    artifact_store: Optional[ExportArtifactStore] = None,
+) -> dict:
+    """
+    功能描述：
+        在 Celery worker 中执行导出任务：生成产物、上报进度并通知发起人。
+
+    参数：
+        job_id (str): 导出任务ID。
+        session_factory: 异步数据库会话工厂。
+        artifact_store (Optional[ExportArtifactStore]): 产物目录，默认读取配置。
+
+    返回值：
+        dict: 任务执行结果。
+    """
+    redis = get_sync_redis()
+    record = _loads(redis.get(_job_key(job_id)))
+    if record is None:
+        return {"status": "failed", "error": "导出任务不存在或已过期"}
+    store = artifact_store or ExportArtifactStore()
+    record.update({"status": "running", "stage": "exporting", "message": "正在导出"})
+    _save_record(redis, record)
+
+    async with session_factory() as db:
+        service = ExportService(
+            db,
+            output_dir=store.job_dir(job_id),
+            on_progress=_build_progress_callback(redis, record),
+        )
+        try:
+            exported = await getattr(service, EXPORT_JOB_KINDS[record["kind"]])(**record["params"])
+            if isinstance(exported, ExportStream):
+                file_path = await store.write_stream(job_id, exported.file_name, exported.chunks)
+                file_name, media_type = exported.file_name, exported.media_type
+            else:
+                file_path, file_name, media_type = exported["file_path"], exported["file_name"], ZIP_MEDIA_TYPE
+        except Exception as exc:
+            logger.exception("export job failed job_id=%s", job_id)
+            record.update({"status": "failed", "stage": "done", "message": str(exc)})
+            _save_record(redis, record)
+            # 失败的任务不再占用指纹，下一次相同请求重新计算
+            if redis.get(_dedup_key(record["fingerprint"])) == job_id:
+                redis.delete(_dedup_key(record["fingerprint"]))
+            await _notify_owner(db, record, "导出失败", f"导出任务 {job_id} 失败：{exc}")
+            return {"status": "failed", "error": str(exc)}
+
+        record.update({
+            "progress": 100,
+            "stage": "done",
+            "message": f"导出完成，共 {record['completed']} 条记录",
+            "status": "done",
+            "result": {
+                "file_name": file_name,
+                "media_type": media_type,
+                "size": os.path.getsize(file_path),
+                "download_url": f"{settings.API_V1_STR}/export/jobs/{job_id}/download",
+            },
+        })
+        _save_record(redis, record)
+        hours = max(1, settings.EXPORT_ARTIFACT_TTL // 3600)
+        await _notify_owner(
+            db, record, "导出完成",
+            f"{file_name} 已生成，可在 {hours} 小时内下载：{record['result']['download_url']}",
+        )
+    return {"status": "done", "job_id": job_id, "file_name": file_name}
@@ -1,25 +1,106 @@
+import codecs
 import csv
+import html
 import io
 import json
 import os
-import shutil
+import hashlib
 import tempfile
-import zipfile
 from datetime import datetime
-from typing import Optional
+from typing import Any, AsyncIterator, Callable, NamedTuple, Optional
 
-import pandas as pd
-from sqlalchemy import func, select
+from sqlalchemy import Select, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 
 from app.core.config import settings
+from app.models.assignment import Assignment
+from app.models.course import CourseTeachingClass
+from app.models.hanzi import Hanzi
+from app.models.hanzi_dictionary import DatasetHanziRelation
+from app.models.student import Student
+from app.models.submission import Submission
+from app.models.teaching_class import TeachingClass, TeachingClassMember
+from app.repositories.assignment_repo import AssignmentRepository
 from app.repositories.hanzi_dictionary_repo import HanziDatasetRepository
 from app.repositories.hanzi_repo import HanziRepository
+from app.repositories.report_repo import ReportRepository, SubmissionStats
+from app.services.url_signer import get_url_signer
+from app.utils.pagination import iter_keyset_batches
+from app.utils.streaming_export import ExportStream, build_export_stream
+from app.utils.zip_stream import ZIP_STREAM_CHUNK_SIZE, MediaObjectFetcher, ObjectFetcher, ZipStreamWriter
+
+HANZI_EXPORT_FIELDS = (
+    "id",
+    "dictionary_id",
+    "character",
+    "image_path",
+    "stroke_count",
+    "structure",
+    "stroke_order",
+    "stroke_pattern",
+    "pinyin",
+    "source",
+    "level",
+    "comment",
+    "variant",
+    "standard_image",
+    "created_by_user_id",
+    "created_at",
+    "updated_at",
+)
+EMPTY_STATS = SubmissionStats()
+PACKAGE_MANIFEST_FIELDS = (
+    "id",
+    "dictionary_id",
+    "character",
+    "pinyin",
+    "stroke_count",
+    "stroke_pattern",
+    "structure",
+    "variant",
+    "level",
+    "source",
+    "comment",
+    "image_path",
+    "package_image_path",
+)
+DATASET_CSV_HEADER = "图片URL,汉字,拼音,笔画,笔画模式,结构,字形,等级,来源,备注"
+DATASET_HTML_TAIL = """</tbody>
+</table>
+</body>
+</html>"""
+# 清单在该阈值内留在内存，超过后落盘
+MANIFEST_SPOOL_MAX_BYTES = 4 * 1024 * 1024
+ZIP_MEDIA_TYPE = "application/zip"
+
+
+class ExportWatermark(NamedTuple):
+    """导出范围的数据水位：主体行数与由行数、最近更新时间折算出的摘要。"""
+    total: int
+    token: str
+
+
+def _format_average(score: Optional[float]) -> float | str:
+    return round(score, 1) if score is not None else ""
 
 
 class ExportService:
-    def __init__(self, db: AsyncSession, output_dir: Optional[str] = None):
+    def __init__(
+        self,
+        db: AsyncSession,
+        output_dir: Optional[str] = None,
+        object_fetcher: Optional[ObjectFetcher] = None,
+        on_progress: Optional[Callable[[int], None]] = None,
+    ):
         self.db = db
+        # 每读完一批主体数据回调一次累计行数，异步导出任务据此上报进度
+        self.on_progress = on_progress
+        self._exported_rows = 0
+        # 打包时图片的读取来源，默认读 MEDIA_ROOT，可替换为对象存储实现
+        self.object_fetcher = object_fetcher or MediaObjectFetcher()
+        # 汉字表的 image_path 不再定时重签，导出时按页读时签名
+        self.url_signer = get_url_signer()
         self.repo = HanziRepository(db)
         self.dataset_repo = HanziDatasetRepository(db)
         self.output_dir = output_dir or os.path.join(settings.MEDIA_ROOT, "export_results")
@@ -38,33 +119,13 @@ class ExportService:
         stroke_pattern: Optional[str] = None,
         dataset_id: Optional[str] = None,
         source: Optional[str] = None,
-    ) -> dict:
-        os.makedirs(self.output_dir, exist_ok=True)
-        allowed_fields = {
-            "id",
-            "dictionary_id",
-            "character",
-            "image_path",
-            "stroke_count",
-            "structure",
-            "stroke_order",
-            "stroke_pattern",
-            "pinyin",
-            "source",
-            "level",
-            "comment",
-            "variant",
-            "standard_image",
-            "created_by_user_id",
-            "created_at",
-            "updated_at",
-        }
-        selected_fields = [field for field in fields if field in allowed_fields]
+        export_format: str = "xlsx",
+    ) -> ExportStream:
+        """按筛选条件流式导出汉字，字段非法时在开始输出前抛出 ValueError。"""
+        selected_fields = [field for field in fields if field in HANZI_EXPORT_FIELDS]
         if not selected_fields:
             raise ValueError("导出字段为空或不合法")
-        items = await self.repo.get_all(
-            skip=0,
-            limit=100000,
+        statement = self.repo.select_filtered(
             structure=structure,
             level=level,
             variant=variant,
@@ -77,99 +138,100 @@ class ExportService:
             dataset_id=dataset_id,
             source=source,
         )
-        rows = []
-        for item in items:
-            row = {}
-            for field in selected_fields:
-                value = getattr(item, field, None)
-                if isinstance(value, datetime):
-                    value = value.isoformat()
-                row[field] = value
-            rows.append(row)
-        df = pd.DataFrame(rows)
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        file_name = f"hanzi_export_{timestamp}.xlsx"
-        file_path = os.path.join(self.output_dir, file_name)
-        df.to_excel(file_path, index=False)
-        return {
-            "file_name": file_name,
-            "file_path": file_path,
-            "file_url": f"/media/export_results/{file_name}",
-            "total": len(rows),
-        }
+
+        async def rows() -> AsyncIterator[list]:
+            sign_images = "image_path" in selected_fields
+            async for items in self._iter_batches(statement, Hanzi.id):
+                image_urls = await self._image_urls(items) if sign_images else [None] * len(items)
+                for item, image_url in zip(items, image_urls):
+                    yield [
+                        image_url if field == "image_path" else getattr(item, field, None)
+                        for field in selected_fields
+                    ]
+
+        return build_export_stream("hanzi_export", selected_fields, rows(), export_format)
 
     async def export_dataset_package(self, dataset_id: str, current_user_id: str) -> dict:
+        """
+        功能描述：
+            将数据集图片与清单流式打包到 export_results；图片直接从对象来源写入 zip，不做中转复制。
+            产物经 /media 静态路由下载，支持 Range 断点续传。
+
+        参数：
+            dataset_id (str): 数据集ID。
+            current_user_id (str): 当前用户ID。
+
+        返回值：
+            dict: 产物文件名、路径、下载地址与条目数。
+        """
         os.makedirs(self.output_dir, exist_ok=True)
         dataset = await self.dataset_repo.get(dataset_id, current_user_id)
         if not dataset:
             raise ValueError("数据集不存在")
-        items = await self.repo.get_all(
-            skip=0,
-            limit=100000,
-            created_by_user_id=current_user_id,
-            dataset_id=dataset_id,
-        )
+        statement = self.repo.select_filtered(created_by_user_id=current_user_id, dataset_id=dataset_id)
         timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
         zip_name = f"hanzi_dataset_{dataset.id}_{timestamp}.zip"
         zip_path = os.path.join(self.output_dir, zip_name)
-        temp_dir = tempfile.mkdtemp(prefix=f"dataset_{dataset.id}_", dir=self.output_dir)
-        images_dir = os.path.join(temp_dir, "images")
-        os.makedirs(images_dir, exist_ok=True)
-        manifest_rows = []
+        part_path = f"{zip_path}.part"
+        total = 0
+
+        async def chunks() -> AsyncIterator[bytes]:
+            nonlocal total
+            writer = ZipStreamWriter()
+            with tempfile.SpooledTemporaryFile(max_size=MANIFEST_SPOOL_MAX_BYTES, mode="w+", encoding="utf-8") \
+                    as manifest_json, \
+                    tempfile.SpooledTemporaryFile(max_size=MANIFEST_SPOOL_MAX_BYTES, mode="w+", encoding="utf-8",
+                                                  newline="") as manifest_csv:
+                csv_writer = csv.DictWriter(manifest_csv, fieldnames=PACKAGE_MANIFEST_FIELDS)
+                csv_writer.writeheader()
+                async for items in self._iter_batches(statement, Hanzi.id):
+                    for item, image_url in zip(items, await self._image_urls(items)):
+                        total += 1
+                        packaged_image = None
+                        resolved = self.object_fetcher.resolve(image_url)
+                        if resolved:
+                            packaged_image = self._build_package_image_name(resolved, total)
+                            with writer.open_entry(packaged_image) as entry:
+                                async for data in self.object_fetcher.iter_bytes(resolved):
+                                    entry.write(data)
+                                    if writer.should_flush():
+                                        yield writer.drain()
+                        row = {field: getattr(item, field, None) for field in PACKAGE_MANIFEST_FIELDS[:-1]}
+                        row["image_path"] = image_url
+                        row["package_image_path"] = packaged_image
+                        csv_writer.writerow(row)
+                        dumped = json.dumps(row, ensure_ascii=False, indent=2, default=str).replace("\n", "\n  ")
+                        manifest_json.write(("[\n  " if total == 1 else ",\n  ") + dumped)
+                    if writer.should_flush():
+                        yield writer.drain()
+                manifest_json.write("\n]" if total else "[]")
+                for entry_name, spool, encoding in (
+                    ("manifest.json", manifest_json, "utf-8"),
+                    ("manifest.csv", manifest_csv, "utf-8-sig"),
+                ):
+                    spool.seek(0)
+                    with writer.open_entry(entry_name) as entry:
+                        if encoding == "utf-8-sig":
+                            entry.write(codecs.BOM_UTF8)
+                        while text := spool.read(ZIP_STREAM_CHUNK_SIZE):
+                            entry.write(text.encode("utf-8"))
+                            if writer.should_flush():
+                                yield writer.drain()
+            yield writer.close()
+
         try:
-            for index, item in enumerate(items, start=1):
-                packaged_image = self._copy_image_to_package(item.image_path, images_dir, index)
-                manifest_rows.append(
-                    {
-                        "id": item.id,
-                        "dictionary_id": item.dictionary_id,
-                        "character": item.character,
-                        "pinyin": item.pinyin,
-                        "stroke_count": item.stroke_count,
-                        "stroke_pattern": item.stroke_pattern,
-                        "structure": item.structure,
-                        "variant": item.variant,
-                        "level": item.level,
-                        "source": item.source,
-                        "comment": item.comment,
-                        "image_path": item.image_path,
-                        "package_image_path": packaged_image,
-                    }
-                )
-            manifest_json_path = os.path.join(temp_dir, "manifest.json")
-            with open(manifest_json_path, "w", encoding="utf-8") as file:
-                json.dump(manifest_rows, file, ensure_ascii=False, indent=2, default=str)
-            manifest_csv_path = os.path.join(temp_dir, "manifest.csv")
-            with open(manifest_csv_path, "w", encoding="utf-8-sig", newline="") as file:
-                writer = csv.DictWriter(file, fieldnames=list(manifest_rows[0].keys()) if manifest_rows else [
-                    "id",
-                    "dictionary_id",
-                    "character",
-                    "pinyin",
-                    "stroke_count",
-                    "stroke_pattern",
-                    "structure",
-                    "variant",
-                    "level",
-                    "source",
-                    "comment",
-                    "image_path",
-                    "package_image_path",
-                ])
-                writer.writeheader()
-                writer.writerows(manifest_rows)
-            with zipfile.ZipFile(zip_path, "w", zipfile.ZIP_DEFLATED) as archive:
-                for root, _, files in os.walk(temp_dir):
-                    for name in files:
-                        file_path = os.path.join(root, name)
-                        archive.write(file_path, os.path.relpath(file_path, temp_dir))
+            with open(part_path, "wb") as file:
+                async for chunk in chunks():
+                    file.write(chunk)
+            os.replace(part_path, zip_path)
         finally:
-            shutil.rmtree(temp_dir, ignore_errors=True)
+            if os.path.exists(part_path):
+                os.remove(part_path)
         return {
             "file_name": zip_name,
             "file_path": zip_path,
             "file_url": f"/media/export_results/{zip_name}",
-            "total": len(manifest_rows),
+            "total": total,
             "dataset_id": dataset.id,
             "dataset_name": dataset.name,
         }
@@ -183,84 +245,108 @@ class ExportService:
         pinyin: Optional[str] = None,
         stroke_pattern: Optional[str] = None,
         format: str = "html+csv",
-    ) -> tuple[io.BytesIO, str]:
-        """导出数据集，format="html+csv" 导出 index.html + data.csv，"csv" 仅导出 CSV。"""
+    ) -> ExportStream:
+        """导出数据集，format="html+csv" 导出 index.html + data.csv，"csv" 仅导出 CSV；zip 边生成边发送。"""
         dataset = await self.dataset_repo.get(dataset_id, current_user_id)
         if not dataset:
             raise ValueError("数据集不存在")
 
         if hanzi_ids:
-            items = await self._fetch_items_by_ids(hanzi_ids, current_user_id, dataset_id)
+            selected_items = await self._fetch_items_by_ids(hanzi_ids, current_user_id, dataset_id)
+            has_items = bool(selected_items)
         else:
-            items = await self.dataset_repo.list_items(
-                dataset_id=dataset_id,
-                created_by_user_id=current_user_id,
-                skip=0, limit=100000,
-                character=character,
-                pinyin=pinyin,
-                stroke_pattern=stroke_pattern,
+            statement = self.dataset_repo.select_items(
+                dataset_id, current_user_id, character=character, pinyin=pinyin, stroke_pattern=stroke_pattern,
             )
-
-        if not items:
+            has_items = await self.dataset_repo.count_items_in_scope(
+                dataset_id, current_user_id, character=character, pinyin=pinyin, stroke_pattern=stroke_pattern,
+            ) > 0
+        if not has_items:
             raise ValueError("没有符合条件的记录可导出")
 
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        safe_name = dataset.name.replace("/", "_").replace("\\", "_")[:50]
+        async def batches() -> AsyncIterator[list]:
+            if hanzi_ids:
+                yield selected_items
+                self._report_progress(len(selected_items))
+                return
+            async for items in self._iter_batches(statement, Hanzi.id):
+                yield items
 
         # CSV 永远生成，HTML 按格式决定
         want_html = "html" in format
-        rows_html_parts: list[str] = []
-        csv_lines: list[str] = ["图片URL,汉字,拼音,笔画,笔画模式,结构,字形,等级,来源,备注"]
-        for item in items:
-            img_url = (item.image_path or "").strip()
-            char = item.character or ""
-            pinyin = item.pinyin or ""
-            stroke_count = str(item.stroke_count) if item.stroke_count else ""
-            stroke_pattern = item.stroke_pattern or ""
-            structure = getattr(item, "structure", "") or ""
-            variant = getattr(item, "variant", "") or ""
-            level = getattr(item, "level", "") or ""
-            source = item.source or ""
-            comment = getattr(item, "comment", "") or ""
-
-            if want_html:
-                img_cell = f'<img src="{img_url}" loading="lazy" onerror="this.alt=\'—\'" />' if img_url else "—"
-                rows_html_parts.append(
-                    f"<tr>"
-                    f"<td>{img_cell}</td>"
-                    f"<td class=\"char\">{char}</td>"
-                    f"<td>{pinyin}</td>"
-                    f"<td>{stroke_count}</td>"
-                    f"<td>{stroke_pattern}</td>"
-                    f"<td>{structure}</td>"
-                    f"<td>{variant}</td>"
-                    f"<td>{level}</td>"
-                    f"<td>{source}</td>"
-                    f"<td>{comment}</td>"
-                    f"</tr>"
-                )
 
-            csv_lines.append(
-                ",".join(
-                    f'"{v}"'
-                    for v in [
-                        img_url, char, pinyin, stroke_count, stroke_pattern,
-                        structure, variant, level, source, comment,
-                    ]
-                )
-            )
+        async def chunks() -> AsyncIterator[bytes]:
+            writer = ZipStreamWriter()
+            count = 0
+            with tempfile.SpooledTemporaryFile(max_size=MANIFEST_SPOOL_MAX_BYTES, mode="w+", encoding="utf-8") \
+                    as html_rows:
+                with writer.open_entry("data.csv") as entry:
+                    entry.write(codecs.BOM_UTF8 + DATASET_CSV_HEADER.encode("utf-8"))
+                    buffer = io.StringIO()
+                    csv_writer = csv.writer(buffer, quoting=csv.QUOTE_ALL, lineterminator="")
+                    async for items in batches():
+                        for item, image_url in zip(items, await self._image_urls(items)):
+                            values = self._dataset_row_values(item, image_url)
+                            buffer.write("\n")
+                            csv_writer.writerow(values)
+                            if want_html:
+                                html_rows.write(self._dataset_row_html(values))
+                            count += 1
+                        entry.write(buffer.getvalue().encode("utf-8"))
+                        buffer.seek(0)
+                        buffer.truncate()
+                        if writer.should_flush():
+                            yield writer.drain()
+                if want_html:
+                    html_rows.seek(0)
+                    with writer.open_entry("index.html") as entry:
+                        entry.write(self._dataset_html_head(dataset.name, count).encode("utf-8"))
+                        while text := html_rows.read(ZIP_STREAM_CHUNK_SIZE):
+                            entry.write(text.encode("utf-8"))
+                            if writer.should_flush():
+                                yield writer.drain()
+                        entry.write(DATASET_HTML_TAIL.encode("utf-8"))
+            yield writer.close()
 
-        # 打包 ZIP
-        zip_buf = io.BytesIO()
-        with zipfile.ZipFile(zip_buf, "w", zipfile.ZIP_DEFLATED) as zf:
-            zf.writestr("data.csv", "\n".join(csv_lines).encode("utf-8-sig"))
-            if want_html:
-                html = f"""<!DOCTYPE html>
+        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+        safe_name = dataset.name.replace("/", "_").replace("\\", "_")[:50]
+        return ExportStream(file_name=f"{safe_name}_{timestamp}.zip", media_type=ZIP_MEDIA_TYPE, chunks=chunks())
+
+    async def _image_urls(self, items: list) -> list[Optional[str]]:
+        """整页汉字的图片地址：有 uri 的换成签名 URL，签名失败或无 uri 时沿用库中存量地址。"""
+        return await self.url_signer.resolve(items, "uri", "image_path")
+
+    @staticmethod
+    def _dataset_row_values(item, image_url: Optional[str]) -> list[str]:
+        return [
+            (image_url or "").strip(),
+            item.character or "",
+            item.pinyin or "",
+            str(item.stroke_count) if item.stroke_count else "",
+            item.stroke_pattern or "",
+            getattr(item, "structure", "") or "",
+            getattr(item, "variant", "") or "",
+            getattr(item, "level", "") or "",
+            item.source or "",
+            getattr(item, "comment", "") or "",
+        ]
+
+    @staticmethod
+    def _dataset_row_html(values: list[str]) -> str:
+        img_url, char, *rest = [html.escape(value) for value in values]
+        img_cell = f'<img src="{img_url}" loading="lazy" onerror="this.alt=\'—\'" />' if img_url else "—"
+        cells = "".join(f"<td>{value}</td>" for value in rest)
+        return f"<tr><td>{img_cell}</td><td class=\"char\">{char}</td>{cells}</tr>\n"
+
+    @staticmethod
+    def _dataset_html_head(dataset_name: str, count: int) -> str:
+        name = html.escape(dataset_name)
+        return f"""<!DOCTYPE html>
 <html lang="zh-CN">
 <head>
 <meta charset="utf-8">
 <meta name="viewport" content="width=device-width, initial-scale=1">
-<title>{dataset.name} - 数据集导出</title>
+<title>{name} - 数据集导出</title>
 <style>
 *,*::before,*::after{{box-sizing:border-box;margin:0;padding:0}}
 body{{font-family:"Microsoft YaHei","PingFang SC",sans-serif;color:#333;background:#fafafa;padding:24px}}
@@ -275,36 +361,28 @@ img{{width:60px;height:60px;object-fit:contain;border-radius:4px;border:1px soli
 </style>
 </head>
 <body>
-<h1>{dataset.name}</h1>
-<p class="meta">导出时间：{datetime.now().strftime("%Y-%m-%d %H:%M")}　共 {len(items)} 条</p>
+<h1>{name}</h1>
+<p class="meta">导出时间：{datetime.now().strftime("%Y-%m-%d %H:%M")}　共 {count} 条</p>
 <table>
 <thead><tr>
 <th>图片</th><th>汉字</th><th>拼音</th><th>笔画</th><th>笔画模式</th>
 <th>结构</th><th>字形</th><th>等级</th><th>来源</th><th>备注</th>
 </tr></thead>
 <tbody>
-{chr(10).join(rows_html_parts)}
-</tbody>
-</table>
-</body>
-</html>"""
-                zf.writestr("index.html", html.encode("utf-8"))
-        zip_buf.seek(0)
-
-        filename = f"{safe_name}_{timestamp}.zip"
-        return zip_buf, filename
+"""
 
     async def _fetch_items_by_ids(
         self, hanzi_ids: list[str], current_user_id: str, dataset_id: str
     ) -> list:
         """按 ID 列表获取条目，验证归属权限。"""
-        from app.models.hanzi import Hanzi
-        from app.models.hanzi_dictionary import DatasetHanziRelation
-        from sqlalchemy import or_
-
         if not hanzi_ids:
             return []
-        result = await self.db.execute(
+        result = await self.db.execute(self._items_by_ids_statement(hanzi_ids, current_user_id, dataset_id))
+        return result.scalars().all()
+
+    @staticmethod
+    def _items_by_ids_statement(hanzi_ids: list[str], current_user_id: str, dataset_id: str) -> Select:
+        return (
             select(Hanzi)
             .join(DatasetHanziRelation, DatasetHanziRelation.hanzi_id == Hanzi.id)
             .where(
@@ -314,128 +392,210 @@ img{{width:60px;height:60px;object-fit:contain;border-radius:4px;border:1px soli
                     Hanzi.created_by_user_id.is_(None)),
             )
         )
-        return result.scalars().all()
-
-
 
-    def _copy_image_to_package(self, image_path: Optional[str], images_dir: str, index: int) -> Optional[str]:
-        resolved_path = self._resolve_image_path(image_path)
-        if not resolved_path:
-            return None
+    @staticmethod
+    def _build_package_image_name(resolved_path: str, index: int) -> str:
         _, ext = os.path.splitext(resolved_path)
         ext = ext or ".png"
         target_name = f"{index:04d}_{os.path.basename(resolved_path)}"
         if not target_name.endswith(ext):
             target_name = f"{target_name}{ext}"
-        target_path = os.path.join(images_dir, target_name)
-        shutil.copy2(resolved_path, target_path)
         return f"images/{target_name}"
 
-    def _resolve_image_path(self, image_path: Optional[str]) -> Optional[str]:
-        if not image_path:
-            return None
-        normalized = image_path.replace("\\", "/")
-        candidates = [image_path]
-        if normalized.startswith("/media/"):
-            candidates.append(os.path.join(settings.MEDIA_ROOT, normalized.removeprefix("/media/").lstrip("/")))
-        elif not os.path.isabs(image_path) and "://" not in normalized:
-            candidates.append(os.path.join(settings.MEDIA_ROOT, normalized.lstrip("/")))
-        for candidate in candidates:
-            if candidate and os.path.isfile(candidate):
-                return candidate
-        return None
-
     async def export_assignments(
         self, teacher_id: str, course_id: str | None = None,
-        status: str | None = None,
-    ) -> dict:
-        """导出作业列表 Excel。"""
-        import pandas as pd
-        from sqlalchemy import func
-        from app.repositories.assignment_repo import AssignmentRepository
-        from app.models.submission import Submission
+        status: str | None = None, export_format: str = "xlsx",
+    ) -> ExportStream:
+        """流式导出作业列表。"""
+        statement = self._assignments_statement(teacher_id, course_id, status)
+        report_repo = ReportRepository(self.db)
 
-        os.makedirs(self.output_dir, exist_ok=True)
-        repo = AssignmentRepository(self.db)
-        items = await repo.get_all(0, 100000, teacher_id, status, course_id, None)
-        rows = []
-        for a in items:
-            sub_stats = await self.db.execute(
-                select(func.count(), func.avg(Submission.score))
-                .where(Submission.assignment_id == a.id)
-            )
-            count, avg_score = sub_stats.first()
-            rows.append({
-                "标题": a.title, "状态": a.status,
-                "截止时间": a.due_date.strftime("%Y-%m-%d %H:%M") if a.due_date else "",
-                "提交人数": count or 0,
-                "平均分": round(float(avg_score), 1) if avg_score else "",
-            })
-        df = pd.DataFrame(rows)
-        filename = f"assignments_{datetime.now().strftime('%Y%m%d%H%M%S')}.xlsx"
-        filepath = os.path.join(self.output_dir, filename)
-        df.to_excel(filepath, index=False)
-        return {"file_name": filename, "file_path": filepath,
-                "file_url": f"/media/export_results/{filename}", "total": len(rows)}
+        async def rows() -> AsyncIterator[list]:
+            async for items in self._iter_batches(statement, Assignment.id):
+                stats = await report_repo.submission_stats_by_assignment([a.id for a in items])
+                for a in items:
+                    item_stats = stats.get(a.id, EMPTY_STATS)
+                    yield [
+                        a.title, a.status,
+                        a.due_date.strftime("%Y-%m-%d %H:%M") if a.due_date else "",
+                        item_stats.submission_count,
+                        item_stats.graded_count,
+                        _format_average(item_stats.average_score),
+                    ]
+
+        return build_export_stream(
+            "assignments", ["标题", "状态", "截止时间", "提交人数", "已批改", "平均分"], rows(), export_format,
+        )
 
     async def export_students(
         self, teacher_id: str, course_id: str | None = None,
-        class_id: str | None = None,
-    ) -> dict:
-        """导出学生列表 Excel。"""
-        import pandas as pd
-        from app.repositories.student_repo import StudentRepository
-        from app.models.submission import Submission
+        class_id: str | None = None, export_format: str = "xlsx",
+    ) -> ExportStream:
+        """流式导出教师教学班内的学生列表，可按教学班或课程进一步缩小范围。"""
+        statement = self._students_statement(teacher_id, course_id, class_id)
+        report_repo = ReportRepository(self.db)
 
-        os.makedirs(self.output_dir, exist_ok=True)
-        student_repo = StudentRepository(self.db)
-        students = await student_repo.get_all(0, 100000, teacher_id=teacher_id)
-        rows = []
-        for s in students:
-            sub_stats = await self.db.execute(
-                select(func.count(), func.avg(Submission.score))
-                .where(Submission.student_id == s.id)
-            )
-            count, avg_score = sub_stats.first()
-            rows.append({
-                "姓名": s.name, "班级": s.class_name or "",
-                "提交次数": count or 0,
-                "平均分": round(float(avg_score), 1) if avg_score else "",
-            })
-        df = pd.DataFrame(rows)
-        filename = f"students_{datetime.now().strftime('%Y%m%d%H%M%S')}.xlsx"
-        filepath = os.path.join(self.output_dir, filename)
-        df.to_excel(filepath, index=False)
-        return {"file_name": filename, "file_path": filepath,
-                "file_url": f"/media/export_results/{filename}", "total": len(rows)}
+        async def rows() -> AsyncIterator[list]:
+            async for students in self._iter_batches(statement, Student.id):
+                stats = await report_repo.submission_stats_by_student([s.id for s in students], course_id=course_id)
+                for s in students:
+                    item_stats = stats.get(s.id, EMPTY_STATS)
+                    yield [
+                        s.name, s.class_name or "",
+                        item_stats.submission_count,
+                        item_stats.graded_count,
+                        _format_average(item_stats.average_score),
+                    ]
+
+        return build_export_stream(
+            "students", ["姓名", "班级", "提交次数", "已批改", "平均分"], rows(), export_format,
+        )
 
     async def export_submissions(
         self, assignment_id: str, student_id: str | None = None,
-        status: str | None = None,
-    ) -> dict:
-        """导出提交记录 Excel。"""
-        import pandas as pd
-        from app.repositories.submission_repo import SubmissionRepository
-        from app.repositories.assignment_repo import AssignmentRepository
-
-        os.makedirs(self.output_dir, exist_ok=True)
-        sub_repo = SubmissionRepository(self.db)
-        items = await sub_repo.get_all_by_assignment(assignment_id, 0, 100000, student_id)
+        status: str | None = None, export_format: str = "xlsx",
+    ) -> ExportStream:
+        """流式导出某作业的提交记录。"""
         assignment = await AssignmentRepository(self.db).get(assignment_id)
-        rows = []
-        for sub in items:
-            if status and sub.status != status:
-                continue
-            rows.append({
-                "学生": getattr(getattr(sub, "student", None), "name", ""),
-                "作业": assignment.title if assignment else "",
-                "得分": sub.score, "评语": sub.teacher_feedback or "",
-                "提交时间": sub.submitted_at.strftime("%Y-%m-%d %H:%M") if sub.submitted_at else "",
-                "状态": sub.status,
-            })
-        df = pd.DataFrame(rows)
-        filename = f"submissions_{datetime.now().strftime('%Y%m%d%H%M%S')}.xlsx"
-        filepath = os.path.join(self.output_dir, filename)
-        df.to_excel(filepath, index=False)
-        return {"file_name": filename, "file_path": filepath,
-                "file_url": f"/media/export_results/{filename}", "total": len(rows)}
+        assignment_title = assignment.title if assignment else ""
+        statement = self._submissions_statement(assignment_id, student_id, status).options(
+            selectinload(Submission.student)
+        )
+
+        async def rows() -> AsyncIterator[list]:
+            async for items in self._iter_batches(statement, Submission.id):
+                for sub in items:
+                    yield [
+                        getattr(getattr(sub, "student", None), "name", ""),
+                        assignment_title,
+                        sub.score, sub.teacher_feedback or "",
+                        sub.submitted_at.strftime("%Y-%m-%d %H:%M") if sub.submitted_at else "",
+                        sub.status,
+                    ]
+
+        return build_export_stream(
+            "submissions", ["学生", "作业", "得分", "评语", "提交时间", "状态"], rows(), export_format,
+        )
+
+    @staticmethod
+    def _assignments_statement(teacher_id: str, course_id: str | None = None, status: str | None = None) -> Select:
+        statement = select(Assignment).where(Assignment.teacher_id == teacher_id)
+        if course_id:
+            statement = statement.where(Assignment.course_id == course_id)
+        if status:
+            statement = statement.where(Assignment.status == status)
+        return statement
+
+    @staticmethod
+    def _students_statement(teacher_id: str, course_id: str | None = None, class_id: str | None = None) -> Select:
+        member_ids = (
+            select(TeachingClassMember.student_id)
+            .join(TeachingClass, TeachingClass.id == TeachingClassMember.teaching_class_id)
+            .where(TeachingClass.teacher_id == teacher_id)
+        )
+        if class_id:
+            member_ids = member_ids.where(TeachingClassMember.teaching_class_id == class_id)
+        if course_id:
+            member_ids = member_ids.where(
+                TeachingClassMember.teaching_class_id.in_(
+                    select(CourseTeachingClass.teaching_class_id).where(CourseTeachingClass.course_id == course_id)
+                )
+            )
+        return select(Student).where(Student.id.in_(member_ids))
+
+    @staticmethod
+    def _submissions_statement(assignment_id: str, student_id: str | None = None, status: str | None = None) -> Select:
+        statement = select(Submission).where(Submission.assignment_id == assignment_id)
+        if student_id:
+            statement = statement.where(Submission.student_id == student_id)
+        if status:
+            statement = statement.where(Submission.status == status)
+        return statement
+
+    async def data_watermark(self, kind: str, params: dict[str, Any]) -> ExportWatermark:
+        """
+        功能描述：
+            计算某类导出在给定参数下的数据水位，只做聚合查询不读取明细。
+            作业与学生导出包含提交统计列，因此同时纳入相关提交的行数与最近提交/批改时间。
+
+        参数：
+            kind (str): 导出类型，与导出任务类型一致。
+            params (dict[str, Any]): 对应导出方法的参数。
+
+        返回值：
+            ExportWatermark: 主体行数与水位摘要；数据增删改后摘要随之变化。
+        """
+        submission_times = ("submitted_at", "graded_at")
+        if kind == "hanzi":
+            parts = [(self.repo.select_filtered(
+                structure=params.get("structure"),
+                level=params.get("level"),
+                variant=params.get("variant"),
+                search=params.get("search"),
+                created_by_user_id=params.get("current_user_id"),
+                character=params.get("character"),
+                pinyin=params.get("pinyin"),
+                stroke_count=params.get("stroke_count"),
+                stroke_pattern=params.get("stroke_pattern"),
+                dataset_id=params.get("dataset_id"),
+                source=params.get("source"),
+            ), ("updated_at",))]
+        elif kind == "dataset_package":
+            parts = [(self.repo.select_filtered(
+                created_by_user_id=params["current_user_id"], dataset_id=params["dataset_id"],
+            ), ("updated_at",))]
+        elif kind == "dataset_html":
+            if params.get("hanzi_ids"):
+                statement = self._items_by_ids_statement(
+                    params["hanzi_ids"], params["current_user_id"], params["dataset_id"],
+                )
+            else:
+                statement = self.dataset_repo.select_items(
+                    params["dataset_id"], params["current_user_id"],
+                    character=params.get("character"),
+                    pinyin=params.get("pinyin"),
+                    stroke_pattern=params.get("stroke_pattern"),
+                )
+            parts = [(statement, ("updated_at",))]
+        elif kind == "assignments":
+            statement = self._assignments_statement(
+                params["teacher_id"], params.get("course_id"), params.get("status"),
+            )
+            parts = [
+                (statement, ("updated_at",)),
+                (select(Submission).where(Submission.assignment_id.in_(statement.with_only_columns(Assignment.id))),
+                 submission_times),
+            ]
+        elif kind == "students":
+            statement = self._students_statement(
+                params["teacher_id"], params.get("course_id"), params.get("class_id"),
+            )
+            submissions = select(Submission).where(Submission.student_id.in_(statement.with_only_columns(Student.id)))
+            if params.get("course_id"):
+                submissions = submissions.where(
+                    Submission.assignment_id.in_(
+                        select(Assignment.id).where(Assignment.course_id == params["course_id"])
+                    )
+                )
+            parts = [(statement, ("updated_at",)), (submissions, submission_times)]
+        elif kind == "submissions":
+            parts = [(self._submissions_statement(
+                params["assignment_id"], params.get("student_id"), params.get("status"),
+            ), submission_times)]
+        else:
+            raise ValueError(f"不支持的导出类型：{kind}")
+
+        report_repo = ReportRepository(self.db)
+        marks = [await report_repo.data_watermark(statement, *columns) for statement, columns in parts]
+        token = hashlib.sha1(json.dumps(marks, default=str).encode("utf-8")).hexdigest()
+        return ExportWatermark(total=int(marks[0][0] or 0), token=token)
+
+    async def _iter_batches(self, statement: Select, key_column: Any) -> AsyncIterator[list]:
+        async for items in iter_keyset_batches(self.db, statement, key_column, settings.EXPORT_BATCH_SIZE):
+            yield items
+            self._report_progress(len(items))
+
+    def _report_progress(self, count: int) -> None:
+        self._exported_rows += count
+        if self.on_progress is not None:
+            self.on_progress(self._exported_rows)
@@ -1,30 +1,37 @@
 """
 为什么这样做：共享字典检索独立索引，支持拼音与笔画组合查询，避免数据库全文扫描开销。
-特殊逻辑：笔画重复次数通过动态字段 + 脚本过滤校验，保证"包含且数量满足"的边界语义。
+特殊逻辑：字形/部首走精确 term，拼音前缀走索引期 edge-ngram 子字段的 match，查询耗时不随词典规模增长；
+笔画重复次数在索引期展开为"笔画_次数"词项，"包含且数量满足"直接由倒排索引的 term 过滤判定，无需查询期脚本。
 """
 
 import logging
 from datetime import datetime
-from typing import Any, Optional
+from typing import Any, AsyncIterator, Optional
 
 from elasticsearch import NotFoundError
-from sqlalchemy import select
+from sqlalchemy import Select, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.models.hanzi_dictionary import HanziDictionary
 from app.schemas.search import ReindexResponse
-from app.services.base_search_service import BaseSearchService
+from app.services.base_search_service import SYNCED_AT_FIELD, BaseSearchService
 from app.utils.hanzi_dictionary_parser import (
-    build_stroke_unit_count_fields,
     build_stroke_unit_counts,
-    encode_stroke_unit_key,
-    normalize_pinyin_keyword,
+    build_stroke_unit_token,
+    build_stroke_unit_tokens,
+    normalize_pinyin_search_key,
     split_stroke_pattern,
 )
+from app.utils.pagination import iter_keyset_batches
 
 
 logger = logging.getLogger(__name__)
+PINYIN_PREFIX_FIELD = "pinyin_normalized.prefix"
+# 拼音最长约 6 个字母，多音节写法也远小于该上限
+PINYIN_PREFIX_MAX_GRAM = 20
+# 仅供检索使用、不对外返回的文档字段
+_INTERNAL_DOCUMENT_FIELDS = {"stroke_units", "stroke_unit_tokens", SYNCED_AT_FIELD}
 
 
 class HanziDictionarySearchService(BaseSearchService):
@@ -34,59 +41,92 @@ class HanziDictionarySearchService(BaseSearchService):
         super().__init__(db)
         self.index_name = f"{settings.ELASTICSEARCH_INDEX_PREFIX}_hanzi_dictionary"
 
-    async def _create_index(self) -> None:
-        await self.es.indices.create(
-            index=self.index_name,
-            body={
-                "mappings": {
-                    "properties": {
-                        "dictionary_id": {"type": "keyword"},
-                        "character": {"type": "keyword"},
-                        "pinyin": {"type": "keyword"},
-                        "pinyin_normalized": {"type": "keyword"},
-                        "stroke_count": {"type": "integer"},
-                        "stroke_pattern": {"type": "keyword", "ignore_above": 1024},
-                        "stroke_units": {"type": "keyword"},
-                        "stroke_unit_counts": {"type": "object", "dynamic": True},
-                        "source": {"type": "keyword"},
-                        "updated_at": {"type": "date"},
-                    }
+    def _build_index_body(self) -> dict[str, Any]:
+        return {
+            "settings": {
+                "analysis": {
+                    "filter": {
+                        "pinyin_prefix_filter": {
+                            "type": "edge_ngram",
+                            "min_gram": 1,
+                            "max_gram": PINYIN_PREFIX_MAX_GRAM,
+                        }
+                    },
+                    "analyzer": {
+                        "pinyin_prefix_analyzer": {
+                            "type": "custom",
+                            "tokenizer": "keyword",
+                            "filter": ["lowercase", "pinyin_prefix_filter"],
+                        },
+                        "keyword_lowercase_analyzer": {
+                            "type": "custom",
+                            "tokenizer": "keyword",
+                            "filter": ["lowercase"],
+                        },
+                    },
                 }
             },
-        )
-
-    async def ensure_index_with_bootstrap(self) -> ReindexResponse:
-        await self.ensure_index()
-        count_response = await self.es.count(index=self.index_name)
-        total = int(count_response.get("count", 0))
-        if total > 0:
-            return ReindexResponse(status="success", indexed=0, failed=0)
-        return await self.reindex()
-
-    async def reindex(self) -> ReindexResponse:
-        exists = await self.es.indices.exists(index=self.index_name)
-        if exists:
-            try:
-                await self.es.indices.delete(index=self.index_name)
-            except NotFoundError:
-                pass
-        # 清除缓存，因为索引刚被删除
-        BaseSearchService.invalidate_index_cache(self.index_name)
-        await self.ensure_index()
-        items = (await self.db.execute(select(HanziDictionary))).scalars().all()
-        actions = [
-            {
-                "_op_type": "index",
-                "_index": self.index_name,
-                "_id": self._document_id(item.id),
-                "_source": self._build_document(item),
+            "mappings": {
+                "properties": {
+                    "dictionary_id": {"type": "keyword"},
+                    "character": {"type": "keyword"},
+                    "radical": {"type": "keyword"},
+                    "pinyin": {"type": "keyword"},
+                    "pinyin_normalized": {
+                        "type": "keyword",
+                        "fields": {
+                            "prefix": {
+                                "type": "text",
+                                "analyzer": "pinyin_prefix_analyzer",
+                                "search_analyzer": "keyword_lowercase_analyzer",
+                            }
+                        },
+                    },
+                    "stroke_count": {"type": "integer"},
+                    "stroke_pattern": {"type": "keyword", "ignore_above": 1024},
+                    "stroke_units": {"type": "keyword"},
+                    "stroke_unit_tokens": {"type": "keyword"},
+                    "source": {"type": "keyword"},
+                    "updated_at": {"type": "date"},
+                    SYNCED_AT_FIELD: {"type": "date"},
+                }
             }
-            for item in items
-        ]
-        success, failed = await self._bulk_index(actions)
-        if success > 0:
-            await self._refresh_index_safe()
-        return self._build_reindex_response(success, failed)
+        }
+
+    async def _populate_index(self, index: str) -> tuple[int, int]:
+        return await self._bulk_index(self._iter_actions(index, select(HanziDictionary)))
+
+    async def _collect_source_stats(self) -> dict[str, dict[str, Any]]:
+        row = (await self.db.execute(
+            select(func.count(), func.max(HanziDictionary.updated_at), func.max(HanziDictionary.id))
+            .select_from(HanziDictionary)
+        )).one()
+        watermark = row[1].isoformat() if isinstance(row[1], datetime) else row[1]
+        return {
+            HanziDictionary.__tablename__: {"count": int(row[0] or 0), "watermark": watermark, "max_id": row[2]},
+        }
+
+    async def _sync_source(self, source: str, since: str | None) -> tuple[int, int]:
+        statement = select(HanziDictionary)
+        if since:
+            statement = statement.where(HanziDictionary.updated_at >= datetime.fromisoformat(since))
+        started_at = self._sync_timestamp()
+        success, errors = await self._bulk_index(self._iter_actions(self.index_name, statement))
+        if not since and errors == 0:
+            await self._sweep_stale_documents([], started_at)
+        return success, errors
+
+    async def _iter_actions(self, index: str, statement: Select) -> AsyncIterator[dict[str, Any]]:
+        async for items in iter_keyset_batches(
+            self.db, statement, HanziDictionary.id, settings.SEARCH_REINDEX_BATCH_SIZE
+        ):
+            for item in items:
+                yield {
+                    "_op_type": "index",
+                    "_index": index,
+                    "_id": self._document_id(item.id),
+                    "_source": self._build_document(item),
+                }
 
     async def index_document(self, item: HanziDictionary, refresh: bool = False) -> None:
         await self._index_document(self._document_id(item.id), self._build_document(item), refresh=refresh)
@@ -98,18 +138,67 @@ class HanziDictionarySearchService(BaseSearchService):
             return
 
     async def apply_cdc_change(self, operation: str, data: dict[str, Any]) -> None:
-        await self.ensure_index()
         dictionary_id = str(data.get("id") or "")
         if not dictionary_id:
             return
-        if operation == "delete":
-            await self.delete_document(dictionary_id, refresh=False)
-            return
-        item = await self._get_dictionary_item(dictionary_id)
-        if not item:
-            await self.delete_document(dictionary_id, refresh=False)
-            return
-        await self.index_document(item, refresh=False)
+        actions = await self.build_cdc_actions({dictionary_id: operation})
+        await self.apply_bulk_actions(actions)
+
+    async def build_cdc_actions(self, changes: dict[str, str]) -> list[dict[str, Any]]:
+        """把已合并的变更 {dictionary_id: operation} 一次查库后转成 bulk 动作，库中已不存在的条目转为删除。"""
+        await self.ensure_index()
+        upsert_ids = [dictionary_id for dictionary_id, operation in changes.items() if operation != "delete"]
+        items: dict[str, HanziDictionary] = {}
+        if upsert_ids:
+            result = await self.db.execute(select(HanziDictionary).where(HanziDictionary.id.in_(upsert_ids)))
+            items = {str(item.id): item for item in result.scalars().all()}
+        actions: list[dict[str, Any]] = []
+        for dictionary_id in changes:
+            item = items.get(dictionary_id)
+            if item:
+                actions.append({
+                    "_op_type": "index",
+                    "_index": self.index_name,
+                    "_id": self._document_id(item.id),
+                    "_source": self._build_document(item),
+                })
+            else:
+                actions.append({
+                    "_op_type": "delete",
+                    "_index": self.index_name,
+                    "_id": self._document_id(dictionary_id),
+                })
+        return actions
+
+    async def sync_changed_entries(self, changes: dict[str, str]) -> ReindexResponse:
+        """
+        功能描述：
+            只把字典初始化产生的变更条目推送到 ES；索引清单缺失或 mapping 变化时退回全量重建。
+            全部写入成功后刷新清单，下次启动引导不会把这批变更再识别为漂移。
+
+        参数：
+            changes (dict[str, str]): {dictionary_id: operation}，operation 为 update/delete。
+
+        返回值：
+            ReindexResponse: 返回写入统计。
+        """
+        await self.ensure_index()
+        manifest = await self._read_manifest()
+        if not manifest or manifest.get("mapping_hash") != self._mapping_hash():
+            return await self.reindex()
+        indexed = 0
+        failed = 0
+        pending = list(changes.items())
+        batch_size = max(1, settings.SEARCH_SYNC_BATCH_SIZE)
+        for start in range(0, len(pending), batch_size):
+            actions = await self.build_cdc_actions(dict(pending[start:start + batch_size]))
+            success, errors = await self.apply_bulk_actions(actions)
+            indexed += success
+            failed += errors
+        if changes and failed == 0:
+            await self._refresh_index_safe()
+            await self._write_manifest(self.index_name, await self._collect_source_stats())
+        return self._build_reindex_response(indexed, failed)
 
     async def search(
         self,
@@ -120,15 +209,19 @@ class HanziDictionarySearchService(BaseSearchService):
         stroke_count: Optional[int] = None,
         stroke_pattern: Optional[str] = None,
         keyword: Optional[str] = None,
+        radical: Optional[str] = None,
     ) -> dict[str, Any]:
         await self.ensure_index()
         filters: list[dict[str, Any]] = []
         character_keyword = (character or "").strip()
         if character_keyword:
-            filters.append({"wildcard": {"character": {"value": f"*{character_keyword}*"}}})
-        normalized_pinyin = normalize_pinyin_keyword(pinyin)
-        if normalized_pinyin:
-            filters.append({"wildcard": {"pinyin_normalized": {"value": f"{normalized_pinyin}*"}}})
+            filters.append({"term": {"character": character_keyword}})
+        radical_keyword = (radical or "").strip()
+        if radical_keyword:
+            filters.append({"term": {"radical": radical_keyword}})
+        pinyin_key = normalize_pinyin_search_key(pinyin)
+        if pinyin_key:
+            filters.append(self._build_pinyin_prefix_query(pinyin_key))
         if stroke_count is not None:
             filters.append({"term": {"stroke_count": stroke_count}})
         keyword_filter = self._build_keyword_filter(keyword)
@@ -154,51 +247,36 @@ class HanziDictionarySearchService(BaseSearchService):
         ids = [str(item.get("_source", {}).get("dictionary_id") or "") for item in items]
         ids = [dictionary_id for dictionary_id in ids if dictionary_id]
         items_data = [
-            {k: v for k, v in (item.get("_source") or {}).items() if k != "stroke_units" and k != "stroke_unit_counts"}
+            {k: v for k, v in (item.get("_source") or {}).items() if k not in _INTERNAL_DOCUMENT_FIELDS}
             for item in items
         ]
         return {"ids": ids, "total": total, "items": items_data}
 
-    async def _get_dictionary_item(self, dictionary_id: str) -> Optional[HanziDictionary]:
-        result = await self.db.execute(select(HanziDictionary).where(HanziDictionary.id == dictionary_id))
-        return result.scalars().first()
-
     def _build_keyword_filter(self, keyword: Optional[str]) -> Optional[dict[str, Any]]:
         if not keyword:
             return None
         trimmed = keyword.strip()
-        normalized = normalize_pinyin_keyword(keyword)
+        pinyin_key = normalize_pinyin_search_key(keyword)
         clauses: list[dict[str, Any]] = []
         if trimmed:
-            clauses.append({"wildcard": {"character": {"value": f"*{trimmed}*"}}})
-        if normalized:
-            clauses.append({"wildcard": {"pinyin_normalized": {"value": f"{normalized}*"}}})
+            clauses.append({"term": {"character": trimmed}})
+        if pinyin_key:
+            clauses.append(self._build_pinyin_prefix_query(pinyin_key))
         if not clauses:
             return None
         return {"bool": {"should": clauses, "minimum_should_match": 1}}
 
+    @staticmethod
+    def _build_pinyin_prefix_query(pinyin_key: str) -> dict[str, Any]:
+        """前缀已在索引期展开为 edge-ngram 词项，查询侧整体作为单个词项匹配。"""
+        return {"match": {PINYIN_PREFIX_FIELD: {"query": pinyin_key[:PINYIN_PREFIX_MAX_GRAM]}}}
+
     def _build_stroke_pattern_filters(self, stroke_pattern: Optional[str]) -> list[dict[str, Any]]:
         query_counts = build_stroke_unit_counts(stroke_pattern)
         if not query_counts:
             return []
-        filters: list[dict[str, Any]] = [{"term": {"stroke_units": unit}} for unit in query_counts]
-        repeated_counts = {unit: count for unit, count in query_counts.items() if count > 1}
-        if not repeated_counts:
-            return filters
-        script_lines = []
-        for unit, count in repeated_counts.items():
-            field_key = encode_stroke_unit_key(unit)
-            field_name = f"stroke_unit_counts.{field_key}"
-            script_lines.append(
-                (
-                    f"if (!doc.containsKey('{field_name}') "
-                    f"|| doc['{field_name}'].size() == 0 "
-                    f"|| doc['{field_name}'].value < {count}) return false;"
-                )
-            )
-        script_lines.append("return true;")
-        filters.append({"script": {"script": {"lang": "painless", "source": " ".join(script_lines)}}})
-        return filters
+        tokens = [build_stroke_unit_token(unit, count) for unit, count in query_counts.items()]
+        return [{"term": {"stroke_unit_tokens": token}} for token in tokens]
 
     @staticmethod
     def _document_id(dictionary_id: str) -> str:
@@ -210,12 +288,14 @@ class HanziDictionarySearchService(BaseSearchService):
         return {
             "dictionary_id": item.id,
             "character": item.character,
+            "radical": item.radical,
             "pinyin": item.pinyin or "",
-            "pinyin_normalized": normalize_pinyin_keyword(item.pinyin),
+            "pinyin_normalized": normalize_pinyin_search_key(item.pinyin),
             "stroke_count": item.stroke_count,
             "stroke_pattern": item.stroke_pattern or "",
             "stroke_units": split_stroke_pattern(item.stroke_pattern),
-            "stroke_unit_counts": build_stroke_unit_count_fields(item.stroke_pattern),
+            "stroke_unit_tokens": build_stroke_unit_tokens(item.stroke_pattern),
             "source": item.source,
             "updated_at": updated_at,
+            SYNCED_AT_FIELD: HanziDictionarySearchService._sync_timestamp(),
         }
@@ -1,6 +1,6 @@
 """
 为什么这样做：共享字典服务优先走 ES，失败时自动降级数据库过滤，确保检索能力在异常场景仍可用。
-特殊逻辑：初始化按批量 upsert 并同步索引，兼顾大批数据导入的性能与一致性边界。
+特殊逻辑：初始化按行内容摘要求增量，只批量写入并推送变更条目；源文件未变时直接跳过。
 """
 
 import logging
@@ -10,6 +10,8 @@ import pandas as pd
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
+from app.core.redis_client import get_redis
 from app.models.hanzi import Hanzi
 from app.models.hanzi_dictionary import HanziDataset
 from app.repositories.hanzi_dictionary_repo import HanziDatasetRepository, HanziDictionaryRepository
@@ -29,16 +31,23 @@ from app.schemas.hanzi_dictionary import (
 )
 from app.services.hanzi_service import HanziService
 from app.services.hanzi_dictionary_search_service import HanziDictionarySearchService
+from app.services.url_signer import get_url_signer
+from app.utils.id_generator import generate_id
 from app.utils.pagination import build_paged_response
+from app.utils.redis_cache import CACHE_TTL_STATIC, build_cache_key, cache_get, cache_set
 from app.utils.hanzi_dictionary_parser import (
-    contains_exact_stroke_units,
-    parse_strokes_file,
-    resolve_pinyin,
+    DICTIONARY_CONTENT_COLUMNS,
+    DICTIONARY_CONTENT_HASH_VERSION,
+    build_dictionary_content_hashes,
+    load_strokes_table,
     split_stroke_pattern,
 )
 
 
 logger = logging.getLogger(__name__)
+DICTIONARY_SOURCE_STROKES = "strokes_txt"
+# 最近一次成功应用的源文件标记；Redis 丢失时退回到投影比对，不会误跳过
+DICTIONARY_SOURCE_MARKER_KEY = build_cache_key("hanzi_dictionary", "applied_source")
 
 
 class HanziDictionaryService:
@@ -59,6 +68,7 @@ class HanziDictionaryService:
         self.repo = HanziDictionaryRepository(db)
         self.dataset_repo = HanziDatasetRepository(db)
         self.search_service = HanziDictionarySearchService(db)
+        self.url_signer = get_url_signer()
 
     async def get_dictionary_entry(self, dictionary_id: str) -> Optional[HanziDictionaryResponse]:
         """
@@ -87,6 +97,7 @@ class HanziDictionaryService:
         stroke_count: Optional[int] = None,
         stroke_pattern: Optional[str] = None,
         keyword: Optional[str] = None,
+        radical: Optional[str] = None,
     ) -> HanziDictionaryListResponse:
         """
         功能描述：
@@ -102,6 +113,7 @@ class HanziDictionaryService:
             stroke_count (Optional[int]): 数量值。
             stroke_pattern (Optional[str]): 字符串结果。
             keyword (Optional[str]): 字符串结果。
+            radical (Optional[str]): 部首，精确匹配。
 
         返回值：
             HanziDictionaryListResponse: 返回列表或分页查询结果。
@@ -116,6 +128,7 @@ class HanziDictionaryService:
                 stroke_count=stroke_count,
                 stroke_pattern=normalized_stroke_pattern,
                 keyword=keyword,
+                radical=radical,
             )
             dictionary_items = await self.repo.list_by_ids_in_order(search_result["ids"])
             total = search_result["total"]
@@ -130,6 +143,7 @@ class HanziDictionaryService:
                 stroke_count=stroke_count,
                 stroke_pattern=normalized_stroke_pattern,
                 keyword=keyword,
+                radical=radical,
             )
         payload = build_paged_response(
             items=items,
@@ -141,11 +155,12 @@ class HanziDictionaryService:
     async def initialize_from_strokes(self, file_path: str, force: bool = False) -> HanziDictionaryInitResponse:
         """
         功能描述：
-            初始化，从笔画文件加载字典条目。
+            初始化，从笔画文件加载字典条目：按行内容摘要与库中投影比对，只写入新增/变更/删除的增量，
+            并只向 ES 推送变更条目；同一份源文件已应用过时直接返回。
 
         参数：
             file_path (str): 文件或资源路径。
-            force (bool): 布尔值结果。
+            force (bool): 为 True 时忽略已应用标记，重写全部条目并全量重建索引。
 
         返回值：
             HanziDictionaryInitResponse: 返回HanziDictionaryInitResponse类型的处理结果。
@@ -155,41 +170,124 @@ class HanziDictionaryService:
             await self._sync_search_index(force_reindex=False)
             return HanziDictionaryInitResponse(total=0, created=0, updated=0)
 
-        existing_map = await self.repo.get_all()
-        existing_frame = pd.DataFrame(existing_map)
-        if existing_frame.empty:
-            existing_frame = pd.DataFrame(columns=["character"])
-        else:
-            existing_frame = existing_frame[["character"]].drop_duplicates()
-
-        merged_frame = pd.merge(
-            stroke_frame,
-            existing_frame,
-            on="character",
-            how="outer",
-            indicator=True,
-        )
-        if merged_frame.empty:
+        total = len(stroke_frame)
+        source_marker = self._build_source_marker(stroke_frame)
+        if not force and await self._is_source_applied(source_marker):
             await self._sync_search_index(force_reindex=False)
-            return HanziDictionaryInitResponse(total=0, created=0, updated=0)
-
-        new_frame = merged_frame.loc[
-            merged_frame["_merge"] == "left_only",
-            ["character", "stroke_count", "stroke_pattern"]
-        ].copy()
-        if new_frame.empty:
-            await self._sync_search_index(force_reindex=False)
-            return HanziDictionaryInitResponse(total=len(merged_frame), created=0, updated=0)
-        new_frame["pinyin"] = new_frame["character"].apply(resolve_pinyin)
-        new_frame["source"] = "strokes_txt"
+            return HanziDictionaryInitResponse(total=total, created=0, updated=0)
 
-        created, updated = await self.repo.upsert_many(
-            new_frame,
+        inserts, updates, delete_ids = self._diff_dictionary_rows(
+            stroke_frame,
+            await self.repo.list_content_hashes(),
             force=force,
+        )
+        deleted_ids = await self.repo.apply_delta(
+            inserts,
+            updates,
+            delete_ids,
             batch_size=self.DEFAULT_INIT_BATCH_SIZE,
         )
-        await self._sync_search_index(force_reindex=True)
-        return HanziDictionaryInitResponse(total=len(merged_frame), created=created, updated=updated)
+        if force:
+            await self._sync_search_index(force_reindex=True)
+        else:
+            changes = {row["id"]: "update" for row in [*inserts, *updates]}
+            changes.update({dictionary_id: "delete" for dictionary_id in deleted_ids})
+            await self._sync_search_changes(changes)
+        await self._mark_source_applied(source_marker)
+        return HanziDictionaryInitResponse(
+            total=total,
+            created=len(inserts),
+            updated=len(updates),
+            deleted=len(deleted_ids),
+        )
+
+    @staticmethod
+    def _diff_dictionary_rows(
+        stroke_frame: pd.DataFrame,
+        existing: dict[str, tuple[str, Optional[str], str]],
+        force: bool = False,
+    ) -> tuple[list[dict], list[dict], list[str]]:
+        """
+        功能描述：
+            以 (字符, 内容摘要) 比对源文件与库中条目，得出新增、变更与待删除集合。
+            非 Strokes.txt 来源的同名条目视为人工维护，不更新也不删除。
+
+        参数：
+            stroke_frame (pd.DataFrame): load_strokes_table 返回的数据表。
+            existing (dict[str, tuple[str, Optional[str], str]]): {字符: (主键, 内容摘要, 来源)}。
+            force (bool): 为 True 时即使摘要一致也视为变更。
+
+        返回值：
+            tuple[list[dict], list[dict], list[str]]: 返回 (新增行, 变更行, 待删除主键)。
+        """
+        frame = stroke_frame[["character", *DICTIONARY_CONTENT_COLUMNS]]
+        hashes = build_dictionary_content_hashes(frame)
+        inserts: list[dict] = []
+        updates: list[dict] = []
+        seen: set[str] = set()
+        for row, content_hash in zip(frame.to_dict(orient="records"), hashes):
+            character = row.pop("character")
+            seen.add(character)
+            current = existing.get(character)
+            if current is None:
+                inserts.append({
+                    "id": generate_id(),
+                    "character": character,
+                    **row,
+                    "source": DICTIONARY_SOURCE_STROKES,
+                    "content_hash": content_hash,
+                })
+                continue
+            dictionary_id, current_hash, source = current
+            if source != DICTIONARY_SOURCE_STROKES or (current_hash == content_hash and not force):
+                continue
+            updates.append({"id": dictionary_id, **row, "content_hash": content_hash})
+        delete_ids = [
+            dictionary_id
+            for character, (dictionary_id, _content_hash, source) in existing.items()
+            if character not in seen and source == DICTIONARY_SOURCE_STROKES
+        ]
+        return inserts, updates, delete_ids
+
+    @staticmethod
+    def _build_source_marker(stroke_frame: pd.DataFrame) -> dict:
+        return {
+            "digest": stroke_frame.attrs.get("source_digest"),
+            "hash_version": DICTIONARY_CONTENT_HASH_VERSION,
+            "total": len(stroke_frame),
+        }
+
+    async def _is_source_applied(self, source_marker: dict) -> bool:
+        """已应用标记与源文件摘要一致、且库中行数未被外部改动时，视为无需初始化。"""
+        if not source_marker.get("digest"):
+            return False
+        applied = await cache_get(get_redis(), DICTIONARY_SOURCE_MARKER_KEY)
+        if applied != source_marker:
+            return False
+        return await self.repo.count_all() >= source_marker["total"]
+
+    async def _mark_source_applied(self, source_marker: dict) -> None:
+        if source_marker.get("digest"):
+            await cache_set(get_redis(), DICTIONARY_SOURCE_MARKER_KEY, source_marker, ttl=CACHE_TTL_STATIC)
+
+    async def _sync_search_changes(self, changes: dict[str, str]) -> None:
+        """
+        功能描述：
+            同步字典增量到检索索引；无变更时仅做启动引导校验。
+
+        参数：
+            changes (dict[str, str]): {dictionary_id: operation}。
+
+        返回值：
+            None: 无返回值。
+        """
+        if not changes:
+            await self._sync_search_index(force_reindex=False)
+            return
+        try:
+            await self.search_service.sync_changed_entries(changes)
+        except Exception:
+            logger.exception("共享字典 ES 增量同步失败")
 
     async def list_datasets(
         self,
@@ -288,7 +386,7 @@ class HanziDictionaryService:
             character=character, pinyin=pinyin, stroke_pattern=stroke_pattern,
         )
         payload = build_paged_response(
-            items=[self._to_hanzi_response(item) for item in items],
+            items=await self._to_hanzi_responses(items),
             total=total,
             pagination={"page": page, "size": size, "skip": skip, "limit": limit},
         )
@@ -364,14 +462,18 @@ class HanziDictionaryService:
             updated_at=dataset.updated_at,
         )
 
+    async def _to_hanzi_responses(self, items: list[Hanzi]) -> list[HanziResponse]:
+        image_paths = await self.url_signer.resolve(items, "uri", "image_path")
+        return [self._to_hanzi_response(item, image_path) for item, image_path in zip(items, image_paths)]
+
     @staticmethod
-    def _to_hanzi_response(item: Hanzi) -> HanziResponse:
+    def _to_hanzi_response(item: Hanzi, image_path: Optional[str] = None) -> HanziResponse:
         return HanziResponse(
             id=item.id,
             dictionary_id=item.dictionary_id,
             character=item.character,
             char=item.character,
-            image_path=item.image_path,
+            image_path=image_path or item.image_path,
             stroke_count=item.stroke_count,
             structure=item.structure,
             stroke_order=item.stroke_order,
@@ -391,7 +493,7 @@ class HanziDictionaryService:
     def parse_strokes_file(file_path: str) -> pd.DataFrame:
         """
         功能描述：
-            解析strokes文件。
+            解析strokes文件，拼音已随解析结果一并缓存。
 
         参数：
             file_path (str): 文件或资源路径。
@@ -399,7 +501,7 @@ class HanziDictionaryService:
         返回值：
             pd.DataFrame: 返回pd.DataFrame类型的处理结果。
         """
-        return parse_strokes_file(file_path)
+        return load_strokes_table(file_path, cache_dir=settings.TEMP_DIR)
 
     async def _list_dictionary_entries_by_db_fallback(
         self,
@@ -410,6 +512,7 @@ class HanziDictionaryService:
         stroke_count: Optional[int],
         stroke_pattern: Optional[str],
         keyword: Optional[str],
+        radical: Optional[str] = None,
     ) -> tuple[list[HanziDictionaryResponse], int]:
         """
         功能描述：
@@ -423,38 +526,30 @@ class HanziDictionaryService:
             stroke_count (Optional[int]): 数量值。
             stroke_pattern (Optional[str]): 字符串结果。
             keyword (Optional[str]): 字符串结果。
+            radical (Optional[str]): 部首，精确匹配。
 
         返回值：
             tuple[list[HanziDictionaryResponse], int]: 返回tuple[list[HanziDictionaryResponse], int]类型的处理结果。
         """
-        if not stroke_pattern:
-            dictionary_items = await self.repo.list_all_filtered(
-                skip=skip,
-                limit=limit,
-                character=character,
-                pinyin=pinyin,
-                stroke_count=stroke_count,
-                keyword=keyword,
-            )
-            total = await self.repo.count_filtered(
-                character=character,
-                pinyin=pinyin,
-                stroke_count=stroke_count,
-                keyword=keyword,
-            )
-            return [self._to_dictionary_response(item) for item in dictionary_items], total
-        candidates = await self.repo.list_search_candidates(
+        dictionary_items = await self.repo.list_all_filtered(
+            skip=skip,
+            limit=limit,
+            character=character,
+            pinyin=pinyin,
+            stroke_count=stroke_count,
+            keyword=keyword,
+            radical=radical,
+            stroke_pattern=stroke_pattern,
+        )
+        total = await self.repo.count_filtered(
             character=character,
             pinyin=pinyin,
             stroke_count=stroke_count,
             keyword=keyword,
+            radical=radical,
+            stroke_pattern=stroke_pattern,
         )
-        matched_items = [
-            self._to_dictionary_response(item)
-            for item in candidates
-            if contains_exact_stroke_units(item.stroke_pattern, stroke_pattern)
-        ]
-        return matched_items[skip:skip + limit], len(matched_items)
+        return [self._to_dictionary_response(item) for item in dictionary_items], total
 
     async def _sync_search_index(self, force_reindex: bool) -> None:
         """
@@ -490,6 +585,7 @@ class HanziDictionaryService:
         return HanziDictionaryResponse(
             id=item.id,
             character=item.character,
+            radical=item.radical,
             stroke_count=item.stroke_count,
             stroke_pattern=item.stroke_pattern,
             stroke_units=split_stroke_pattern(item.stroke_pattern),
@@ -1,11 +1,14 @@
 """
 为什么这样做：汉字服务保持轻量 CRUD，并统一输出字段，降低前后端字段别名不一致的接入成本。
-特殊逻辑：笔画能力从全局 stroke_service 读取，避免每次请求重复加载笔画源数据。
+特殊逻辑：笔画能力从全局 stroke_service 读取，避免每次请求重复加载笔画源数据；
+批量 OCR 预填先把上传分块落盘并按内容去重，再交给识别流水线并发识别，结果按完成顺序流式产出；
+图片地址在组装响应时按 uri 读时签名，整页一次批量处理。
 """
 
+import asyncio
+import json
 from pathlib import Path
-from tempfile import NamedTemporaryFile
-from typing import Optional
+from typing import AsyncIterator, Optional
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -16,6 +19,7 @@ from fastapi import UploadFile
 from app.schemas.hanzi import (
     HanziCreate,
     HanziListResponse,
+    HanziOCRBatchPrefillFailure,
     HanziOCRBatchPrefillItem,
     HanziOCRBatchPrefillResponse,
     HanziOCRPrefillResponse,
@@ -24,7 +28,10 @@ from app.schemas.hanzi import (
     OCRDictionaryCandidate,
 )
 from app.core.app_state import stroke_service
+from app.services.ocr_pipeline import OCRPipeline, OCRPipelineResult
 from app.services.ocr_service import OCRService
+from app.services.url_signer import get_url_signer
+from app.utils.file_utils import SpooledUpload, spool_upload_file
 from app.utils.pagination import build_paged_response
 from app.utils.hanzi_dictionary_parser import split_stroke_pattern
 
@@ -35,6 +42,7 @@ class HanziService:
         self.repo = HanziRepository(db)
         self.dictionary_repo = HanziDictionaryRepository(db)
         self.ocr_service = OCRService()
+        self.url_signer = get_url_signer()
 
     async def get_hanzi(self, id: str, current_user_id: str) -> Optional[HanziResponse]:
         """
@@ -50,7 +58,7 @@ class HanziService:
         """
         hanzi = await self.repo.get(id, current_user_id)
         if hanzi:
-            return self._to_response(hanzi)
+            return (await self._to_responses([hanzi]))[0]
         return None
 
     async def get_hanzi_by_char(self, char: str, current_user_id: str) -> Optional[HanziResponse]:
@@ -67,7 +75,7 @@ class HanziService:
         """
         hanzi = await self.repo.get_by_character(char, current_user_id)
         if hanzi:
-            return self._to_response(hanzi)
+            return (await self._to_responses([hanzi]))[0]
         return None
 
     async def list_hanzi(self, skip: int = 0, limit: int = 20,
@@ -113,7 +121,7 @@ class HanziService:
             source=source,
         )
         payload = build_paged_response(
-            items=[self._to_response(item) for item in items],
+            items=await self._to_responses(items),
             total=total,
             pagination={"page": page, "size": size, "skip": skip, "limit": limit},
         )
@@ -133,7 +141,7 @@ class HanziService:
         """
         prepared = await self._prepare_payload(hanzi_in)
         hanzi = await self.repo.create(prepared, current_user_id)
-        return self._to_response(hanzi)
+        return (await self._to_responses([hanzi]))[0]
 
     async def update_hanzi(self, id: str, hanzi_in: HanziUpdate, current_user_id: str) -> Optional[HanziResponse]:
         """
@@ -154,7 +162,7 @@ class HanziService:
 
         prepared = await self._prepare_payload(hanzi_in)
         updated_hanzi = await self.repo.update(hanzi, prepared)
-        return self._to_response(updated_hanzi)
+        return (await self._to_responses([updated_hanzi]))[0]
 
     async def delete_hanzi(self, id: str, current_user_id: str) -> bool:
         hanzi = await self.repo.get(id, current_user_id)
@@ -229,6 +237,11 @@ class HanziService:
         返回值：
             dict: 返回包含字符、笔画数和笔画顺序的字典。
         """
+        record = stroke_service.get_record(ch)
+        if record:
+            return {"character": ch, "stroke_count": record.stroke_count,
+                    "stroke_order": stroke_service.get_stroke_order(ch)}
+        # 内存引擎未收录的字符（如自建字）才回查数据库
         return {
             "character": ch,
             "stroke_count": await self.repo.get_stroke_count(ch),
@@ -243,10 +256,36 @@ class HanziService:
         current_user_id: Optional[str] = None,
         page: Optional[int] = None,
         size: Optional[int] = None,
+        stroke_count: Optional[int] = None,
+        radical: Optional[str] = None,
     ) -> HanziListResponse:
-        items = await self.repo.search_by_stroke_order(stroke_pattern, skip, limit, current_user_id)
+        """
+        功能描述：
+            按笔顺片段检索当前用户可见的汉字：笔画引擎先由倒排索引、笔画数分桶与部首索引算出候选字，
+            数据库只在候选字范围内比对笔顺；引擎未收录的条件组合（候选过多）才退回数据库自身过滤。
+
+        参数：
+            stroke_pattern (str): 笔顺片段，空格分隔的多个片段需同时命中。
+            skip (int): 分页偏移量。
+            limit (int): 单次查询的最大返回数量。
+            current_user_id (Optional[str]): 当前用户ID。
+            page (Optional[int]): 当前页码。
+            size (Optional[int]): 每页条数。
+            stroke_count (Optional[int]): 笔画数。
+            radical (Optional[str]): 部首。
+
+        返回值：
+            HanziListResponse: 返回分页结果。
+        """
+        characters = stroke_service.candidate_characters(stroke_pattern, stroke_count=stroke_count, radical=radical)
+        if characters is not None and not characters:
+            items = []
+        else:
+            items = await self.repo.search_by_stroke_order(
+                stroke_pattern, skip, limit, current_user_id, stroke_count=stroke_count, characters=characters,
+            )
         payload = build_paged_response(
-            items=[self._to_response(item) for item in items],
+            items=await self._to_responses(items),
             total=len(items),
             pagination={"page": page, "size": size, "skip": skip, "limit": limit},
         )
@@ -271,25 +310,120 @@ class HanziService:
 
         返回值：
             HanziOCRBatchPrefillResponse: 返回包含批量预填充数据的响应对象。
+
+        异常：
+            ValueError: 任一文件未识别出汉字时抛出，与单张预填保持一致。
         """
+        uploads = await self.prepare_batch_prefill(files)
         items: list[HanziOCRBatchPrefillItem] = []
-        for file in files:
-            file_path = await self._save_upload_file(file)
-            try:
-                recognized = await self.ocr_service.recognize_image(file_path)
-                recognized_text = self._normalize_recognized_text(recognized)
-                prefill = await self._build_prefill_by_character(recognized_text)
-                items.append(
-                    HanziOCRBatchPrefillItem(
-                        file_name=file.filename or Path(file_path).name,
+        failures: list[HanziOCRBatchPrefillFailure] = []
+        async for result in self.iter_batch_prefill(uploads):
+            if isinstance(result, HanziOCRBatchPrefillFailure):
+                failures.append(result)
+            else:
+                items.append(result)
+        if failures:
+            first = min(failures, key=lambda failure: failure.index)
+            raise ValueError(f"{first.file_name}：{first.error}")
+        items.sort(key=lambda item: item.index)
+        return HanziOCRBatchPrefillResponse(total=len(items), items=items)
+
+    async def prepare_batch_prefill(self, files: list[UploadFile]) -> list[SpooledUpload]:
+        """
+        功能描述：
+            校验识别配置并把上传文件分块落盘，流式响应开始前调用，使配置错误仍能以 400 返回。
+
+        参数：
+            files (list[UploadFile]): 上传的图片文件列表。
+
+        返回值：
+            list[SpooledUpload]: 落盘后的文件，由 iter_batch_prefill 负责清理。
+        """
+        self.ocr_service.ensure_recognize_config()
+        uploads: list[SpooledUpload] = []
+        try:
+            for file in files:
+                uploads.append(await spool_upload_file(file))
+        except BaseException:
+            self._remove_uploads(uploads)
+            raise
+        return uploads
+
+    async def iter_batch_prefill(
+        self,
+        uploads: list[SpooledUpload],
+    ) -> AsyncIterator[HanziOCRBatchPrefillItem | HanziOCRBatchPrefillFailure]:
+        """
+        功能描述：
+            并发识别已落盘的图片，按完成顺序逐个产出预填结果；内容相同的文件只识别一次。
+
+        参数：
+            uploads (list[SpooledUpload]): prepare_batch_prefill 的返回值。
+
+        返回值：
+            AsyncIterator[HanziOCRBatchPrefillItem | HanziOCRBatchPrefillFailure]: 每个文件一条结果。
+        """
+        groups: dict[str, list[int]] = {}
+        for index, upload in enumerate(uploads):
+            groups.setdefault(upload.sha256, []).append(index)
+        representatives = [indices[0] for indices in groups.values()]
+        queue: asyncio.Queue[OCRPipelineResult] = asyncio.Queue()
+        pipeline = OCRPipeline(self.ocr_service, result_cache=self.ocr_service.result_cache)
+        task = asyncio.create_task(
+            pipeline.run([uploads[index].path for index in representatives], on_result=queue.put),
+        )
+        try:
+            for _ in representatives:
+                result = await self._next_result(queue, task)
+                duplicates = groups[uploads[representatives[result.index]].sha256]
+                try:
+                    if not result.ok:
+                        raise ValueError(result.error)
+                    recognized_text = self._normalize_recognized_text(result.characters)
+                    # 字典候选查询共用一个数据库会话，在消费端逐条执行
+                    prefill = await self._build_prefill_by_character(recognized_text)
+                except ValueError as exc:
+                    for index in duplicates:
+                        yield HanziOCRBatchPrefillFailure(
+                            index=index, file_name=uploads[index].file_name, error=str(exc),
+                        )
+                    continue
+                for index in duplicates:
+                    yield HanziOCRBatchPrefillItem(
+                        index=index,
+                        file_name=uploads[index].file_name,
                         recognized_text=recognized_text,
                         draft=prefill.draft,
                         candidates=prefill.candidates,
                     )
-                )
-            finally:
-                Path(file_path).unlink(missing_ok=True)
-        return HanziOCRBatchPrefillResponse(total=len(items), items=items)
+            await task
+        finally:
+            # 客户端中途断开时停止剩余识别
+            if not task.done():
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+            self._remove_uploads(uploads)
+
+    async def stream_batch_prefill(self, uploads: list[SpooledUpload]) -> AsyncIterator[str]:
+        """
+        功能描述：
+            以 SSE 逐条推送批量预填结果：item 为识别成功，error 为单个文件失败，最后推送 done 汇总。
+
+        参数：
+            uploads (list[SpooledUpload]): prepare_batch_prefill 的返回值。
+
+        返回值：
+            AsyncIterator[str]: SSE 文本片段。
+        """
+        succeeded = failed = 0
+        async for result in self.iter_batch_prefill(uploads):
+            if isinstance(result, HanziOCRBatchPrefillFailure):
+                failed += 1
+                yield self._to_sse("error", result.model_dump(mode="json"))
+            else:
+                succeeded += 1
+                yield self._to_sse("item", result.model_dump(mode="json"))
+        yield self._to_sse("done", {"total": len(uploads), "succeeded": succeeded, "failed": failed})
 
     async def _prepare_payload(self, payload_model: HanziCreate | HanziUpdate) -> HanziCreate | HanziUpdate:
         payload = payload_model.model_dump(exclude_unset=True)
@@ -351,21 +485,41 @@ class HanziService:
 
     @staticmethod
     async def _save_upload_file(file: UploadFile) -> str:
-        file.file.seek(0)
-        suffix = Path(file.filename or "upload.png").suffix or ".png"
-        with NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
-            content = await file.read()
-            temp_file.write(content)
-            return temp_file.name
+        return (await spool_upload_file(file)).path
+
+    @staticmethod
+    async def _next_result(queue: asyncio.Queue, task: asyncio.Task) -> OCRPipelineResult:
+        # 流水线异常退出时不再有结果入队，直接抛出其异常而不是一直等待
+        getter = asyncio.ensure_future(queue.get())
+        await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+        if getter.done():
+            return getter.result()
+        getter.cancel()
+        task.result()
+        return await queue.get()
+
+    @staticmethod
+    def _remove_uploads(uploads: list[SpooledUpload]) -> None:
+        for upload in uploads:
+            Path(upload.path).unlink(missing_ok=True)
+
+    @staticmethod
+    def _to_sse(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    async def _to_responses(self, items) -> list[HanziResponse]:
+        # 整页一次签名；签名结果只进响应，不回写 ORM 对象，避免读接口触发 UPDATE
+        image_paths = await self.url_signer.resolve(items, "uri", "image_path")
+        return [self._to_response(item, image_path) for item, image_path in zip(items, image_paths)]
 
     @staticmethod
-    def _to_response(item) -> HanziResponse:
+    def _to_response(item, image_path: Optional[str] = None) -> HanziResponse:
         return HanziResponse(
             id=item.id,
             dictionary_id=item.dictionary_id,
             character=item.character,
             char=item.character,
-            image_path=item.image_path,
+            image_path=image_path or item.image_path,
             stroke_count=item.stroke_count,
             structure=item.structure,
             stroke_order=item.stroke_order,
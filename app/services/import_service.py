@@ -14,6 +14,7 @@ from typing import Any, Awaitable, Callable, Optional
 import pandas as pd
 
 from app.core.config import settings
+from app.services.ocr_pipeline import OCRPipeline, OCRPipelineResult
 from app.services.ocr_service import OCRService
 from app.utils.image_utils import extract_zip_to_temp
 
@@ -98,6 +99,7 @@ class ImportService:
         """
         self.output_dir = output_dir or os.path.join(settings.MEDIA_ROOT, IMPORT_RESULTS_DIR_NAME)
         self.ocr_service = OCRService()
+        self.ocr_pipeline = OCRPipeline(self.ocr_service, result_cache=self.ocr_service.result_cache)
 
     async def process_import_task(
         self,
@@ -302,7 +304,7 @@ class ImportService:
     ) -> RecognitionSummary:
         """
         功能描述：
-            识别图片。
+            通过识别流水线并发识别全部图片，再按原始顺序汇总成功行与失败文件。
 
         参数：
             context (ImportContext): ImportContext 类型的数据。
@@ -316,39 +318,49 @@ class ImportService:
         success_count = 0
         failed_count = 0
         total_count = len(context.image_files)
-
-        for index, image_file in enumerate(context.image_files):
-            if self._should_report_progress(index, total_count):
-                current_progress = self._calculate_progress(index, total_count)
-                await update_status(current_progress, f"正在处理 {index + 1}/{total_count}…")
-
-            try:
+        completed_count = 0
+
+        async def on_result(_: OCRPipelineResult) -> None:
+            nonlocal completed_count
+            if self._should_report_progress(completed_count, total_count):
+                current_progress = self._calculate_progress(completed_count, total_count)
+                await update_status(current_progress, f"正在处理 {completed_count + 1}/{total_count}…")
+            completed_count += 1
+
+        # 凭证缺失时每张图都会失败，提前校验让整个任务直接报错
+        self.ocr_service.ensure_recognize_config()
+        image_paths = [os.path.join(context.image_dir, image_file) for image_file in context.image_files]
+        recognized = await self.ocr_pipeline.run(image_paths, on_result=on_result)
+
+        # 流水线按输入顺序返回，Excel 行序与图片文件名顺序保持一致
+        for image_file, outcome in zip(context.image_files, recognized):
+            if not outcome.ok:
                 # 单张识别失败不能阻断整批导入，这里按"逐张容错、集中汇总失败原因"的方式处理。
-                result_row = await self._recognize_single_image(
-                    image_dir=context.image_dir,
+                failed_count, failed_files = self._record_failed_file(
+                    failed_count=failed_count,
+                    failed_files=failed_files,
                     image_file=image_file,
-                    level_data=context.level_data,
-                    comment_data=context.comment_data,
+                    reason=outcome.error,
                 )
-                if result_row is None:
-                    # OCR 没有返回有效字符时按失败文件记录，便于最终结果中提示人工复核。
-                    failed_count, failed_files = self._record_failed_file(
-                        failed_count=failed_count,
-                        failed_files=failed_files,
-                        image_file=image_file,
-                        reason=FAILED_RECOGNITION_REASON,
-                    )
-                    continue
-
-                results.append(result_row)
-                success_count += 1
-            except Exception as exc:
+                continue
+            result_row = self._build_recognized_row(
+                char=outcome.characters,
+                image_file=image_file,
+                level_data=context.level_data,
+                comment_data=context.comment_data,
+            )
+            if result_row is None:
+                # OCR 没有返回有效字符时按失败文件记录，便于最终结果中提示人工复核。
                 failed_count, failed_files = self._record_failed_file(
                     failed_count=failed_count,
                     failed_files=failed_files,
                     image_file=image_file,
-                    reason=str(exc),
+                    reason=FAILED_RECOGNITION_REASON,
                 )
+                continue
+
+            results.append(result_row)
+            success_count += 1
 
         return RecognitionSummary(
             results=results,
@@ -409,32 +421,29 @@ class ImportService:
         failed_files.append((image_file, reason))
         return failed_count + 1, failed_files
 
-    async def _recognize_single_image(
+    def _build_recognized_row(
         self,
-        image_dir: str,
+        char: Any,
         image_file: str,
         level_data: MetadataMapping,
         comment_data: MetadataMapping,
     ) -> Optional[ResultRow]:
         """
         功能描述：
-            识别single图片。
+            根据识别结果构建结果行并补充元数据。
 
         参数：
-            image_dir (str): 字符串结果。
+            char (Any): 识别出的字符。
             image_file (str): 文件对象或文件标识。
             level_data (MetadataMapping): MetadataMapping 类型的数据。
             comment_data (MetadataMapping): MetadataMapping 类型的数据。
 
         返回值：
-            Optional[ResultRow]: 返回处理结果对象；无可用结果时返回 None。
+            Optional[ResultRow]: 返回处理结果对象；未识别出字符时返回 None。
         """
-        image_path = os.path.join(image_dir, image_file)
-        file_name_without_ext = os.path.splitext(image_file)[0]
-        char = await self.ocr_service.recognize_image(image_path)
         if not char:
             return None
-
+        file_name_without_ext = os.path.splitext(image_file)[0]
         result_row = self._build_result_row(char, file_name_without_ext)
         self._apply_metadata(result_row, image_file, level_data, comment_data)
         return result_row
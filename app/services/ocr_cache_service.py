@@ -0,0 +1,170 @@
+"""
+为什么这样做：同一张手写图片会在 OCR 预填、数据集导入、ZIP 导入与 AI 评语中反复识别，每次都是一次付费调用；
+这里按图片内容寻址缓存识别结果，重复上传与重试只需计算一次摘要。
+特殊逻辑：摘要取“解码 → 纠正 EXIF 方向 → 转灰度”后的像素 SHA-256，元数据或容器格式不同但像素相同的图片命中同一条；
+缓存分两层：Redis 热层带 TTL，数据库冷层长期保存，冷层命中后回填热层；
+只缓存非空结果，供应商报错或限流导致的空结果不会被固化；远程 URL 无法在本地计算摘要，不走缓存。
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+from typing import Iterable, Optional, Sequence
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.redis_client import get_redis
+from app.repositories.ocr_result_repo import OCRResultRepository
+from app.utils.redis_cache import CACHE_FALLBACK_EXCEPTIONS
+
+logger = logging.getLogger(__name__)
+
+# 单张识别与网格合并识别的结果来源不同，分模式缓存
+OCR_MODE_HANDWRITING = "handwriting"
+OCR_MODE_GRID = "handwriting_grid"
+OCR_RESULT_CACHE_PREFIX = "ocr:result"
+
+Characters = str | list[str]
+
+
+def compute_image_digest(image_path: str) -> str:
+    """
+    功能描述：
+        计算图片内容摘要；无法解码的文件退化为原始字节摘要。
+
+    参数：
+        image_path (str): 本地图片路径。
+
+    返回值：
+        str: 64 位十六进制 SHA-256。
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    try:
+        with Image.open(image_path) as image:
+            normalized = ImageOps.exif_transpose(image).convert("L")
+            digest = hashlib.sha256(f"{normalized.width}x{normalized.height}:".encode("ascii"))
+            digest.update(normalized.tobytes())
+            return digest.hexdigest()
+    except (UnidentifiedImageError, OSError):
+        digest = hashlib.sha256()
+        with open(image_path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+def _cache_key(mode: str, digest: str) -> str:
+    return f"{mode}:{digest}"
+
+
+class OCRResultCache:
+    def __init__(self, session_factory=None, ttl: Optional[int] = None):
+        """
+        功能描述：
+            初始化OCRResultCache并准备运行所需的依赖对象。
+
+        参数：
+            session_factory: 冷层使用的异步会话工厂，默认 AsyncSessionLocal。
+            ttl (Optional[int]): 热层过期时间（秒），默认读取配置。
+
+        返回值：
+            None: 无返回值。
+        """
+        self.session_factory = session_factory or AsyncSessionLocal
+        self.ttl = ttl or settings.OCR_RESULT_CACHE_TTL
+        self.enabled = settings.OCR_RESULT_CACHE_ENABLED
+
+    async def digest(self, image_path: str) -> Optional[str]:
+        """计算本地图片摘要；远程 URL、缓存关闭或文件不可读时返回 None。"""
+        if not self.enabled or image_path.startswith(("http://", "https://")):
+            return None
+        try:
+            return await asyncio.to_thread(compute_image_digest, image_path)
+        except OSError as exc:
+            logger.warning("计算图片摘要失败 path=%s: %s", image_path, exc)
+            return None
+
+    async def get(self, digest: Optional[str], modes: Sequence[str]) -> Optional[Characters]:
+        """按模式优先级查找一张图片的识别结果。"""
+        if digest is None:
+            return None
+        return (await self.get_many([digest], modes)).get(digest)
+
+    async def get_many(self, digests: Iterable[Optional[str]], modes: Sequence[str]) -> dict[str, Characters]:
+        """
+        功能描述：
+            批量查找识别结果，先查 Redis，未命中的再查数据库并回填 Redis。
+
+        参数：
+            digests (Iterable[Optional[str]]): 图片摘要，None 会被忽略。
+            modes (Sequence[str]): 可接受的识别模式，靠前的优先。
+
+        返回值：
+            dict[str, Characters]: 摘要 → 识别结果；未命中的摘要不在结果中。
+        """
+        unique = [digest for digest in dict.fromkeys(digests) if digest]
+        if not unique:
+            return {}
+        keys = [_cache_key(mode, digest) for digest in unique for mode in modes]
+        found = await self._read_hot(keys)
+        missing = [key for key in keys if key not in found]
+        if missing:
+            cold = await self._read_cold(missing)
+            for key, characters in cold.items():
+                found[key] = characters
+                await self._write_hot(key, characters)
+
+        results: dict[str, Characters] = {}
+        for digest in unique:
+            for mode in modes:
+                characters = found.get(_cache_key(mode, digest))
+                if characters:
+                    results[digest] = characters
+                    break
+        return results
+
+    async def set(self, digest: Optional[str], mode: str, characters: Characters) -> None:
+        """写入两层缓存；空结果与无摘要的图片直接忽略。"""
+        if digest is None or not characters:
+            return
+        key = _cache_key(mode, digest)
+        await self._write_hot(key, characters)
+        try:
+            async with self.session_factory() as db:
+                await OCRResultRepository(db).upsert(key, mode, digest, characters)
+        except Exception as exc:
+            logger.warning("写入 OCR 结果冷缓存失败 key=%s: %s", key, exc)
+
+    async def _read_hot(self, keys: list[str]) -> dict[str, Characters]:
+        try:
+            values = await get_redis().mget([f"{OCR_RESULT_CACHE_PREFIX}:{key}" for key in keys])
+        except CACHE_FALLBACK_EXCEPTIONS as exc:
+            logger.warning("读取 OCR 结果缓存失败：%s", exc)
+            return {}
+        found: dict[str, Characters] = {}
+        for key, raw in zip(keys, values):
+            if raw is None:
+                continue
+            try:
+                found[key] = json.loads(raw)
+            except json.JSONDecodeError:
+                continue
+        return found
+
+    async def _write_hot(self, key: str, characters: Characters) -> None:
+        try:
+            await get_redis().set(
+                f"{OCR_RESULT_CACHE_PREFIX}:{key}", json.dumps(characters, ensure_ascii=False), ex=self.ttl,
+            )
+        except CACHE_FALLBACK_EXCEPTIONS as exc:
+            logger.warning("写入 OCR 结果缓存失败 key=%s: %s", key, exc)
+
+    async def _read_cold(self, keys: list[str]) -> dict[str, Characters]:
+        try:
+            async with self.session_factory() as db:
+                return await OCRResultRepository(db).get_many(keys)
+        except Exception as exc:
+            logger.warning("读取 OCR 结果冷缓存失败：%s", exc)
+            return {}
@@ -0,0 +1,269 @@
+"""
+为什么这样做：百度 OCR 原先每次用 requests.post 新建连接，每次识别都要重新握手，
+访问令牌又缓存在每个 OCRService 实例上，服务实例一多令牌就被反复申请；
+这里改为进程级的异步客户端：httpx 连接池保持长连接，调用方直接 await，不再占用线程池。
+特殊逻辑：令牌先查进程内缓存，再查 Redis（多进程共享），都未命中时才去百度申请；
+申请过程是单飞的，进程内靠锁、跨进程靠 Redis NX 锁，没抢到锁的调用方轮询等待令牌写回，
+超时仍未拿到再自行申请兜底。令牌被百度判定失效时清除缓存并重试一次。
+连接池绑定事件循环，循环关闭后已无法再关闭其中的连接；Celery 等同步入口用 run_with_ocr_clients
+代替 asyncio.run，让连接池在本次循环结束前关闭，而不是留给下一个循环覆盖后泄漏套接字。
+"""
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Awaitable, Optional, TypeVar
+from urllib.parse import urlencode
+
+import httpx
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.utils.redis_cache import CACHE_FALLBACK_EXCEPTIONS
+
+
+logger = logging.getLogger(__name__)
+T = TypeVar("T")
+
+BAIDU_TOKEN_CACHE_PREFIX = "ocr:baidu:token"
+# 令牌提前失效时间（秒），避免临界过期
+BAIDU_TOKEN_ADVANCE_EXPIRE = 300
+BAIDU_TOKEN_LOCK_TTL = 10
+BAIDU_TOKEN_WAIT_INTERVAL = 0.1
+# 百度返回的令牌无效 / 过期错误码
+BAIDU_INVALID_TOKEN_ERROR_CODES = frozenset({110, 111})
+FORM_HEADERS = {
+    "Content-Type": "application/x-www-form-urlencoded",
+    "Accept": "application/json",
+}
+
+
+class BaiduOCRClient:
+    """百度 OCR 异步客户端：连接池复用长连接，访问令牌跨进程共享。"""
+
+    def __init__(
+        self,
+        api_key: str,
+        secret_key: str,
+        base_url: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.base_url = (base_url or settings.BAIDU_OCR_BASE_URL).rstrip("/")
+        # 测试可注入 httpx.MockTransport
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._token_lock: Optional[asyncio.Lock] = None
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        # 不同凭证使用不同缓存键，切换账号后不会读到旧令牌
+        fingerprint = hashlib.sha1(f"{api_key}:{secret_key}".encode("utf-8")).hexdigest()[:16]
+        self._token_key = f"{BAIDU_TOKEN_CACHE_PREFIX}:{fingerprint}"
+        self._lock_key = f"{self._token_key}:lock"
+
+    def _http_client(self) -> httpx.AsyncClient:
+        # 连接池与锁都绑定事件循环；Celery 任务每次 asyncio.run 都是新循环，需要随之重建
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            if self._client is not None and not self._client.is_closed:
+                # 旧循环已结束，aclose 会因 "Event loop is closed" 失败，只能提示调用方改用 run_with_ocr_clients
+                logger.warning("百度 OCR 连接池未随上一个事件循环关闭，其连接将泄漏")
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                timeout=settings.OCR_HTTP_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.OCR_HTTP_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.OCR_HTTP_MAX_CONNECTIONS,
+                    keepalive_expiry=settings.OCR_HTTP_KEEPALIVE_SECONDS,
+                ),
+            )
+            self._client_loop = loop
+            self._token_lock = asyncio.Lock()
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None and self._client_loop is asyncio.get_running_loop():
+            await self._client.aclose()
+        self._client = None
+        self._client_loop = None
+
+    async def handwriting(self, image_url: str) -> dict[str, Any]:
+        """
+        功能描述：
+            调用百度手写文字识别。
+
+        参数：
+            image_url (str): 图片公网地址。
+
+        返回值：
+            dict[str, Any]: 百度返回的原始结果。
+        """
+        return await self._handwriting({"url": image_url, "detect_direction": "true"})
+
+    async def handwriting_image(self, image: bytes) -> dict[str, Any]:
+        """
+        功能描述：
+            直接提交图片内容做手写识别，并返回逐字位置，供网格合并识别按坐标拆分结果。
+
+        参数：
+            image (bytes): 图片字节（JPEG/PNG）。
+
+        返回值：
+            dict[str, Any]: 百度返回的原始结果，words_result[].chars[] 带 location。
+        """
+        # 不做方向检测：旋转后的坐标无法再对应到网格格子
+        return await self._handwriting({
+            "image": base64.b64encode(image).decode("ascii"),
+            "recognize_granularity": "small",
+        })
+
+    async def _handwriting(self, payload: dict[str, Any]) -> dict[str, Any]:
+        result = await self._post_with_token("/rest/2.0/ocr/v1/handwriting", payload)
+        if result.get("error_code") in BAIDU_INVALID_TOKEN_ERROR_CODES:
+            await self.invalidate_token()
+            result = await self._post_with_token("/rest/2.0/ocr/v1/handwriting", payload)
+        return result
+
+    async def _post_with_token(self, path: str, payload: dict[str, Any]) -> dict[str, Any]:
+        token = await self.get_access_token()
+        response = await self._http_client().post(
+            f"{self.base_url}{path}",
+            params={"access_token": token},
+            headers=FORM_HEADERS,
+            content=urlencode(payload),
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def get_access_token(self) -> str:
+        """依次从进程内缓存、Redis、百度获取访问令牌。"""
+        if self._token_is_fresh():
+            return self._token
+        self._http_client()  # 确保令牌锁属于当前事件循环
+        async with self._token_lock:
+            if self._token_is_fresh():
+                return self._token
+            cached = await self._read_shared_token()
+            if cached is None:
+                cached = await self._refresh_shared_token()
+            self._token, self._token_expires_at = cached
+            return self._token
+
+    async def invalidate_token(self) -> None:
+        """清除进程内与 Redis 中的令牌，下次调用重新申请。"""
+        self._token = None
+        self._token_expires_at = 0.0
+        try:
+            await get_redis().delete(self._token_key)
+        except CACHE_FALLBACK_EXCEPTIONS as exc:
+            logger.warning("清除百度令牌缓存失败：%s", exc)
+
+    def _token_is_fresh(self) -> bool:
+        return bool(self._token) and time.time() < self._token_expires_at - BAIDU_TOKEN_ADVANCE_EXPIRE
+
+    async def _read_shared_token(self) -> Optional[tuple[str, float]]:
+        try:
+            raw = await get_redis().get(self._token_key)
+        except CACHE_FALLBACK_EXCEPTIONS as exc:
+            logger.warning("读取百度令牌缓存失败：%s", exc)
+            return None
+        if not raw:
+            return None
+        try:
+            data = json.loads(raw)
+            return str(data["token"]), float(data["expires_at"])
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    async def _refresh_shared_token(self) -> tuple[str, float]:
+        redis = get_redis()
+        try:
+            acquired = await redis.set(self._lock_key, "1", ex=BAIDU_TOKEN_LOCK_TTL, nx=True)
+        except CACHE_FALLBACK_EXCEPTIONS as exc:
+            logger.warning("获取百度令牌刷新锁失败，直接申请：%s", exc)
+            return await self._fetch_token()
+        if not acquired:
+            # 其他进程正在申请，等待其写回
+            deadline = time.monotonic() + BAIDU_TOKEN_LOCK_TTL
+            while time.monotonic() < deadline:
+                await asyncio.sleep(BAIDU_TOKEN_WAIT_INTERVAL)
+                cached = await self._read_shared_token()
+                if cached is not None:
+                    return cached
+            return await self._fetch_token()
+        try:
+            token, expires_at = await self._fetch_token()
+            ttl = int(expires_at - time.time()) - BAIDU_TOKEN_ADVANCE_EXPIRE
+            if ttl > 0:
+                try:
+                    await redis.set(self._token_key, json.dumps({"token": token, "expires_at": expires_at}), ex=ttl)
+                except CACHE_FALLBACK_EXCEPTIONS as exc:
+                    logger.warning("写入百度令牌缓存失败：%s", exc)
+            return token, expires_at
+        finally:
+            try:
+                await redis.delete(self._lock_key)
+            except CACHE_FALLBACK_EXCEPTIONS:
+                pass
+
+    async def _fetch_token(self) -> tuple[str, float]:
+        response = await self._http_client().post(
+            f"{self.base_url}/oauth/2.0/token",
+            params={
+                "grant_type": "client_credentials",
+                "client_id": self.api_key,
+                "client_secret": self.secret_key,
+            },
+        )
+        response.raise_for_status()
+        data = response.json()
+        if not data.get("access_token"):
+            raise ValueError(f"百度OCR令牌申请失败：{data.get('error_description') or data}")
+        return str(data["access_token"]), time.time() + int(data.get("expires_in", 0))
+
+
+_baidu_client: Optional[BaiduOCRClient] = None
+
+
+def get_baidu_ocr_client() -> BaiduOCRClient:
+    """获取进程级百度 OCR 客户端；凭证或地址配置变化时重建。"""
+    global _baidu_client
+    api_key = (settings.BAIDU_API_KEY or "").strip()
+    secret_key = (settings.BAIDU_SECRET_KEY or "").strip()
+    base_url = settings.BAIDU_OCR_BASE_URL.rstrip("/")
+    if _baidu_client is None or (_baidu_client.api_key, _baidu_client.secret_key, _baidu_client.base_url) != (
+        api_key, secret_key, base_url,
+    ):
+        _baidu_client = BaiduOCRClient(api_key, secret_key, base_url)
+    return _baidu_client
+
+
+async def close_ocr_clients() -> None:
+    """应用关闭时释放连接池。"""
+    if _baidu_client is not None:
+        await _baidu_client.aclose()
+
+
+def run_with_ocr_clients(main: Awaitable[T]) -> T:
+    """
+    功能描述：
+        同步入口（Celery 任务）代替 asyncio.run 使用：协程结束后在同一事件循环内关闭 OCR 连接池。
+
+    参数：
+        main (Awaitable[T]): 要执行的协程。
+
+    返回值：
+        T: 协程的返回值。
+    """
+    async def runner() -> T:
+        try:
+            return await main
+        finally:
+            await close_ocr_clients()
+
+    return asyncio.run(runner())
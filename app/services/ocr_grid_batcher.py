@@ -0,0 +1,161 @@
+"""
+为什么这样做：批量识别原先固定合并成 5x5 网格、写临时 JPEG、再上传 ImageX 换 URL，且网格逐个串行识别；
+这里按图片尺寸与请求体上限自适应决定网格大小，网格在内存中拼好后直接以图片内容提交识别，
+多个网格并发执行，大批量导入的识别调用次数与耗时都随之下降。
+特殊逻辑：识别结果带逐字坐标，按坐标归属到格子，不再依赖“字数恰好等于格子数”的顺序对齐；
+没有识别出内容的格子（包括整个网格请求失败）收集起来，缩小网格重新合并重试，最后一轮逐张单独识别；
+QPS 超限按指数退避重试同一网格，其余错误直接计为本网格失败，交给下一轮拆分重试。
+"""
+
+import asyncio
+import logging
+import random
+from typing import Awaitable, Callable, Optional, Protocol
+
+from app.core.config import settings
+from app.services.ocr_service import OCRRateLimitError
+from app.utils.image_utils import GridPlan, compose_grid, plan_grid, read_image_sizes
+from app.utils.rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# 每轮重试网格容量缩小的倍数，如 64 → 16 → 4 → 1
+GRID_RETRY_SHRINK = 4
+
+
+class LocatedRecognizer(Protocol):
+    """网格识别依赖的识别接口，默认实现为 OCRService。"""
+
+    async def recognize_located(self, image: bytes) -> list[tuple[str, float, float]]:
+        ...
+
+
+class GridOCRBatcher:
+    def __init__(
+        self,
+        recognizer: LocatedRecognizer,
+        concurrency: Optional[int] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        """
+        功能描述：
+            初始化GridOCRBatcher并准备运行所需的依赖对象。
+
+        参数：
+            recognizer (LocatedRecognizer): 返回逐字坐标的识别实现。
+            concurrency (Optional[int]): 同时识别的网格数，默认读取配置。
+            rate_limiter (Optional[TokenBucket]): 识别调用限速器，默认按 OCR_QPS 创建。
+            sleep (Callable[[float], Awaitable[None]]): 退避等待函数，测试可替换。
+
+        返回值：
+            None: 无返回值。
+        """
+        self.recognizer = recognizer
+        self.rate_limiter = rate_limiter or TokenBucket(settings.OCR_QPS)
+        self._slots = asyncio.Semaphore(concurrency or settings.OCR_GRID_CONCURRENCY)
+        self._sleep = sleep
+
+    async def recognize(
+        self,
+        image_paths: list[str],
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> list[str]:
+        """
+        功能描述：
+            网格合并识别一批图片。
+
+        参数：
+            image_paths (list[str]): 本地图片路径列表。
+            on_progress (Optional[Callable[[int], None]]): 已完成（识别出结果或已放弃）图片数回调。
+
+        返回值：
+            list[str]: 与输入顺序一致的识别文本，识别失败为空串。
+        """
+        results = [""] * len(image_paths)
+        sizes = await asyncio.to_thread(read_image_sizes, image_paths)
+        pending = [index for index, size in enumerate(sizes) if size is not None]
+        completed = len(image_paths) - len(pending)
+        if not pending:
+            self._report(on_progress, completed)
+            return results
+
+        plan = plan_grid(
+            [sizes[index] for index in pending],
+            max_side=settings.OCR_GRID_MAX_SIDE,
+            max_cells=settings.OCR_GRID_MAX_CELLS,
+            max_payload_bytes=settings.OCR_GRID_MAX_PAYLOAD_BYTES,
+            min_cell=settings.OCR_GRID_MIN_CELL,
+            max_cell=settings.OCR_GRID_MAX_CELL,
+        )
+        while pending:
+            chunks = [pending[i:i + plan.capacity] for i in range(0, len(pending), plan.capacity)]
+            failed: list[int] = []
+
+            async def run_chunk(chunk: list[int]) -> None:
+                nonlocal completed
+                texts = await self._recognize_chunk([image_paths[index] for index in chunk], plan)
+                for index, text in zip(chunk, texts):
+                    if text:
+                        results[index] = text
+                        completed += 1
+                    else:
+                        failed.append(index)
+                self._report(on_progress, completed)
+
+            await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+            if plan.capacity == 1:
+                break
+            pending = sorted(failed)
+            plan = plan.with_capacity(plan.capacity // GRID_RETRY_SHRINK)
+            if pending:
+                logger.info("网格识别 %s 张未识别出内容，缩小为每网格 %s 格重试", len(pending), plan.capacity)
+        self._report(on_progress, len(image_paths))
+        return results
+
+    async def _recognize_chunk(self, image_paths: list[str], plan: GridPlan) -> list[str]:
+        layout = plan.for_count(len(image_paths))
+        async with self._slots:
+            image = await asyncio.to_thread(compose_grid, image_paths, layout)
+        # 估算失准时按实际体积对半拆分
+        if len(image) * 4 / 3 > settings.OCR_GRID_MAX_PAYLOAD_BYTES and len(image_paths) > 1:
+            half = len(image_paths) // 2
+            first, second = await asyncio.gather(
+                self._recognize_chunk(image_paths[:half], plan),
+                self._recognize_chunk(image_paths[half:], plan),
+            )
+            return first + second
+
+        texts = [""] * len(image_paths)
+        try:
+            located = await self._recognize_with_retry(image)
+        except Exception as exc:
+            logger.warning("网格识别失败（%s 格）：%s", len(image_paths), exc)
+            return texts
+        for char, x, y in located:
+            cell = layout.cell_at(x, y)
+            if cell is not None and cell < len(image_paths):
+                texts[cell] += char
+        return texts
+
+    async def _recognize_with_retry(self, image: bytes) -> list[tuple[str, float, float]]:
+        attempt = 1
+        while True:
+            await self.rate_limiter.acquire()
+            try:
+                async with self._slots:
+                    return await self.recognizer.recognize_located(image)
+            except OCRRateLimitError:
+                if attempt >= settings.OCR_MAX_ATTEMPTS:
+                    raise
+                base = min(
+                    settings.OCR_RETRY_BACKOFF_MAX_SECONDS,
+                    settings.OCR_RETRY_BACKOFF_SECONDS * (2 ** (attempt - 1)),
+                )
+                await self._sleep(base * random.uniform(0.5, 1.0))
+                attempt += 1
+
+    @staticmethod
+    def _report(on_progress: Optional[Callable[[int], None]], completed: int) -> None:
+        if on_progress is not None:
+            on_progress(completed)
@@ -0,0 +1,182 @@
+"""
+为什么这样做：批量导入逐张串行执行“上传 → 签名 → 识别”，几百张图片的耗时几乎全是排队的网络延迟；
+这里把三个阶段拆开，各自限制并发，图片在阶段之间流动，上传与识别互相重叠。
+特殊逻辑：识别阶段另有令牌桶按供应商 QPS 限速，QPS 超限与网络错误按指数退避加抖动重试，
+ValueError（配置缺失、文件不存在等）视为不可恢复，直接记为失败；
+结果按输入顺序返回，完成回调按实际完成顺序触发，供调用方上报进度。
+阶段实现通过 OCRStages 协议注入，测试可替换为本地模拟实现；
+传入 result_cache 时本地图片先按内容摘要查缓存，命中的图片不进入任何阶段。
+"""
+
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Protocol, Sequence
+
+from app.core.config import settings
+from app.services.ocr_cache_service import OCR_MODE_GRID, OCR_MODE_HANDWRITING, OCRResultCache
+from app.utils.rate_limiter import TokenBucket
+
+
+logger = logging.getLogger(__name__)
+
+NON_RETRYABLE_EXCEPTIONS = (ValueError, FileNotFoundError)
+
+
+class OCRStages(Protocol):
+    """识别流水线依赖的三个阶段，默认实现为 OCRService。"""
+
+    async def upload_to_storage(self, image_path: str) -> str:
+        ...
+
+    async def sign_uri(self, uri: str) -> str:
+        ...
+
+    async def recognize_url(self, image_url: str, raise_on_rate_limit: bool = False) -> str | list[str]:
+        ...
+
+
+@dataclass(frozen=True)
+class OCRPipelineConfig:
+    upload_concurrency: int
+    sign_concurrency: int
+    recognize_concurrency: int
+    qps: float
+    max_attempts: int
+    backoff_seconds: float
+    backoff_max_seconds: float
+
+    @classmethod
+    def from_settings(cls) -> "OCRPipelineConfig":
+        return cls(
+            upload_concurrency=settings.OCR_UPLOAD_CONCURRENCY,
+            sign_concurrency=settings.OCR_SIGN_CONCURRENCY,
+            recognize_concurrency=settings.OCR_RECOGNIZE_CONCURRENCY,
+            qps=settings.OCR_QPS,
+            max_attempts=settings.OCR_MAX_ATTEMPTS,
+            backoff_seconds=settings.OCR_RETRY_BACKOFF_SECONDS,
+            backoff_max_seconds=settings.OCR_RETRY_BACKOFF_MAX_SECONDS,
+        )
+
+
+@dataclass(frozen=True)
+class OCRPipelineResult:
+    index: int
+    image_path: str
+    characters: str | list[str] = ""
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+ResultCallback = Callable[[OCRPipelineResult], Awaitable[None]]
+
+
+class OCRPipeline:
+    def __init__(
+        self,
+        stages: OCRStages,
+        config: Optional[OCRPipelineConfig] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        result_cache: Optional[OCRResultCache] = None,
+    ):
+        """
+        功能描述：
+            初始化OCRPipeline并准备运行所需的依赖对象。
+
+        参数：
+            stages (OCRStages): 上传、签名、识别三个阶段的实现。
+            config (Optional[OCRPipelineConfig]): 并发、限速与重试配置，默认读取 settings。
+            rate_limiter (Optional[TokenBucket]): 识别阶段限速器，默认按 config.qps 创建。
+            sleep (Callable[[float], Awaitable[None]]): 退避等待函数，测试可替换。
+            result_cache (Optional[OCRResultCache]): 识别结果缓存，为 None 时不查缓存。
+
+        返回值：
+            None: 无返回值。
+        """
+        self.stages = stages
+        self.config = config or OCRPipelineConfig.from_settings()
+        self.rate_limiter = rate_limiter or TokenBucket(self.config.qps)
+        self._sleep = sleep
+        self.result_cache = result_cache
+        self._upload_slots = asyncio.Semaphore(self.config.upload_concurrency)
+        self._sign_slots = asyncio.Semaphore(self.config.sign_concurrency)
+        self._recognize_slots = asyncio.Semaphore(self.config.recognize_concurrency)
+
+    async def run(
+        self,
+        image_paths: Sequence[str],
+        on_result: Optional[ResultCallback] = None,
+    ) -> list[OCRPipelineResult]:
+        """
+        功能描述：
+            并发识别一批图片，单张失败不影响其余图片。
+
+        参数：
+            image_paths (Sequence[str]): 本地图片路径或公网 URL。
+            on_result (Optional[ResultCallback]): 每张图片完成（成功或失败）后的回调。
+
+        返回值：
+            list[OCRPipelineResult]: 与输入顺序一致的识别结果。
+        """
+        async def process(index: int, image_path: str) -> OCRPipelineResult:
+            try:
+                characters = await self._recognize_one(image_path)
+                result = OCRPipelineResult(index=index, image_path=image_path, characters=characters)
+            except Exception as exc:
+                result = OCRPipelineResult(index=index, image_path=image_path, error=str(exc) or type(exc).__name__)
+            if on_result is not None:
+                await on_result(result)
+            return result
+
+        return list(await asyncio.gather(*(process(index, path) for index, path in enumerate(image_paths))))
+
+    async def _recognize_one(self, image_path: str) -> str | list[str]:
+        if image_path.startswith(("http://", "https://")):
+            return await self._call_with_retry(
+                "recognize", self._recognize_slots, self._recognize_limited, image_path,
+            )
+        digest = None
+        if self.result_cache is not None:
+            digest = await self.result_cache.digest(image_path)
+            cached = await self.result_cache.get(digest, (OCR_MODE_HANDWRITING, OCR_MODE_GRID))
+            if cached:
+                return cached
+        uri = await self._call_with_retry("upload", self._upload_slots, self.stages.upload_to_storage, image_path)
+        image_url = await self._call_with_retry("sign", self._sign_slots, self.stages.sign_uri, uri)
+        characters = await self._call_with_retry(
+            "recognize", self._recognize_slots, self._recognize_limited, image_url,
+        )
+        if self.result_cache is not None:
+            await self.result_cache.set(digest, OCR_MODE_HANDWRITING, characters)
+        return characters
+
+    async def _recognize_limited(self, image_url: str) -> str | list[str]:
+        # 每次尝试（包括重试）都占用一枚令牌
+        await self.rate_limiter.acquire()
+        return await self.stages.recognize_url(image_url, raise_on_rate_limit=True)
+
+    async def _call_with_retry(self, stage: str, slots: asyncio.Semaphore, func, arg):
+        attempt = 1
+        while True:
+            try:
+                async with slots:
+                    return await func(arg)
+            except NON_RETRYABLE_EXCEPTIONS:
+                raise
+            except Exception as exc:
+                if attempt >= self.config.max_attempts:
+                    raise
+                # 退避期间不占用阶段并发槽，其他图片可继续推进
+                delay = self._backoff_delay(attempt)
+                logger.warning("OCR %s 阶段第 %s 次失败，%.2fs 后重试：%s", stage, attempt, delay, exc)
+                await self._sleep(delay)
+                attempt += 1
+
+    def _backoff_delay(self, attempt: int) -> float:
+        base = min(self.config.backoff_max_seconds, self.config.backoff_seconds * (2 ** (attempt - 1)))
+        return base * random.uniform(0.5, 1.0)
@@ -1,26 +1,43 @@
 """
 为什么这样做：识别链路采用"火山上传换公网 URL + 百度 OCR"组合，降低本地文件直传第三方的不稳定因素。
-特殊逻辑：访问令牌做提前失效缓存与双配置校验，避免临界过期和半配置状态触发批量失败。
+特殊逻辑：访问令牌做提前失效缓存与双配置校验，避免临界过期和半配置状态触发批量失败；
+本地图片先按规范化内容摘要查识别结果缓存，命中时跳过上传、签名与识别。
 """
 
+import asyncio
 import logging
 import os
-import time
-import requests
 
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from hashlib import md5
-from typing import Any, Optional
+from typing import Any, Callable, Optional, TypeVar
 
-from urllib.parse import urlencode
-from starlette.concurrency import run_in_threadpool
 from volcengine.imagex.v2.imagex_service import ImagexService
 
 from app.core.config import settings
-from app.utils.image_utils import merge_images
+from app.services.ocr_cache_service import OCR_MODE_GRID, OCR_MODE_HANDWRITING, OCRResultCache
+from app.services.ocr_client import get_baidu_ocr_client
 
 
 logger = logging.getLogger(__name__)
 
+# 百度 OCR 的 QPS 超限错误码，稍后重试即可恢复；其余错误码（额度耗尽、参数错误）重试无意义
+BAIDU_QPS_LIMIT_ERROR_CODES = frozenset({18})
+
+
+# ImageX SDK 基于同步 requests，放在独立线程池里执行，避免挤占请求处理共用的线程池
+_imagex_executor = ThreadPoolExecutor(max_workers=settings.OCR_IMAGEX_THREADS, thread_name_prefix="imagex")
+T = TypeVar("T")
+
+
+class OCRRateLimitError(RuntimeError):
+    """OCR 供应商返回 QPS 超限，调用方可退避后重试。"""
+
+
+async def _run_imagex(func: Callable[..., T], *args: Any) -> T:
+    return await asyncio.get_running_loop().run_in_executor(_imagex_executor, partial(func, *args))
+
 
 class OCRService:
     def __init__(self):
@@ -43,6 +60,8 @@ class OCRService:
         self.volcengine_workflow_template_id = "system_workflow_image_ocr"
 
         self.imagex_service = ImagexService(region=self.volcengine_region)
+        self.imagex_service.set_host(settings.IMAGEX_HOST)
+        self.imagex_service.set_scheme(settings.IMAGEX_SCHEME)
         if self.volcengine_access_key:
             self.imagex_service.set_ak(self.volcengine_access_key)
         if self.volcengine_secret_key:
@@ -50,10 +69,9 @@ class OCRService:
 
         self.baidu_api_key = settings.BAIDU_API_KEY.strip()
         self.baidu_secret_key = settings.BAIDU_SECRET_KEY.strip()
-        # token缓存与过期时间（提前过期，避免临界值调用失败）
-        self._baidu_access_token: str | None = None
-        self._baidu_access_token_expires_at: float = 0.0
-        self._baidu_token_advance_expire = 300
+        # 进程级客户端：连接池与访问令牌在所有 OCRService 实例间共享
+        self.ocr_client = get_baidu_ocr_client()
+        self.result_cache = OCRResultCache()
 
     def _default_store_key(self, image_path: str) -> str:
         """
@@ -66,10 +84,17 @@ class OCRService:
         返回值：
             str: 返回str类型的处理结果。
         """
-        ext = os.path.splitext(image_path)[1].lower() or ".png"
+        digest = md5()
         with open(image_path, "rb") as f:
-            digest = md5(f.read()).hexdigest()
-        return f"ocr/{digest}{ext}"
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return self.build_store_key(digest.hexdigest(), image_path)
+
+    @staticmethod
+    def build_store_key(content_md5: str, image_path: str) -> str:
+        """按内容 MD5 与扩展名生成对象键；调用方已算好摘要时可直接传入 upload_image，免去再读一遍文件。"""
+        ext = os.path.splitext(image_path)[1].lower() or ".png"
+        return f"ocr/{content_md5}{ext}"
 
     @staticmethod
     def _is_remote_url(image_path: str) -> bool:
@@ -126,36 +151,7 @@ class OCRService:
         }
         return self.imagex_service.get_resource_url(params).get("Result", {}).get("URL", "")
 
-    def _get_baidu_access_token(self) -> str:
-        """
-        功能描述：
-            按条件获取百度access令牌。
-
-        参数：
-            无。
-
-        返回值：
-            str: 返回str类型的处理结果。
-        """
-        if self._baidu_access_token and (
-            time.time() < self._baidu_access_token_expires_at - self._baidu_token_advance_expire
-        ):
-            return self._baidu_access_token
-
-        url = "https://aip.baidubce.com/oauth/2.0/token"
-        params = {
-            "grant_type": "client_credentials",
-            "client_id": self.baidu_api_key,
-            "client_secret": self.baidu_secret_key
-        }
-        resp = requests.post(url, params=params)
-
-        self._baidu_access_token = str(resp.json().get("access_token"))
-        self._baidu_access_token_expires_at = time.time() + int(resp.json().get("expires_in", 0))
-
-        return self._baidu_access_token
-
-    def _ai_process_ocr(self, image_url: str) -> dict[str, Any]:
+    async def _ai_process_ocr(self, image_url: str) -> dict[str, Any]:
         """
         功能描述：
             处理processOCR。
@@ -166,22 +162,7 @@ class OCRService:
         返回值：
             dict[str, Any]: 返回字典形式的结果数据。
         """
-        url = "https://aip.baidubce.com/rest/2.0/ocr/v1/handwriting?access_token=" + self._get_baidu_access_token()
-
-        payload = {
-            "url": image_url,
-            "detect_direction": "true",
-        }
-        headers = {
-            'Content-Type': 'application/x-www-form-urlencoded',
-            'Accept': 'application/json'
-        }
-
-        response = requests.post(url, headers=headers, data=urlencode(payload), timeout=30)
-        response.raise_for_status()
-        result = response.json()
-
-        return result
+        return await self.ocr_client.handwriting(image_url)
 
     def _extract_text(self, payload: Any) -> str | list[str]:
         if not isinstance(payload, dict):
@@ -201,51 +182,105 @@ class OCRService:
             return full_text
         return [char for char in full_text]
 
-    async def recognize_image(self, image_path: str) -> str | list[str]:
+    def ensure_recognize_config(self) -> None:
+        # 校验百度OCR配置
+        if not self.baidu_api_key or not self.baidu_secret_key:
+            raise ValueError("缺少百度OCR凭证，请配置 BAIDU_API_KEY/BAIDU_SECRET_KEY")
+        # 校验图片上传所需的火山配置
+        if not self.volcengine_service_id or not self.volcengine_access_key or not self.volcengine_secret_key:
+            raise ValueError("缺少火山引擎图片上传凭证，请检查相关配置")
+
+    async def upload_to_storage(self, image_path: str) -> str:
+        """上传本地图片到 ImageX，返回资源 URI。"""
+        upload_res = await _run_imagex(self._upload_image, image_path)
+        return upload_res.get("URI", "")
+
+    async def sign_uri(self, uri: str) -> str:
+        """把 ImageX 资源 URI 换成带签名的公网 URL。"""
+        image_url = await _run_imagex(self._transform_uri2url, uri)
+        if not image_url:
+            raise ValueError("图片URL生成失败，请检查火山引擎配置")
+        return image_url
+
+    async def recognize_url(self, image_url: str, raise_on_rate_limit: bool = False) -> str | list[str]:
         """
         功能描述：
-            识别图片。
+            对公网图片 URL 调用百度手写识别并提取文本。
 
         参数：
-            image_path (str): 待处理图片的本地路径。
+            image_url (str): 图片公网地址。
+            raise_on_rate_limit (bool): 为 True 时 QPS 超限抛出 OCRRateLimitError，供流水线退避重试；
+                否则与其他错误码一样返回空串。
 
         返回值：
-            str | list[str]: 返回str | list[str]类型的处理结果。
+            str | list[str]: 单字返回 str，多字返回逐字列表，无结果返回空串。
         """
-        # 校验百度OCR配置
-        if not self.baidu_api_key or not self.baidu_secret_key:
-            raise ValueError("缺少百度OCR凭证，请配置 BAIDU_API_KEY/BAIDU_SECRET_KEY")
-        # 校验图片上传所需的火山配置
-        if not self.volcengine_service_id or not self.volcengine_access_key or not self.volcengine_secret_key:
-            raise ValueError("缺少火山引擎图片上传凭证，请检查相关配置")
+        ocr_result = await self._ai_process_ocr(image_url)
+        if raise_on_rate_limit and isinstance(ocr_result, dict) \
+                and ocr_result.get("error_code") in BAIDU_QPS_LIMIT_ERROR_CODES:
+            raise OCRRateLimitError(ocr_result.get("error_msg") or "OCR QPS 超限")
+        return self._extract_text(ocr_result)
 
-        def _work() -> str | list[str]:
-            # 本地文件先上传换公网 URL；已是 URL 的图片直接复用，兼容提交作业后的异步识别链路。
-            """
-            功能描述：
-                处理OCRService。
+    async def recognize_located(self, image: bytes) -> list[tuple[str, float, float]]:
+        """
+        功能描述：
+            识别内存中的图片并返回每个字及其中心坐标，供网格合并识别按坐标归属到格子。
 
-            参数：
-                无。
+        参数：
+            image (bytes): 图片字节。
 
-            返回值：
-                str | list[str]: 返回str | list[str]类型的处理结果。
-            """
-            if self._is_remote_url(image_path):
-                image_url = image_path
-            else:
-                upload_res = self._upload_image(image_path)
-                uri = upload_res.get("URI", "")
-                image_url = self._transform_uri2url(uri)
-                if not image_url:
-                    raise ValueError("图片URL生成失败，请检查火山引擎配置")
+        返回值：
+            list[tuple[str, float, float]]: (字, 中心 x, 中心 y)；供应商报错时返回空列表。
+
+        异常：
+            OCRRateLimitError: QPS 超限，调用方可退避后重试。
+        """
+        payload = await self.ocr_client.handwriting_image(image)
+        if payload.get("error_code") in BAIDU_QPS_LIMIT_ERROR_CODES:
+            raise OCRRateLimitError(payload.get("error_msg") or "OCR QPS 超限")
+        if "error_code" in payload:
+            logger.warning("Baidu OCR error %s: %s", payload.get("error_code"), payload.get("error_msg", ""))
+            return []
+        located: list[tuple[str, float, float]] = []
+        for item in payload.get("words_result", []):
+            # 逐字结果缺失时退化为整行位置
+            for part in item.get("chars") or [{"char": item.get("words", ""), "location": item.get("location")}]:
+                char = (part.get("char") or "").replace(" ", "")
+                location = part.get("location") or {}
+                if not char or not location:
+                    continue
+                located.append((
+                    char,
+                    location.get("left", 0) + location.get("width", 0) / 2,
+                    location.get("top", 0) + location.get("height", 0) / 2,
+                ))
+        return located
+
+    async def recognize_image(self, image_path: str) -> str | list[str]:
+        """
+        功能描述：
+            识别图片。
 
-            # 调用百度OCR识别
-            ocr_result = self._ai_process_ocr(image_url)
-            # 提取文本结果
-            return self._extract_text(ocr_result)
+        参数：
+            image_path (str): 待处理图片的本地路径。
 
-        return await run_in_threadpool(_work)
+        返回值：
+            str | list[str]: 返回str | list[str]类型的处理结果。
+        """
+        self.ensure_recognize_config()
+        # 本地文件先上传换公网 URL；已是 URL 的图片直接复用，兼容提交作业后的异步识别链路。
+        if self._is_remote_url(image_path):
+            return await self.recognize_url(image_path)
+        digest = await self.result_cache.digest(image_path)
+        cached = await self.result_cache.get(digest, (OCR_MODE_HANDWRITING, OCR_MODE_GRID))
+        if cached:
+            return cached
+        characters = await self._recognize_local(image_path)
+        await self.result_cache.set(digest, OCR_MODE_HANDWRITING, characters)
+        return characters
+
+    async def _recognize_local(self, image_path: str) -> str | list[str]:
+        return await self.recognize_url(await self.sign_uri(await self.upload_to_storage(image_path)))
 
     async def upload_image(self, image_path: str, store_key: Optional[str] = None) -> dict[str, Any]:
         """
@@ -281,7 +316,7 @@ class OCRService:
                 "image_url": image_url,
             }
 
-        return await run_in_threadpool(_work)
+        return await _run_imagex(_work)
 
     async def recognize(self, image_path: str) -> dict[str, Any]:
         """
@@ -297,20 +332,47 @@ class OCRService:
         char = await self.recognize_image(image_path)
         return {"characters": char, "image_path": image_path}
 
-    async def batch_recognize(self, image_paths: list[str]) -> dict[str, Any]:
+    async def batch_recognize(
+        self,
+        image_paths: list[str],
+        on_progress: Optional[Callable[[int], None]] = None,
+    ) -> dict[str, Any]:
         """
         功能描述：
-            批量处理识别。
+            批量处理识别。已缓存的图片直接取结果，其余图片交给网格合并识别，结果按格子写回缓存。
 
         参数：
-            image_paths (list[str]): 待处理图片路径列表。
+            image_paths (list[str]): 待处理本地图片路径列表。
+            on_progress (Optional[Callable[[int], None]]): 已完成图片数回调。
 
         返回值：
-            dict[str, Any]: 返回字典形式的结果数据。
+            dict[str, Any]: character 为按输入顺序拼接的逐字列表，results 为每张图片的识别文本。
         """
-        merged_paths = await run_in_threadpool(merge_images, image_paths)
-        char_list = []
-        for merged_path in merged_paths:
-            res = await self.recognize_image(merged_path)
-            char_list.extend(res if isinstance(res, list) else [res])
-        return {"character": char_list, "merged_paths": merged_paths}
+        # 延迟导入：网格识别模块引用本模块的异常类型，顶层导入会形成循环依赖。
+        from app.services.ocr_grid_batcher import GridOCRBatcher
+
+        digests = list(await asyncio.gather(*(self.result_cache.digest(path) for path in image_paths)))
+        cached = await self.result_cache.get_many(digests, (OCR_MODE_GRID, OCR_MODE_HANDWRITING))
+        results: list[str] = [""] * len(image_paths)
+        pending: list[int] = []
+        for index, digest in enumerate(digests):
+            hit = cached.get(digest) if digest else None
+            if hit:
+                results[index] = "".join(hit) if isinstance(hit, list) else hit
+            else:
+                pending.append(index)
+
+        hits = len(image_paths) - len(pending)
+        if on_progress is not None and hits:
+            on_progress(hits)
+        if pending:
+            self.ensure_recognize_config()
+            texts = await GridOCRBatcher(self).recognize(
+                [image_paths[index] for index in pending],
+                on_progress=(lambda completed: on_progress(hits + completed)) if on_progress else None,
+            )
+            for index, text in zip(pending, texts):
+                results[index] = text
+                await self.result_cache.set(digests[index], OCR_MODE_GRID, text)
+        char_list = [char for text in results for char in text]
+        return {"character": char_list, "results": results}
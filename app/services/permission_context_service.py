@@ -0,0 +1,189 @@
+"""
+为什么这样做：学生每次检索/联想都要知道自己能看到哪些课程与班级，逐请求查库会让检索延迟被 DB 拖住；
+这里把可见范围物化到 Redis，检索链路只剩一次 Redis 往返。
+特殊逻辑：每个用户有独立版本号，选课/入班变更经 outbox 事件递增版本并删除缓存；
+缓存值记录生成时的版本，读到旧版本即视为未命中，避免“先读旧数据、后写回缓存”的竞态把失效覆盖掉。
+"""
+
+import json
+import logging
+from dataclasses import asdict
+from typing import Any, Iterable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.redis_client import get_redis
+from app.core.security import SessionUser
+from app.models.user import UserRole
+from app.repositories.course_repo import CourseRepository
+from app.repositories.event_outbox_repo import EventOutboxRepository
+from app.repositories.student_repo import StudentRepository
+from app.repositories.teaching_class_repo import TeachingClassRepository
+from app.schemas.search import PermissionContext
+from app.utils.redis_cache import CACHE_FALLBACK_EXCEPTIONS, CACHE_TTL_MEDIUM, build_cache_key, cache_set
+
+
+logger = logging.getLogger(__name__)
+
+# 缓存结构变化时递增，旧结构的缓存自然失效
+PERMISSION_CONTEXT_CACHE_VERSION = "v1"
+PERMISSION_CONTEXT_TTL = CACHE_TTL_MEDIUM
+MEMBERSHIP_CHANGED_EVENT = "teaching_class.membership_changed"
+COURSE_CLASSES_CHANGED_EVENT = "course.class_links_changed"
+PERMISSION_CHANGE_EVENTS = frozenset({MEMBERSHIP_CHANGED_EVENT, COURSE_CLASSES_CHANGED_EVENT})
+
+
+def _context_key(user_id: str) -> str:
+    return build_cache_key("search:perm", PERMISSION_CONTEXT_CACHE_VERSION, user_id)
+
+
+def _version_key(user_id: str) -> str:
+    return build_cache_key("search:perm:ver", user_id)
+
+
+async def add_permission_change_event(
+    db: AsyncSession,
+    event_type: str,
+    aggregate_type: str,
+    aggregate_id: str,
+    student_ids: Iterable[str] = (),
+    teaching_class_ids: Iterable[str] = (),
+) -> None:
+    """
+    功能描述：
+        在当前事务内写入可见范围变更事件，随业务数据一起提交。
+
+    参数：
+        db (AsyncSession): 数据库会话，用于执行持久化操作。
+        event_type (str): 事件类型，取 PERMISSION_CHANGE_EVENTS 之一。
+        aggregate_type (str): 聚合类型。
+        aggregate_id (str): 聚合ID。
+        student_ids (Iterable[str]): 直接受影响的学生ID。
+        teaching_class_ids (Iterable[str]): 成员全部受影响的教学班ID。
+
+    返回值：
+        None: 无返回值。
+    """
+    payload = json.dumps(
+        {"student_ids": sorted(set(student_ids)), "teaching_class_ids": sorted(set(teaching_class_ids))},
+        ensure_ascii=False,
+    )
+    await EventOutboxRepository(db).add_event(
+        aggregate_type=aggregate_type,
+        aggregate_id=aggregate_id,
+        event_type=event_type,
+        payload=payload,
+    )
+
+
+class PermissionContextService:
+    def __init__(self, db: AsyncSession):
+        """
+        功能描述：
+            初始化PermissionContextService并准备运行所需的依赖对象。
+
+        参数：
+            db (AsyncSession): 数据库会话，仅在缓存未命中或处理变更事件时使用。
+
+        返回值：
+            None: 无返回值。
+        """
+        self.db = db
+
+    async def get_context(self, current_user: SessionUser) -> PermissionContext:
+        """
+        功能描述：
+            获取当前用户的检索权限上下文；管理员与教师不依赖预查询，学生优先读 Redis。
+
+        参数：
+            current_user (SessionUser): 当前登录用户。
+
+        返回值：
+            PermissionContext: 权限上下文，可通过 fingerprint() 得到缓存指纹。
+        """
+        if current_user.role == UserRole.ADMIN:
+            return PermissionContext(role="admin")
+        if current_user.role == UserRole.TEACHER:
+            return PermissionContext(role="teacher", user_id=current_user.id)
+
+        redis = get_redis()
+        cached, version = await self._read_cached(redis, current_user.id)
+        if cached is not None and cached.get("version") == version:
+            return PermissionContext(**cached["context"])
+        context = await self._load_student_context(current_user.id)
+        await cache_set(
+            redis,
+            _context_key(current_user.id),
+            {"version": version, "context": asdict(context)},
+            ttl=PERMISSION_CONTEXT_TTL,
+        )
+        return context
+
+    async def invalidate_users(self, user_ids: Iterable[str]) -> int:
+        """
+        功能描述：
+            递增用户版本号并删除已物化的上下文。
+
+        参数：
+            user_ids (Iterable[str]): 需要失效的用户ID。
+
+        返回值：
+            int: 实际处理的用户数。
+        """
+        redis = get_redis()
+        count = 0
+        for user_id in dict.fromkeys(user_ids):
+            try:
+                version_key = _version_key(user_id)
+                await redis.incr(version_key)
+                # 版本号比缓存值活得久，保证缓存过期前写回的旧版本一定被识别
+                await redis.expire(version_key, PERMISSION_CONTEXT_TTL * 2)
+                await redis.delete(_context_key(user_id))
+                count += 1
+            except CACHE_FALLBACK_EXCEPTIONS as exc:
+                logger.warning("权限上下文失效失败 user_id=%s: %s", user_id, exc)
+        return count
+
+    async def handle_change_event(self, payload: dict[str, Any]) -> int:
+        """
+        功能描述：
+            处理 outbox 中的可见范围变更事件，解析出受影响用户后批量失效。
+
+        参数：
+            payload (dict[str, Any]): 事件载荷，包含 student_ids 与 teaching_class_ids。
+
+        返回值：
+            int: 失效的用户数。
+        """
+        user_ids = await StudentRepository(self.db).list_user_ids_by_membership(
+            student_ids=payload.get("student_ids") or [],
+            teaching_class_ids=payload.get("teaching_class_ids") or [],
+        )
+        return await self.invalidate_users(user_ids)
+
+    @staticmethod
+    async def _read_cached(redis, user_id: str) -> tuple[dict | None, int]:
+        try:
+            raw_context, raw_version = await redis.mget(_context_key(user_id), _version_key(user_id))
+        except CACHE_FALLBACK_EXCEPTIONS as exc:
+            logger.warning("读取权限上下文缓存失败 user_id=%s: %s", user_id, exc)
+            return None, 0
+        version = int(raw_version or 0)
+        if raw_context is None:
+            return None, version
+        try:
+            return json.loads(raw_context), version
+        except json.JSONDecodeError:
+            return None, version
+
+    async def _load_student_context(self, user_id: str) -> PermissionContext:
+        student = await StudentRepository(self.db).get_by_user_id(user_id)
+        if not student:
+            return PermissionContext(role="student", user_id=user_id)
+        return PermissionContext(
+            role="student",
+            user_id=user_id,
+            student_user_id=user_id,
+            course_ids=sorted(await CourseRepository(self.db).list_ids_for_student(student.id)),
+            class_ids=sorted(await TeachingClassRepository(self.db).list_ids_for_student(student.id)),
+        )
@@ -4,9 +4,10 @@
 """
 
 from dataclasses import dataclass, field
-from typing import Any, Awaitable, Callable
+from datetime import datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable
 
-from sqlalchemy import select
+from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
@@ -19,6 +20,7 @@ from app.models.student import Student
 from app.models.submission import Submission
 from app.models.teacher import Teacher
 from app.models.teaching_class import TeachingClass, TeachingClassMember, TeachingClassMemberStatus
+from app.utils.pagination import iter_keyset_batches
 
 
 @dataclass(frozen=True)
@@ -34,45 +36,73 @@ class SearchDocument:
 class SearchModuleConfig:
     table: str
     module: str
-    load_all: Callable[[AsyncSession], Awaitable[list[Any]]]
+    model: Any
     load_one: Callable[[AsyncSession, str], Awaitable[Any | None]]
     build_document: Callable[[AsyncSession, Any, dict], Awaitable[SearchDocument | None]]
-    preload: Callable[[AsyncSession], Awaitable[dict]] | None = None
+    # 按批预加载关联映射：入参为当前批实体，只查询该批引用到的关联行
+    preload: Callable[[AsyncSession, list[Any]], Awaitable[dict]] | None = None
+    # 启动引导比对与增量追平使用的水位列，必须随每次修改前移，不能用 created_at
+    watermark_column: str = "updated_at"
 
 
-# ===== 预加载函数（reindex 时批量加载，消除 N+1） =====
+# ===== 预加载函数（reindex 时按批加载，消除 N+1 且内存随批大小有界） =====
 
-async def _preload_teacher_user_ids(db: AsyncSession) -> dict[str, str]:
-    result = await db.execute(select(Teacher.id, Teacher.user_id))
+def _collect_ids(values: Iterable[Any]) -> set[str]:
+    return {str(value) for value in values if value}
+
+
+async def _preload_teacher_user_ids(db: AsyncSession, teacher_ids: Iterable[str] | None = None) -> dict[str, str]:
+    query = select(Teacher.id, Teacher.user_id)
+    if teacher_ids is not None:
+        ids = _collect_ids(teacher_ids)
+        if not ids:
+            return {}
+        query = query.where(Teacher.id.in_(ids))
+    result = await db.execute(query)
     return {str(row[0]): str(row[1]) for row in result.all() if row[0] and row[1]}
 
 
-async def _preload_student_teacher_user_ids(db: AsyncSession) -> dict[str, list[str]]:
-    result = await db.execute(
+async def _preload_student_teacher_user_ids(
+    db: AsyncSession, student_ids: Iterable[str] | None = None
+) -> dict[str, list[str]]:
+    query = (
         select(TeachingClassMember.student_id, Teacher.user_id)
         .join(TeachingClass, TeachingClassMember.teaching_class_id == TeachingClass.id)
         .join(Teacher, TeachingClass.teacher_id == Teacher.id)
         .where(TeachingClassMember.status == TeachingClassMemberStatus.ACTIVE)
     )
+    if student_ids is not None:
+        ids = _collect_ids(student_ids)
+        if not ids:
+            return {}
+        query = query.where(TeachingClassMember.student_id.in_(ids))
+    result = await db.execute(query)
     mapping: dict[str, list[str]] = {}
     for student_id, user_id in result.all():
         mapping.setdefault(str(student_id), []).append(str(user_id))
     return mapping
 
 
-async def _preload_comment_scope_maps(db: AsyncSession) -> dict[str, Any]:
-    teacher_user_ids = await _preload_teacher_user_ids(db)
-    assignment_rows = (await db.execute(
-        select(Assignment.id, Assignment.teacher_id, Assignment.course_id)
-    )).all()
-    assignment_map = {
-        str(row[0]): {"teacher_id": str(row[1]), "course_id": str(row[2])}
-        for row in assignment_rows if row[0]
-    }
-    submission_rows = (await db.execute(
-        select(Submission.id, Submission.assignment_id)
-    )).all()
-    submission_map = {str(row[0]): str(row[1]) for row in submission_rows if row[0]}
+async def _preload_comment_scope_maps(db: AsyncSession, items: list[Comment]) -> dict[str, Any]:
+    submission_ids = _collect_ids(item.target_id for item in items if item.target_type == TargetType.SUBMISSION)
+    submission_map: dict[str, str] = {}
+    if submission_ids:
+        submission_rows = (await db.execute(
+            select(Submission.id, Submission.assignment_id).where(Submission.id.in_(submission_ids))
+        )).all()
+        submission_map = {str(row[0]): str(row[1]) for row in submission_rows if row[0]}
+    assignment_ids = _collect_ids(item.target_id for item in items if item.target_type == TargetType.ASSIGNMENT)
+    assignment_ids.update(submission_map.values())
+    assignment_map: dict[str, dict[str, str]] = {}
+    if assignment_ids:
+        assignment_rows = (await db.execute(
+            select(Assignment.id, Assignment.teacher_id, Assignment.course_id).where(Assignment.id.in_(assignment_ids))
+        )).all()
+        assignment_map = {
+            str(row[0]): {"teacher_id": str(row[1]), "course_id": str(row[2])}
+            for row in assignment_rows if row[0]
+        }
+    teacher_user_ids = await _preload_teacher_user_ids(db, (info["teacher_id"] for info in assignment_map.values()))
     return {
         "teacher_user_ids": teacher_user_ids,
         "assignment_map": assignment_map,
@@ -80,16 +110,16 @@ async def _preload_comment_scope_maps(db: AsyncSession) -> dict[str, Any]:
     }
 
 
-async def _preload_teacher_context(db: AsyncSession) -> dict[str, Any]:
+async def _preload_teacher_context(db: AsyncSession, items: list[Any]) -> dict[str, Any]:
     """assignment / course / teaching_class 共享的 teacher 预加载。"""
-    return {"teacher_user_ids": await _preload_teacher_user_ids(db)}
+    return {"teacher_user_ids": await _preload_teacher_user_ids(db, (item.teacher_id for item in items))}
 
 
-async def _preload_student_context(db: AsyncSession) -> dict[str, Any]:
-    return {"student_teacher_ids": await _preload_student_teacher_user_ids(db)}
+async def _preload_student_context(db: AsyncSession, items: list[Student]) -> dict[str, Any]:
+    return {"student_teacher_ids": await _preload_student_teacher_user_ids(db, (item.id for item in items))}
 
 
-# ===== CDC 单条查询回退（apply_cdc_change 路径使用） =====
+# ===== CDC 单条查询回退（无预加载上下文时使用） =====
 
 async def _get_teacher_user_id_fallback(db: AsyncSession, teacher_id: str | None) -> str | None:
     if not teacher_id:
@@ -111,52 +141,28 @@ async def _resolve_teacher_user_id(
     return teacher_user_id
 
 
-# ===== load 函数 =====
-
-async def _load_all_assignments(db: AsyncSession) -> list[Assignment]:
-    return (await db.execute(select(Assignment))).scalars().all()
-
+# ===== load 函数（CDC 单条加载） =====
 
 async def _load_assignment(db: AsyncSession, source_id: str) -> Assignment | None:
     return (await db.execute(select(Assignment).where(Assignment.id == source_id))).scalars().first()
 
 
-async def _load_all_comments(db: AsyncSession) -> list[Comment]:
-    return (await db.execute(select(Comment))).scalars().all()
-
-
 async def _load_comment(db: AsyncSession, source_id: str) -> Comment | None:
     return (await db.execute(select(Comment).where(Comment.id == source_id))).scalars().first()
 
 
-async def _load_all_hanzi(db: AsyncSession) -> list[Hanzi]:
-    return (await db.execute(select(Hanzi))).scalars().all()
-
-
 async def _load_hanzi(db: AsyncSession, source_id: str) -> Hanzi | None:
     return (await db.execute(select(Hanzi).where(Hanzi.id == source_id))).scalars().first()
 
 
-async def _load_all_courses(db: AsyncSession) -> list[Course]:
-    return (await db.execute(select(Course))).scalars().all()
-
-
 async def _load_course(db: AsyncSession, source_id: str) -> Course | None:
     return (await db.execute(select(Course).where(Course.id == source_id))).scalars().first()
 
 
-async def _load_all_teaching_classes(db: AsyncSession) -> list[TeachingClass]:
-    return (await db.execute(select(TeachingClass))).scalars().all()
-
-
 async def _load_teaching_class(db: AsyncSession, source_id: str) -> TeachingClass | None:
     return (await db.execute(select(TeachingClass).where(TeachingClass.id == source_id))).scalars().first()
 
 
-async def _load_all_students(db: AsyncSession) -> list[Student]:
-    return (await db.execute(select(Student))).scalars().all()
-
-
 async def _load_student(db: AsyncSession, source_id: str) -> Student | None:
     return (await db.execute(select(Student).where(Student.id == source_id))).scalars().first()
 
@@ -197,7 +203,7 @@ async def _build_comment_document(
         if assignment_info:
             teacher_user_id = teacher_user_ids.get(assignment_info["teacher_id"])
             course_id = assignment_info.get("course_id")
-        elif not assignment_map:
+        elif "assignment_map" not in context:
             # CDC 回退
             assignment = await _load_assignment(db, item.target_id)
             if assignment:
@@ -210,7 +216,7 @@ async def _build_comment_document(
             if assignment_info:
                 teacher_user_id = teacher_user_ids.get(assignment_info["teacher_id"])
                 course_id = assignment_info.get("course_id")
-        elif not submission_map:
+        elif "submission_map" not in context:
             # CDC 回退
             submission = await (await db.execute(
                 select(Submission).where(Submission.id == item.target_id)
@@ -296,7 +302,7 @@ async def _build_student_document(
 ) -> SearchDocument | None:
     student_teacher_ids = context.get("student_teacher_ids", {})
     teacher_user_ids = student_teacher_ids.get(item.id, [])
-    if not teacher_user_ids and not student_teacher_ids:
+    if "student_teacher_ids" not in context:
         # CDC 回退
         result = await db.execute(
             select(Teacher.user_id)
@@ -326,10 +332,6 @@ async def _build_student_document(
 
 # ===== dataset =====
 
-async def _load_all_datasets(db: AsyncSession) -> list[HanziDataset]:
-    return (await db.execute(select(HanziDataset))).scalars().all()
-
-
 async def _load_dataset(db: AsyncSession, source_id: str) -> HanziDataset | None:
     return (await db.execute(select(HanziDataset).where(HanziDataset.id == source_id))).scalars().first()
 
@@ -357,7 +359,7 @@ SEARCH_MODULE_REGISTRY: dict[str, SearchModuleConfig] = {
     "assignment": SearchModuleConfig(
         table="assignment",
         module="assignment",
-        load_all=_load_all_assignments,
+        model=Assignment,
         load_one=_load_assignment,
         build_document=_build_assignment_document,
         preload=_preload_teacher_context,
@@ -365,7 +367,7 @@ SEARCH_MODULE_REGISTRY: dict[str, SearchModuleConfig] = {
     "comment": SearchModuleConfig(
         table="comment",
         module="discussion",
-        load_all=_load_all_comments,
+        model=Comment,
         load_one=_load_comment,
         build_document=_build_comment_document,
         preload=_preload_comment_scope_maps,
@@ -373,7 +375,7 @@ SEARCH_MODULE_REGISTRY: dict[str, SearchModuleConfig] = {
     "hanzi": SearchModuleConfig(
         table="hanzi",
         module="hanzi",
-        load_all=_load_all_hanzi,
+        model=Hanzi,
         load_one=_load_hanzi,
         build_document=_build_hanzi_document,
         preload=None,
@@ -381,7 +383,7 @@ SEARCH_MODULE_REGISTRY: dict[str, SearchModuleConfig] = {
     "course": SearchModuleConfig(
         table="course",
         module="course",
-        load_all=_load_all_courses,
+        model=Course,
         load_one=_load_course,
         build_document=_build_course_document,
         preload=_preload_teacher_context,
@@ -389,7 +391,7 @@ SEARCH_MODULE_REGISTRY: dict[str, SearchModuleConfig] = {
     "teaching_class": SearchModuleConfig(
         table="teaching_class",
         module="teaching_class",
-        load_all=_load_all_teaching_classes,
+        model=TeachingClass,
         load_one=_load_teaching_class,
         build_document=_build_teaching_class_document,
         preload=_preload_teacher_context,
@@ -397,15 +399,15 @@ SEARCH_MODULE_REGISTRY: dict[str, SearchModuleConfig] = {
     "student": SearchModuleConfig(
         table="student",
         module="student",
-        load_all=_load_all_students,
+        model=Student,
         load_one=_load_student,
         build_document=_build_student_document,
         preload=_preload_student_context,
     ),
-    "dataset": SearchModuleConfig(
+    "hanzi_dataset": SearchModuleConfig(
         table="hanzi_dataset",
         module="dataset",
-        load_all=_load_all_datasets,
+        model=HanziDataset,
         load_one=_load_dataset,
         build_document=_build_dataset_document,
         preload=None,
@@ -413,6 +415,53 @@ SEARCH_MODULE_REGISTRY: dict[str, SearchModuleConfig] = {
 }
 
 
+async def load_module_stats(db: AsyncSession, config: SearchModuleConfig) -> dict[str, Any]:
+    """单条聚合查询取行数、最大水位与最大主键，供启动引导与索引清单比对。"""
+    column = getattr(config.model, config.watermark_column)
+    row = (await db.execute(
+        select(func.count(), func.max(column), func.max(config.model.id)).select_from(config.model)
+    )).one()
+    watermark = row[1].isoformat() if isinstance(row[1], datetime) else row[1]
+    return {"count": int(row[0] or 0), "watermark": watermark, "max_id": row[2]}
+
+
+async def iter_module_batches(
+    db: AsyncSession,
+    config: SearchModuleConfig,
+    batch_size: int | None = None,
+    since: datetime | None = None,
+) -> AsyncIterator[list[Any]]:
+    """按主键 keyset 分页流式读取模块数据；since 为水位时只读取其后（含边界，避免同秒写入漏数）的变更行。"""
+    statement = select(config.model)
+    if since is not None:
+        statement = statement.where(getattr(config.model, config.watermark_column) >= since)
+    async for items in iter_keyset_batches(
+        db, statement, config.model.id, batch_size or settings.SEARCH_REINDEX_BATCH_SIZE
+    ):
+        yield items
+
+
+async def load_module_items(db: AsyncSession, config: SearchModuleConfig, source_ids: Iterable[str]) -> list[Any]:
+    """CDC 微批按主键一次取回多行。"""
+    ids = _collect_ids(source_ids)
+    if not ids:
+        return []
+    return (await db.execute(select(config.model).where(config.model.id.in_(ids)))).scalars().all()
+
+
+async def build_module_documents(
+    db: AsyncSession, config: SearchModuleConfig, items: list[Any]
+) -> list[SearchDocument]:
+    """对一批实体执行按批预加载并构建检索文档。"""
+    context = await config.preload(db, items) if config.preload else {}
+    documents: list[SearchDocument] = []
+    for item in items:
+        document = await config.build_document(db, item, context)
+        if document:
+            documents.append(document)
+    return documents
+
+
 def get_configured_search_sync_tables() -> set[str]:
     return {item.strip() for item in settings.SEARCH_SYNC_CANAL_TABLES.split(",") if item.strip()}
 
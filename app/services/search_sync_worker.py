@@ -1,6 +1,9 @@
 """
 为什么这样做：同步 worker 只消费配置允许的表，降低 CDC 噪声对检索链路的影响。
-特殊逻辑：消息解析后按"共享字典/跨模块检索"分流处理，并对 schema 与操作类型做边界过滤。
+特殊逻辑：消息先按"行数/等待时长"攒成微批，同一主键的多次变更合并为最后一次；
+每批每张表一次主键查询 + 一次预加载，所有索引共用一次 ES _bulk；
+只确认变更全部写入成功的消息，整批异常或条目级失败（含 429）涉及的消息带重试次数重新投递，
+退避在刷写锁之外进行，超过 SEARCH_SYNC_MAX_ATTEMPTS 的消息以 requeue=False 拒绝进入死信。
 """
 
 import asyncio
@@ -12,15 +15,20 @@ import aio_pika
 
 from app.core.config import settings
 from app.core.database import AsyncSessionLocal
+from app.services.cross_search_service import CrossSearchService
 from app.services.hanzi_dictionary_search_service import HanziDictionarySearchService
+from app.services.search_registry import get_configured_search_sync_tables, get_enabled_search_module_configs
 
 
 logger = logging.getLogger(__name__)
 DICTIONARY_SEARCH_TABLE = "hanzi_dictionary"
+# 重新投递前的基础等待，按投递次数指数增长，避免重投递空转
+RETRY_BACKOFF_SECONDS = 1.0
+RETRY_BACKOFF_MAX_SECONDS = 60.0
+# 重新投递时记录已失败次数的消息头
+RETRY_ATTEMPTS_HEADER = "x-search-sync-attempts"
 
-
-def get_configured_search_sync_tables() -> set[str]:
-    return {item.strip() for item in settings.SEARCH_SYNC_CANAL_TABLES.split(",") if item.strip()}
+ChangeKey = tuple[str, str]
 
 
 class SearchSyncWorker:
@@ -36,8 +44,20 @@ class SearchSyncWorker:
             None: 无返回值。
         """
         self.allowed_tables = get_configured_search_sync_tables()
-        self.unregistered_tables = self.allowed_tables - {DICTIONARY_SEARCH_TABLE}
+        self.routed_tables = set(get_enabled_search_module_configs()) | {DICTIONARY_SEARCH_TABLE}
+        self.unregistered_tables = self.allowed_tables - self.routed_tables
         self.allowed_schema = settings.SEARCH_SYNC_CANAL_SCHEMA or settings.MYSQL_DB
+        # 未确认消息数受 prefetch 限制，批大小不能超过它，否则永远攒不满
+        self.max_batch_messages = max(1, settings.SEARCH_SYNC_RABBITMQ_PREFETCH)
+        self.max_batch_rows = max(1, settings.SEARCH_SYNC_BATCH_SIZE)
+        self.max_batch_wait = max(0, settings.SEARCH_SYNC_BATCH_MAX_WAIT_MS) / 1000
+        self.max_attempts = max(1, settings.SEARCH_SYNC_MAX_ATTEMPTS)
+        self._channel: aio_pika.abc.AbstractChannel | None = None
+        # 每条消息携带的变更键，条目级失败时据此只重试相关消息
+        self._pending_messages: list[tuple[aio_pika.abc.AbstractIncomingMessage, set[ChangeKey]]] = []
+        self._pending_changes: dict[ChangeKey, str] = {}
+        self._lock = asyncio.Lock()
+        self._flush_task: asyncio.Task | None = None
         for table in sorted(self.unregistered_tables):
             logger.warning("检索同步监听配置了未注册表：%s", table)
 
@@ -58,35 +78,168 @@ class SearchSyncWorker:
         connection = await aio_pika.connect_robust(settings.SEARCH_SYNC_RABBITMQ_URL)
         async with connection:
             channel = await connection.channel()
+            self._channel = channel
             await channel.set_qos(prefetch_count=settings.SEARCH_SYNC_RABBITMQ_PREFETCH)
             queue = await channel.declare_queue(settings.SEARCH_SYNC_RABBITMQ_QUEUE, durable=True)
             await queue.consume(self._on_message, no_ack=False)
             logger.info("检索同步监听启动，queue=%s", settings.SEARCH_SYNC_RABBITMQ_QUEUE)
             await asyncio.Future()
 
-    async def _on_message(self, message: aio_pika.IncomingMessage) -> None:
+    async def _on_message(self, message: aio_pika.abc.AbstractIncomingMessage) -> None:
+        """
+        功能描述：
+            处理消息：解析后并入当前微批，达到行数/消息数上限立即刷写，否则等待定时刷写。
+
+        参数：
+            message (aio_pika.abc.AbstractIncomingMessage): aio_pika.IncomingMessage 类型的数据。
+
+        返回值：
+            None: 无返回值。
+        """
+        payload = self._parse_json(message.body)
+        changes = self._extract_changes(payload) if payload is not None else []
+        if not changes:
+            # 无法解析或与检索无关的消息直接确认，不占用批容量
+            await message.ack()
+            return
+        retry: list[aio_pika.abc.AbstractIncomingMessage] = []
+        async with self._lock:
+            self._pending_messages.append((message, self._merge_changes(changes)))
+            if (
+                len(self._pending_changes) >= self.max_batch_rows
+                or len(self._pending_messages) >= self.max_batch_messages
+            ):
+                retry = await self._flush_locked()
+            elif self._flush_task is None:
+                self._flush_task = asyncio.create_task(self._flush_later())
+        await self._retry_messages(retry)
+
+    def _merge_changes(self, changes: list[tuple[str, str, dict]]) -> set[ChangeKey]:
+        """同一 (表, 主键) 只保留最后一次操作；写入时会回表读取最新状态，中间态无需保留。返回本条消息涉及的键。"""
+        keys: set[ChangeKey] = set()
+        for table, operation, row in changes:
+            source_id = str(row.get("id") or "")
+            if not source_id:
+                continue
+            key = (table, source_id)
+            keys.add(key)
+            # 重新插入以保持按最后变更时间排序
+            self._pending_changes.pop(key, None)
+            self._pending_changes[key] = operation
+        return keys
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.max_batch_wait)
+        async with self._lock:
+            retry = await self._flush_locked()
+        await self._retry_messages(retry)
+
+    async def _flush_locked(self) -> list[aio_pika.abc.AbstractIncomingMessage]:
+        """刷写当前微批并确认成功的消息，返回需要重新投递的消息；调用方需持有 self._lock，并在释放锁后处理重试。"""
+        if self._flush_task is not None and self._flush_task is not asyncio.current_task():
+            self._flush_task.cancel()
+        self._flush_task = None
+        messages, changes = self._pending_messages, self._pending_changes
+        self._pending_messages, self._pending_changes = [], {}
+        if not messages:
+            return []
+        try:
+            failed_keys = await self._apply_changes(changes)
+        except Exception:
+            logger.exception("检索同步微批写入失败，消息稍后重新投递：messages=%d, rows=%d", len(messages), len(changes))
+            return [message for message, _ in messages]
+        retry: list[aio_pika.abc.AbstractIncomingMessage] = []
+        for message, keys in messages:
+            if keys & failed_keys:
+                retry.append(message)
+            else:
+                await message.ack()
+        if retry:
+            logger.warning("检索同步条目写入失败，重新投递相关消息：messages=%d, rows=%d", len(retry), len(failed_keys))
+        return retry
+
+    async def _retry_messages(self, messages: list[aio_pika.abc.AbstractIncomingMessage]) -> None:
         """
         功能描述：
-            处理消息。
+            退避后把消息带上失败次数重新发布到队列尾部并确认原消息；超过次数上限的消息拒绝进入死信。
+            在刷写锁之外执行，退避不阻塞其他微批。
 
         参数：
-            message (aio_pika.IncomingMessage): aio_pika.IncomingMessage 类型的数据。
+            messages (list[aio_pika.abc.AbstractIncomingMessage]): 需要重试的消息。
 
         返回值：
             None: 无返回值。
         """
-        async with message.process(requeue=False):
-            payload = self._parse_json(message.body)
-            if payload is None:
-                return
-            changes = self._extract_changes(payload)
-            if not changes:
-                return
-            async with AsyncSessionLocal() as db:
-                hanzi_dictionary_search_service = HanziDictionarySearchService(db)
-                for table, operation, row in changes:
-                    if table == DICTIONARY_SEARCH_TABLE:
-                        await hanzi_dictionary_search_service.apply_cdc_change(operation, row)
+        if not messages:
+            return
+        attempts = {id(message): self._attempts(message) + 1 for message in messages}
+        retryable = [message for message in messages if attempts[id(message)] < self.max_attempts]
+        for message in messages:
+            if attempts[id(message)] >= self.max_attempts:
+                logger.error("检索同步消息重试 %d 次仍失败，转入死信：%s", attempts[id(message)], message.body[:200])
+                await message.nack(requeue=False)
+        if not retryable:
+            return
+        exponent = max(attempts[id(message)] for message in retryable) - 1
+        await asyncio.sleep(min(RETRY_BACKOFF_SECONDS * 2 ** exponent, RETRY_BACKOFF_MAX_SECONDS))
+        for message in retryable:
+            if self._channel is None:
+                await message.nack(requeue=True)
+                continue
+            headers = dict(message.headers or {})
+            headers[RETRY_ATTEMPTS_HEADER] = attempts[id(message)]
+            await self._channel.default_exchange.publish(
+                aio_pika.Message(
+                    body=message.body,
+                    headers=headers,
+                    content_type=message.content_type,
+                    delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                ),
+                routing_key=settings.SEARCH_SYNC_RABBITMQ_QUEUE,
+            )
+            await message.ack()
+
+    @staticmethod
+    def _attempts(message: aio_pika.abc.AbstractIncomingMessage) -> int:
+        try:
+            return int((message.headers or {}).get(RETRY_ATTEMPTS_HEADER, 0))
+        except (TypeError, ValueError):
+            return 0
+
+    async def _apply_changes(self, changes: dict[ChangeKey, str]) -> set[ChangeKey]:
+        """
+        功能描述：
+            按表分组生成 bulk 动作，共用一个 DB 会话，所有索引合并为一次 _bulk 提交。
+
+        参数：
+            changes (dict[ChangeKey, str]): 合并后的 {(表, 主键): 操作}。
+
+        返回值：
+            set[ChangeKey]: 条目级写入失败的 (表, 主键)。
+        """
+        grouped: dict[str, dict[str, str]] = {}
+        for (table, source_id), operation in changes.items():
+            grouped.setdefault(table, {})[source_id] = operation
+        async with AsyncSessionLocal() as db:
+            cross_search_service = CrossSearchService(db)
+            dictionary_search_service = HanziDictionarySearchService(db)
+            actions: list[dict] = []
+            keys_by_doc_id: dict[str, ChangeKey] = {}
+            for table, table_changes in grouped.items():
+                if table == DICTIONARY_SEARCH_TABLE:
+                    table_actions = await dictionary_search_service.build_cdc_actions(table_changes)
+                else:
+                    table_actions = await cross_search_service.build_cdc_actions(table, table_changes)
+                # 两个服务都按变更顺序为每个主键生成一个动作
+                for source_id, action in zip(table_changes, table_actions):
+                    keys_by_doc_id[str(action["_id"])] = (table, source_id)
+                actions.extend(table_actions)
+            success, failed_ids = await cross_search_service.apply_bulk_actions_with_failures(actions)
+        logger.info("检索同步微批完成：rows=%d, success=%d, failed=%d", len(changes), success, len(failed_ids))
+        # 无法定位到主键的失败保守地视为整批失败
+        if any(doc_id not in keys_by_doc_id for doc_id in failed_ids):
+            return set(changes)
+        return {keys_by_doc_id[doc_id] for doc_id in failed_ids}
 
     def _parse_json(self, body: bytes) -> dict[str, Any] | list[dict[str, Any]] | None:
         """
@@ -125,7 +278,7 @@ class SearchSyncWorker:
         table = str(payload.get("table") or "")
         if self.allowed_schema and database and database != self.allowed_schema:
             return []
-        if table not in self.allowed_tables:
+        if table not in self.allowed_tables or table not in self.routed_tables:
             return []
         if payload.get("isDdl"):
             return []
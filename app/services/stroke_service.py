@@ -1,25 +1,299 @@
 """
-为什么这样做：笔画服务在启动时一次性加载文件，避免高频查询反复 IO。
-特殊逻辑：同时兼容"|"与制表符两种历史格式，解析失败行直接跳过作为脏数据边界兜底。
+为什么这样做：笔画服务在启动时一次性编译为只读查询引擎，笔画查询与笔顺检索直接在进程内完成，不再回源数据库或 ES。
+特殊逻辑：源文件解析复用 load_strokes_table 的缓存产物，与字典初始化只解析一次；
+编译结果以源文件摘要为键落盘为二进制快照，源文件未变时冷启动直接加载快照，跳过解析与建索引；
+用户汉字的笔顺检索先由引擎算出候选字，再作为 character IN (...) 条件收窄数据库查询；
+"|" 历史格式只有笔画数，笔顺按笔画数返回占位序列，与旧实现一致。
 """
 
+import logging
+import marshal
 import os
-from typing import Dict
+from array import array
+from itertools import islice
+from typing import Dict, Iterable, NamedTuple, Optional, Sequence
 
 from app.core.config import settings
+from app.utils.hanzi_dictionary_parser import compute_file_digest, load_strokes_table, split_stroke_pattern
+
+
+logger = logging.getLogger(__name__)
+SNAPSHOT_FILE_NAME = "stroke_engine.bin"
+SNAPSHOT_MAGIC = b"CWSE"
+# 快照结构变化时递增，旧快照自动失效
+SNAPSHOT_VERSION = 3
+# 笔画名按单字节编码，足以覆盖规范笔画名（约 30 种）
+MAX_UNIT_KINDS = 256
+# 笔顺倒排索引的最大 n 元长度：单笔画 + 相邻两笔，更长的序列由二元组求交后逐条校验
+POSTING_MAX_GRAM = 2
+# 候选字超过该数量时不再拼 IN 条件，交给数据库自身的笔顺过滤
+MAX_FILTER_CANDIDATES = 2000
+# "|" 历史格式没有笔顺，按笔画数重复该占位符
+LEGACY_STROKE_PLACEHOLDER = "*"
+
+
+class StrokeRecord(NamedTuple):
+    character: str
+    radical: str
+    stroke_count: int
+    stroke_pattern: str
+    units: tuple[str, ...]
+
+
+class StrokeEngine:
+    """
+    不可变笔画查询引擎：字符→记录、笔画数分桶、部首索引、笔画名 n 元倒排表。
+    记录按列存放（字符串 + 定长数组），快照只需整块拷贝字节，加载时不逐条构造对象；
+    构建后不再修改，可在多个请求间无锁共享，重新加载时整体替换实例。
+    """
+
+    def __init__(
+        self,
+        characters: str,
+        radicals: list[str],
+        stroke_counts: array,
+        unit_names: tuple[str, ...],
+        unit_offsets: array,
+        unit_data: bytes,
+        postings: Dict[tuple[int, ...], array],
+    ):
+        self._characters = characters
+        self._radicals = radicals
+        self._stroke_counts = stroke_counts
+        self._unit_names = unit_names
+        self._unit_ids: Dict[str, int] = {name: unit_id for unit_id, name in enumerate(unit_names)}
+        self._unit_offsets = unit_offsets
+        self._unit_data = unit_data
+        self._postings = postings
+        self._by_character: Dict[str, int] = {character: ordinal for ordinal, character in enumerate(characters)}
+        self._by_stroke_count = self._build_bucket_index(stroke_counts)
+        self._by_radical = self._build_bucket_index(radicals)
+
+    @classmethod
+    def compile(cls, records: Iterable[StrokeRecord]) -> "StrokeEngine":
+        """
+        功能描述：
+            由解析后的记录编译查询引擎，同一字符重复出现时保留最后一条。
+
+        参数：
+            records (Iterable[StrokeRecord]): 笔画记录。
+
+        返回值：
+            StrokeEngine: 返回编译后的引擎。
+        """
+        deduplicated: Dict[str, StrokeRecord] = {}
+        for record in records:
+            deduplicated.pop(record.character, None)
+            deduplicated[record.character] = record
+        unit_ids: Dict[str, int] = {}
+        unit_offsets = array("I", [0])
+        unit_data = bytearray()
+        postings: Dict[tuple[int, ...], array] = {}
+        for ordinal, record in enumerate(deduplicated.values()):
+            encoded = [unit_ids.setdefault(unit, len(unit_ids)) for unit in record.units]
+            if len(unit_ids) > MAX_UNIT_KINDS:
+                raise ValueError(f"笔画名种类超过 {MAX_UNIT_KINDS}，无法按单字节编码")
+            unit_data.extend(encoded)
+            unit_offsets.append(len(unit_data))
+            for gram in cls._iter_grams(encoded):
+                posting = postings.setdefault(gram, array("I"))
+                # 同一记录内重复的 n 元只登记一次，保证倒排表有序且无重复
+                if not posting or posting[-1] != ordinal:
+                    posting.append(ordinal)
+        return cls(
+            "".join(deduplicated),
+            [record.radical for record in deduplicated.values()],
+            array("H", (max(record.stroke_count, 0) for record in deduplicated.values())),
+            tuple(unit_ids),
+            unit_offsets,
+            bytes(unit_data),
+            postings,
+        )
+
+    @property
+    def size(self) -> int:
+        return len(self._characters)
+
+    def get(self, character: str) -> Optional[StrokeRecord]:
+        ordinal = self._by_character.get(character)
+        return None if ordinal is None else self._record_at(ordinal)
+
+    def search(
+        self,
+        pattern: Optional[str] = None,
+        stroke_count: Optional[int] = None,
+        radical: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[StrokeRecord]:
+        """
+        功能描述：
+            按笔顺片段、笔画数与部首组合检索，笔顺片段要求按顺序连续出现；
+            空格分隔的多个片段需同时命中，与用户汉字笔顺检索的写法一致。
+
+        参数：
+            pattern (Optional[str]): 笔顺片段，如 "横,竖" 或 "横,竖 撇"。
+            stroke_count (Optional[int]): 笔画数。
+            radical (Optional[str]): 部首。
+            limit (Optional[int]): 最大返回数量，None 表示不限。
+
+        返回值：
+            list[StrokeRecord]: 返回按源文件顺序排列的命中记录。
+        """
+        candidate_sets: list[Sequence[int]] = []
+        if stroke_count is not None:
+            candidate_sets.append(self._by_stroke_count.get(stroke_count, ()))
+        if radical:
+            candidate_sets.append(self._by_radical.get(radical, ()))
+        for fragment in (pattern or "").split():
+            query_units = split_stroke_pattern(fragment)
+            if not query_units:
+                continue
+            if any(unit not in self._unit_ids for unit in query_units):
+                return []
+            candidate_sets.append(self._match_sequence([self._unit_ids[unit] for unit in query_units]))
+        if not candidate_sets:
+            ordinals: Iterable[int] = range(self.size)
+        elif len(candidate_sets) == 1:
+            ordinals = candidate_sets[0]
+        else:
+            # 从最短的候选集开始求交，代价取决于最稀疏的条件而不是字典规模
+            candidate_sets.sort(key=len)
+            matched = set(candidate_sets[0])
+            for candidates in candidate_sets[1:]:
+                matched.intersection_update(candidates)
+            ordinals = sorted(matched)
+        return [self._record_at(ordinal) for ordinal in islice(ordinals, limit)]
+
+    def _match_sequence(self, query: list[int]) -> Sequence[int]:
+        grams = list(self._iter_grams(query, exact=True))
+        postings = sorted((self._postings.get(gram, array("I")) for gram in grams), key=len)
+        if len(postings) == 1:
+            return postings[0]
+        matched = set(postings[0])
+        for posting in postings[1:]:
+            matched.intersection_update(posting)
+            if not matched:
+                return []
+        # 二元组全部命中不代表连续出现，逐条核对原始序列
+        needle = bytes(query)
+        return sorted(ordinal for ordinal in matched if needle in self._units_at(ordinal))
+
+    def _units_at(self, ordinal: int) -> bytes:
+        return self._unit_data[self._unit_offsets[ordinal]:self._unit_offsets[ordinal + 1]]
+
+    def _record_at(self, ordinal: int) -> StrokeRecord:
+        units = tuple(self._unit_names[unit_id] for unit_id in self._units_at(ordinal))
+        return StrokeRecord(
+            self._characters[ordinal],
+            self._radicals[ordinal],
+            self._stroke_counts[ordinal],
+            ",".join(units),
+            units,
+        )
+
+    def dumps(self, source_digest: str) -> bytes:
+        """
+        功能描述：
+            序列化为二进制快照，仅包含内置类型，加载时不执行任意代码。
+
+        参数：
+            source_digest (str): 源文件摘要，用于加载时校验快照是否过期。
+
+        返回值：
+            bytes: 返回快照字节串。
+        """
+        payload = (
+            source_digest,
+            self._characters,
+            "\t".join(self._radicals),
+            self._stroke_counts.tobytes(),
+            self._unit_names,
+            self._unit_offsets.tobytes(),
+            self._unit_data,
+            {gram: posting.tobytes() for gram, posting in self._postings.items()},
+        )
+        return self._snapshot_header() + marshal.dumps(payload)
+
+    @classmethod
+    def loads(cls, data: bytes, source_digest: str) -> Optional["StrokeEngine"]:
+        """
+        功能描述：
+            从二进制快照恢复引擎；格式版本或源文件摘要不一致时返回 None。
+
+        参数：
+            data (bytes): 快照字节串。
+            source_digest (str): 当前源文件摘要。
+
+        返回值：
+            Optional[StrokeEngine]: 返回恢复后的引擎；快照不可用时返回 None。
+        """
+        header = cls._snapshot_header()
+        if not data.startswith(header):
+            return None
+        try:
+            (
+                digest, characters, radicals, stroke_counts, unit_names, unit_offsets, unit_data, raw_postings,
+            ) = marshal.loads(data[len(header):])
+        except (EOFError, ValueError, TypeError):
+            return None
+        if digest != source_digest:
+            return None
+        postings = {gram: cls._array_from_bytes("I", raw) for gram, raw in raw_postings.items()}
+        return cls(
+            characters,
+            radicals.split("\t") if characters else [],
+            cls._array_from_bytes("H", stroke_counts),
+            unit_names,
+            cls._array_from_bytes("I", unit_offsets),
+            unit_data,
+            postings,
+        )
+
+    @staticmethod
+    def _snapshot_header() -> bytes:
+        return SNAPSHOT_MAGIC + bytes((SNAPSHOT_VERSION, marshal.version))
+
+    @staticmethod
+    def _array_from_bytes(typecode: str, raw: bytes) -> array:
+        values = array(typecode)
+        values.frombytes(raw)
+        return values
+
+    @staticmethod
+    def _iter_grams(encoded: list[int], exact: bool = False) -> Iterable[tuple[int, ...]]:
+        """建索引时产出全部 1..N 元组；查询时只需最长可用的 n 元组（exact=True）。"""
+        sizes = [min(len(encoded), POSTING_MAX_GRAM)] if exact else range(1, POSTING_MAX_GRAM + 1)
+        for size in sizes:
+            for start in range(len(encoded) - size + 1):
+                yield tuple(encoded[start:start + size])
+
+    @staticmethod
+    def _build_bucket_index(keys: Iterable) -> Dict:
+        buckets: Dict = {}
+        for ordinal, key in enumerate(keys):
+            if key or key == 0:
+                buckets.setdefault(key, array("I")).append(ordinal)
+        return buckets
+
+
+EMPTY_ENGINE = StrokeEngine.compile(())
 
 
 class StrokeService:
     def __init__(self):
         """
-        初始化stroke_data。
+        初始化笔画查询引擎。
         """
-        self._stroke_data: Dict[str, str] = {}
+        self._engine: StrokeEngine = EMPTY_ENGINE
+
+    @property
+    def engine(self) -> StrokeEngine:
+        return self._engine
 
     def load(self) -> None:
         """
         功能描述：
-            加载StrokeService。
+            加载StrokeService：源文件未变时直接读取快照，否则重新解析编译并写回快照。
 
         参数：
             无。
@@ -27,34 +301,21 @@ class StrokeService:
         返回值：
             None: 无返回值。
         """
-        path = settings.STROKES_FILE_PATH
-        if not os.path.isabs(path):
-            path = os.path.join(os.getcwd(), path)
+        path = self._resolve_path(settings.STROKES_FILE_PATH)
         if not os.path.exists(path):
-            self._stroke_data = {}
+            self._engine = EMPTY_ENGINE
             return
-        data: Dict[str, str] = {}
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                raw = line.strip()
-                if not raw:
-                    continue
-                if "|" in raw:
-                    parts = raw.split("|")
-                    if len(parts) >= 3:
-                        ch = parts[1]
-                        try:
-                            count = int(parts[2])
-                            data[ch] = "*" * count
-                        except ValueError:
-                            continue
-                    continue
-                parts = raw.split("\t")
-                if len(parts) >= 5:
-                    ch = parts[1]
-                    strokes = parts[4]
-                    data[ch] = strokes
-        self._stroke_data = data
+        cache_dir = self._resolve_path(settings.TEMP_DIR)
+        digest = compute_file_digest(path)
+        snapshot_path = os.path.join(cache_dir, SNAPSHOT_FILE_NAME)
+        engine = self._read_snapshot(snapshot_path, digest)
+        if engine is None:
+            engine = StrokeEngine.compile(self._iter_records(load_strokes_table(path, cache_dir=cache_dir)))
+            self._write_snapshot(snapshot_path, engine.dumps(digest))
+        self._engine = engine
+
+    def get_record(self, ch: str) -> Optional[StrokeRecord]:
+        return self._engine.get(ch)
 
     def get_stroke_order(self, ch: str) -> str:
         """
@@ -67,7 +328,10 @@ class StrokeService:
         返回值：
             str: 返回查询到的结果对象。
         """
-        return self._stroke_data.get(ch, "")
+        record = self._engine.get(ch)
+        if not record:
+            return ""
+        return record.stroke_pattern or LEGACY_STROKE_PLACEHOLDER * record.stroke_count
 
     def get_stroke_count(self, ch: str) -> int:
         """
@@ -80,22 +344,93 @@ class StrokeService:
         返回值：
             int: 返回查询到的结果对象。
         """
-        order = self.get_stroke_order(ch)
-        return len(order) if order else 0
+        record = self._engine.get(ch)
+        return record.stroke_count if record else 0
+
+    def search(
+        self,
+        pattern: Optional[str] = None,
+        stroke_count: Optional[int] = None,
+        radical: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> list[StrokeRecord]:
+        return self._engine.search(pattern=pattern, stroke_count=stroke_count, radical=radical, limit=limit)
+
+    def candidate_characters(
+        self,
+        pattern: Optional[str] = None,
+        stroke_count: Optional[int] = None,
+        radical: Optional[str] = None,
+    ) -> Optional[list[str]]:
+        """
+        功能描述：
+            由引擎索引算出满足条件的候选字，供数据库查询按 character IN (...) 收窄。
+
+        参数：
+            pattern (Optional[str]): 笔顺片段，空格分隔的多个片段需同时命中。
+            stroke_count (Optional[int]): 笔画数。
+            radical (Optional[str]): 部首。
+
+        返回值：
+            Optional[list[str]]: 候选字列表；引擎未加载，或候选过多且无部首条件时返回 None，表示不收窄。
+        """
+        if not self._engine.size:
+            return None
+        limit = None if radical else MAX_FILTER_CANDIDATES + 1
+        records = self._engine.search(pattern=pattern, stroke_count=stroke_count, radical=radical, limit=limit)
+        if limit is not None and len(records) > MAX_FILTER_CANDIDATES:
+            return None
+        return [record.character for record in records]
 
     def match_pattern(self, order: str, pattern: str) -> bool:
         """
         功能描述：
-            处理pattern。
+            判断笔顺是否包含全部片段，每个片段的笔画须按顺序连续出现，与引擎检索的匹配规则一致。
 
         参数：
-            order (str): 字符串结果。
-            pattern (str): 字符串结果。
+            order (str): 笔顺，如 "横,竖"。
+            pattern (str): 空格分隔的笔顺片段。
 
         返回值：
-            bool: 返回操作是否成功。
+            bool: 全部片段命中时返回 True。
         """
         if not pattern:
             return False
-        tokens = [p.strip() for p in pattern.split(" ") if p.strip()]
-        return all(t in order for t in tokens)
+        # 按笔画名比对而不是子串比对，"横" 不会误中 "横折"
+        haystack = f",{','.join(split_stroke_pattern(order))},"
+        fragments = [split_stroke_pattern(fragment) for fragment in pattern.split()]
+        return all(units and f",{','.join(units)}," in haystack for units in fragments)
+
+    @staticmethod
+    def _iter_records(frame) -> Iterable[StrokeRecord]:
+        if frame.empty:
+            return
+        for character, radical, stroke_count, stroke_pattern in frame[
+            ["character", "radical", "stroke_count", "stroke_pattern"]
+        ].itertuples(index=False, name=None):
+            units = tuple(split_stroke_pattern(stroke_pattern))
+            yield StrokeRecord(character, radical or "", stroke_count or 0, stroke_pattern or "", units)
+
+    @staticmethod
+    def _resolve_path(path: str) -> str:
+        return path if os.path.isabs(path) else os.path.join(os.getcwd(), path)
+
+    @staticmethod
+    def _read_snapshot(snapshot_path: str, digest: str) -> Optional[StrokeEngine]:
+        try:
+            with open(snapshot_path, "rb") as f:
+                return StrokeEngine.loads(f.read(), digest)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _write_snapshot(snapshot_path: str, data: bytes) -> None:
+        # 先写临时文件再原子替换，避免并发启动的进程读到半截快照
+        temp_path = f"{snapshot_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, snapshot_path)
+        except OSError:
+            logger.warning("笔画引擎快照写入失败：%s", snapshot_path, exc_info=True)
@@ -7,6 +7,7 @@ from app.core.redis_client import get_redis
 from app.repositories.student_repo import StudentRepository
 from app.repositories.teaching_class_repo import TeachingClassRepository
 from app.schemas.student import StudentCreate, StudentUpdate, StudentResponse
+from app.services.teaching_class_service import TeachingClassService
 from app.utils.redis_cache import build_cache_key, cache_delete
 
 
@@ -83,9 +84,12 @@ class StudentService:
         class_student_ids = await self.teaching_class_repo.list_student_ids_for_teacher(teacher_id)
         if student_id not in class_student_ids:
             return False
+        # 经教学班服务移除：与删除同事务写入成员变更事件并触发 outbox 发布，
+        # 被移出学生的权限上下文缓存随之失效，不会在 TTL 内继续检索该班课程
+        teaching_class_service = TeachingClassService(self.db)
         teaching_classes = await self.teaching_class_repo.get_all(teacher_id=teacher_id)
         removed = False
         for tc in teaching_classes:
-            if await self.teaching_class_repo.remove_member(tc.id, student_id):
+            if await teaching_class_service.remove_member(tc.id, student_id, teacher_id):
                 removed = True
         return removed
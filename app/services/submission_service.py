@@ -23,6 +23,7 @@ from app.models.message import Message
 from app.models.student import Student
 from app.models.submission import SubmissionStatus
 from app.repositories.ai_feedback_repo import AIFeedbackRepository
+from app.repositories.attachment_blob_repo import AttachmentBlobRepository
 from app.repositories.attachment_repo import AttachmentRepository
 from app.repositories.event_outbox_repo import EventOutboxRepository
 from app.repositories.submission_repo import SubmissionRepository
@@ -34,6 +35,7 @@ from app.schemas.submission import (
     SubmissionTransitionEvent,
 )
 from app.services.submission_state_machine import SubmissionStateMachine
+from app.services.url_signer import get_url_signer
 from app.tasks.notification_tasks import send_grade_notification, send_submission_notification, publish_outbox_events
 from app.tasks.ai_feedback_tasks import generate_ai_feedback, generate_submission_ai_summary
 from app.utils.pagination import build_paged_response
@@ -54,6 +56,7 @@ class SubmissionService:
         self.repo = SubmissionRepository(db)
         self.outbox_repo = EventOutboxRepository(db)
         self.state_machine = SubmissionStateMachine()
+        self.url_signer = get_url_signer()
 
     async def upload_submission_images(
         self,
@@ -74,20 +77,18 @@ class SubmissionService:
         from app.services.attachment_service import AttachmentService
         attachment_service = AttachmentService(self.repo.db)
 
-        attachment_ids: list[str] = []
         for upload_file in files:
             if not upload_file.filename:
                 raise ValueError("上传图片缺少文件名")
-            try:
-                attachment = await attachment_service.upload_attachment(
-                    file=upload_file,
-                    owner_type="submission",
-                    owner_id="temp",
-                )
-                attachment_ids.append(attachment.id)
-            except Exception as e:
-                raise ValueError(f"上传图片失败: {str(e)}")
-        return attachment_ids
+        try:
+            attachments = await attachment_service.upload_attachments(
+                files,
+                owner_type="submission",
+                owner_id="temp",
+            )
+        except Exception as e:
+            raise ValueError(f"上传图片失败: {str(e)}")
+        return [attachment.id for attachment in attachments]
 
     async def get_submission(self, id: str) -> Optional[SubmissionResponse]:
         """
@@ -100,7 +101,7 @@ class SubmissionService:
             Optional[SubmissionResponse]: 返回查询到的结果对象；未命中时返回 None。
         """
         submission = await self.repo.get(id)
-        return SubmissionResponse.model_validate(submission) if submission else None
+        return (await self._to_responses([submission]))[0] if submission else None
 
     async def get_latest_submission_for_student(
         self,
@@ -121,7 +122,7 @@ class SubmissionService:
             assignment_id=assignment_id,
             student_id=student_id,
         )
-        return SubmissionResponse.model_validate(submission) if submission else None
+        return (await self._to_responses([submission]))[0] if submission else None
 
     async def list_submissions_by_assignment(
         self,
@@ -150,7 +151,7 @@ class SubmissionService:
         items = await self.repo.get_all_by_assignment(assignment_id, skip, limit, student_id)
         total = await self.repo.count_by_assignment(assignment_id, student_id)
         payload = build_paged_response(
-            items=[SubmissionResponse.model_validate(i) for i in items],
+            items=await self._to_responses(items),
             total=total,
             pagination={"page": page, "size": size, "skip": skip, "limit": limit},
         )
@@ -209,7 +210,7 @@ class SubmissionService:
         )
         # refresh 不 eager load 关系，需重新查询以避免 async lazy load 报错
         reloaded = await self.repo.get(submission.id)
-        return SubmissionResponse.model_validate(reloaded)
+        return (await self._to_responses([reloaded]))[0]
 
     async def update_submission(
         self,
@@ -251,9 +252,12 @@ class SubmissionService:
             current_ids = {a.id for a in current_attachments}
             new_ids = set(submission_in.attachment_ids)
 
-            # 删除不在新列表中的附件
+            # 删除不在新列表中的附件，并归还内容块引用（与软删除同一事务提交）
+            blob_repo = AttachmentBlobRepository(self.repo.db)
             for attachment in current_attachments:
                 if attachment.id not in new_ids:
+                    if attachment.blob_id:
+                        await blob_repo.release(attachment.blob_id)
                     await attachment_repo.soft_delete(attachment)
 
             # 添加新附件
@@ -273,7 +277,7 @@ class SubmissionService:
         )
         # refresh 不 eager load 关系，需重新查询以避免 async lazy load 报错
         reloaded = await self.repo.get(updated_submission.id)
-        return SubmissionResponse.model_validate(reloaded)
+        return (await self._to_responses([reloaded]))[0]
 
     async def grade_submission(
         self,
@@ -314,7 +318,7 @@ class SubmissionService:
             body,
         )
         send_grade_notification.delay(submission.id)
-        return SubmissionResponse.model_validate(submission)
+        return (await self._to_responses([submission]))[0]
 
     async def _write_grade_result_message(
         self,
@@ -502,7 +506,22 @@ class SubmissionService:
         if not submission.graded_at:
             update_payload["graded_at"] = datetime.now()
         updated = await self.repo.update(submission, update_payload)
-        return SubmissionResponse.model_validate(updated)
+        return (await self._to_responses([updated]))[0]
+
+    async def _to_responses(self, submissions: list) -> list[SubmissionResponse]:
+        """
+        功能描述：
+            把提交记录转换为响应模型，整页附件的图片地址一次批量读时签名。
+
+        参数：
+            submissions (list): 提交记录 ORM 对象列表。
+
+        返回值：
+            list[SubmissionResponse]: 与输入顺序一致的响应列表。
+        """
+        responses = [SubmissionResponse.model_validate(submission) for submission in submissions]
+        await self.url_signer.apply([attachment for response in responses for attachment in response.attachments])
+        return responses
 
     @staticmethod
     def _build_resubmission_payload(
@@ -592,7 +611,7 @@ class SubmissionService:
             assignment_id=assignment_id,
         )
         payload = build_paged_response(
-            items=[SubmissionResponse.model_validate(i) for i in items],
+            items=await self._to_responses(items),
             total=total,
             pagination={"page": page, "size": size, "skip": skip, "limit": limit},
         )
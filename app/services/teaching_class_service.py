@@ -31,6 +31,8 @@ from app.schemas.teaching_class import (
     TeachingClassMemberResponse,
     TeachingClassResponse,
 )
+from app.services.permission_context_service import MEMBERSHIP_CHANGED_EVENT, add_permission_change_event
+from app.tasks.notification_tasks import publish_outbox_events
 from app.utils.pagination import build_paged_response
 
 
@@ -174,7 +176,17 @@ class TeachingClassService:
             raise ValueError("教学班级不存在")
         if teaching_class.teacher_id != teacher_id:
             raise ValueError("仅可移除本人教学班级中的学生")
-        return await self.repo.remove_member(teaching_class_id, student_id)
+        member = await self.repo.get_member(teaching_class_id, student_id)
+        if not member:
+            return False
+        # 确认有成员行要删除后才写入事件，与删除同一事务提交；
+        # 否则批量移除时未命中班级的事件会残留在会话中，被后续提交一并写入
+        await add_permission_change_event(
+            self.db, MEMBERSHIP_CHANGED_EVENT, "teaching_class", teaching_class_id, student_ids=[student_id],
+        )
+        await self.repo.delete_member(member)
+        publish_outbox_events.delay()
+        return True
 
     async def create_join_token(
         self,
@@ -296,11 +308,19 @@ class TeachingClassService:
             status=TeachingClassMemberStatus.ACTIVE,
         )
         await self.repo.add(member)
+        await add_permission_change_event(
+            self.db,
+            MEMBERSHIP_CHANGED_EVENT,
+            "teaching_class",
+            token_item.teaching_class_id,
+            student_ids=[current_student_id],
+        )
 
         token_item.used_count += 1
         token_item.last_used_at = datetime.now()
         await self.repo.save()
         await self.repo.refresh(member)
+        publish_outbox_events.delay()
 
         # 同步写入 StudentClass，保证学生端"我的班级"列表能查到该班级。
         # 用 get_by_student_and_class 做幂等检查，避免唯一约束冲突。
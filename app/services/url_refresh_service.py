@@ -1,21 +1,35 @@
 """
 ImageX URL 定时刷新服务。
 
-遍历配置注册表，对每张表的存量记录调用 GetResourceURL API 重新签名，
-更新即将过期的 URL。使用 url_refreshed_at 避免重复刷新近期已签名的记录。
+遍历配置注册表，对每张表中超过刷新阈值的记录调用 GetResourceURL API 重新签名。
+
+为什么这样做：原实现逐行同步签名、逐行 UPDATE，且每轮都从头查询“未刷新”的记录，
+被域名过滤跳过或签名失败的行会被反复选中；大表一轮跑不完，下一轮又从头开始。
+特殊逻辑：
+- 按主键游标（id > 上一页末尾）分页，只取 id/uri/url 三列，域名过滤下推到 SQL；
+- 每页的 URI 去重后并发签名（SDK 只提供远程签名接口，放在独立线程池中执行），
+  同一 URI 在一轮内只签一次，附件与内容块共享的 URI 不会重复调用；
+- 每页用一条 UPDATE ... CASE 批量写回；
+- 每轮有时间预算，超时即停，并把各表游标写入 Redis，下一轮优先从断点续刷；
+- 开启读时签名（URL_SIGN_ON_READ_ENABLED）后，标记 signed_on_read 的表由 url_signer 在返回时签名，这里跳过。
 """
 
+import asyncio
 import logging
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
 
-from sqlalchemy import select, update
+from sqlalchemy import case, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from urllib.parse import urlparse
 
 from app.core.config import settings
 from app.core.url_refresh_config import URL_REFRESH_TABLE_CONFIG
 from app.core.database import AsyncSessionLocal
+from app.core.redis_client import get_sync_redis
 from volcengine.imagex.v2.imagex_service import ImagexService
 
 logger = logging.getLogger(__name__)
@@ -26,6 +40,12 @@ _IMAGEX_URL_TTL = 2592000
 # 刷新阈值：距上次刷新超过 15 分钟即重新签名（保证在 30 分钟过期前续签）
 _REFRESH_THRESHOLD_MINUTES = 15
 
+# 单页最多行数，决定一条 UPDATE ... CASE 的规模
+_PAGE_SIZE_CAP = 500
+
+# 各表游标（上一页末尾的主键），Redis Hash
+_CHECKPOINT_KEY = "url_refresh:checkpoint"
+
 # URI 提取正则：匹配 /{uri}~{tpl}.{format} 格式
 _URI_PATTERN = re.compile(r"/(.+?)~[^/]+?\.[\w]+$")
 
@@ -33,97 +53,170 @@ _URI_PATTERN = re.compile(r"/(.+?)~[^/]+?\.[\w]+$")
 class UrlRefreshService:
     """ImageX URL 刷新服务"""
 
-    def __init__(self, imagex_service: ImagexService):
+    def __init__(
+        self,
+        imagex_service: ImagexService,
+        session_factory=None,
+        redis_client=None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
         self._imagex = imagex_service
+        self._session_factory = session_factory or AsyncSessionLocal
+        self._redis = redis_client
+        self._clock = clock
+        self._deadline = 0.0
+        # 本轮已签名的 URI → URL
+        self._signed: dict[str, str] = {}
 
     def refresh_all(self) -> dict[str, int]:
         """同步入口（供 Celery task 调用），遍历注册表刷新所有启用表。"""
-        import asyncio
-
         return asyncio.run(self._refresh_all_async())
 
     async def _refresh_all_async(self) -> dict[str, int]:
-        """异步实现，逐表刷新。"""
+        """异步实现，有断点的表优先，逐表刷新直到时间预算用完。"""
         results: dict[str, int] = {}
-        async with AsyncSessionLocal() as db:
-            for model_cls, cfg in URL_REFRESH_TABLE_CONFIG.items():
-                if not cfg.get("enabled", True):
-                    continue
-                tablename = model_cls.__tablename__
-                try:
-                    count = await self._refresh_table(db, model_cls, cfg)
-                    results[tablename] = count
-                except Exception:
-                    logger.exception("刷新表 %s 的 ImageX URL 失败", tablename)
-                    results[tablename] = -1
-            return results
+        self._deadline = self._clock() + settings.URL_REFRESH_TIME_BUDGET_SECONDS
+        self._signed = {}
+        checkpoints = self._load_checkpoints()
+        tables = [
+            (model_cls, cfg) for model_cls, cfg in URL_REFRESH_TABLE_CONFIG.items()
+            # 读时签名的表不再需要定时重签写回
+            if cfg.get("enabled", True) and not (settings.URL_SIGN_ON_READ_ENABLED and cfg.get("signed_on_read"))
+        ]
+        tables.sort(key=lambda item: item[0].__tablename__ not in checkpoints)
+
+        with ThreadPoolExecutor(
+            max_workers=settings.URL_REFRESH_CONCURRENCY, thread_name_prefix="url-refresh",
+        ) as executor:
+            async with self._session_factory() as db:
+                for model_cls, cfg in tables:
+                    tablename = model_cls.__tablename__
+                    if self._out_of_budget():
+                        logger.info("URL 刷新时间预算已用完，表 %s 留待下一轮", tablename)
+                        break
+                    try:
+                        results[tablename] = await self._refresh_table(
+                            db, model_cls, cfg, executor, checkpoints.get(tablename),
+                        )
+                    except Exception:
+                        await db.rollback()
+                        logger.exception("刷新表 %s 的 ImageX URL 失败", tablename)
+                        results[tablename] = -1
+        return results
 
     async def _refresh_table(
         self,
         db: AsyncSession,
         model_cls: type,
         cfg: dict[str, object],
+        executor: ThreadPoolExecutor,
+        after_id: Optional[str] = None,
     ) -> int:
         url_field = str(cfg["url_field"])
         uri_field = str(cfg["uri_field"])
-        batch_size = settings.URL_REFRESH_BATCH_SIZE
-        refreshed = 0
-
+        tablename = model_cls.__tablename__
+        id_col = model_cls.id
+        url_col = getattr(model_cls, url_field)
         uri_col = getattr(model_cls, uri_field)
         refreshed_at_col = getattr(model_cls, "url_refreshed_at")
+        page_size = min(settings.URL_REFRESH_BATCH_SIZE, _PAGE_SIZE_CAP)
         domains = [d.strip() for d in settings.URL_REFRESH_DOMAINS.split(",") if d.strip()]
 
         # 只刷超过 15 分钟未刷新的记录，避免同一轮反复签
         threshold = datetime.now(timezone.utc) - timedelta(minutes=_REFRESH_THRESHOLD_MINUTES)
-        # 每轮处理的批量大小，避免一次性加载过多 ORM 对象导致 MemoryError
-        chunk_size = min(batch_size, 200)
+        query = (
+            select(id_col, uri_col)
+            .where(uri_col.isnot(None), uri_col != "")
+            .where(refreshed_at_col.is_(None) | (refreshed_at_col < threshold))
+            .order_by(id_col)
+            .limit(page_size)
+        )
+        if domains:
+            query = query.where(or_(*(url_col.contains(domain) for domain in domains)))
 
+        refreshed = 0
         while True:
-            result = await db.execute(
-                select(model_cls)
-                .where(uri_col.isnot(None))
-                .where(
-                    (refreshed_at_col.is_(None)) | (refreshed_at_col < threshold)
-                )
-                .limit(chunk_size)
-            )
-            rows = result.scalars().all()
+            page_query = query.where(id_col > after_id) if after_id is not None else query
+            rows = (await db.execute(page_query)).all()
             if not rows:
+                self._clear_checkpoint(tablename)
                 break
 
-            for row in rows:
-                uri_val = getattr(row, uri_field)
-                if not uri_val:
-                    continue
-
-                current_url = getattr(row, url_field, "") or ""
-                if domains and not any(d in current_url for d in domains):
-                    continue
-
-                try:
-                    new_url = self._get_resource_url(uri_val)
-                    if new_url:
-                        await db.execute(
-                            update(model_cls)
-                            .where(model_cls.id == row.id)
-                            .values(
-                                **{
-                                    url_field: new_url,
-                                    "url_refreshed_at": datetime.now(timezone.utc),
-                                }
-                            )
-                        )
-                        refreshed += 1
-                except Exception:
-                    logger.exception(
-                        "刷新 %s id=%s 的 URL 失败", model_cls.__tablename__, row.id
-                    )
-
+            signed = await self._sign_many({row[1] for row in rows}, executor)
+            new_urls = {row[0]: signed[row[1]] for row in rows if signed.get(row[1])}
+            if new_urls:
+                await db.execute(
+                    update(model_cls)
+                    .where(id_col.in_(list(new_urls)))
+                    .values({
+                        url_field: case(new_urls, value=id_col),
+                        "url_refreshed_at": datetime.now(timezone.utc),
+                    })
+                    .execution_options(synchronize_session=False)
+                )
             await db.commit()
+            refreshed += len(new_urls)
+            after_id = rows[-1][0]
 
-        logger.info("表 %s 刷新完成，共刷新 %d 条", model_cls.__tablename__, refreshed)
+            if len(rows) < page_size:
+                self._clear_checkpoint(tablename)
+                break
+            if self._out_of_budget():
+                self._save_checkpoint(tablename, after_id)
+                logger.info("表 %s 刷新到 id=%s 时时间预算用完，下一轮从此处继续", tablename, after_id)
+                break
+
+        logger.info("表 %s 刷新完成，共刷新 %d 条", tablename, refreshed)
         return refreshed
 
+    async def _sign_many(self, uris: set[str], executor: ThreadPoolExecutor) -> dict[str, str]:
+        """并发签名一组 URI，失败的 URI 不在结果中；本轮已签过的直接复用。"""
+        loop = asyncio.get_running_loop()
+        pending = [uri for uri in uris if uri not in self._signed]
+
+        async def sign(uri: str) -> None:
+            try:
+                url = await loop.run_in_executor(executor, self._get_resource_url, uri)
+            except Exception:
+                logger.exception("签名 URI %s 失败", uri)
+                return
+            if url:
+                self._signed[uri] = url
+
+        await asyncio.gather(*(sign(uri) for uri in pending))
+        return {uri: self._signed[uri] for uri in uris if uri in self._signed}
+
+    def _out_of_budget(self) -> bool:
+        return self._clock() >= self._deadline
+
+    def _checkpoint_client(self):
+        if self._redis is None:
+            self._redis = get_sync_redis()
+        return self._redis
+
+    def _load_checkpoints(self) -> dict[str, str]:
+        try:
+            raw = self._checkpoint_client().hgetall(_CHECKPOINT_KEY) or {}
+        except Exception:
+            logger.warning("读取 URL 刷新断点失败，本轮从头开始", exc_info=True)
+            return {}
+        return {
+            (key.decode() if isinstance(key, bytes) else key): (value.decode() if isinstance(value, bytes) else value)
+            for key, value in raw.items()
+        }
+
+    def _save_checkpoint(self, tablename: str, last_id: str) -> None:
+        try:
+            self._checkpoint_client().hset(_CHECKPOINT_KEY, tablename, last_id)
+        except Exception:
+            logger.warning("保存 URL 刷新断点失败 table=%s", tablename, exc_info=True)
+
+    def _clear_checkpoint(self, tablename: str) -> None:
+        try:
+            self._checkpoint_client().hdel(_CHECKPOINT_KEY, tablename)
+        except Exception:
+            logger.warning("清除 URL 刷新断点失败 table=%s", tablename, exc_info=True)
+
     def _get_resource_url(self, uri: str) -> str:
         """调用 veImageX GetResourceURL API 生成新签名 URL。"""
         params = {
@@ -0,0 +1,186 @@
+"""
+为什么这样做：ImageX 签名 URL 会过期，原先靠定时任务把 hanzi、attachment 等表里存的 URL 整表重签写回，
+绝大多数行在下次过期前根本不会被读到，却每隔几分钟被改写一遍。
+这里改为读时签名：库里的 uri 是稳定标识，序列化响应时再按 (uri, 模板) 换成签名 URL。
+特殊逻辑：签名结果两级缓存——进程内 L1（有界 LRU）与 Redis，TTL 略短于签名有效期；
+列表接口把一整页的 uri 交给 sign_many，一次 MGET 查缓存，未命中的去重后并发签名，再用一个 pipeline 回填；
+签名失败或功能关闭时退回库中存量 URL，不影响接口返回。
+"""
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Iterable, Optional, Sequence
+
+from app.core.config import settings
+from app.core.redis_client import get_redis
+from app.utils.redis_cache import CACHE_FALLBACK_EXCEPTIONS
+
+logger = logging.getLogger(__name__)
+
+SIGNED_URL_CACHE_PREFIX = "imagex:signed"
+
+
+class SignedUrlCache:
+    def __init__(
+        self,
+        sign: Optional[Callable[[str], Awaitable[str]]] = None,
+        ttl: Optional[int] = None,
+        max_entries: Optional[int] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        功能描述：
+            初始化SignedUrlCache并准备运行所需的依赖对象。
+
+        参数：
+            sign: 把 uri 换成签名 URL 的协程函数，默认使用 OCRService.sign_uri。
+            ttl (Optional[int]): 签名 URL 缓存时间（秒），默认读取配置。
+            max_entries (Optional[int]): 进程内缓存的最大条目数，默认读取配置。
+            clock: 单调时钟，测试时可替换。
+
+        返回值：
+            None: 无返回值。
+        """
+        self._sign = sign
+        self.ttl = ttl or settings.SIGNED_URL_CACHE_TTL
+        self.max_entries = max_entries or settings.SIGNED_URL_L1_MAX_ENTRIES
+        self._clock = clock
+        self._local: OrderedDict[str, tuple[str, float]] = OrderedDict()
+
+    async def sign(self, uri: Optional[str]) -> Optional[str]:
+        """签名单个 uri；空 uri 或签名失败返回 None。"""
+        if not uri:
+            return None
+        return (await self.sign_many([uri])).get(uri)
+
+    async def sign_many(self, uris: Iterable[Optional[str]]) -> dict[str, str]:
+        """
+        功能描述：
+            批量把 uri 换成签名 URL，依次查进程内缓存、Redis，剩余的并发签名并回填两级缓存。
+
+        参数：
+            uris (Iterable[Optional[str]]): 资源 URI，空值与重复值会被忽略。
+
+        返回值：
+            dict[str, str]: uri → 签名 URL；签名失败的 uri 不在结果中。
+        """
+        unique = [uri for uri in dict.fromkeys(uris) if uri]
+        if not unique:
+            return {}
+        template = settings.IMAGEX_TEMPLATE_ID
+        keys = {uri: f"{SIGNED_URL_CACHE_PREFIX}:{template}:{uri}" for uri in unique}
+
+        signed: dict[str, str] = {}
+        for uri in unique:
+            url = self._get_local(keys[uri])
+            if url:
+                signed[uri] = url
+
+        missing = [uri for uri in unique if uri not in signed]
+        if missing:
+            for uri, url in (await self._read_redis([keys[uri] for uri in missing], missing)).items():
+                signed[uri] = url
+                self._set_local(keys[uri], url)
+
+        missing = [uri for uri in unique if uri not in signed]
+        if missing:
+            fresh = await self._sign_missing(missing)
+            for uri, url in fresh.items():
+                signed[uri] = url
+                self._set_local(keys[uri], url)
+            await self._write_redis({keys[uri]: url for uri, url in fresh.items()})
+        return signed
+
+    async def resolve(self, items: Sequence[Any], uri_attr: str, url_attr: str) -> list[Optional[str]]:
+        """
+        功能描述：
+            为一页记录解析对外返回的图片地址，有 uri 的换成签名 URL，其余沿用存量 URL。
+
+        参数：
+            items (Sequence[Any]): ORM 对象或响应模型。
+            uri_attr (str): 资源 URI 字段名。
+            url_attr (str): 存量 URL 字段名。
+
+        返回值：
+            list[Optional[str]]: 与 items 一一对应的地址。
+        """
+        stored = [getattr(item, url_attr, None) for item in items]
+        if not settings.URL_SIGN_ON_READ_ENABLED:
+            return stored
+        uris = [getattr(item, uri_attr, None) for item in items]
+        signed = await self.sign_many(uris)
+        return [(signed.get(uri) or url) if uri else url for uri, url in zip(uris, stored)]
+
+    async def apply(self, responses: Sequence[Any], uri_attr: str = "uri", url_attr: str = "file_url") -> None:
+        """就地改写响应模型的地址字段；只用于响应模型，ORM 对象改写会被当作脏数据写回。"""
+        for response, url in zip(responses, await self.resolve(responses, uri_attr, url_attr)):
+            setattr(response, url_attr, url)
+
+    def _get_local(self, key: str) -> Optional[str]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        url, expires_at = entry
+        if expires_at <= self._clock():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return url
+
+    def _set_local(self, key: str, url: str) -> None:
+        self._local[key] = (url, self._clock() + self.ttl)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def _read_redis(self, keys: list[str], uris: list[str]) -> dict[str, str]:
+        try:
+            values = await get_redis().mget(keys)
+        except CACHE_FALLBACK_EXCEPTIONS as exc:
+            logger.warning("读取签名 URL 缓存失败：%s", exc)
+            return {}
+        return {uri: value for uri, value in zip(uris, values) if value}
+
+    async def _write_redis(self, entries: dict[str, str]) -> None:
+        if not entries:
+            return
+        try:
+            async with get_redis().pipeline(transaction=False) as pipe:
+                for key, url in entries.items():
+                    pipe.set(key, url, ex=self.ttl)
+                await pipe.execute()
+        except CACHE_FALLBACK_EXCEPTIONS as exc:
+            logger.warning("写入签名 URL 缓存失败：%s", exc)
+
+    async def _sign_missing(self, uris: list[str]) -> dict[str, str]:
+        if self._sign is None:
+            # 延迟构造：全部命中缓存的请求不需要 ImageX 客户端与凭证
+            from app.services.ocr_service import OCRService
+
+            try:
+                self._sign = OCRService().sign_uri
+            except Exception as exc:
+                logger.warning("初始化 ImageX 签名客户端失败：%s", exc)
+                return {}
+        # 签名调用在 ImageX 专用线程池中执行，并发度由线程池大小约束
+        results = await asyncio.gather(*(self._sign(uri) for uri in uris), return_exceptions=True)
+        signed: dict[str, str] = {}
+        for uri, result in zip(uris, results):
+            if isinstance(result, BaseException):
+                logger.warning("签名 URI 失败 uri=%s: %s", uri, result)
+            elif result:
+                signed[uri] = result
+        return signed
+
+
+_url_signer: Optional[SignedUrlCache] = None
+
+
+def get_url_signer() -> SignedUrlCache:
+    """获取进程级签名 URL 缓存，进程内缓存在所有请求间共享。"""
+    global _url_signer
+    if _url_signer is None:
+        _url_signer = SignedUrlCache()
+    return _url_signer
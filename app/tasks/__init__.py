@@ -4,11 +4,19 @@ Celery 任务聚合入口。
 worker 启动时通过自动发现加载该包，并在导入阶段完成任务注册。
 """
 
-from . import ai_feedback_tasks, dataset_import_tasks, import_tasks, notification_tasks, url_refresh_tasks
+from . import (
+    ai_feedback_tasks,
+    dataset_import_tasks,
+    export_tasks,
+    import_tasks,
+    notification_tasks,
+    url_refresh_tasks,
+)
 
 __all__ = [
     "ai_feedback_tasks",
     "dataset_import_tasks",
+    "export_tasks",
     "import_tasks",
     "notification_tasks",
     "url_refresh_tasks",
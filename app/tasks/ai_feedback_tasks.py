@@ -3,6 +3,7 @@ import logging
 
 from app.core.celery_app import celery_app
 from app.core.database import AsyncSessionLocal
+from app.services.ocr_client import run_with_ocr_clients
 
 logger = logging.getLogger(__name__)
 
@@ -20,7 +21,7 @@ def generate_ai_feedback(attachment_id: str) -> dict:
         dict: 返回字典形式的结果数据。
     """
     logger.info("开始生成附件 AI 评语：attachment_id=%s", attachment_id)
-    return asyncio.run(_generate_attachment_feedback(attachment_id))
+    return run_with_ocr_clients(_generate_attachment_feedback(attachment_id))
 
 
 @celery_app.task(name="generate_submission_ai_summary")
@@ -0,0 +1,34 @@
+"""
+Celery 异步导出任务。
+"""
+
+import asyncio
+import logging
+
+from app.core.celery_app import celery_app
+from app.core.database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="run_export_job", bind=True, max_retries=0)
+def run_export_job(self, job_id: str) -> dict:
+    # 延迟导入：服务层在入队时引用本模块，顶层导入会形成循环依赖。
+    from app.services.export_job_service import execute_export_job
+
+    try:
+        return asyncio.run(execute_export_job(job_id, session_factory=AsyncSessionLocal))
+    except Exception as exc:
+        logger.exception("export job crashed job_id=%s", job_id)
+        return {"status": "failed", "error": str(exc)}
+
+
+@celery_app.task(name="cleanup_export_artifacts")
+def cleanup_export_artifacts() -> dict:
+    """删除超过保留时长的导出产物目录。"""
+    from app.utils.export_artifacts import ExportArtifactStore
+
+    removed = ExportArtifactStore().cleanup_expired()
+    if removed:
+        logger.info("清理过期导出产物 %s 个", removed)
+    return {"status": "ok", "removed": removed}
@@ -1,4 +1,3 @@
-import asyncio
 import json
 from datetime import datetime
 
@@ -7,6 +6,7 @@ from redis import Redis
 from app.core.celery_app import celery_app
 from app.core.config import settings
 from app.services.import_service import ImportService
+from app.services.ocr_client import run_with_ocr_clients
 
 
 TASK_LOG_KEY_PREFIX = "task_logs"
@@ -117,7 +117,7 @@ def process_import_data(
 
     try:
         # Celery 任务函数是同步入口，这里显式托管异步流程，避免事件循环嵌套冲突。
-        return asyncio.run(
+        return run_with_ocr_clients(
             service.process_import_task(zip_file_path, level_json_path, comment_json_path, status_callback)
         )
     except Exception as exc:
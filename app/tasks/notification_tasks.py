@@ -1,3 +1,4 @@
+import json
 import logging
 import asyncio
 
@@ -114,6 +115,24 @@ async def _batch_send_reminder(
         return _build_task_result(plan_id=plan_id, executed=result.total)
 
 
+async def _dispatch_outbox_event(db, event) -> None:
+    """
+    功能描述：
+        执行 outbox 事件的进程内订阅方；目前只有检索权限缓存订阅可见范围变更事件。
+
+    参数：
+        db (AsyncSession): 数据库会话，用于执行持久化操作。
+        event (EventOutbox): 待发布的事件。
+
+    返回值：
+        None: 无返回值。
+    """
+    from app.services.permission_context_service import PERMISSION_CHANGE_EVENTS, PermissionContextService
+
+    if event.event_type in PERMISSION_CHANGE_EVENTS:
+        await PermissionContextService(db).handle_change_event(json.loads(event.payload))
+
+
 async def _publish_outbox_events(limit: int = 100) -> dict:
     """
     功能描述：
@@ -138,6 +157,7 @@ async def _publish_outbox_events(limit: int = 100) -> dict:
                     event.event_type,
                     event.aggregate_id,
                 )
+                await _dispatch_outbox_event(db, event)
                 await repo.mark_published(event)
                 published_count += 1
             except Exception as exc:
@@ -0,0 +1,89 @@
+"""
+为什么这样做：异步导出的结果需要在任务结束后保留一段时间供下载与复用，
+放在 /media 下会绕过鉴权，因此单独存放在产物目录，由下载接口校验归属后再读取。
+特殊逻辑：每个任务一个子目录，先写 .part 再原子改名，下载方永远看不到写了一半的文件；
+过期判断以子目录修改时间为准，清理任务整目录删除。
+"""
+
+import os
+import shutil
+import time
+from typing import AsyncIterator, Optional
+
+from app.core.config import settings
+
+
+PART_SUFFIX = ".part"
+
+
+class ExportArtifactStore:
+    """本地导出产物目录：按任务ID分目录存放，超过保留时长后由清理任务删除。"""
+
+    def __init__(self, root: Optional[str] = None, ttl_seconds: Optional[int] = None):
+        self.root = os.path.abspath(root or settings.EXPORT_ARTIFACT_ROOT)
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else settings.EXPORT_ARTIFACT_TTL
+
+    def job_dir(self, job_id: str) -> str:
+        """返回任务产物目录，不存在时创建。"""
+        path = os.path.join(self.root, os.path.basename(job_id))
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    async def write_stream(self, job_id: str, file_name: str, chunks: AsyncIterator[bytes]) -> str:
+        """
+        功能描述：
+            将导出字节流写入任务目录，写完后原子改名为正式文件。
+
+        参数：
+            job_id (str): 导出任务ID。
+            file_name (str): 产物文件名。
+            chunks (AsyncIterator[bytes]): 导出字节流。
+
+        返回值：
+            str: 产物文件绝对路径。
+        """
+        path = os.path.join(self.job_dir(job_id), os.path.basename(file_name))
+        part_path = f"{path}{PART_SUFFIX}"
+        try:
+            with open(part_path, "wb") as file:
+                async for chunk in chunks:
+                    file.write(chunk)
+            os.replace(part_path, path)
+        finally:
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        return path
+
+    def resolve(self, job_id: str, file_name: str) -> Optional[str]:
+        """返回仍在有效期内的产物路径；文件不存在或已过期时返回 None。"""
+        path = os.path.join(self.root, os.path.basename(job_id), os.path.basename(file_name))
+        if not os.path.isfile(path) or self._is_expired(os.path.dirname(path), time.time()):
+            return None
+        return path
+
+    def cleanup_expired(self, now: Optional[float] = None) -> int:
+        """
+        功能描述：
+            删除超过保留时长的任务目录。
+
+        参数：
+            now (Optional[float]): 当前时间戳，默认取系统时间。
+
+        返回值：
+            int: 删除的任务目录数。
+        """
+        if not os.path.isdir(self.root):
+            return 0
+        now = now if now is not None else time.time()
+        removed = 0
+        for entry in os.scandir(self.root):
+            if entry.is_dir() and self._is_expired(entry.path, now):
+                shutil.rmtree(entry.path, ignore_errors=True)
+                removed += 1
+        return removed
+
+    def _is_expired(self, path: str, now: float) -> bool:
+        try:
+            return now - os.path.getmtime(path) > self.ttl_seconds
+        except OSError:
+            return True
@@ -1,7 +1,27 @@
+import hashlib
 import os
+import tempfile
 import uuid
+from dataclasses import dataclass
+from typing import Optional
+
 from fastapi import UploadFile
 
+# 上传文件分块落盘的块大小，内存占用与文件大小无关
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class SpooledUpload:
+    """已落盘的上传文件：临时路径、原始文件名、字节数与内容摘要。"""
+
+    path: str
+    file_name: str
+    size: int
+    sha256: str
+    # ImageX 对象键沿用 MD5 命名，与 SHA-256 在同一遍读取中计算
+    md5: str = ""
+
 
 def ensure_dir(path: str) -> None:
     """
@@ -37,3 +57,43 @@ async def save_upload_file(upload_file: UploadFile, target_dir: str) -> str:
     with open(file_path, "wb") as f:
         f.write(content)
     return file_path
+
+
+async def spool_upload_file(upload_file: UploadFile, target_dir: Optional[str] = None) -> SpooledUpload:
+    """
+    功能描述：
+        分块把上传文件写入临时文件，写入的同时计算 SHA-256 与 MD5，内存占用只与块大小有关；
+        临时文件名随机生成，不使用客户端文件名，并发请求之间不会互相覆盖。
+
+    参数：
+        upload_file (UploadFile): 上传文件对象。
+        target_dir (Optional[str]): 临时文件目录，默认系统临时目录。
+
+    返回值：
+        SpooledUpload: 落盘结果；调用方负责删除临时文件。
+    """
+    if target_dir:
+        ensure_dir(target_dir)
+    await upload_file.seek(0)
+    suffix = os.path.splitext(upload_file.filename or "")[1] or ".png"
+    digest = hashlib.sha256()
+    md5 = hashlib.md5()
+    size = 0
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=target_dir) as temp_file:
+        try:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                digest.update(chunk)
+                md5.update(chunk)
+                temp_file.write(chunk)
+                size += len(chunk)
+        except BaseException:
+            temp_file.close()
+            os.unlink(temp_file.name)
+            raise
+    return SpooledUpload(
+        path=temp_file.name,
+        file_name=upload_file.filename or os.path.basename(temp_file.name),
+        size=size,
+        sha256=digest.hexdigest(),
+        md5=md5.hexdigest(),
+    )
@@ -1,14 +1,50 @@
+import hashlib
+import logging
+import marshal
+import os
 import re
+import unicodedata
 from collections import Counter
 from pathlib import Path
 
 import pandas as pd
 
 
+logger = logging.getLogger(__name__)
+
+
+STROKES_COLUMNS = ["character", "radical", "stroke_count", "stroke_pattern"]
+STROKES_TABLE_COLUMNS = STROKES_COLUMNS + ["pinyin"]
+STROKES_ARTIFACT_PREFIX = "strokes_table_"
+# 解析规则或缓存结构变化时递增，旧缓存自动失效
+STROKES_ARTIFACT_VERSION = 1
+# 参与内容摘要的字段，字段集合变化时需同步递增 DICTIONARY_CONTENT_HASH_VERSION
+DICTIONARY_CONTENT_COLUMNS = ["radical", "stroke_count", "stroke_pattern", "pinyin"]
+DICTIONARY_CONTENT_HASH_VERSION = 1
+
+
+def compute_file_digest(file_path: str) -> str:
+    """
+    功能描述：
+        计算文件内容的 sha256 摘要，作为解析缓存与编译快照的版本键。
+
+    参数：
+        file_path (str): 文件或资源路径。
+
+    返回值：
+        str: 返回十六进制摘要。
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
 def parse_strokes_file(file_path: str) -> pd.DataFrame:
     """
     功能描述：
-        解析strokes文件。
+        解析strokes文件：逐行切分制表符字段，兼容只含笔画数的"|"历史格式，同一字符保留最后一行。
 
     参数：
         file_path (str): 文件或资源路径。
@@ -20,31 +56,133 @@ def parse_strokes_file(file_path: str) -> pd.DataFrame:
     if not path.exists():
         return pd.DataFrame()
 
-    frame = pd.read_csv(
-        path,
-        sep="\t",
-        engine="python",
-        header=None,
-        names=["codepoint", "character", "radical", "stroke_count", "stroke_pattern"],
-        dtype="string",
-    )
-    if frame.empty:
+    rows: dict[str, tuple] = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            row = _tokenize_strokes_line(line)
+            if row is None:
+                continue
+            # 先删后插，使重复字符按最后出现的位置排序，与 drop_duplicates(keep="last") 一致
+            rows.pop(row[0], None)
+            rows[row[0]] = row
+    if not rows:
         return pd.DataFrame()
+    return pd.DataFrame(list(rows.values()), columns=STROKES_COLUMNS, dtype=object)
+
+
+def _tokenize_strokes_line(line: str) -> tuple | None:
+    raw = line.strip()
+    if not raw:
+        return None
+    if "|" in raw:
+        parts = raw.split("|")
+        character = parts[1].strip()[:1] if len(parts) >= 3 else ""
+        if not character:
+            return None
+        return character, None, _parse_stroke_count(parts[2], None), None
+    parts = raw.split("\t")
+    if len(parts) < 2:
+        return None
+    character = parts[1].strip()[:1]
+    if not character:
+        return None
+    radical = parts[2].strip() if len(parts) > 2 else ""
+    stroke_pattern = parts[4].strip() if len(parts) > 4 else ""
+    stroke_count = _parse_stroke_count(parts[3] if len(parts) > 3 else "", stroke_pattern)
+    return character, radical or None, stroke_count, stroke_pattern or None
+
+
+def _parse_stroke_count(value: str, stroke_pattern: str | None) -> int | None:
+    try:
+        return int(value.strip())
+    except ValueError:
+        # 笔画数缺失或非法时按笔画序列长度补齐
+        units = split_stroke_pattern(stroke_pattern)
+        return len(units) if units else None
 
-    frame["character"] = frame["character"].fillna("").str.strip().str.slice(0, 1)
-    frame["stroke_pattern"] = frame["stroke_pattern"].fillna("").str.strip()
-    frame["stroke_pattern"] = frame["stroke_pattern"].replace("", pd.NA)
-    frame["stroke_count"] = pd.to_numeric(frame["stroke_count"], errors="coerce").astype("Int64")
-    frame = frame.loc[frame["character"] != "", ["character", "stroke_count", "stroke_pattern"]]
-    frame = frame.drop_duplicates(subset=["character"], keep="last").reset_index(drop=True)
-    if frame.empty:
-        return pd.DataFrame()
 
-    frame["stroke_count"] = frame["stroke_count"].fillna(frame["stroke_pattern"].str.len()).astype("Int64")
-    frame = frame.where(frame.notna(), None)
+def load_strokes_table(file_path: str, cache_dir: str | None = None) -> pd.DataFrame:
+    """
+    功能描述：
+        读取笔画文件并补齐拼音，结果按文件摘要缓存为二进制产物；文件未变时直接读取缓存，
+        跳过逐行解析与拼音解析。初始化字典与加载笔画引擎共用同一份产物。
+
+    参数：
+        file_path (str): 文件或资源路径。
+        cache_dir (str | None): 缓存目录，为空时不读写缓存。
+
+    返回值：
+        pd.DataFrame: 返回包含 character/radical/stroke_count/stroke_pattern/pinyin 的数据表，
+        attrs["source_digest"] 为源文件摘要。
+    """
+    if not Path(file_path).exists():
+        return pd.DataFrame()
+    digest = compute_file_digest(file_path)
+    artifact_path = Path(cache_dir) / f"{STROKES_ARTIFACT_PREFIX}{digest}.bin" if cache_dir else None
+    frame = _read_strokes_artifact(artifact_path, digest) if artifact_path else None
+    if frame is None:
+        frame = parse_strokes_file(file_path)
+        if not frame.empty:
+            frame["pinyin"] = resolve_pinyin_series(frame["character"])
+            if artifact_path:
+                _write_strokes_artifact(artifact_path, digest, frame)
+    frame.attrs["source_digest"] = digest
     return frame
 
 
+def build_dictionary_content_hashes(frame: pd.DataFrame) -> list[str]:
+    """
+    功能描述：
+        按行计算字典内容摘要（部首、笔画数、笔画序列、拼音），用于增量初始化时比对变更。
+
+    参数：
+        frame (pd.DataFrame): load_strokes_table 返回的数据表。
+
+    返回值：
+        list[str]: 返回与行顺序一致的摘要列表。
+    """
+    hashes: list[str] = []
+    for values in frame[DICTIONARY_CONTENT_COLUMNS].itertuples(index=False, name=None):
+        raw = "\x1f".join("" if value is None else str(value) for value in values)
+        hashes.append(hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest())
+    return hashes
+
+
+def _read_strokes_artifact(artifact_path: Path, digest: str) -> pd.DataFrame | None:
+    try:
+        payload = marshal.loads(artifact_path.read_bytes())
+    except (OSError, EOFError, ValueError, TypeError):
+        return None
+    if not isinstance(payload, tuple) or payload[:2] != (STROKES_ARTIFACT_VERSION, digest):
+        return None
+    characters, *columns = payload[2:]
+    return pd.DataFrame(
+        dict(zip(STROKES_TABLE_COLUMNS, [list(characters), *columns])),
+        columns=STROKES_TABLE_COLUMNS,
+        dtype=object,
+    )
+
+
+def _write_strokes_artifact(artifact_path: Path, digest: str, frame: pd.DataFrame) -> None:
+    payload = (
+        STROKES_ARTIFACT_VERSION,
+        digest,
+        "".join(frame["character"]),
+        *(frame[column].tolist() for column in STROKES_TABLE_COLUMNS[1:]),
+    )
+    temp_path = artifact_path.with_name(f"{artifact_path.name}.{os.getpid()}.tmp")
+    try:
+        artifact_path.parent.mkdir(parents=True, exist_ok=True)
+        temp_path.write_bytes(marshal.dumps(payload))
+        os.replace(temp_path, artifact_path)
+        # 源文件更新后旧摘要的产物不会再被命中，顺手清理
+        for stale in artifact_path.parent.glob(f"{STROKES_ARTIFACT_PREFIX}*.bin"):
+            if stale != artifact_path:
+                stale.unlink(missing_ok=True)
+    except OSError:
+        logger.warning("笔画解析缓存写入失败：%s", artifact_path, exc_info=True)
+
+
 def resolve_pinyin(character: str) -> str:
     """
     功能描述：
@@ -70,7 +208,8 @@ def resolve_pinyin(character: str) -> str:
 def resolve_pinyin_series(characters: pd.Series) -> pd.Series:
     """
     功能描述：
-        解析pinyinseries。
+        批量解析pinyin：直接按码位查 pypinyin 单字读音表，同一读音只去调一次，
+        结果与逐字调用 resolve_pinyin 一致，但无需逐字走分词流程。
 
     参数：
         characters (pd.Series): pd.Series 类型的数据。
@@ -78,7 +217,23 @@ def resolve_pinyin_series(characters: pd.Series) -> pd.Series:
     返回值：
         pd.Series: 返回解析后的结果数据。
     """
-    return characters.fillna("").astype(str).apply(resolve_pinyin)
+    values = characters.fillna("").astype(str)
+    try:
+        from pypinyin.pinyin_dict import pinyin_dict
+    except Exception:
+        return values.apply(resolve_pinyin)
+    readings: dict[str, str] = {}
+    resolved: list[str] = []
+    for value in values:
+        raw = pinyin_dict.get(ord(value[0])) if value else None
+        if not raw:
+            resolved.append(value)
+            continue
+        first = raw.split(",", 1)[0]
+        if first not in readings:
+            readings[first] = normalize_pinyin_search_key(first)
+        resolved.append(readings[first])
+    return pd.Series(resolved, index=characters.index, dtype=object)
 
 
 def normalize_pinyin_keyword(keyword: str | None) -> str:
@@ -97,6 +252,26 @@ def normalize_pinyin_keyword(keyword: str | None) -> str:
     return re.sub(r"\s+", "", keyword).strip().lower()
 
 
+def normalize_pinyin_search_key(value: str | None) -> str:
+    """
+    功能描述：
+        生成拼音检索键：去空白、小写、去声调符号与数字声调，ü 统一写作 v（与 pypinyin 默认输出一致）。
+        索引与查询两侧共用，保证 "zhōng" / "zhong1" / "Zhong" 命中同一词项。
+
+    参数：
+        value (str | None): 原始拼音或用户输入。
+
+    返回值：
+        str: 返回归一化后的拼音检索键。
+    """
+    normalized = normalize_pinyin_keyword(value)
+    if not normalized:
+        return ""
+    decomposed = unicodedata.normalize("NFD", normalized).replace("u\u0308", "v").replace("u:", "v")
+    stripped = "".join(char for char in decomposed if unicodedata.category(char) != "Mn")
+    return re.sub(r"[0-9]", "", stripped)
+
+
 def split_stroke_pattern(pattern: str | None) -> list[str]:
     """
     功能描述：
@@ -162,18 +337,38 @@ def encode_stroke_unit_key(unit: str) -> str:
     return unit.encode("utf-8").hex()
 
 
-def build_stroke_unit_count_fields(pattern: str | None) -> dict[str, int]:
+def build_stroke_unit_token(unit: str, count: int) -> str:
+    """
+    功能描述：
+        构建笔画重复次数词项，表示"至少包含 count 个该笔画"。
+
+    参数：
+        unit (str): 笔画名称。
+        count (int): 最少出现次数。
+
+    返回值：
+        str: 返回词项字符串。
+    """
+    return f"{encode_stroke_unit_key(unit)}_{count}"
+
+
+def build_stroke_unit_tokens(pattern: str | None) -> list[str]:
     """
     功能描述：
-        构建笔画unitcount字段。
+        构建笔画重复次数词项列表：某笔画出现 n 次时展开为 1..n 共 n 个词项，
+        "至少 N 个某笔画"即可用单个 term 命中倒排索引。
 
     参数：
         pattern (str | None): 字符串结果。
 
     返回值：
-        dict[str, int]: 返回字典形式的结果数据。
+        list[str]: 返回词项列表。
     """
-    return {encode_stroke_unit_key(unit): count for unit, count in build_stroke_unit_counter(pattern).items()}
+    return [
+        build_stroke_unit_token(unit, index)
+        for unit, count in build_stroke_unit_counter(pattern).items()
+        for index in range(1, count + 1)
+    ]
 
 
 def contains_exact_stroke_units(candidate_pattern: str | None, query_pattern: str | None) -> bool:
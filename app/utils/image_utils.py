@@ -1,14 +1,19 @@
+import io
 import os
 import zipfile
 import shutil
 import tempfile
 import logging
 import math
-from typing import List, Tuple
+from dataclasses import dataclass, replace
+from typing import List, Optional, Tuple
 
 
 logger = logging.getLogger(__name__)
 
+# 白底手写字 JPEG（quality=90）每像素体积的保守估计，用于按请求体上限估算网格容量
+GRID_JPEG_BYTES_PER_PIXEL = 0.35
+
 
 def extract_zip_to_temp(zip_path: str, output_dir: str) -> str:
     """
@@ -47,52 +52,136 @@ def extract_zip_to_temp(zip_path: str, output_dir: str) -> str:
     return temp_dir
 
 
-def merge_images(image_paths: List[str], grid_size: Tuple[int, int] = (5, 5)) -> List[str]:
+@dataclass(frozen=True)
+class GridPlan:
+    """网格布局：cols x rows 个边长为 cell 的格子，格子之间与四周留 gutter 宽的白边。"""
+
+    cols: int
+    rows: int
+    cell: int
+    gutter: int
+
+    @property
+    def capacity(self) -> int:
+        return self.cols * self.rows
+
+    @property
+    def pitch(self) -> int:
+        return self.cell + self.gutter
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        return self.cols * self.pitch + self.gutter, self.rows * self.pitch + self.gutter
+
+    def with_capacity(self, capacity: int) -> "GridPlan":
+        """按不超过 capacity 的格子数收缩网格，格子尺寸不变。"""
+        capacity = max(1, min(capacity, self.capacity))
+        cols = min(self.cols, max(1, math.isqrt(capacity)))
+        return replace(self, cols=cols, rows=max(1, min(self.rows, capacity // cols)))
+
+    def for_count(self, count: int) -> "GridPlan":
+        """只装 count 张图片时的最小网格。"""
+        cols = max(1, min(self.cols, count))
+        return replace(self, cols=cols, rows=math.ceil(count / cols))
+
+    def cell_origin(self, index: int) -> Tuple[int, int]:
+        return self.gutter + (index % self.cols) * self.pitch, self.gutter + (index // self.cols) * self.pitch
+
+    def cell_at(self, x: float, y: float) -> Optional[int]:
+        """坐标所在的格子序号；落在网格外时返回 None。"""
+        col, row = int((x - self.gutter / 2) // self.pitch), int((y - self.gutter / 2) // self.pitch)
+        if 0 <= col < self.cols and 0 <= row < self.rows:
+            return row * self.cols + col
+        return None
+
+
+def read_image_sizes(image_paths: List[str]) -> List[Optional[Tuple[int, int]]]:
     """
     功能描述：
-        合并图片。
+        只读取文件头获取图片尺寸（已按 EXIF 方向纠正），无法解码的图片返回 None。
 
     参数：
         image_paths (List[str]): 待处理图片路径列表。
-        grid_size (Tuple[int, int]): Tuple[int, int] 类型的数据。
 
     返回值：
-        List[str]: 返回List[str]类型的处理结果。
+        List[Optional[Tuple[int, int]]]: 与输入顺序一致的 (宽, 高)。
+    """
+    from PIL import Image, UnidentifiedImageError
+
+    sizes: List[Optional[Tuple[int, int]]] = []
+    for path in image_paths:
+        try:
+            with Image.open(path) as img:
+                width, height = img.size
+                # EXIF 方向 5~8 表示旋转了 90 度，宽高互换
+                if img.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                    width, height = height, width
+                sizes.append((width, height))
+        except (UnidentifiedImageError, OSError):
+            sizes.append(None)
+    return sizes
+
+
+def plan_grid(
+    sizes: List[Tuple[int, int]],
+    max_side: int,
+    max_cells: int,
+    max_payload_bytes: int,
+    min_cell: int,
+    max_cell: int,
+) -> GridPlan:
     """
+    功能描述：
+        按图片尺寸与供应商请求体上限规划网格：格子边长取图片长边的中位数，
+        再由合并图最长边与 JPEG 体积估算共同决定一张网格放多少格。
 
-    from PIL import Image
+    参数：
+        sizes (List[Tuple[int, int]]): 图片 (宽, 高) 列表，不能为空。
+        max_side (int): 合并图最长边上限（像素）。
+        max_cells (int): 单张网格最多格子数。
+        max_payload_bytes (int): 单次请求图片 base64 后的体积上限（字节）。
+        min_cell (int): 格子最小边长，过小会影响识别率。
+        max_cell (int): 格子最大边长，大图缩放到该尺寸以内。
 
-    if not image_paths:
+    返回值：
+        GridPlan: 网格布局。
+    """
+    if not sizes:
         raise ValueError("没有可用于合并的有效图片")
+    longest = sorted(max(width, height) for width, height in sizes)[len(sizes) // 2]
+    cell = max(min_cell, min(max_cell, longest))
+    gutter = max(8, cell // 8)
+    per_side = max(1, (max_side - gutter) // (cell + gutter))
+    per_cell_bytes = (cell + gutter) ** 2 * GRID_JPEG_BYTES_PER_PIXEL * 4 / 3
+    capacity = min(per_side * per_side, max_cells, max(1, int(max_payload_bytes // per_cell_bytes)))
+    return GridPlan(cols=per_side, rows=per_side, cell=cell, gutter=gutter).with_capacity(capacity)
+
+
+def compose_grid(image_paths: List[str], plan: GridPlan) -> bytes:
+    """
+    功能描述：
+        在内存中把图片按网格拼成一张 JPEG：等比缩放进格子并居中，逐张打开、粘贴后立即关闭。
+
+    参数：
+        image_paths (List[str]): 本网格的图片路径，数量不超过 plan.capacity。
+        plan (GridPlan): 网格布局。
 
-    batch_size = grid_size[0] * grid_size[1]
-    batches = [image_paths[i:i + batch_size] for i in range(0, len(image_paths), batch_size)]
-    merged_paths = []
-
-    for batch_paths in batches:
-        images = [Image.open(p) for p in batch_paths]
-        cols, rows = grid_size
-        num = len(images)
-        actual_cols = min(cols, num)
-        actual_rows = math.ceil(num / cols) if num != cols * rows else rows
-
-        w, h = images[0].size
-        need_resize = max(w * actual_cols, h * actual_rows) > 2160
-        if need_resize:
-            scale = min(2160 / (w * actual_cols), 2160 / (h * actual_rows))
-            w, h = int(w * scale), int(h * scale)
-
-        merged_img = Image.new('RGB', (w * actual_cols, h * actual_rows), (255, 255, 255))
-
-        for i, img in enumerate(images):
-            x = (i % cols) * w
-            y = (i // cols) * h
-            if need_resize:
-                img = img.resize((w, h), Image.Resampling.LANCZOS)
-            merged_img.paste(img, (x, y))
-
-        tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".jpg")
-        merged_img.save(tmp.name, quality=95)
-        merged_paths.append(tmp.name)
-
-    return merged_paths
+    返回值：
+        bytes: JPEG 字节；无法解码的图片对应格子留白。
+    """
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    canvas = Image.new("RGB", plan.size, (255, 255, 255))
+    for index, path in enumerate(image_paths):
+        try:
+            with Image.open(path) as img:
+                tile = ImageOps.exif_transpose(img).convert("RGB")
+                tile.thumbnail((plan.cell, plan.cell), Image.Resampling.LANCZOS)
+        except (UnidentifiedImageError, OSError) as exc:
+            logger.warning("合并网格时读取图片失败：%s，错误：%s", path, exc)
+            continue
+        x, y = plan.cell_origin(index)
+        canvas.paste(tile, (x + (plan.cell - tile.width) // 2, y + (plan.cell - tile.height) // 2))
+    buffer = io.BytesIO()
+    canvas.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
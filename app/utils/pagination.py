@@ -1,4 +1,7 @@
-from typing import Optional
+from typing import Any, AsyncIterator, Optional
+
+from sqlalchemy import Select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 
 def resolve_pagination(
@@ -69,3 +72,40 @@ def build_paged_response(items: list, total: int, pagination: dict) -> dict:
         "limit": pagination["limit"],
         "has_more": pagination["skip"] + len(items) < total,
     }
+
+
+async def iter_keyset_batches(
+    db: AsyncSession,
+    statement: Select,
+    key_column: Any,
+    batch_size: int,
+    scalars: bool = True,
+) -> AsyncIterator[list]:
+    """
+    功能描述：
+        按唯一键做 keyset 分页，逐批流式读取查询结果。
+        相比 offset 分页，每页都走索引定位，深翻页耗时恒定；调用方处理完一批再取下一批，内存占用与表大小无关。
+
+    参数：
+        db (AsyncSession): 数据库会话，用于执行持久化操作。
+        statement (Select): 不带 order_by/limit 的基础查询。
+        key_column (Any): 分页键列，需唯一且可比较（通常为主键）。
+        batch_size (int): 每批条数。
+        scalars (bool): 为 True 时返回 ORM 实体列表，否则返回 Row 列表。
+
+    返回值：
+        AsyncIterator[list]: 逐批产出结果列表。
+    """
+    last_key = None
+    while True:
+        query = statement.order_by(key_column).limit(batch_size)
+        if last_key is not None:
+            query = query.where(key_column > last_key)
+        result = await db.execute(query)
+        items = result.scalars().all() if scalars else result.all()
+        if not items:
+            return
+        yield items
+        if len(items) < batch_size:
+            return
+        last_key = getattr(items[-1], key_column.key)
@@ -0,0 +1,44 @@
+"""
+为什么这样做：第三方 OCR 按 QPS 计费与限流，并发调用时单靠信号量只能限制“同时在途数”，
+短调用仍会瞬间打满配额触发限流错误；令牌桶按速率发放调用许可，平均速率贴合供应商 QPS。
+特殊逻辑：桶容量默认等于速率（允许 1 秒的突发），等待者通过锁排队，先到先得。
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Optional
+
+
+class TokenBucket:
+    """异步令牌桶：acquire 在令牌不足时睡眠到下一枚令牌生成。"""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+    ):
+        if rate <= 0:
+            raise ValueError("rate 必须大于 0")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._updated_at = clock()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self) -> None:
+        """取走一枚令牌，必要时等待。"""
+        async with self._lock:
+            self._refill()
+            while self._tokens < 1:
+                await self._sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
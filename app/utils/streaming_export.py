@@ -0,0 +1,104 @@
+"""
+为什么这样做：导出一次读入全部数据再整体写文件，内存随行数线性增长且首字节要等全部写完；
+这里把“分批读出的行”直接写成 CSV/Excel 字节流，内存只与批大小有关。
+特殊逻辑：CSV 边写边吐，首字节在第一批数据到达后立即发出；
+xlsx 是 zip 容器，必须写完中央目录才完整，因此用 openpyxl write_only 逐行落到临时文件，
+保存后再分块吐出，行数据本身不在内存中累积。
+"""
+
+import asyncio
+import csv
+import io
+import tempfile
+import urllib.parse
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, AsyncIterator, Sequence
+
+from openpyxl import Workbook
+
+
+EXPORT_CHUNK_SIZE = 64 * 1024
+# xlsx 保存结果在该阈值内留在内存，超过后自动落盘
+EXPORT_SPOOL_MAX_BYTES = 8 * 1024 * 1024
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CSV_MEDIA_TYPE = "text/csv; charset=utf-8"
+EXPORT_MEDIA_TYPES = {"xlsx": XLSX_MEDIA_TYPE, "csv": CSV_MEDIA_TYPE}
+
+
+@dataclass
+class ExportStream:
+    """一次导出的结果：文件名、MIME 类型与按需生成的字节块。"""
+    file_name: str
+    media_type: str
+    chunks: AsyncIterator[bytes]
+
+
+def build_export_stream(
+    base_name: str,
+    header: Sequence[str],
+    rows: AsyncIterator[Sequence[Any]],
+    export_format: str = "xlsx",
+) -> ExportStream:
+    """
+    功能描述：
+        将异步行迭代器包装为导出流，数据在响应发送时才开始读取。
+
+    参数：
+        base_name (str): 文件名前缀，自动追加时间戳与扩展名。
+        header (Sequence[str]): 表头。
+        rows (AsyncIterator[Sequence[Any]]): 数据行迭代器。
+        export_format (str): "xlsx" 或 "csv"。
+
+    返回值：
+        ExportStream: 导出流对象。
+    """
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"不支持的导出格式：{export_format}")
+    file_name = f"{base_name}_{datetime.now().strftime('%Y%m%d%H%M%S')}.{export_format}"
+    chunks = iter_csv_chunks(header, rows) if export_format == "csv" else iter_xlsx_chunks(header, rows)
+    return ExportStream(file_name=file_name, media_type=EXPORT_MEDIA_TYPES[export_format], chunks=chunks)
+
+
+def build_attachment_headers(file_name: str) -> dict[str, str]:
+    """构造下载响应头，文件名按 RFC 5987 编码以支持中文。"""
+    return {"Content-Disposition": f"attachment; filename*=UTF-8''{urllib.parse.quote(file_name)}"}
+
+
+def _format_cell(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.strftime("%Y-%m-%d %H:%M:%S")
+    return value
+
+
+async def iter_csv_chunks(header: Sequence[str], rows: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    """逐行写 CSV，缓冲区累计到 EXPORT_CHUNK_SIZE 即吐出；带 BOM 以便 Excel 直接识别 UTF-8。"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+    async for row in rows:
+        writer.writerow([_format_cell(value) for value in row])
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def iter_xlsx_chunks(header: Sequence[str], rows: AsyncIterator[Sequence[Any]]) -> AsyncIterator[bytes]:
+    """write_only 模式逐行写入工作表，保存后分块读出。"""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(list(header))
+    async for row in rows:
+        sheet.append([_format_cell(value) for value in row])
+    with tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_MAX_BYTES) as spool:
+        # 压缩打包是纯 CPU 工作，放到线程里避免阻塞事件循环
+        await asyncio.to_thread(workbook.save, spool)
+        spool.seek(0)
+        while chunk := spool.read(EXPORT_CHUNK_SIZE):
+            yield chunk
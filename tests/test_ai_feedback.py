@@ -66,6 +66,7 @@ class TestAttachmentAIFeedbackService(unittest.IsolatedAsyncioTestCase):
             owner_id="sub-1",
             management_system_id="ms-1",
             file_url="media/t.jpg",
+            blob_id=None,
         )
         service.attachment_repo.get = AsyncMock(return_value=attachment)
         service.submission_repo.get = AsyncMock(return_value=SimpleNamespace(id="sub-1"))
@@ -102,6 +103,7 @@ class TestAttachmentAIFeedbackService(unittest.IsolatedAsyncioTestCase):
             owner_id="sub-1",
             management_system_id="ms-1",
             file_url="media/t.jpg",
+            blob_id=None,
         )
         service.attachment_repo.get = AsyncMock(return_value=attachment)
         service.submission_repo.get = AsyncMock(return_value=SimpleNamespace(id="sub-1"))
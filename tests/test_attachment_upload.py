@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import io
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from starlette.datastructures import UploadFile
+
+os.environ.setdefault("MYSQL_HOST", "localhost")
+os.environ.setdefault("MYSQL_PORT", "3306")
+os.environ.setdefault("MYSQL_USER", "root")
+os.environ.setdefault("MYSQL_PASSWORD", "root")
+os.environ.setdefault("MYSQL_DB", "charwork")
+
+from app.services.attachment_service import AttachmentService  # noqa: E402
+from app.services.ocr_service import OCRService  # noqa: E402
+
+
+class FakeStorage:
+    build_store_key = staticmethod(OCRService.build_store_key)
+
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.store_keys: list[str] = []
+        self.paths: list[str] = []
+
+    async def upload_image(self, image_path: str, store_key: str = None) -> dict:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        self.paths.append(image_path)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        if store_key.endswith(".bad"):
+            raise ConnectionError("upload reset")
+        self.store_keys.append(store_key)
+        return {"uri": store_key, "image_url": f"https://cdn/{store_key}"}
+
+
+class FakeBlobRepo:
+    def __init__(self):
+        self.blobs: dict[str, SimpleNamespace] = {}
+
+    async def get_by_sha256s(self, sha256s):
+        return {sha: self.blobs[sha] for sha in sha256s if sha in self.blobs}
+
+    async def get_or_create(self, **fields):
+        blob = SimpleNamespace(id=f"blob-{len(self.blobs)}", ref_count=0, **fields)
+        self.blobs[fields["sha256"]] = blob
+        return blob
+
+    async def add_references(self, blob_id, count=1):
+        for blob in self.blobs.values():
+            if blob.id == blob_id:
+                blob.ref_count += count
+
+
+class FakeSigner:
+    async def apply(self, responses, uri_attr="uri", url_attr="file_url"):
+        for response in responses:
+            setattr(response, url_attr, f"https://cdn/{getattr(response, uri_attr)}?signed")
+
+
+def _upload(name: str, content: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(content), filename=name)
+
+
+class TestAttachmentUpload(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.storage = FakeStorage()
+        with patch("app.services.attachment_service.OCRService", return_value=self.storage):
+            self.service = AttachmentService(AsyncMock())
+
+        async def create(attachment_in):
+            return SimpleNamespace(id=attachment_in.filename, **attachment_in.model_dump())
+
+        self.service.repo.create = create
+        self.service.blob_repo = FakeBlobRepo()
+        self.service.url_signer = FakeSigner()
+        patcher = patch("app.services.attachment_service.settings.ATTACHMENT_UPLOAD_CONCURRENCY", 3)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def test_uploads_run_concurrently_and_keep_input_order(self):
+        files = [_upload(f"{index}.png", f"img-{index}".encode()) for index in range(6)]
+
+        with patch("app.services.attachment_service.AttachmentResponse.model_validate", side_effect=lambda a: a):
+            attachments = await self.service.upload_attachments(files, "submission", "temp")
+
+        self.assertEqual([attachment.filename for attachment in attachments], [f"{i}.png" for i in range(6)])
+        self.assertEqual(self.storage.max_in_flight, 3)
+        self.assertIn(f"ocr/{hashlib.md5(b'img-0').hexdigest()}.png", self.storage.store_keys)
+        self.assertEqual(attachments[0].file_size, len(b"img-0"))
+        self.assertTrue(attachments[0].file_url.endswith("?signed"))
+        self.assertFalse(any(os.path.exists(path) for path in self.storage.paths))
+
+    async def test_duplicate_content_reuses_blob_without_uploading(self):
+        with patch("app.services.attachment_service.AttachmentResponse.model_validate", side_effect=lambda a: a):
+            await self.service.upload_attachments([_upload("a.png", b"same")], "submission", "temp")
+            attachments = await self.service.upload_attachments(
+                [_upload("b.png", b"same"), _upload("c.png", b"other"), _upload("d.png", b"other")],
+                "submission", "temp",
+            )
+
+        self.assertEqual(len(self.storage.store_keys), 2)
+        self.assertEqual(attachments[0].blob_id, "blob-0")
+        self.assertEqual(attachments[1].blob_id, attachments[2].blob_id)
+        blobs = self.service.blob_repo.blobs
+        self.assertEqual(sorted(blob.ref_count for blob in blobs.values()), [2, 2])
+
+    async def test_failed_upload_raises_after_cleanup(self):
+        files = [_upload("same.png", b"a"), _upload("same.bad", b"b")]
+
+        with self.assertRaises(ConnectionError):
+            await self.service.upload_attachments(files, "submission", "temp")
+
+        self.assertEqual(len(set(self.storage.paths)), 2)
+        self.assertFalse(any(os.path.exists(path) for path in self.storage.paths))
+
+
+if __name__ == "__main__":
+    unittest.main()
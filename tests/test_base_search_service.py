@@ -9,17 +9,62 @@ class FakeIndices:
     def __init__(self):
         self.exists_response = False
         self.created = []
+        self.bodies = {}
+        self.deleted = []
+        self.settings_updates = []
+        self.alias_actions = []
+        self.aliases: dict[str, str] = {}
+        self.generations: list[str] = []
+        self.meta: dict[str, dict] = {}
 
     async def exists(self, index: str):
         return self.exists_response
 
     async def create(self, index: str, body: dict):
         self.created.append(index)
+        self.bodies[index] = body
+        self.generations.append(index)
+
+    async def put_settings(self, index: str, settings: dict):
+        self.settings_updates.append((index, settings))
+
+    async def refresh(self, index: str):
+        return None
+
+    async def delete(self, index: str):
+        self.deleted.append(index)
+        if index in self.generations:
+            self.generations.remove(index)
+
+    async def exists_alias(self, name: str):
+        return name in self.aliases
+
+    async def get_alias(self, name: str | None = None, index: str | None = None):
+        if name is not None:
+            return {self.aliases[name]: {"aliases": {name: {}}}}
+        return {generation: {"aliases": {}} for generation in self.generations}
+
+    async def get_mapping(self, index: str):
+        target = self.aliases.get(index, index)
+        return {target: {"mappings": {"_meta": self.meta.get(target, {})}}}
+
+    async def put_mapping(self, index: str, meta: dict):
+        self.meta[self.aliases.get(index, index)] = meta
+
+    async def update_aliases(self, actions: list[dict]):
+        self.alias_actions.append(actions)
+        for action in actions:
+            if "add" in action:
+                self.aliases[action["add"]["alias"]] = action["add"]["index"]
 
 
 class FakeES:
     def __init__(self):
         self.indices = FakeIndices()
+        self.count_response = {"count": 0}
+
+    async def count(self, index: str):
+        return self.count_response
 
 
 class TestBaseSearchService(unittest.IsolatedAsyncioTestCase):
@@ -98,6 +143,166 @@ class TestBaseSearchService(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(success, 5)
         self.assertEqual(failed, 0)
 
+    async def test_reindex_builds_generation_and_swaps_alias(self):
+        from app.services.base_search_service import MANIFEST_META_KEY
+        fake_es = FakeES()
+        fake_es.count_response = {"count": 3}
+        fake_es.indices.aliases["test_index"] = "test_index_v20260101000000000000"
+        fake_es.indices.generations.append("test_index_v20260101000000000000")
+        with patch("app.services.base_search_service.get_es_client", return_value=fake_es):
+            service = BaseSearchService(AsyncMock())
+            service.index_name = "test_index"
+            service._build_index_body = lambda: {"mappings": {}}
+            service._populate_index = AsyncMock(return_value=(3, 0))
+            result = await service.reindex()
+        generation = fake_es.indices.created[0]
+        self.assertTrue(generation.startswith("test_index_v"))
+        self.assertEqual(fake_es.indices.bodies[generation]["settings"]["index"]["refresh_interval"], "-1")
+        self.assertEqual(fake_es.indices.bodies[generation]["settings"]["index"]["number_of_replicas"], 0)
+        service._populate_index.assert_called_once_with(generation)
+        self.assertEqual(
+            fake_es.indices.alias_actions[-1],
+            [
+                {"remove": {"index": "test_index_v20260101000000000000", "alias": "test_index"}},
+                {"add": {"index": generation, "alias": "test_index"}},
+            ],
+        )
+        self.assertEqual(fake_es.indices.deleted, ["test_index_v20260101000000000000"])
+        self.assertIn(MANIFEST_META_KEY, fake_es.indices.meta[generation])
+        self.assertEqual(result.indexed, 3)
+
+    async def test_reindex_catches_up_changes_written_during_populate(self):
+        from app.services.base_search_service import MANIFEST_META_KEY
+        fake_es = FakeES()
+        fake_es.count_response = {"count": 3}
+        before = {"hanzi": {"count": 3, "watermark": "2026-01-01T00:00:00", "max_id": "105"}}
+        after = {"hanzi": {"count": 3, "watermark": "2026-01-02T00:00:00", "max_id": "105"}}
+        with patch("app.services.base_search_service.get_es_client", return_value=fake_es):
+            service = BaseSearchService(AsyncMock())
+            service.index_name = "test_index"
+            service._build_index_body = lambda: {"mappings": {}}
+            service._populate_index = AsyncMock(return_value=(3, 0))
+            service._collect_source_stats = AsyncMock(side_effect=[before, after])
+
+            async def sync_source(source, since):
+                # 追平必须发生在别名切到新一代之后
+                self.assertEqual(fake_es.indices.aliases["test_index"], fake_es.indices.created[0])
+                return 1, 0
+
+            service._sync_source = AsyncMock(side_effect=sync_source)
+            result = await service.reindex()
+        generation = fake_es.indices.created[0]
+        service._sync_source.assert_called_once_with("hanzi", "2026-01-01T00:00:00")
+        self.assertEqual(fake_es.indices.meta[generation][MANIFEST_META_KEY]["sources"], after)
+        self.assertEqual(result.indexed, 4)
+
+    async def test_reindex_keeps_alias_when_count_mismatch(self):
+        from app.services.base_search_service import IndexGenerationError
+        fake_es = FakeES()
+        fake_es.count_response = {"count": 1}
+        with patch("app.services.base_search_service.get_es_client", return_value=fake_es):
+            service = BaseSearchService(AsyncMock())
+            service.index_name = "test_index"
+            service._build_index_body = lambda: {"mappings": {}}
+            service._populate_index = AsyncMock(return_value=(3, 0))
+            with self.assertRaises(IndexGenerationError):
+                await service.reindex()
+        self.assertEqual(fake_es.indices.alias_actions, [])
+        self.assertEqual(fake_es.indices.deleted, fake_es.indices.created)
+
+    async def test_reindex_keeps_alias_when_some_writes_failed(self):
+        from app.services.base_search_service import IndexGenerationError
+        fake_es = FakeES()
+        fake_es.count_response = {"count": 3}
+        fake_es.indices.aliases["test_index"] = "test_index_v20260101000000000000"
+        with patch("app.services.base_search_service.get_es_client", return_value=fake_es):
+            service = BaseSearchService(AsyncMock())
+            service.index_name = "test_index"
+            service._build_index_body = lambda: {"mappings": {}}
+            service._populate_index = AsyncMock(return_value=(3, 1))
+            with self.assertRaises(IndexGenerationError):
+                await service.reindex()
+        self.assertEqual(fake_es.indices.alias_actions, [])
+        self.assertEqual(fake_es.indices.aliases["test_index"], "test_index_v20260101000000000000")
+        self.assertEqual(fake_es.indices.deleted, fake_es.indices.created)
+        self.assertEqual(fake_es.indices.meta, {})
+
+    async def test_swap_alias_replaces_legacy_concrete_index(self):
+        fake_es = FakeES()
+        fake_es.indices.exists_response = True
+        with patch("app.services.base_search_service.get_es_client", return_value=fake_es):
+            service = BaseSearchService(AsyncMock())
+            service.index_name = "test_index"
+            await service._swap_alias("test_index_v1")
+        self.assertEqual(
+            fake_es.indices.alias_actions[0],
+            [
+                {"remove_index": {"index": "test_index"}},
+                {"add": {"index": "test_index_v1", "alias": "test_index"}},
+            ],
+        )
+
+    def _build_bootstrap_service(self, fake_es, manifest_sources: dict, current_sources: dict):
+        from app.services.base_search_service import MANIFEST_META_KEY
+        fake_es.indices.exists_response = True
+        fake_es.indices.aliases["test_index"] = "test_index_v1"
+        with patch("app.services.base_search_service.get_es_client", return_value=fake_es):
+            service = BaseSearchService(AsyncMock())
+        service.index_name = "test_index"
+        service._build_index_body = lambda: {"mappings": {}}
+        fake_es.indices.meta["test_index_v1"] = {
+            MANIFEST_META_KEY: {"mapping_hash": service._mapping_hash(), "sources": manifest_sources},
+        }
+        service._collect_source_stats = AsyncMock(return_value=current_sources)
+        service._sync_source = AsyncMock(return_value=(2, 0))
+        service.reindex = AsyncMock()
+        return service
+
+    async def test_bootstrap_skips_when_manifest_current(self):
+        sources = {"hanzi": {"count": 10, "watermark": "2026-01-01T00:00:00", "max_id": "105"}}
+        service = self._build_bootstrap_service(FakeES(), sources, dict(sources))
+        result = await service.ensure_index_with_bootstrap()
+        service.reindex.assert_not_called()
+        service._sync_source.assert_not_called()
+        self.assertEqual(result.indexed, 0)
+
+    async def test_bootstrap_catches_up_from_watermark(self):
+        service = self._build_bootstrap_service(
+            FakeES(),
+            {"hanzi": {"count": 10, "watermark": "2026-01-01T00:00:00", "max_id": "105"}},
+            {"hanzi": {"count": 10, "watermark": "2026-01-02T00:00:00", "max_id": "105"}},
+        )
+        result = await service.ensure_index_with_bootstrap()
+        service._sync_source.assert_called_once_with("hanzi", "2026-01-01T00:00:00")
+        self.assertEqual(result.indexed, 2)
+
+    async def test_bootstrap_refreshes_source_when_count_drifts(self):
+        service = self._build_bootstrap_service(
+            FakeES(),
+            {"hanzi": {"count": 10, "watermark": "2026-01-01T00:00:00", "max_id": "105"}},
+            {"hanzi": {"count": 9, "watermark": "2026-01-01T00:00:00", "max_id": "105"}},
+        )
+        await service.ensure_index_with_bootstrap()
+        service._sync_source.assert_called_once_with("hanzi", None)
+
+    async def test_bootstrap_refreshes_source_when_row_replaced(self):
+        # 删一行再插一行：行数与水位都可能不变，但新行推高了最大主键
+        service = self._build_bootstrap_service(
+            FakeES(),
+            {"hanzi": {"count": 10, "watermark": "2026-01-01T00:00:00", "max_id": "105"}},
+            {"hanzi": {"count": 10, "watermark": "2026-01-01T00:00:00", "max_id": "107"}},
+        )
+        await service.ensure_index_with_bootstrap()
+        service._sync_source.assert_called_once_with("hanzi", None)
+
+    async def test_bootstrap_reindexes_when_mapping_changed(self):
+        from app.services.base_search_service import MANIFEST_META_KEY
+        fake_es = FakeES()
+        service = self._build_bootstrap_service(fake_es, {}, {})
+        fake_es.indices.meta["test_index_v1"][MANIFEST_META_KEY]["mapping_hash"] = "stale"
+        await service.ensure_index_with_bootstrap()
+        service.reindex.assert_called_once()
+
     async def test_bulk_index_empty_actions(self):
         fake_es = AsyncMock()
         with patch("app.services.base_search_service.get_es_client", return_value=fake_es):
@@ -137,22 +342,34 @@ class TestCrossSearchServiceInheritance(unittest.IsolatedAsyncioTestCase):
         from app.services.search_registry import SearchModuleConfig, SearchDocument
 
         fake_es = FakeES()
-        fake_es.indices.exists_response = True
+        fake_es.count_response = {"count": 1}
         doc = SearchDocument(module="test", source_id="1", title="t", content="c")
         config = SearchModuleConfig(
             table="test_table",
             module="test",
-            load_all=AsyncMock(return_value=[MagicMock()]),
+            model=MagicMock(),
             load_one=AsyncMock(return_value=MagicMock()),
             build_document=AsyncMock(return_value=doc),
             preload=AsyncMock(return_value={}),
         )
+
+        async def fake_batches(db, module_config, batch_size=None, since=None):
+            yield [MagicMock()]
+
+        async def fake_bulk(client, actions, **kwargs):
+            collected = [action async for action in actions]
+            self.assertEqual(collected[0]["_index"], fake_es.indices.created[0])
+            return len(collected), []
+
         with patch("app.services.base_search_service.get_es_client", return_value=fake_es):
             with patch("app.services.cross_search_service.get_enabled_search_module_configs", return_value={"test_table": config}):
-                with patch("app.services.base_search_service.async_bulk", return_value=(1, [])) as mock_bulk:
-                    service = CrossSearchService(AsyncMock())
-                    service.index_name = "test_global_search"
-                    result = await service.reindex()
+                with patch("app.services.cross_search_service.load_module_stats", AsyncMock(return_value={})):
+                    with patch("app.services.cross_search_service.iter_module_batches", fake_batches):
+                        with patch("app.services.base_search_service.async_bulk", side_effect=fake_bulk) as mock_bulk:
+                            service = CrossSearchService(AsyncMock())
+                            service.index_name = "test_global_search"
+                            result = await service.reindex()
         self.assertEqual(result.indexed, 1)
         self.assertEqual(result.failed, 0)
         mock_bulk.assert_called_once()
+        config.preload.assert_called_once()
@@ -1,3 +1,5 @@
+import unittest
+
 import pytest
 from app.services.cross_search_service import CrossSearchService
 
@@ -49,3 +51,155 @@ class TestBuildPermissionFilter:
         )
         result = CrossSearchService._build_permission_filter(ctx)
         assert len(result) == 1
+
+
+class TestCrossSearchPaging(unittest.IsolatedAsyncioTestCase):
+    """测试 PIT 游标翻页、总数与分面"""
+
+    def _build_service(self, response: dict):
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        configs = {"hanzi": MagicMock(module="hanzi"), "course": MagicMock(module="course")}
+        with patch("app.services.cross_search_service.get_enabled_search_module_configs", return_value=configs), \
+                patch("app.services.base_search_service.get_es_client", return_value=MagicMock()):
+            service = CrossSearchService(AsyncMock())
+        service.ensure_index = AsyncMock()
+        service.es = MagicMock()
+        service.es.open_point_in_time = AsyncMock(return_value={"id": "pit-1"})
+        service.es.close_point_in_time = AsyncMock()
+        service.es.search = AsyncMock(return_value=response)
+        return service
+
+    @staticmethod
+    def _hit(source_id: str, sort: list) -> dict:
+        return {
+            "_id": f"hanzi_{source_id}",
+            "_source": {"module": "hanzi", "source_id": source_id, "title": "永", "content": "永字八法"},
+            "highlight": {"title": ["<em>永</em>"]},
+            "sort": sort,
+        }
+
+    async def test_full_page_returns_cursor_and_facets(self):
+        from app.schemas.search import PermissionContext
+
+        response = {
+            "pit_id": "pit-2",
+            "hits": {"total": {"value": 42}, "hits": [self._hit("h1", [3.0, "hanzi", "h1"]), self._hit("h2", [2.0, "hanzi", "h2"])]},
+            "aggregations": {
+                "modules": {"buckets": [{"key": "hanzi", "doc_count": 40}, {"key": "course", "doc_count": 2}]},
+            },
+        }
+        service = self._build_service(response)
+        ctx = PermissionContext(role="admin")
+
+        result = await service.search("永", current_user=None, modules=["hanzi"], limit=2, permission_ctx=ctx)
+
+        body = service.es.search.await_args.kwargs["body"]
+        assert "pit" not in body
+        assert service.es.search.await_args.kwargs["index"] == service.index_name
+        assert body["post_filter"] == {"terms": {"module": ["hanzi"]}}
+        assert body["track_total_hits"] is True
+        assert "search_after" not in body
+        assert result.total == 42
+        assert result.facets == {"hanzi": 40, "course": 2}
+        assert result.items[0].highlights == {"title": ["<em>永</em>"]}
+        assert result.next_cursor
+        service.es.open_point_in_time.assert_awaited_once()
+        service.es.close_point_in_time.assert_not_awaited()
+
+        service.es.search.return_value = {"hits": {"total": {"value": 42}, "hits": []}}
+        await service.search(
+            "永", current_user=None, modules=["hanzi"], limit=2, permission_ctx=ctx, cursor=result.next_cursor,
+        )
+        body = service.es.search.await_args.kwargs["body"]
+        assert body["pit"]["id"] == "pit-1"
+        assert body["search_after"] == [2.0, "hanzi", "h2"]
+        service.es.open_point_in_time.assert_awaited_once()
+        service.es.close_point_in_time.assert_awaited_once_with(id="pit-1")
+
+    async def test_single_page_result_opens_no_pit(self):
+        response = {"hits": {"total": {"value": 1}, "hits": [self._hit("h1", [3.0, "hanzi", "h1"])]}}
+        service = self._build_service(response)
+
+        result = await service.search("永", current_user=None, limit=2)
+
+        assert result.next_cursor is None
+        service.es.open_point_in_time.assert_not_awaited()
+        service.es.close_point_in_time.assert_not_awaited()
+
+    async def test_cursor_bound_to_query(self):
+        from app.services.cross_search_service import SearchCursorError
+
+        service = self._build_service({})
+        cursor = CrossSearchService._encode_cursor("pit-1", [1.0, 2], "other-query")
+        with pytest.raises(SearchCursorError):
+            await service.search("永", current_user=None, cursor=cursor)
+        with pytest.raises(SearchCursorError):
+            await service.search("永", current_user=None, cursor="not-a-cursor")
+
+
+class TestCrossSearchSuggest(unittest.IsolatedAsyncioTestCase):
+    """测试带权限上下文的搜索建议"""
+
+    def _build_service(self):
+        import asyncio
+        from unittest.mock import AsyncMock, MagicMock, patch
+
+        configs = {
+            table: MagicMock(module=table)
+            for table in ("assignment", "course", "teaching_class", "discussion", "student", "hanzi", "dataset")
+        }
+        with patch("app.services.cross_search_service.get_enabled_search_module_configs", return_value=configs), \
+                patch("app.services.base_search_service.get_es_client", return_value=MagicMock()):
+            service = CrossSearchService(AsyncMock())
+        service.ensure_index = AsyncMock()
+
+        async def slow_search(**kwargs):
+            await asyncio.sleep(0.01)
+            return {"suggest": {"title_suggest": [{"options": [
+                {"_id": "course_c1", "_source": {"module": "course", "source_id": "c1", "title": "书法入门"}},
+            ]}]}}
+
+        service.es = MagicMock()
+        service.es.search = AsyncMock(side_effect=slow_search)
+        return service
+
+    def test_document_scopes_match_query_scopes(self):
+        from app.schemas.search import PermissionContext
+
+        service = self._build_service()
+        course_doc = {"module": "course", "source_id": "c1", "teacher_user_id": "t1"}
+        hanzi_doc = {"module": "hanzi", "source_id": "h1", "created_by_user_id": None}
+        student_ctx = PermissionContext(role="student", user_id="s1", student_user_id="s1", course_ids=["c1"])
+        other_teacher = PermissionContext(role="teacher", user_id="t2")
+
+        student_scopes = set(service._build_suggest_scopes(student_ctx, None))
+        teacher_scopes = set(service._build_suggest_scopes(other_teacher, None))
+        assert student_scopes & set(service._build_document_suggest_scopes(course_doc))
+        assert not teacher_scopes & set(service._build_document_suggest_scopes(course_doc))
+        assert teacher_scopes & set(service._build_document_suggest_scopes(hanzi_doc))
+        assert service._build_suggest_scopes(PermissionContext(role="admin"), ["hanzi"]) == ["hanzi"]
+        assert service._build_suggest_scopes(PermissionContext(role="student"), ["course"]) == []
+        assert service._build_suggest_inputs("书法") == ["书法", "shufa", "sf"]
+
+    async def test_concurrent_prefixes_share_one_call_and_cache(self):
+        import asyncio
+        from unittest.mock import AsyncMock, patch
+        from app.schemas.search import PermissionContext
+
+        service = self._build_service()
+        ctx = PermissionContext(role="student", user_id="s1", student_user_id="s1", course_ids=["c1"])
+        with patch("app.services.cross_search_service.get_redis"), \
+                patch("app.services.cross_search_service.cache_get", AsyncMock(return_value=None)), \
+                patch("app.services.cross_search_service.cache_set", AsyncMock()) as mock_cache_set:
+            results = await asyncio.gather(*[
+                service.suggest(" ShuF ", current_user=None, permission_ctx=ctx) for _ in range(5)
+            ])
+
+        assert all(result == [{"module": "course", "id": "c1", "title": "书法入门"}] for result in results)
+        service.es.search.assert_awaited_once()
+        body = service.es.search.await_args.kwargs["body"]
+        assert body["suggest"]["title_suggest"]["prefix"] == "shuf"
+        assert "course|course:c1" in body["suggest"]["title_suggest"]["completion"]["contexts"]["scope"]
+        cache_key = mock_cache_set.await_args.args[1]
+        assert cache_key.endswith(ctx.fingerprint() + ":*:10:shuf")
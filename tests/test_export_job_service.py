@@ -0,0 +1,98 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import AsyncMock, patch
+
+os.environ.setdefault("MYSQL_HOST", "localhost")
+os.environ.setdefault("MYSQL_PORT", "3306")
+os.environ.setdefault("MYSQL_USER", "root")
+os.environ.setdefault("MYSQL_PASSWORD", "root")
+os.environ.setdefault("MYSQL_DB", "charwork")
+
+from app.services import export_job_service  # noqa: E402
+from app.services.export_job_service import ExportJobService  # noqa: E402
+from app.services.export_service import ExportWatermark  # noqa: E402
+from app.utils.export_artifacts import ExportArtifactStore  # noqa: E402
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+
+class TestExportJobService(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.watermark = AsyncMock(return_value=ExportWatermark(total=3, token="w1"))
+        self.artifact_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.artifact_dir.cleanup)
+        self.store = ExportArtifactStore(self.artifact_dir.name, ttl_seconds=60)
+        for target, value in (
+            ("get_redis", lambda: self.redis),
+            ("ExportService.data_watermark", self.watermark),
+        ):
+            patcher = patch(f"app.services.export_job_service.{target}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        task_patcher = patch.object(export_job_service, "run_export_job")
+        self.task = task_patcher.start()
+        self.addCleanup(task_patcher.stop)
+        self.service = ExportJobService(AsyncMock(), artifact_store=self.store)
+
+    async def test_identical_request_reuses_pending_job(self):
+        params = {"teacher_id": "t1", "export_format": "csv"}
+        first = await self.service.create_job("students", params, owner_user_id="u1")
+        second = await self.service.create_job("students", dict(reversed(params.items())), owner_user_id="u1")
+
+        self.assertFalse(first["reused"])
+        self.assertTrue(second["reused"])
+        self.assertEqual(second["job_id"], first["job_id"])
+        self.task.apply_async.assert_called_once_with(args=[first["job_id"]], task_id=first["job_id"])
+
+    async def test_changed_watermark_starts_new_job(self):
+        first = await self.service.create_job("assignments", {"teacher_id": "t1"}, owner_user_id="u1")
+        self.watermark.return_value = ExportWatermark(total=4, token="w2")
+        second = await self.service.create_job("assignments", {"teacher_id": "t1"}, owner_user_id="u1")
+
+        self.assertNotEqual(second["job_id"], first["job_id"])
+        self.assertEqual(self.task.apply_async.call_count, 2)
+
+    async def test_expired_artifact_is_not_reused_or_downloadable(self):
+        job = await self.service.create_job("submissions", {"assignment_id": "a1"}, owner_user_id="u1")
+        record = export_job_service._loads(self.redis.store[export_job_service._job_key(job["job_id"])])
+        record.update({"status": "done", "result": {"file_name": "s.csv", "media_type": "text/csv"}})
+        self.redis.store[export_job_service._job_key(job["job_id"])] = export_job_service.json.dumps(record)
+
+        async def chunks():
+            yield b"a,b\n"
+
+        await self.store.write_stream(job["job_id"], "s.csv", chunks())
+        path, _ = await self.service.resolve_artifact(job["job_id"], owner_user_id="u1")
+        self.assertTrue(os.path.isfile(path))
+        with self.assertRaises(LookupError):
+            await self.service.resolve_artifact(job["job_id"], owner_user_id="other")
+
+        self.assertEqual(self.store.cleanup_expired(now=time.time() + 120), 1)
+        again = await self.service.create_job("submissions", {"assignment_id": "a1"}, owner_user_id="u1")
+        self.assertFalse(again["reused"])
+        with self.assertRaises(LookupError):
+            await self.service.resolve_artifact(job["job_id"], owner_user_id="u1")
+
+
+if __name__ == "__main__":
+    unittest.main()
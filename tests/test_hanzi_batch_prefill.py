@@ -0,0 +1,81 @@
+import io
+import os
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from starlette.datastructures import UploadFile
+
+os.environ.setdefault("MYSQL_HOST", "localhost")
+os.environ.setdefault("MYSQL_PORT", "3306")
+os.environ.setdefault("MYSQL_USER", "root")
+os.environ.setdefault("MYSQL_PASSWORD", "root")
+os.environ.setdefault("MYSQL_DB", "charwork")
+
+from app.schemas.hanzi import HanziCreate, HanziOCRPrefillResponse  # noqa: E402
+from app.services.hanzi_service import HanziService  # noqa: E402
+
+
+class FakeOCR:
+    result_cache = None
+
+    def __init__(self):
+        self.recognized: list[str] = []
+
+    def ensure_recognize_config(self):
+        pass
+
+    async def upload_to_storage(self, image_path: str) -> str:
+        return image_path
+
+    async def sign_uri(self, uri: str) -> str:
+        return f"https://cdn/{uri}"
+
+    async def recognize_url(self, image_url: str, raise_on_rate_limit: bool = False) -> str:
+        path = image_url.removeprefix("https://cdn/")
+        self.recognized.append(path)
+        with open(path, "rb") as file:
+            return file.read().decode("utf-8")
+
+
+def _upload(name: str, content: str) -> UploadFile:
+    return UploadFile(io.BytesIO(content.encode("utf-8")), filename=name)
+
+
+class TestHanziBatchPrefill(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.ocr = FakeOCR()
+        with patch("app.services.hanzi_service.OCRService", return_value=self.ocr):
+            self.service = HanziService(AsyncMock())
+
+        async def build_prefill(character: str) -> HanziOCRPrefillResponse:
+            return HanziOCRPrefillResponse(recognized_text=character, draft=HanziCreate(character=character))
+
+        self.service._build_prefill_by_character = build_prefill
+
+    async def test_stream_dedups_identical_files_and_reports_failures(self):
+        uploads = await self.service.prepare_batch_prefill([
+            _upload("a.png", "永"), _upload("b.png", " "), _upload("c.png", "永"),
+        ])
+        self.assertEqual(uploads[0].sha256, uploads[2].sha256)
+        self.assertEqual(uploads[0].size, len("永".encode("utf-8")))
+
+        events = [chunk async for chunk in self.service.stream_batch_prefill(uploads)]
+
+        self.assertEqual(len(self.ocr.recognized), 2)
+        self.assertEqual(sum(chunk.startswith("event: item") for chunk in events), 2)
+        self.assertEqual(sum(chunk.startswith("event: error") for chunk in events), 1)
+        self.assertIn('"succeeded": 2', events[-1])
+        self.assertFalse(any(os.path.exists(upload.path) for upload in uploads))
+
+    async def test_batch_response_keeps_upload_order(self):
+        response = await self.service.build_batch_prefill_by_uploads([
+            _upload("a.png", "永"), _upload("b.png", "和"),
+        ])
+
+        self.assertEqual([item.file_name for item in response.items], ["a.png", "b.png"])
+        self.assertEqual([item.recognized_text for item in response.items], ["永", "和"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import os
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+os.environ.setdefault("MYSQL_HOST", "localhost")
+os.environ.setdefault("MYSQL_PORT", "3306")
+os.environ.setdefault("MYSQL_USER", "root")
+os.environ.setdefault("MYSQL_PASSWORD", "root")
+os.environ.setdefault("MYSQL_DB", "charwork")
+
+import pandas as pd  # noqa: E402
+
+from app.services.hanzi_dictionary_service import HanziDictionaryService  # noqa: E402
+from app.utils.hanzi_dictionary_parser import build_dictionary_content_hashes  # noqa: E402
+
+
+def _stroke_frame() -> pd.DataFrame:
+    frame = pd.DataFrame(
+        [
+            ["一", "一", 1, "横", "yi"],
+            ["十", "十", 2, "横,竖", "shi"],
+            ["中", "丨", 4, "竖,横折,横,竖", "zhong"],
+        ],
+        columns=["character", "radical", "stroke_count", "stroke_pattern", "pinyin"],
+        dtype=object,
+    )
+    frame.attrs["source_digest"] = "digest-1"
+    return frame
+
+
+class TestHanziDictionaryInit(unittest.IsolatedAsyncioTestCase):
+
+    def _build_service(self) -> HanziDictionaryService:
+        with patch("app.services.hanzi_dictionary_service.HanziDictionarySearchService"):
+            service = HanziDictionaryService(AsyncMock())
+        service.repo = MagicMock()
+        service.repo.count_all = AsyncMock(return_value=3)
+        service.repo.list_content_hashes = AsyncMock()
+        service.repo.apply_delta = AsyncMock(side_effect=lambda inserts, updates, delete_ids, batch_size: delete_ids)
+        service.search_service = MagicMock()
+        service.search_service.sync_changed_entries = AsyncMock()
+        service.search_service.ensure_index_with_bootstrap = AsyncMock()
+        service.parse_strokes_file = MagicMock(return_value=_stroke_frame())
+        return service
+
+    def test_diff_detects_inserts_updates_and_removals(self):
+        frame = _stroke_frame()
+        hashes = build_dictionary_content_hashes(frame)
+        existing = {
+            "一": ("d1", hashes[0], "strokes_txt"),
+            "十": ("d2", "stale-hash", "strokes_txt"),
+            "丁": ("d3", "x", "strokes_txt"),
+            "口": ("d4", None, "manual"),
+        }
+
+        inserts, updates, delete_ids = HanziDictionaryService._diff_dictionary_rows(frame, existing)
+
+        self.assertEqual([row["character"] for row in inserts], ["中"])
+        self.assertEqual(inserts[0]["content_hash"], hashes[2])
+        self.assertEqual(updates, [{
+            "id": "d2",
+            "radical": "十",
+            "stroke_count": 2,
+            "stroke_pattern": "横,竖",
+            "pinyin": "shi",
+            "content_hash": hashes[1],
+        }])
+        self.assertEqual(delete_ids, ["d3"])
+
+    async def test_pushes_only_changed_entries(self):
+        service = self._build_service()
+        hashes = build_dictionary_content_hashes(_stroke_frame())
+        service.repo.list_content_hashes.return_value = {
+            "一": ("d1", hashes[0], "strokes_txt"),
+            "十": ("d2", "stale-hash", "strokes_txt"),
+            "中": ("d3", hashes[2], "strokes_txt"),
+            "丁": ("d4", "x", "strokes_txt"),
+        }
+        with patch("app.services.hanzi_dictionary_service.cache_get", AsyncMock(return_value=None)), \
+                patch("app.services.hanzi_dictionary_service.cache_set", AsyncMock()) as mock_cache_set:
+            result = await service.initialize_from_strokes("Strokes.txt")
+
+        self.assertEqual((result.total, result.created, result.updated, result.deleted), (3, 0, 1, 1))
+        service.search_service.sync_changed_entries.assert_awaited_once_with({"d2": "update", "d4": "delete"})
+        mock_cache_set.assert_awaited_once()
+
+    async def test_unchanged_source_is_noop(self):
+        service = self._build_service()
+        marker = service._build_source_marker(_stroke_frame())
+        with patch("app.services.hanzi_dictionary_service.cache_get", AsyncMock(return_value=marker)):
+            result = await service.initialize_from_strokes("Strokes.txt")
+
+        self.assertEqual((result.created, result.updated, result.deleted), (0, 0, 0))
+        service.repo.list_content_hashes.assert_not_called()
+        service.repo.apply_delta.assert_not_called()
+        service.search_service.sync_changed_entries.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,7 +15,7 @@ SEARCH_READY = True
 
 try:
     from app.services.hanzi_dictionary_search_service import HanziDictionarySearchService
-    from app.utils.hanzi_dictionary_parser import encode_stroke_unit_key
+    from app.utils.hanzi_dictionary_parser import build_stroke_unit_token, normalize_pinyin_search_key
 except ModuleNotFoundError:
     SEARCH_READY = False
 
@@ -41,6 +41,21 @@ class FakeIndices:
     async def refresh(self, index: str):
         self.refreshed.append(index)
 
+    async def put_settings(self, index: str, settings: dict):
+        return None
+
+    async def exists_alias(self, name: str):
+        return False
+
+    async def get_alias(self, name: str | None = None, index: str | None = None):
+        return {}
+
+    async def update_aliases(self, actions: list[dict]):
+        return None
+
+    async def put_mapping(self, index: str, meta: dict):
+        return None
+
 
 class FakeES:
     def __init__(self):
@@ -89,19 +104,24 @@ if SEARCH_READY:
                 skip=20,
                 limit=10,
                 character="中",
-                pinyin=" zhong ",
+                pinyin=" Zhōng ",
                 stroke_count=5,
                 stroke_pattern="横,横,撇",
                 keyword="zhong",
+                radical="丨",
             )
 
-            self.assertEqual(result, {"ids": ["dict-1"], "total": 1})
+            self.assertEqual(result, {"ids": ["dict-1"], "total": 1, "items": [{"dictionary_id": "dict-1"}]})
             body = fake_es.search_calls[0][1]
             filters = body["query"]["bool"]["filter"]
+            self.assertIn({"term": {"character": "中"}}, filters)
+            self.assertIn({"term": {"radical": "丨"}}, filters)
+            self.assertIn({"match": {"pinyin_normalized.prefix": {"query": "zhong"}}}, filters)
+            self.assertFalse(any("wildcard" in str(item) for item in filters))
             self.assertIn({"term": {"stroke_count": 5}}, filters)
-            self.assertIn({"term": {"stroke_units": "横"}}, filters)
-            self.assertIn({"term": {"stroke_units": "撇"}}, filters)
-            self.assertTrue(any("script" in item for item in filters))
+            self.assertIn({"term": {"stroke_unit_tokens": build_stroke_unit_token("横", 2)}}, filters)
+            self.assertIn({"term": {"stroke_unit_tokens": build_stroke_unit_token("撇", 1)}}, filters)
+            self.assertFalse(any("script" in item for item in filters))
             self.assertEqual(body["from"], 20)
             self.assertEqual(body["size"], 10)
 
@@ -113,7 +133,8 @@ if SEARCH_READY:
             item = SimpleNamespace(
                 id="dict-1",
                 character="文",
-                pinyin="wen",
+                radical="文",
+                pinyin="wén",
                 stroke_count=3,
                 stroke_pattern="撇,横,横",
                 source="strokes_txt",
@@ -122,19 +143,23 @@ if SEARCH_READY:
 
             document = service._build_document(item)
 
+            self.assertEqual(document["radical"], "文")
+            self.assertEqual(document["pinyin_normalized"], "wen")
             self.assertEqual(document["stroke_units"], ["撇", "横", "横"])
             self.assertEqual(
-                document["stroke_unit_counts"],
-                {
-                    encode_stroke_unit_key("撇"): 1,
-                    encode_stroke_unit_key("横"): 2,
-                },
+                document["stroke_unit_tokens"],
+                [
+                    build_stroke_unit_token("撇", 1),
+                    build_stroke_unit_token("横", 1),
+                    build_stroke_unit_token("横", 2),
+                ],
             )
 
         async def test_reindex_returns_reindex_response(self):
             from app.schemas.search import ReindexResponse
             from unittest.mock import MagicMock
             fake_es = FakeES()
+            fake_es.count_response = {"count": 0}
             with patch(_ES_CLIENT_PATCH, return_value=fake_es):
                 service = HanziDictionarySearchService(AsyncMock())
                 # execute() 是 async，返回值是同步的 result 对象
@@ -144,6 +169,13 @@ if SEARCH_READY:
                 with patch("app.services.base_search_service.async_bulk", return_value=(0, [])):
                     result = await service.reindex()
             self.assertIsInstance(result, ReindexResponse)
+
+        def test_pinyin_search_key_strips_tones_and_umlaut(self):
+            self.assertEqual(normalize_pinyin_search_key(" Zhōng "), "zhong")
+            self.assertEqual(normalize_pinyin_search_key("zhong1"), "zhong")
+            self.assertEqual(normalize_pinyin_search_key("lǜ"), "lv")
+            self.assertEqual(normalize_pinyin_search_key("nu:3"), "nv")
+            self.assertEqual(normalize_pinyin_search_key(None), "")
 else:
     @unittest.skip("当前环境缺少共享字典 ES 检索依赖")
     class HanziDictionarySearchServiceTests(unittest.TestCase):
@@ -0,0 +1,108 @@
+import io
+import os
+import tempfile
+import unittest
+
+from PIL import Image
+
+os.environ.setdefault("MYSQL_HOST", "localhost")
+os.environ.setdefault("MYSQL_PORT", "3306")
+os.environ.setdefault("MYSQL_USER", "root")
+os.environ.setdefault("MYSQL_PASSWORD", "root")
+os.environ.setdefault("MYSQL_DB", "charwork")
+
+from app.services.ocr_grid_batcher import GridOCRBatcher  # noqa: E402
+from app.services.ocr_service import OCRRateLimitError  # noqa: E402
+from app.utils.image_utils import plan_grid  # noqa: E402
+from app.utils.rate_limiter import TokenBucket  # noqa: E402
+
+
+class FakeRecognizer:
+    """按灰度值识别格子：每个非白色格子返回一个字，坐标取格子中心；指定灰度的格子只在单独识别时成功。"""
+
+    def __init__(self, shy_colors=(), rate_limited_calls=0):
+        self.calls: list[int] = []
+        self.shy_colors = set(shy_colors)
+        self.rate_limited_calls = rate_limited_calls
+
+    async def recognize_located(self, image: bytes):
+        if self.rate_limited_calls:
+            self.rate_limited_calls -= 1
+            raise OCRRateLimitError("qps")
+        canvas = Image.open(io.BytesIO(image)).convert("L")
+        located = []
+        cells = 0
+        # 网格中每个格子都被缩放到 96px，格子中心在 gutter + col * pitch + 48
+        gutter, pitch = 12, 108
+        for row in range((canvas.height - gutter) // pitch):
+            for col in range((canvas.width - gutter) // pitch):
+                x, y = gutter + col * pitch + 48, gutter + row * pitch + 48
+                value = canvas.getpixel((x, y))
+                if value > 240:
+                    continue
+                cells += 1
+                located.append((chr(0x4E00 + round(value / 10)), x + 5, y - 5))
+        self.calls.append(cells)
+        if cells > 1:
+            located = [item for item in located if item[0] not in self.shy_colors]
+        return located
+
+
+class TestGridOCRBatcher(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _images(self, count: int) -> list[str]:
+        paths = []
+        for index in range(count):
+            path = os.path.join(self.tmp.name, f"{index}.png")
+            Image.new("RGB", (60, 80), (index * 10,) * 3).save(path)
+            paths.append(path)
+        return paths
+
+    def _batcher(self, recognizer) -> GridOCRBatcher:
+        async def no_sleep(_seconds):
+            pass
+
+        return GridOCRBatcher(recognizer, concurrency=2, rate_limiter=TokenBucket(1000), sleep=no_sleep)
+
+    def test_plan_respects_side_and_payload_limits(self):
+        plan = plan_grid([(60, 80)] * 10, max_side=1024, max_cells=64, max_payload_bytes=10 ** 7,
+                         min_cell=96, max_cell=320)
+        self.assertEqual((plan.cell, plan.gutter), (96, 12))
+        self.assertEqual((plan.cols, plan.rows), (8, 8))
+        self.assertLessEqual(max(plan.size), 1024)
+
+        small = plan_grid([(60, 80)], max_side=1024, max_cells=64, max_payload_bytes=50_000,
+                          min_cell=96, max_cell=320)
+        self.assertLess(small.capacity, 16)
+        self.assertEqual(small.cell_at(*small.cell_origin(small.cols + 1)), small.cols + 1)
+
+    async def test_results_map_to_cells_by_coordinates(self):
+        paths = self._images(12)
+        recognizer = FakeRecognizer(rate_limited_calls=1)
+        progress = []
+
+        results = await self._batcher(recognizer).recognize(paths, on_progress=progress.append)
+
+        self.assertEqual(results, [chr(0x4E00 + index) for index in range(12)])
+        self.assertEqual(recognizer.calls, [12])
+        self.assertEqual(progress[-1], 12)
+
+    async def test_failed_cells_are_resplit_and_retried(self):
+        paths = self._images(12) + [os.path.join(self.tmp.name, "missing.png")]
+        recognizer = FakeRecognizer(shy_colors={chr(0x4E00 + 3), chr(0x4E00 + 7)})
+
+        results = await self._batcher(recognizer).recognize(paths)
+
+        self.assertEqual(results[:12], [chr(0x4E00 + index) for index in range(12)])
+        self.assertEqual(results[12], "")
+        # 首轮整批识别，第二轮两个失败格合并为一个小网格仍失败，最后逐张识别
+        self.assertEqual(recognizer.calls[0], 12)
+        self.assertEqual(sorted(recognizer.calls[-2:]), [1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
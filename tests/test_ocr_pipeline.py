@@ -0,0 +1,230 @@
+import asyncio
+import json
+import os
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import httpx
+
+os.environ.setdefault("MYSQL_HOST", "localhost")
+os.environ.setdefault("MYSQL_PORT", "3306")
+os.environ.setdefault("MYSQL_USER", "root")
+os.environ.setdefault("MYSQL_PASSWORD", "root")
+os.environ.setdefault("MYSQL_DB", "charwork")
+
+from app.services import ocr_client  # noqa: E402
+from app.services.ocr_client import BaiduOCRClient, run_with_ocr_clients  # noqa: E402
+from app.services.ocr_pipeline import OCRPipeline, OCRPipelineConfig  # noqa: E402
+from app.services.ocr_service import OCRRateLimitError, OCRService  # noqa: E402
+from app.utils.rate_limiter import TokenBucket  # noqa: E402
+
+
+def _config(**overrides) -> OCRPipelineConfig:
+    values = dict(
+        upload_concurrency=2, sign_concurrency=2, recognize_concurrency=2, qps=1000.0,
+        max_attempts=3, backoff_seconds=0.01, backoff_max_seconds=0.01,
+    )
+    values.update(overrides)
+    return OCRPipelineConfig(**values)
+
+
+class FakeStages:
+    def __init__(self):
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.recognize_failures: dict[str, list[Exception]] = {}
+
+    async def upload_to_storage(self, image_path: str) -> str:
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        # 文件名越靠前越慢，完成顺序与输入顺序相反
+        await asyncio.sleep(0.001 * (10 - int(image_path[-1])))
+        self.in_flight -= 1
+        if image_path.endswith("9"):
+            raise ValueError("图片文件不存在")
+        return f"uri/{image_path}"
+
+    async def sign_uri(self, uri: str) -> str:
+        return f"https://cdn/{uri}"
+
+    async def recognize_url(self, image_url: str, raise_on_rate_limit: bool = False) -> str:
+        failures = self.recognize_failures.get(image_url)
+        if failures:
+            raise failures.pop(0)
+        return image_url[-1]
+
+
+class TestOCRPipeline(unittest.IsolatedAsyncioTestCase):
+
+    async def test_results_keep_input_order_and_failures_are_isolated(self):
+        stages = FakeStages()
+        stages.recognize_failures["https://cdn/uri/img1"] = [OCRRateLimitError("qps"), ConnectionError("reset")]
+        stages.recognize_failures["https://cdn/uri/img2"] = [ConnectionError("reset")] * 3
+        completed = []
+
+        async def on_result(result):
+            completed.append(result.index)
+
+        paths = [f"img{i}" for i in range(10)]
+        results = await OCRPipeline(stages, _config()).run(paths, on_result=on_result)
+
+        self.assertEqual([result.image_path for result in results], paths)
+        self.assertEqual(results[1].characters, "1")
+        self.assertFalse(results[2].ok)
+        self.assertEqual(results[9].error, "图片文件不存在")
+        self.assertEqual(sorted(completed), list(range(10)))
+        self.assertNotEqual(completed, list(range(10)))
+        self.assertLessEqual(stages.max_in_flight, 2)
+
+    async def test_token_bucket_spaces_calls_by_rate(self):
+        now = [0.0]
+        waits = []
+
+        async def fake_sleep(seconds):
+            waits.append(seconds)
+            now[0] += seconds
+
+        bucket = TokenBucket(rate=2, clock=lambda: now[0], sleep=fake_sleep)
+        for _ in range(5):
+            await bucket.acquire()
+
+        # 前两枚来自初始容量，之后每 0.5 秒一枚
+        self.assertAlmostEqual(now[0], 1.5)
+        self.assertEqual(len(waits), 3)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.store:
+            return None
+        self.store[key] = value
+        return True
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.store.pop(key, None)
+
+
+class _FakeBaiduHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        if self.path.startswith("/oauth/2.0/token"):
+            body = {"access_token": "token", "expires_in": 3600}
+        else:
+            body = {"words_result": [{"words": "永"}]}
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestOCRServiceAgainstFakeServer(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeBaiduHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        overrides = {
+            "BAIDU_OCR_BASE_URL": f"http://127.0.0.1:{self.server.server_port}",
+            "BAIDU_API_KEY": "ak",
+            "BAIDU_SECRET_KEY": "sk",
+            "VOLCENGINE_ACCESS_KEY_ID": "",
+            "VOLCENGINE_SECRET_ACCESS_KEY": "",
+            "VOLCENGINE_SERVICE_ID": "",
+        }
+        for name, value in overrides.items():
+            patcher = patch(f"app.services.ocr_service.settings.{name}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        redis_patcher = patch("app.services.ocr_client.get_redis", return_value=FakeRedis())
+        redis_patcher.start()
+        self.addCleanup(redis_patcher.stop)
+
+    async def test_pipeline_recognizes_remote_urls_through_fake_provider(self):
+        pipeline = OCRPipeline(OCRService(), _config())
+        results = await pipeline.run(["https://cdn/a.png", "https://cdn/b.png"])
+
+        self.assertEqual([result.characters for result in results], ["永", "永"])
+
+
+class TestBaiduOCRClient(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = patch("app.services.ocr_client.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.token_requests = 0
+        self.ocr_tokens: list[str] = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/oauth/2.0/token":
+                self.token_requests += 1
+                await asyncio.sleep(0.01)
+                return httpx.Response(200, json={"access_token": f"t{self.token_requests}", "expires_in": 3600})
+            token = request.url.params["access_token"]
+            self.ocr_tokens.append(token)
+            if token == "stale":
+                return httpx.Response(200, json={"error_code": 111, "error_msg": "Access token expired"})
+            return httpx.Response(200, json={"words_result": [{"words": "永"}]})
+
+        self.transport = httpx.MockTransport(handler)
+
+    def _client(self) -> BaiduOCRClient:
+        return BaiduOCRClient("ak", "sk", "http://baidu.test", transport=self.transport)
+
+    async def test_token_fetched_once_and_shared_between_clients(self):
+        first, second = self._client(), self._client()
+        await asyncio.gather(*(first.handwriting(f"https://cdn/{i}") for i in range(5)))
+        await second.handwriting("https://cdn/x")
+
+        self.assertEqual(self.token_requests, 1)
+        self.assertEqual(set(self.ocr_tokens), {"t1"})
+
+    async def test_expired_token_is_refreshed_once(self):
+        client = self._client()
+        client._token, client._token_expires_at = "stale", time.time() + 3600
+
+        result = await client.handwriting("https://cdn/a")
+
+        self.assertEqual(result["words_result"][0]["words"], "永")
+        self.assertEqual(self.ocr_tokens, ["stale", "t1"])
+
+
+class TestRunWithOCRClients(unittest.TestCase):
+
+    def test_pool_closed_inside_each_event_loop(self):
+        transport = httpx.MockTransport(lambda request: httpx.Response(200, json={}))
+        client = BaiduOCRClient("ak", "sk", "http://baidu.test", transport=transport)
+        pools: list[httpx.AsyncClient] = []
+
+        async def use_client():
+            pools.append(client._http_client())
+
+        with patch.object(ocr_client, "_baidu_client", client):
+            # 模拟 Celery 连续两次任务，每次都是新的事件循环
+            run_with_ocr_clients(use_client())
+            run_with_ocr_clients(use_client())
+
+        self.assertEqual(len(pools), 2)
+        self.assertIsNot(pools[0], pools[1])
+        self.assertTrue(all(pool.is_closed for pool in pools))
+        self.assertIsNone(client._client)
+
+
+if __name__ == "__main__":
+    unittest.main()
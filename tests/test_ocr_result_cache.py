@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, patch
+
+from PIL import Image
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+os.environ.setdefault("MYSQL_HOST", "localhost")
+os.environ.setdefault("MYSQL_PORT", "3306")
+os.environ.setdefault("MYSQL_USER", "root")
+os.environ.setdefault("MYSQL_PASSWORD", "root")
+os.environ.setdefault("MYSQL_DB", "charwork")
+
+from app.models.ocr_result_cache import OCRResultCacheEntry  # noqa: E402
+from app.services.ocr_cache_service import (  # noqa: E402
+    OCR_MODE_GRID,
+    OCR_MODE_HANDWRITING,
+    OCRResultCache,
+    compute_image_digest,
+)
+from app.services.ocr_service import OCRService  # noqa: E402
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store: dict[str, str] = {}
+
+    async def mget(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    async def set(self, key, value, ex=None, nx=False):
+        self.store[key] = value
+        return True
+
+
+class TestOCRResultCache(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(OCRResultCacheEntry.__table__.create)
+        self.session_factory = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.redis = FakeRedis()
+        patcher = patch("app.services.ocr_cache_service.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    def _image(self, name: str, color: int) -> str:
+        path = os.path.join(self.tmp.name, name)
+        Image.new("RGB", (8, 8), (color, color, color)).save(path)
+        return path
+
+    def test_digest_ignores_container_format(self):
+        self.assertEqual(
+            compute_image_digest(self._image("a.png", 10)),
+            compute_image_digest(self._image("a.bmp", 10)),
+        )
+        self.assertNotEqual(
+            compute_image_digest(self._image("a.png", 10)),
+            compute_image_digest(self._image("b.png", 20)),
+        )
+
+    async def test_cold_tier_hit_backfills_redis(self):
+        cache = OCRResultCache(session_factory=self.session_factory)
+        digest = await cache.digest(self._image("a.png", 10))
+        await cache.set(digest, OCR_MODE_HANDWRITING, ["永", "和"])
+        await cache.set(digest, OCR_MODE_GRID, "")
+        self.redis.store.clear()
+
+        result = await cache.get(digest, (OCR_MODE_GRID, OCR_MODE_HANDWRITING))
+
+        self.assertEqual(result, ["永", "和"])
+        self.assertEqual(
+            json.loads(self.redis.store[f"ocr:result:{OCR_MODE_HANDWRITING}:{digest}"]), ["永", "和"],
+        )
+        self.assertIsNone(await cache.digest("https://cdn/a.png"))
+
+    async def test_batch_recognize_only_merges_uncached_images(self):
+        service = OCRService.__new__(OCRService)
+        service.result_cache = OCRResultCache(session_factory=self.session_factory)
+        service.ensure_recognize_config = lambda: None
+        paths = [self._image("a.png", 10), self._image("b.png", 20), self._image("c.png", 30)]
+        await service.result_cache.set(await service.result_cache.digest(paths[0]), OCR_MODE_HANDWRITING, "永")
+
+        recognize = AsyncMock(return_value=["和", "平"])
+        with patch("app.services.ocr_grid_batcher.GridOCRBatcher.recognize", recognize):
+            result = await service.batch_recognize(paths)
+            self.assertEqual(recognize.await_args.args[0], paths[1:])
+            self.assertEqual(result["character"], ["永", "和", "平"])
+
+            # 第二次全部命中，不再合并与识别
+            again = await service.batch_recognize(paths)
+            self.assertEqual(again["results"], ["永", "和", "平"])
+        self.assertEqual(recognize.await_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
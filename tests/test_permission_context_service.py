@@ -0,0 +1,91 @@
+import os
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+os.environ.setdefault("MYSQL_HOST", "localhost")
+os.environ.setdefault("MYSQL_PORT", "3306")
+os.environ.setdefault("MYSQL_USER", "root")
+os.environ.setdefault("MYSQL_PASSWORD", "root")
+os.environ.setdefault("MYSQL_DB", "charwork")
+
+from app.models.user import UserRole  # noqa: E402
+from app.services.permission_context_service import PermissionContextService  # noqa: E402
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store: dict[str, str] = {}
+
+    async def mget(self, *keys):
+        return [self.store.get(key) for key in keys]
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+    async def incr(self, key):
+        self.store[key] = str(int(self.store.get(key) or 0) + 1)
+        return int(self.store[key])
+
+    async def expire(self, key, ttl):
+        return True
+
+    async def delete(self, key):
+        self.store.pop(key, None)
+
+
+class TestPermissionContextService(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        patcher = patch("app.services.permission_context_service.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.student_user = MagicMock(id="u1", role=UserRole.STUDENT)
+
+    def _build_service(self, course_ids: list[str]) -> PermissionContextService:
+        service = PermissionContextService(AsyncMock())
+        service._load_student_context = AsyncMock(side_effect=lambda user_id: self._context(user_id, course_ids))
+        return service
+
+    @staticmethod
+    def _context(user_id, course_ids):
+        from app.schemas.search import PermissionContext
+        return PermissionContext(role="student", user_id=user_id, student_user_id=user_id, course_ids=course_ids)
+
+    async def test_student_context_served_from_cache(self):
+        service = self._build_service(["c1"])
+        first = await service.get_context(self.student_user)
+        second = await service.get_context(self.student_user)
+
+        self.assertEqual(second, first)
+        self.assertEqual(second.fingerprint(), first.fingerprint())
+        service._load_student_context.assert_awaited_once()
+
+    async def test_invalidation_beats_stale_write_back(self):
+        service = self._build_service(["c1"])
+        await service.get_context(self.student_user)
+        cached_before = dict(self.redis.store)
+
+        await service.invalidate_users(["u1"])
+        # 模拟失效前已开始加载的请求把旧结果写回
+        self.redis.store.update({key: value for key, value in cached_before.items() if "ver" not in key})
+        service._load_student_context.side_effect = lambda user_id: self._context(user_id, ["c1", "c2"])
+        refreshed = await service.get_context(self.student_user)
+
+        self.assertEqual(refreshed.course_ids, ["c1", "c2"])
+        self.assertEqual(service._load_student_context.await_count, 2)
+
+    async def test_teacher_skips_cache_and_db(self):
+        service = self._build_service([])
+        context = await service.get_context(MagicMock(id="t1", role=UserRole.TEACHER))
+
+        self.assertEqual((context.role, context.user_id), ("teacher", "t1"))
+        self.assertEqual(self.redis.store, {})
+        service._load_student_context.assert_not_awaited()
+
+
+if __name__ == "__main__":
+    unittest.main()
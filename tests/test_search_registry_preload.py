@@ -19,6 +19,26 @@ class TestPreloadFunctions(unittest.IsolatedAsyncioTestCase):
         result = await _preload_teacher_user_ids(mock_db)
         self.assertEqual(result, {"t1": "u1", "t2": "u2"})
 
+    async def test_preload_teacher_user_ids_scoped_to_batch(self):
+        mock_db = AsyncMock()
+        result = await _preload_teacher_user_ids(mock_db, [None, ""])
+        self.assertEqual(result, {})
+        mock_db.execute.assert_not_called()
+
+    async def test_preload_teacher_context_uses_batch_teacher_ids(self):
+        from types import SimpleNamespace
+        from app.services.search_registry import _preload_teacher_context
+
+        mock_db = AsyncMock()
+        mock_result = MagicMock()
+        mock_result.all.return_value = [("t1", "u1")]
+        mock_db.execute.return_value = mock_result
+        items = [SimpleNamespace(teacher_id="t1"), SimpleNamespace(teacher_id="t1")]
+        result = await _preload_teacher_context(mock_db, items)
+        self.assertEqual(result, {"teacher_user_ids": {"t1": "u1"}})
+        statement = mock_db.execute.call_args[0][0]
+        self.assertIn("IN", str(statement))
+
     async def test_preload_student_teacher_user_ids(self):
         mock_db = AsyncMock()
         mock_result = MagicMock()
@@ -28,6 +48,31 @@ class TestPreloadFunctions(unittest.IsolatedAsyncioTestCase):
         self.assertEqual(result, {"s1": ["u1", "u2"], "s2": ["u3"]})
 
 
+class TestIterKeysetBatches(unittest.IsolatedAsyncioTestCase):
+
+    async def test_pages_until_short_batch(self):
+        from types import SimpleNamespace
+        from app.models.hanzi import Hanzi
+        from sqlalchemy import select
+        from app.utils.pagination import iter_keyset_batches
+
+        pages = [
+            [SimpleNamespace(id="a"), SimpleNamespace(id="b")],
+            [SimpleNamespace(id="c")],
+        ]
+        mock_db = AsyncMock()
+        results = []
+        for page in pages:
+            result = MagicMock()
+            result.scalars.return_value.all.return_value = page
+            results.append(result)
+        mock_db.execute.side_effect = results
+        batches = [batch async for batch in iter_keyset_batches(mock_db, select(Hanzi), Hanzi.id, 2)]
+        self.assertEqual([[item.id for item in batch] for batch in batches], [["a", "b"], ["c"]])
+        second_query = mock_db.execute.call_args_list[1][0][0]
+        self.assertIn("hanzi.id >", str(second_query))
+
+
 class TestBuildDocumentWithContext(unittest.IsolatedAsyncioTestCase):
 
     async def test_build_assignment_document_uses_context(self):
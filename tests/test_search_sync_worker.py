@@ -0,0 +1,122 @@
+import json
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from app.services.search_sync_worker import SearchSyncWorker
+
+
+class FakeMessage:
+    def __init__(self, payload, attempts=None):
+        self.body = json.dumps(payload).encode("utf-8")
+        self.headers = {} if attempts is None else {"x-search-sync-attempts": attempts}
+        self.content_type = "application/json"
+        self.ack = AsyncMock()
+        self.nack = AsyncMock()
+
+
+class FakeChannel:
+    def __init__(self):
+        self.default_exchange = SimpleNamespace(publish=AsyncMock())
+
+
+def _canal_payload(table: str, operation: str, *ids: str) -> dict:
+    return {
+        "database": "charwork",
+        "table": table,
+        "type": operation.upper(),
+        "isDdl": False,
+        "data": [{"id": item_id} for item_id in ids],
+    }
+
+
+class TestSearchSyncWorker(unittest.IsolatedAsyncioTestCase):
+
+    def _build_worker(self) -> SearchSyncWorker:
+        with patch("app.services.search_sync_worker.settings") as mock_settings:
+            mock_settings.SEARCH_SYNC_CANAL_SCHEMA = "charwork"
+            mock_settings.SEARCH_SYNC_RABBITMQ_PREFETCH = 50
+            mock_settings.SEARCH_SYNC_BATCH_SIZE = 3
+            mock_settings.SEARCH_SYNC_BATCH_MAX_WAIT_MS = 10000
+            mock_settings.SEARCH_SYNC_MAX_ATTEMPTS = 3
+            with patch(
+                "app.services.search_sync_worker.get_configured_search_sync_tables",
+                return_value={"hanzi", "hanzi_dictionary", "course"},
+            ):
+                with patch(
+                    "app.services.search_sync_worker.get_enabled_search_module_configs",
+                    return_value={"hanzi": object(), "course": object()},
+                ):
+                    worker = SearchSyncWorker()
+        worker._apply_changes = AsyncMock(return_value=set())
+        return worker
+
+    async def test_coalesces_changes_and_acks_after_flush(self):
+        worker = self._build_worker()
+        first = FakeMessage(_canal_payload("hanzi", "update", "h1"))
+        second = FakeMessage(_canal_payload("hanzi", "delete", "h1"))
+        await worker._on_message(first)
+        await worker._on_message(second)
+        first.ack.assert_not_called()
+
+        third = FakeMessage([
+            _canal_payload("course", "insert", "c1"),
+            _canal_payload("hanzi_dictionary", "update", "d1"),
+        ])
+        await worker._on_message(third)
+
+        worker._apply_changes.assert_called_once_with({
+            ("hanzi", "h1"): "delete",
+            ("course", "c1"): "insert",
+            ("hanzi_dictionary", "d1"): "update",
+        })
+        for message in (first, second, third):
+            message.ack.assert_called_once()
+        self.assertIsNone(worker._flush_task)
+
+    async def test_failed_bulk_requeues_batch(self):
+        worker = self._build_worker()
+        worker._apply_changes.side_effect = RuntimeError("es down")
+        message = FakeMessage(_canal_payload("hanzi", "update", "h1", "h2", "h3"))
+        with patch("app.services.search_sync_worker.RETRY_BACKOFF_SECONDS", 0):
+            await worker._on_message(message)
+        message.ack.assert_not_called()
+        message.nack.assert_called_once_with(requeue=True)
+
+    async def test_item_failures_republish_only_affected_messages(self):
+        worker = self._build_worker()
+        worker._channel = FakeChannel()
+        worker._apply_changes.return_value = {("hanzi", "h2")}
+        ok = FakeMessage(_canal_payload("hanzi", "update", "h1"))
+        rejected = FakeMessage(_canal_payload("hanzi", "update", "h2"), attempts=1)
+        await worker._on_message(ok)
+        with patch("app.services.search_sync_worker.RETRY_BACKOFF_SECONDS", 0):
+            await worker._on_message(rejected)
+            await worker._on_message(FakeMessage(_canal_payload("course", "update", "c1")))
+
+        ok.ack.assert_called_once()
+        rejected.ack.assert_called_once()
+        published = worker._channel.default_exchange.publish.call_args
+        self.assertEqual(published.args[0].body, rejected.body)
+        self.assertEqual(published.args[0].headers["x-search-sync-attempts"], 2)
+
+    async def test_message_dead_lettered_after_max_attempts(self):
+        worker = self._build_worker()
+        worker._channel = FakeChannel()
+        worker._apply_changes.side_effect = RuntimeError("bad row")
+        message = FakeMessage(_canal_payload("hanzi", "update", "h1", "h2", "h3"), attempts=2)
+        await worker._on_message(message)
+        message.nack.assert_called_once_with(requeue=False)
+        worker._channel.default_exchange.publish.assert_not_called()
+
+    async def test_irrelevant_message_acked_immediately(self):
+        worker = self._build_worker()
+        message = FakeMessage(_canal_payload("user", "update", "u1"))
+        await worker._on_message(message)
+        message.ack.assert_called_once()
+        worker._apply_changes.assert_not_called()
+        self.assertIsNone(worker._flush_task)
+
+
+if __name__ == "__main__":
+    unittest.main()
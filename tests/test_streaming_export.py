@@ -0,0 +1,74 @@
+import io
+import os
+import unittest
+import zipfile
+from datetime import datetime
+
+from openpyxl import load_workbook
+
+from app.utils import streaming_export
+from app.utils.streaming_export import build_export_stream
+from app.utils.zip_stream import ZipStreamWriter
+
+
+async def _rows(count: int):
+    for index in range(count):
+        yield [f"字{index}", index, datetime(2024, 1, 2, 3, 4, 5)]
+
+
+class TestStreamingExport(unittest.IsolatedAsyncioTestCase):
+
+    async def test_csv_streams_in_bounded_chunks(self):
+        original_chunk_size = streaming_export.EXPORT_CHUNK_SIZE
+        streaming_export.EXPORT_CHUNK_SIZE = 64
+        self.addCleanup(setattr, streaming_export, "EXPORT_CHUNK_SIZE", original_chunk_size)
+        stream = build_export_stream("hanzi_export", ["汉字", "序号", "时间"], _rows(20), "csv")
+
+        chunks = [chunk async for chunk in stream.chunks]
+
+        self.assertTrue(stream.file_name.endswith(".csv"))
+        self.assertGreater(len(chunks), 2)
+        lines = b"".join(chunks).decode("utf-8-sig").splitlines()
+        self.assertEqual(lines[0], "汉字,序号,时间")
+        self.assertEqual(lines[1], "字0,0,2024-01-02 03:04:05")
+        self.assertEqual(len(lines), 21)
+
+    async def test_xlsx_round_trip(self):
+        stream = build_export_stream("students", ["汉字", "序号", "时间"], _rows(3), "xlsx")
+
+        workbook = load_workbook(io.BytesIO(b"".join([chunk async for chunk in stream.chunks])))
+
+        rows = list(workbook.active.values)
+        self.assertEqual(rows[0], ("汉字", "序号", "时间"))
+        self.assertEqual(rows[3], ("字2", 2, "2024-01-02 03:04:05"))
+
+    def test_rejects_unknown_format(self):
+        with self.assertRaises(ValueError):
+            build_export_stream("x", ["a"], _rows(0), "pdf")
+
+
+class TestZipStreamWriter(unittest.TestCase):
+
+    def test_entries_are_emitted_incrementally(self):
+        writer = ZipStreamWriter()
+        image_bytes = os.urandom(600 * 1024)
+        parts = []
+        with writer.open_entry("images/0001_a.png") as entry:
+            for offset in range(0, len(image_bytes), 64 * 1024):
+                entry.write(image_bytes[offset:offset + 64 * 1024])
+                if writer.should_flush():
+                    parts.append(writer.drain())
+        self.assertTrue(parts)
+        with writer.open_entry("data.csv") as entry:
+            entry.write("汉字\n永\n".encode("utf-8"))
+        parts.append(writer.close())
+
+        archive = zipfile.ZipFile(io.BytesIO(b"".join(parts)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.read("images/0001_a.png"), image_bytes)
+        self.assertEqual(archive.getinfo("images/0001_a.png").compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(archive.getinfo("data.csv").compress_type, zipfile.ZIP_DEFLATED)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import AsyncMock, MagicMock, patch
+
+os.environ.setdefault("MYSQL_HOST", "localhost")
+os.environ.setdefault("MYSQL_PORT", "3306")
+os.environ.setdefault("MYSQL_USER", "root")
+os.environ.setdefault("MYSQL_PASSWORD", "root")
+os.environ.setdefault("MYSQL_DB", "charwork")
+
+from app.services.hanzi_service import HanziService  # noqa: E402
+from app.services.stroke_service import SNAPSHOT_FILE_NAME, StrokeEngine, StrokeService  # noqa: E402
+from app.utils.hanzi_dictionary_parser import load_strokes_table  # noqa: E402
+
+
+STROKES_SAMPLE = (
+    "1\t一\t一\t1\t横\n"
+    "2\t丁\t一\t2\t横,竖钩\n"
+    "3\t十\t十\t2\t横,竖\n"
+    "4\t王\t王\t4\t横,横,竖,横\n"
+    "5\t中\t丨\t4\t竖,横折,横,竖\n"
+    "6|口|3\n"
+    "bad line\n"
+)
+
+
+class StrokeFileMixin:
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.strokes_path = os.path.join(self.temp_dir.name, "Strokes.txt")
+        with open(self.strokes_path, "w", encoding="utf-8") as f:
+            f.write(STROKES_SAMPLE)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def _load(self) -> StrokeService:
+        service = StrokeService()
+        with patch("app.services.stroke_service.settings") as mock_settings:
+            mock_settings.STROKES_FILE_PATH = self.strokes_path
+            mock_settings.TEMP_DIR = self.temp_dir.name
+            service.load()
+        return service
+
+
+class TestStrokeService(StrokeFileMixin, unittest.TestCase):
+
+    def test_lookup_and_indexes(self):
+        service = self._load()
+        self.assertEqual(service.get_stroke_count("王"), 4)
+        self.assertEqual(service.get_stroke_order("中"), "竖,横折,横,竖")
+        self.assertEqual(service.get_stroke_order("缺"), "")
+        self.assertEqual([r.character for r in service.search(stroke_count=2)], ["丁", "十"])
+        self.assertEqual([r.character for r in service.search(radical="一")], ["一", "丁"])
+
+    def test_pattern_requires_contiguous_order(self):
+        service = self._load()
+        self.assertEqual([r.character for r in service.search("横,竖")], ["十", "王", "中"])
+        self.assertEqual([r.character for r in service.search("横,竖,横")], ["王"])
+        self.assertEqual([r.character for r in service.search("竖,横,横")], [])
+        self.assertEqual([r.character for r in service.search("横", stroke_count=4, limit=1)], ["王"])
+        self.assertEqual([r.character for r in service.search("横,竖 竖,横折")], ["中"])
+        self.assertEqual(service.search("不存在"), [])
+
+    def test_candidate_characters(self):
+        self.assertIsNone(StrokeService().candidate_characters("横"))
+        service = self._load()
+        self.assertEqual(service.candidate_characters("横,竖", stroke_count=4), ["王", "中"])
+        self.assertEqual(service.candidate_characters("横", radical="十"), ["十"])
+        with patch("app.services.stroke_service.MAX_FILTER_CANDIDATES", 2):
+            self.assertIsNone(service.candidate_characters("横"))
+            self.assertEqual(service.candidate_characters("横", radical="一"), ["一", "丁"])
+
+    def test_match_pattern_compares_whole_stroke_names(self):
+        service = StrokeService()
+        self.assertTrue(service.match_pattern("竖,横折,横,竖", "横,竖 竖"))
+        self.assertFalse(service.match_pattern("横折", "横"))
+        self.assertFalse(service.match_pattern("横,竖", ""))
+
+    def test_legacy_format_keeps_count_placeholder_order(self):
+        service = self._load()
+        self.assertEqual(service.get_stroke_count("口"), 3)
+        self.assertEqual(service.get_stroke_order("口"), "***")
+
+    def test_snapshot_reused_until_source_changes(self):
+        self._load()
+        snapshot_path = os.path.join(self.temp_dir.name, SNAPSHOT_FILE_NAME)
+        self.assertTrue(os.path.exists(snapshot_path))
+
+        with patch.object(StrokeEngine, "compile", side_effect=AssertionError("should load snapshot")):
+            service = self._load()
+        self.assertEqual(service.get_stroke_count("中"), 4)
+
+        with open(self.strokes_path, "a", encoding="utf-8") as f:
+            f.write("6\t人\t人\t2\t撇,捺\n")
+        service = self._load()
+        self.assertEqual(service.get_stroke_order("人"), "撇,捺")
+
+    def test_parsed_table_cached_with_pinyin(self):
+        self._load()
+        with patch("app.utils.hanzi_dictionary_parser.parse_strokes_file", side_effect=AssertionError("cached")):
+            frame = load_strokes_table(self.strokes_path, cache_dir=self.temp_dir.name)
+        self.assertEqual(frame["character"].tolist(), ["一", "丁", "十", "王", "中", "口"])
+        self.assertEqual(frame.loc[frame["character"] == "中", "pinyin"].item(), "zhong")
+        legacy = frame.loc[frame["character"] == "口"].iloc[0]
+        self.assertEqual(legacy["stroke_count"], 3)
+        self.assertIsNone(legacy["stroke_pattern"])
+
+
+class TestStrokeSearchNarrowsQuery(StrokeFileMixin, unittest.IsolatedAsyncioTestCase):
+
+    def _service(self) -> HanziService:
+        db = AsyncMock()
+        result = MagicMock()
+        result.scalars.return_value.all.return_value = []
+        db.execute.return_value = result
+        with patch("app.services.hanzi_service.OCRService"):
+            return HanziService(db)
+
+    async def test_db_query_limited_to_engine_candidates(self):
+        service = self._service()
+        with patch("app.services.hanzi_service.stroke_service", self._load()):
+            await service.search_by_stroke_order("横,竖", current_user_id="u1", stroke_count=4)
+
+        statement = service.db.execute.await_args.args[0]
+        sql = str(statement.compile(compile_kwargs={"literal_binds": True}))
+        self.assertIn("hanzi.character IN ('王', '中')", sql)
+
+    async def test_no_candidates_skips_db(self):
+        service = self._service()
+        with patch("app.services.hanzi_service.stroke_service", self._load()):
+            result = await service.search_by_stroke_order("竖,横,横", current_user_id="u1")
+
+        service.db.execute.assert_not_awaited()
+        self.assertEqual(result.total, 0)
+
+    async def test_unloaded_engine_falls_back_to_db_filter(self):
+        service = self._service()
+        with patch("app.services.hanzi_service.stroke_service", StrokeService()):
+            await service.search_by_stroke_order("横,竖", current_user_id="u1")
+
+        sql = str(service.db.execute.await_args.args[0].compile(compile_kwargs={"literal_binds": True}))
+        self.assertNotIn("character IN", sql)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+os.environ.setdefault("MYSQL_HOST", "localhost")
+os.environ.setdefault("MYSQL_PORT", "3306")
+os.environ.setdefault("MYSQL_USER", "root")
+os.environ.setdefault("MYSQL_PASSWORD", "root")
+os.environ.setdefault("MYSQL_DB", "charwork")
+
+from app.services.student_service import StudentService  # noqa: E402
+
+
+class FakeTeachingClassRepo:
+    def __init__(self, members: dict[str, set[str]]):
+        self.classes = {class_id: SimpleNamespace(id=class_id, teacher_id="t1") for class_id in members}
+        self.members = members
+        self.deleted: list[tuple[str, str]] = []
+
+    async def get(self, teaching_class_id):
+        return self.classes.get(teaching_class_id)
+
+    async def get_all(self, teacher_id=None):
+        return list(self.classes.values())
+
+    async def list_student_ids_for_teacher(self, teacher_id):
+        return sorted({student_id for ids in self.members.values() for student_id in ids})
+
+    async def get_member(self, teaching_class_id, student_id):
+        if student_id in self.members[teaching_class_id]:
+            return SimpleNamespace(teaching_class_id=teaching_class_id, student_id=student_id)
+        return None
+
+    async def delete_member(self, member):
+        self.members[member.teaching_class_id].discard(member.student_id)
+        self.deleted.append((member.teaching_class_id, member.student_id))
+
+
+class TestRemoveStudentFromClass(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        # 学生只在 c2 中：c1、c3 未命中时不应写入成员变更事件
+        self.repo = FakeTeachingClassRepo({"c1": set(), "c2": {"s1"}, "c3": set()})
+        self.add_event = AsyncMock()
+        self.publish = AsyncMock()
+        for target, value in (
+            ("app.services.teaching_class_service.TeachingClassRepository", lambda db: self.repo),
+            ("app.services.teaching_class_service.add_permission_change_event", self.add_event),
+            ("app.services.teaching_class_service.publish_outbox_events", self.publish),
+        ):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.service = StudentService(AsyncMock())
+        self.service.teaching_class_repo = self.repo
+
+    async def test_event_added_only_for_class_that_held_the_student(self):
+        removed = await self.service.remove_student_from_class("s1", "t1")
+
+        self.assertTrue(removed)
+        self.assertEqual(self.repo.deleted, [("c2", "s1")])
+        self.add_event.assert_awaited_once()
+        self.assertEqual(self.add_event.await_args.args[3], "c2")
+        self.assertEqual(self.add_event.await_args.kwargs, {"student_ids": ["s1"]})
+        self.publish.delay.assert_called_once()
+
+    async def test_missing_member_adds_no_event(self):
+        from app.services.teaching_class_service import TeachingClassService
+
+        removed = await TeachingClassService(AsyncMock()).remove_member("c1", "s1", "t1")
+
+        self.assertFalse(removed)
+        self.assertEqual(self.repo.deleted, [])
+        self.add_event.assert_not_awaited()
+        self.publish.delay.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
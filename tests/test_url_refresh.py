@@ -0,0 +1,139 @@
+import os
+import threading
+import unittest
+from unittest.mock import patch
+
+from sqlalchemy import DateTime, String, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
+
+os.environ.setdefault("MYSQL_HOST", "localhost")
+os.environ.setdefault("MYSQL_PORT", "3306")
+os.environ.setdefault("MYSQL_USER", "root")
+os.environ.setdefault("MYSQL_PASSWORD", "root")
+os.environ.setdefault("MYSQL_DB", "charwork")
+
+from app.services.url_refresh_service import UrlRefreshService  # noqa: E402
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Photo(Base):
+    __tablename__ = "photo"
+
+    id: Mapped[str] = mapped_column(String(10), primary_key=True)
+    uri: Mapped[str | None] = mapped_column(String(100), nullable=True)
+    file_url: Mapped[str | None] = mapped_column(String(200), nullable=True)
+    url_refreshed_at: Mapped[DateTime | None] = mapped_column(DateTime, nullable=True)
+
+
+class FakeImagex:
+    def __init__(self):
+        self.calls: list[str] = []
+        self.lock = threading.Lock()
+
+    def get_resource_url(self, params):
+        with self.lock:
+            self.calls.append(params["URI"])
+        if params["URI"] == "broken":
+            raise ConnectionError("sign failed")
+        return {"Result": {"URL": f"https://x.veimagex.com/{params['URI']}~new.jpeg"}}
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hashes: dict[str, dict[str, str]] = {}
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def hset(self, key, field, value):
+        self.hashes.setdefault(key, {})[field] = value
+
+    def hdel(self, key, field):
+        self.hashes.get(key, {}).pop(field, None)
+
+
+class FakeClock:
+    """每次读取时间前进固定秒数，用来模拟耗时。"""
+
+    def __init__(self, step: float):
+        self.now = 0.0
+        self.step = step
+
+    def __call__(self) -> float:
+        self.now += self.step
+        return self.now
+
+
+class TestUrlRefreshService(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+        async with self.engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        self.session_factory = async_sessionmaker(self.engine, expire_on_commit=False)
+        async with self.session_factory() as db:
+            for index in range(7):
+                # 前六行两两共享 URI；最后一行签名失败
+                uri = "broken" if index == 6 else f"img/{index // 2}"
+                db.add(Photo(id=f"p{index}", uri=uri, file_url=f"https://x.veimagex.com/{uri}~old.jpeg"))
+            db.add(Photo(id="p7", uri="img/local", file_url="/media/local.png"))
+            db.add(Photo(id="p8", uri=None, file_url="https://x.veimagex.com/none~old.jpeg"))
+            await db.commit()
+
+        self.imagex = FakeImagex()
+        self.redis = FakeRedis()
+        for name, value in {
+            "URL_REFRESH_TABLE_CONFIG": {Photo: {"url_field": "file_url", "uri_field": "uri"}},
+            "settings.URL_REFRESH_BATCH_SIZE": 2,
+            "settings.URL_REFRESH_DOMAINS": "veimagex",
+            "settings.URL_REFRESH_CONCURRENCY": 4,
+            "settings.URL_REFRESH_TIME_BUDGET_SECONDS": 10,
+        }.items():
+            patcher = patch(f"app.services.url_refresh_service.{name}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        await self.engine.dispose()
+
+    def _service(self, clock) -> UrlRefreshService:
+        return UrlRefreshService(
+            self.imagex, session_factory=self.session_factory, redis_client=self.redis, clock=clock,
+        )
+
+    async def _urls(self) -> dict[str, str]:
+        async with self.session_factory() as db:
+            rows = (await db.execute(select(Photo.id, Photo.file_url))).all()
+        return dict(rows)
+
+    async def test_refresh_pages_by_id_and_signs_each_uri_once(self):
+        results = await self._service(lambda: 0.0)._refresh_all_async()
+
+        self.assertEqual(results, {"photo": 6})
+        self.assertEqual(sorted(self.imagex.calls), ["broken", "img/0", "img/1", "img/2"])
+        urls = await self._urls()
+        self.assertEqual(urls["p3"], "https://x.veimagex.com/img/1~new.jpeg")
+        self.assertTrue(urls["p6"].endswith("~old.jpeg"))
+        self.assertEqual(urls["p7"], "/media/local.png")
+        self.assertEqual(self.redis.hashes.get("url_refresh:checkpoint", {}), {})
+
+    async def test_time_budget_saves_checkpoint_and_next_run_resumes(self):
+        # 预算 10 秒，每次读时钟前进 5 秒：第一页写完后即超时
+        first = await self._service(FakeClock(5.0))._refresh_all_async()
+
+        self.assertEqual(first, {"photo": 2})
+        self.assertEqual(self.redis.hashes["url_refresh:checkpoint"], {"photo": "p1"})
+
+        second = await self._service(lambda: 0.0)._refresh_all_async()
+
+        self.assertEqual(second, {"photo": 4})
+        self.assertEqual(self.imagex.calls.count("img/0"), 1)
+        self.assertEqual(self.redis.hashes["url_refresh:checkpoint"], {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,112 @@
+import os
+import unittest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+os.environ.setdefault("MYSQL_HOST", "localhost")
+os.environ.setdefault("MYSQL_PORT", "3306")
+os.environ.setdefault("MYSQL_USER", "root")
+os.environ.setdefault("MYSQL_PASSWORD", "root")
+os.environ.setdefault("MYSQL_DB", "charwork")
+
+from app.services.url_signer import SignedUrlCache  # noqa: E402
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def set(self, key, value, ex=None):
+        self.redis.store[key] = value
+        self.redis.ttls[key] = ex
+
+    async def execute(self):
+        return []
+
+
+class FakeRedis:
+    def __init__(self):
+        self.store: dict[str, str] = {}
+        self.ttls: dict[str, int] = {}
+        self.mget_calls = 0
+
+    async def mget(self, keys):
+        self.mget_calls += 1
+        return [self.store.get(key) for key in keys]
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class TestSignedUrlCache(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.redis = FakeRedis()
+        self.signed: list[str] = []
+        self.now = 0.0
+        patcher = patch("app.services.url_signer.get_redis", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch("app.services.url_signer.settings.IMAGEX_TEMPLATE_ID", "tpl")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _sign(self, uri: str) -> str:
+        self.signed.append(uri)
+        if uri == "broken":
+            raise ValueError("图片URL生成失败")
+        return f"https://cdn/{uri}?sig={len(self.signed)}"
+
+    def _cache(self, **kwargs) -> SignedUrlCache:
+        return SignedUrlCache(sign=self._sign, ttl=100, max_entries=kwargs.get("max_entries", 10),
+                              clock=lambda: self.now)
+
+    async def test_page_is_signed_once_and_served_from_cache(self):
+        cache = self._cache()
+        items = [
+            SimpleNamespace(uri="a", image_path="old-a"),
+            SimpleNamespace(uri="a", image_path="old-a"),
+            SimpleNamespace(uri="broken", image_path="old-broken"),
+            SimpleNamespace(uri=None, image_path="/media/local.png"),
+        ]
+
+        first = await cache.resolve(items, "uri", "image_path")
+        second = await cache.resolve(items, "uri", "image_path")
+
+        self.assertEqual(first, ["https://cdn/a?sig=1", "https://cdn/a?sig=1", "old-broken", "/media/local.png"])
+        self.assertEqual(second[0], first[0])
+        self.assertEqual(self.signed, ["a", "broken", "broken"])
+        self.assertEqual(self.redis.store, {"imagex:signed:tpl:a": "https://cdn/a?sig=1"})
+        self.assertEqual(self.redis.ttls["imagex:signed:tpl:a"], 100)
+        self.assertEqual(self.redis.mget_calls, 2)
+
+    async def test_expired_local_entry_falls_back_to_redis_then_resigns(self):
+        cache = self._cache(max_entries=1)
+        await cache.sign_many(["a", "b"])
+        self.assertEqual(list(cache._local), ["imagex:signed:tpl:b"])
+
+        self.assertEqual(await cache.sign("a"), "https://cdn/a?sig=1")
+        self.assertEqual(self.signed, ["a", "b"])
+
+        self.now = 101
+        self.redis.store.clear()
+        self.assertEqual(await cache.sign("a"), "https://cdn/a?sig=3")
+
+    async def test_disabled_returns_stored_urls(self):
+        responses = [SimpleNamespace(uri="a", file_url="stored")]
+
+        with patch("app.services.url_signer.settings.URL_SIGN_ON_READ_ENABLED", False):
+            await self._cache().apply(responses)
+
+        self.assertEqual(responses[0].file_url, "stored")
+        self.assertEqual(self.signed, [])
+
+
+if __name__ == "__main__":
+    unittest.main()